@@ -0,0 +1,352 @@
+"""
+Pre-upgrade database backups: format, file names, restore commands and
+retention.
+
+The backup of a production database is made with pg_dump before an
+upgrade. Three formats are supported:
+    plain       <db>-<version>.sql (.sql.gz, .sql.zst or .sql.lz4 when
+                compressed), restored with psql
+    custom      <db>-<version>.dump, restored with pg_restore (-j N)
+    directory   <db>-<version>.dir/, dumped with pg_dump -j N, restored with
+                pg_restore -j N
+
+The name of the database prefixes the file name: the backups directory
+can be shared by several projects (HALF_ORM_BACKUPS_DIR), whose backups
+must neither collide nor be expired by the retention of another database.
+
+The directory format is the only one pg_dump can write with parallel jobs;
+with the custom format only the restore is parallel.
+
+The backup strategy chooses between this dump and a snapshot, the
+{db}_hop_snap_<version> database created by CREATE DATABASE ... TEMPLATE
+(nearly instant for small and medium databases, but it needs the CREATEDB
+privilege, the room for a copy of the database on the server, and all the
+connections to the database are terminated). With 'both' the dump is made
+from the snapshot. 'auto' takes a snapshot unless the server is known to
+lack the room for it (see choose_backup_strategy), a dump otherwise.
+
+After a successful upgrade the snapshots and the backups of the versions
+older than the `retention` most recent ones are expired, like the
+ho-prod-X.Y.Z branches (PROD_RETENTION by default): the backup files are
+removed and the snapshot databases dropped in the background (see
+drop_snapshots_in_background).
+
+The settings come from .hop/local_config (backup_strategy, backup_format,
+backup_jobs, backup_compress, backup_retention) and can be overridden on
+the command line.
+"""
+
+import re
+import shlex
+import shutil
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Tuple, Union
+
+from packaging.version import Version, InvalidVersion
+
+BACKUP_FORMATS = ('plain', 'custom', 'directory')
+BACKUP_STRATEGIES = ('auto', 'dump', 'snapshot', 'both')
+
+# Production versions kept: ho-prod-X.Y.Z branches, snapshots and backups
+PROD_RETENTION = 3
+
+# Free space required on the server for a snapshot, relative to the size of
+# the database
+SNAPSHOT_SPACE_MARGIN = 1.2
+
+_PG_DUMP_FORMAT = {'plain': 'p', 'custom': 'c', 'directory': 'd'}
+_SUFFIX = {'plain': '.sql', 'custom': '.dump', 'directory': '.dir'}
+
+# Compression methods of pg_dump --compress: suffix and decompressor of a
+# compressed plain backup
+_COMPRESSION = {
+    'gzip': ('.gz', 'gunzip -c'),
+    'zstd': ('.zst', 'zstd -dc'),
+    'lz4': ('.lz4', 'lz4 -dc'),
+}
+
+# <version><suffix> after the <db>- prefix written by backup_path()
+_BACKUP_NAME = re.compile(
+    r'^(?P<version>\d+\.\d+\.\d+[^/]*?)(?:\.sql(?:\.gz|\.zst|\.lz4)?|\.dump|\.dir)$')
+
+
+@dataclass
+class BackupOptions:
+    """
+    How the pre-upgrade backup is made and how many are kept.
+
+    Attributes:
+        strategy: 'auto', 'dump', 'snapshot' or 'both'
+        format: 'plain', 'custom' or 'directory'
+        jobs: Parallel jobs of pg_dump (directory format) and pg_restore
+        compress: pg_dump --compress value (e.g. '6', 'gzip:6', 'zstd:3'),
+            None for the pg_dump default
+        retention: Number of snapshots and backups kept after a successful
+            upgrade, None for PROD_RETENTION
+    """
+    strategy: str = 'auto'
+    format: str = 'plain'
+    jobs: int = 1
+    compress: Optional[str] = None
+    retention: Optional[int] = None
+
+    def __post_init__(self):
+        if self.strategy not in BACKUP_STRATEGIES:
+            raise ValueError(
+                f"Invalid backup strategy '{self.strategy}': "
+                f"expected one of {', '.join(BACKUP_STRATEGIES)}")
+        if self.format not in BACKUP_FORMATS:
+            raise ValueError(
+                f"Invalid backup format '{self.format}': expected one of {', '.join(BACKUP_FORMATS)}")
+        if self.jobs < 1:
+            raise ValueError(f"Invalid number of backup jobs: {self.jobs}")
+        if self.jobs > 1 and self.format != 'directory':
+            raise ValueError("Parallel backup (jobs > 1) requires the directory format")
+        if self.retention is not None and self.retention < 1:
+            raise ValueError(f"Invalid backup retention: {self.retention} (must keep at least 1)")
+        if self.compress is not None:
+            self.compress = str(self.compress)
+            compression_method(self.compress)
+
+    @classmethod
+    def from_local_config(cls, local_config, **overrides) -> 'BackupOptions':
+        """
+        Options of .hop/local_config, overridden by the non-None overrides.
+
+        Raises:
+            ValueError: If the resulting options are invalid
+        """
+        settings = {}
+        if local_config is not None:
+            settings = {
+                'strategy': local_config.backup_strategy,
+                'format': local_config.backup_format,
+                'jobs': local_config.backup_jobs,
+                'compress': local_config.backup_compress,
+                'retention': local_config.backup_retention,
+            }
+        settings.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(**{key: value for key, value in settings.items() if value is not None})
+
+
+def choose_backup_strategy(strategy: str, can_snapshot: bool, database_size: int,
+                           server_free: Optional[int]) -> str:
+    """
+    Resolve the backup strategy: 'dump', 'snapshot' or 'both'.
+
+    'auto' takes a snapshot when the role has the CREATEDB privilege,
+    unless the server is known to have less than SNAPSHOT_SPACE_MARGIN
+    times the size of the database free: a dump otherwise. The free space
+    of a remote or Docker server is unknown, the snapshot is kept (the
+    caller warns about it) rather than turning an instant backup into a
+    dump of the whole database.
+
+    Args:
+        strategy: One of BACKUP_STRATEGIES
+        can_snapshot: The role has the CREATEDB privilege
+        database_size: pg_database_size of the database
+        server_free: Free space of the data directory of the server,
+            None if unknown (remote or Docker server)
+
+    Raises:
+        ValueError: If a snapshot is required without the CREATEDB privilege
+    """
+    if strategy == 'auto':
+        room = server_free is None or server_free >= database_size * SNAPSHOT_SPACE_MARGIN
+        return 'snapshot' if can_snapshot and room else 'dump'
+    if strategy in ('snapshot', 'both') and not can_snapshot:
+        raise ValueError(
+            f"The '{strategy}' backup strategy requires the CREATEDB privilege")
+    return strategy
+
+
+def free_space(path: Union[str, Path, None]) -> Optional[int]:
+    """Free space of the filesystem of path in bytes, None if path is not local."""
+    if path is None:
+        return None
+    try:
+        return shutil.disk_usage(path).free
+    except OSError:
+        return None
+
+
+def format_size(size: int) -> str:
+    """Human readable size: 512 B, 1.5 GB."""
+    for unit in ('B', 'kB', 'MB', 'GB', 'TB'):
+        if size < 1024 or unit == 'TB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def compression_method(compress: Optional[str]) -> Optional[str]:
+    """
+    Compression method of a pg_dump --compress value, None if uncompressed.
+
+    Examples:
+        compression_method('6')       # → 'gzip'
+        compression_method('zstd:3')  # → 'zstd'
+        compression_method('gzip:0')  # → None
+
+    Raises:
+        ValueError: If the method is unknown
+    """
+    if compress is None:
+        return None
+    method, _, detail = str(compress).partition(':')
+    if method.isdigit():
+        return 'gzip' if int(method) > 0 else None
+    if method == 'none' or detail == '0':
+        return None
+    if method not in _COMPRESSION:
+        raise ValueError(
+            f"Invalid backup compression '{compress}': expected a level or one of "
+            f"{', '.join(_COMPRESSION)}[:detail]")
+    return method
+
+
+def backup_path(backups_dir: Union[str, Path], database_name: str, version: str,
+                options: BackupOptions) -> Path:
+    """Path of the backup of database_name at `version` (a directory for the directory format)."""
+    suffix = _SUFFIX[options.format]
+    method = compression_method(options.compress)
+    if options.format == 'plain' and method:
+        suffix += _COMPRESSION[method][0]
+    return Path(backups_dir) / f"{database_name}-{version}{suffix}"
+
+
+def pg_dump_args(database_name: str, path: Path, options: BackupOptions) -> List[str]:
+    """pg_dump arguments (after the connection options) writing the backup to path."""
+    args = ['-F', _PG_DUMP_FORMAT[options.format]]
+    if options.jobs > 1:
+        args += ['-j', str(options.jobs)]
+    if options.compress is not None:
+        args += ['-Z', options.compress]
+    return args + [database_name, '-f', str(path)]
+
+
+def restore_command(database_name: str, path: Union[str, Path], jobs: int = 1) -> str:
+    """Shell command restoring the backup at path into database_name (arguments quoted)."""
+    path = str(path)
+    if path.endswith('.sql'):
+        return shlex.join(['psql', '-d', database_name, '-f', path])
+    for compressed_suffix, decompress in _COMPRESSION.values():
+        if path.endswith(f'.sql{compressed_suffix}'):
+            return f"{shlex.join(decompress.split() + [path])} | {shlex.join(['psql', '-d', database_name])}"
+    jobs_option = ['-j', str(jobs)] if jobs > 1 else []
+    return shlex.join(['pg_restore', '--clean', '--if-exists', *jobs_option, '-d', database_name, path])
+
+
+def remove_backup(path: Union[str, Path]) -> None:
+    """Remove a backup file or directory."""
+    path = Path(path)
+    if path.is_dir():
+        shutil.rmtree(path)
+    elif path.exists():
+        path.unlink()
+
+
+def list_backups(backups_dir: Union[str, Path], database_name: str) -> List[Path]:
+    """Backups of database_name in backups_dir, oldest version first."""
+    backups_dir = Path(backups_dir)
+    if not backups_dir.is_dir():
+        return []
+    prefix = f"{database_name}-"
+    backups = []
+    for path in backups_dir.iterdir():
+        if not path.name.startswith(prefix):
+            continue
+        match = _BACKUP_NAME.match(path.name[len(prefix):])
+        if not match:
+            continue
+        try:
+            backups.append((Version(match.group('version')), path.name, path))
+        except InvalidVersion:
+            continue
+    return [path for _, _, path in sorted(backups)]
+
+
+def backup_size(path: Union[str, Path]) -> int:
+    """Size in bytes of a backup file or directory."""
+    path = Path(path)
+    if path.is_dir():
+        return sum(child.stat().st_size for child in path.rglob('*') if child.is_file())
+    return path.stat().st_size if path.exists() else 0
+
+
+def expired_snapshots(snapshots: Iterable[Tuple[Version, str]], retention: int,
+                      keep: Iterable[str] = ()) -> List[str]:
+    """
+    Snapshots beyond the `retention` most recent versions.
+
+    Args:
+        snapshots: (version, snapshot name) pairs
+        retention: Number of snapshots to keep
+        keep: Snapshots never expired (e.g. the one just made)
+
+    Returns:
+        Names of the expired snapshots, oldest first
+    """
+    keep = set(keep)
+    ordered = [name for _, name in sorted(snapshots)]
+    expired = ordered[:-retention] if len(ordered) > retention else []
+    return [name for name in expired if name not in keep]
+
+
+def drop_snapshots_in_background(drop: Callable[[str], None], snapshots: List[str],
+                                 report: Callable[[str], None] = print) -> threading.Thread:
+    """
+    Drop the snapshot databases in a thread.
+
+    The thread is not a daemon: the process waits for the drops before
+    exiting, but the caller goes on (the upgrade result is reported while
+    the files of the snapshots are removed by the server).
+
+    Args:
+        drop: Drops one snapshot (e.g. Database.drop_snapshot)
+        snapshots: Names of the snapshots to drop
+        report: Output of the progress messages
+
+    Returns:
+        The started thread
+    """
+    def run():
+        for name in snapshots:
+            try:
+                drop(name)
+                report(f"  ✓ Dropped expired snapshot {name}")
+            except Exception as e:
+                report(f"  ⚠ Failed to drop snapshot {name}: {e}")
+
+    thread = threading.Thread(target=run, name='hop-snapshot-retention')
+    thread.start()
+    return thread
+
+
+def prune_backups(backups_dir: Union[str, Path], database_name: str, retention: int,
+                  keep: Iterable[Union[str, Path]] = ()) -> List[Path]:
+    """
+    Remove the oldest backups of database_name, keeping the `retention` most recent ones.
+
+    The backups of the other databases sharing backups_dir are left alone.
+
+    Args:
+        backups_dir: Directory of the backups
+        database_name: Database whose backups are pruned
+        retention: Number of backups to keep
+        keep: Backups never removed (e.g. the one just made)
+
+    Returns:
+        The removed backups
+    """
+    keep = {Path(path).resolve() for path in keep}
+    backups = list_backups(backups_dir, database_name)
+    expired = backups[:-retention] if len(backups) > retention else []
+    removed = []
+    for path in expired:
+        if path.resolve() in keep:
+            continue
+        remove_backup(path)
+        removed.append(path)
+    return removed
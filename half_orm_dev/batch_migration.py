@@ -0,0 +1,238 @@
+"""
+Batched data migrations of large tables for the Python patch files.
+
+A single UPDATE of a large table holds its locks and bloats the WAL until
+it ends, and an interrupted upgrade has to start it over. BatchedMigration
+runs the SQL on one primary key range at a time, each batch being
+committed with a checkpoint in half_orm_meta.hop_batch_checkpoint:
+
+    from half_orm_dev.batch_migration import BatchedMigration
+
+    def run(model):
+        BatchedMigration(
+            '456-users-active', 'public.users',
+            "UPDATE public.users SET active = true "
+            "WHERE id BETWEEN %(first)s AND %(last)s",
+            batch_size=5000).run(model)
+
+A migration that was interrupted resumes after the last committed batch,
+a completed one is skipped. Between two batches it waits while the replay
+lag of a standby (pg_stat_replication) exceeds max_replication_lag.
+
+The migration commits: it must run in autocommit mode, which is the case
+of the run(model) Python patch files (executed outside the transaction of
+the release, see DatabaseTransaction.suspended) and bootstrap files.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Union
+
+import click
+from psycopg import sql as pg_sql
+from psycopg.pq import TransactionStatus
+
+# Progress of the batched migrations (one row per migration) is kept in
+# half_orm_meta.hop_batch_checkpoint, declared in half_orm_meta.sql and in
+# the meta patch (see database.META_PATCH_DIR). A database without it runs
+# the migration without checkpoints.
+CHECKPOINT_TABLE_QUERY = """
+SELECT to_regclass('half_orm_meta.hop_batch_checkpoint') IS NOT NULL AS exists
+"""
+
+CHECKPOINT_QUERY = """
+SELECT last_key, rows, batches, done
+FROM half_orm_meta.hop_batch_checkpoint WHERE name = %(name)s
+"""
+
+SAVE_CHECKPOINT_QUERY = """
+INSERT INTO half_orm_meta.hop_batch_checkpoint
+    (name, relation, last_key, rows, batches, done)
+VALUES (%(name)s, %(relation)s, %(last_key)s, %(rows)s, %(batches)s, %(done)s)
+ON CONFLICT (name) DO UPDATE SET
+    last_key = EXCLUDED.last_key, rows = EXCLUDED.rows, batches = EXCLUDED.batches,
+    done = EXCLUDED.done, updated_at = now()
+"""
+
+# Single-column primary key of a relation and its type
+PRIMARY_KEY_QUERY = """
+SELECT a.attname AS key, format_type(a.atttypid, a.atttypmod) AS type
+FROM pg_index i
+JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+WHERE i.indrelid = %(relation)s::regclass AND i.indisprimary
+"""
+
+KEY_TYPE_QUERY = """
+SELECT a.attname AS key, format_type(a.atttypid, a.atttypmod) AS type
+FROM pg_attribute a
+WHERE a.attrelid = %(relation)s::regclass AND a.attname = %(key)s AND NOT a.attisdropped
+"""
+
+# Largest replay lag of the standbys, in seconds (NULL when they are idle
+# or when the role cannot read the lag: no throttling)
+REPLICATION_LAG_QUERY = """
+SELECT coalesce(max(extract(epoch FROM replay_lag)), 0)::float8 AS lag
+FROM pg_stat_replication
+"""
+
+
+class BatchMigrationError(Exception):
+    """Raised when a batched migration cannot run."""
+    pass
+
+
+@dataclass
+class BatchedMigration:
+    """
+    SQL applied to a relation by primary key ranges, one transaction per range.
+
+    Attributes:
+        name: Checkpoint name, unique to the migration (e.g. "456-users-active")
+        relation: Relation iterated ("schema.table")
+        sql: SQL of a batch, with the %(first)s and %(last)s placeholders
+            (key range, bounds included), or a callable (model, first, last)
+            returning the number of rows processed
+        batch_size: Number of keys per batch
+        key: Column iterated (default: the single-column primary key)
+        max_replication_lag: Wait between two batches while a standby lags
+            more than this, in seconds (None: no throttling)
+        lag_poll: Delay between two replication lag checks, in seconds
+        pause: Delay between two batches, in seconds
+    """
+    name: str
+    relation: str
+    sql: Union[str, Callable[..., Optional[int]]]
+    batch_size: int = 10000
+    key: Optional[str] = None
+    max_replication_lag: Optional[float] = 10.0
+    lag_poll: float = 5.0
+    pause: float = 0.0
+
+    def __post_init__(self):
+        if self.batch_size < 1:
+            raise ValueError(f"Invalid batch size: {self.batch_size}")
+        if self.max_replication_lag is not None and self.max_replication_lag <= 0:
+            raise ValueError(f"Invalid maximum replication lag: {self.max_replication_lag}")
+
+    def run(self, model, sleep: Callable[[float], None] = time.sleep) -> int:
+        """
+        Run the remaining batches of the migration.
+
+        Args:
+            model: halfORM Model (its connection is used, in autocommit mode)
+            sleep: Wait function (for tests)
+
+        Returns:
+            Number of rows processed by the migration since its first batch
+
+        Raises:
+            BatchMigrationError: If the connection is in a transaction or the
+                relation has no usable key
+        """
+        connection = model._connection
+        if not connection.autocommit or connection.info.transaction_status != TransactionStatus.IDLE:
+            raise BatchMigrationError(
+                f"{self.name}: a batched migration commits each batch and must run "
+                f"outside a transaction")
+        with connection.cursor() as cursor:
+            checkpoints = _fetch_one(cursor, CHECKPOINT_TABLE_QUERY)['exists']
+            key, key_type = self._key(cursor)
+            checkpoint = (_fetch_one(cursor, CHECKPOINT_QUERY, {'name': self.name})
+                          if checkpoints else None)
+        if not checkpoints:
+            click.echo(f"    ⚠️  {self.name}: half_orm_meta.hop_batch_checkpoint does not "
+                       f"exist, an interrupted migration will start over")
+        state = {'name': self.name, 'relation': self.relation, 'last_key': None,
+                 'rows': 0, 'batches': 0, 'done': False}
+        if checkpoint:
+            state.update(checkpoint)
+            if state['done']:
+                click.echo(f"    ↳ {self.name}: already done ({state['rows']} rows)")
+                return state['rows']
+            if state['last_key'] is not None:
+                click.echo(f"    ↳ {self.name}: resuming after {key} = {state['last_key']}")
+
+        bounds = _bounds_query(self.relation, key, key_type)
+        while True:
+            if state['batches'] and self.pause:
+                sleep(self.pause)
+            self._throttle(connection, sleep)
+            with connection.transaction(), connection.cursor() as cursor:
+                batch = _fetch_one(cursor, bounds['first' if state['last_key'] is None else 'next'],
+                                   {'after': state['last_key'], 'size': self.batch_size})
+                if batch is None or batch['last'] is None:
+                    state['done'] = True
+                    if checkpoints:
+                        cursor.execute(SAVE_CHECKPOINT_QUERY, state)
+                    break
+                rows = self._execute(model, cursor, batch['first'], batch['last'])
+                state['last_key'] = batch['last']
+                state['rows'] += rows or 0
+                state['batches'] += 1
+                if checkpoints:
+                    cursor.execute(SAVE_CHECKPOINT_QUERY, state)
+            click.echo(f"    ↳ {self.name}: batch {state['batches']}, {key} ≤ {batch['last']}, "
+                       f"{rows if rows is not None else '?'} rows ({state['rows']} total)")
+        click.echo(f"    ↳ {self.name}: done, {state['rows']} rows in {state['batches']} batches")
+        return state['rows']
+
+    def _key(self, cursor):
+        if self.key is None:
+            cursor.execute(PRIMARY_KEY_QUERY, {'relation': self.relation})
+            rows = cursor.fetchall()
+            if len(rows) != 1:
+                raise BatchMigrationError(
+                    f"{self.name}: {self.relation} has no single-column primary key, "
+                    f"give the column to iterate with key=")
+        else:
+            cursor.execute(KEY_TYPE_QUERY, {'relation': self.relation, 'key': self.key})
+            rows = cursor.fetchall()
+            if not rows:
+                raise BatchMigrationError(f"{self.name}: {self.relation} has no column {self.key}")
+        row = _as_dict(cursor, rows[0])
+        return row['key'], row['type']
+
+    def _execute(self, model, cursor, first, last) -> Optional[int]:
+        if callable(self.sql):
+            return self.sql(model, first, last)
+        cursor.execute(self.sql, {'first': first, 'last': last})
+        return cursor.rowcount if cursor.rowcount >= 0 else None
+
+    def _throttle(self, connection, sleep):
+        if self.max_replication_lag is None:
+            return
+        while True:
+            with connection.cursor() as cursor:
+                lag = _fetch_one(cursor, REPLICATION_LAG_QUERY)['lag']
+            if lag <= self.max_replication_lag:
+                return
+            click.echo(f"    ⏳ {self.name}: replication lag {lag:.1f}s > "
+                       f"{self.max_replication_lag:g}s, waiting {self.lag_poll:g}s")
+            sleep(self.lag_poll)
+
+
+def _bounds_query(relation: str, key: str, key_type: str) -> Dict[str, pg_sql.Composed]:
+    """First and last keys of the first batch and of the batch after %(after)s."""
+    template = (
+        "SELECT min({key})::text AS first, max({key})::text AS last "
+        "FROM (SELECT {key} FROM {relation}{where} ORDER BY {key} LIMIT %(size)s) batch")
+    names = {'key': pg_sql.Identifier(key), 'relation': pg_sql.SQL(relation)}
+    return {
+        'first': pg_sql.SQL(template).format(where=pg_sql.SQL(''), **names),
+        'next': pg_sql.SQL(template).format(
+            where=pg_sql.SQL(" WHERE {key} > %(after)s::{type}").format(
+                key=names['key'], type=pg_sql.SQL(key_type)),
+            **names),
+    }
+
+
+def _as_dict(cursor, row) -> Dict:
+    if isinstance(row, dict):
+        return row
+    return dict(zip([column.name for column in cursor.description], row))
+
+
+def _fetch_one(cursor, query, params=None) -> Optional[Dict]:
+    cursor.execute(query, params)
+    row = cursor.fetchone()
+    return _as_dict(cursor, row) if row is not None else None
@@ -0,0 +1,82 @@
+"""
+Local cache of data derived from the repository files (.hop/cache/).
+
+Indexes are JSON files validated against the stat of the files they were
+built from, so they never need to be invalidated explicitly. The cache
+directory holds a .gitignore ignoring everything: `git add .hop/` never
+commits it, whatever the .gitignore of the repository. It can be deleted
+at any time.
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Union
+
+from half_orm_dev.utils import make_ignored_dir
+
+CACHE_DIR = 'cache'
+
+# Bump when the layout of the cached data changes
+FORMAT = 1
+
+
+def cache_dir(base_dir: Union[str, Path]) -> Path:
+    """Path of the cache directory of the repository at base_dir."""
+    return Path(base_dir) / '.hop' / CACHE_DIR
+
+
+def file_key(path: Union[str, Path]) -> Optional[List[int]]:
+    """
+    [inode, mtime (ns), size] of a file or directory, None if missing.
+
+    A cached entry built from path is valid while its key is unchanged.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_ino, stat.st_mtime_ns, stat.st_size]
+
+
+def load(base_dir: Union[str, Path], name: str) -> dict:
+    """
+    Return the cached data `name`, {} if missing, unreadable or outdated.
+    """
+    try:
+        with open(cache_dir(base_dir) / name, encoding='utf-8') as file:
+            data = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get('format') != FORMAT:
+        return {}
+    return data.get('data', {})
+
+
+def save(base_dir: Union[str, Path], name: str, data: dict) -> bool:
+    """
+    Atomically write the cached data `name`.
+
+    Nothing is written outside a hop repository (no .hop/ directory).
+    Failures are ignored: the cache is an optimization.
+
+    Returns:
+        bool: True if the data was written
+    """
+    hop_dir = Path(base_dir) / '.hop'
+    if not hop_dir.is_dir():
+        return False
+    try:
+        directory = make_ignored_dir(cache_dir(base_dir))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{name}.')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump({'format': FORMAT, 'data': data}, file, separators=(',', ':'))
+            os.replace(tmp_path, directory / name)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError:
+        return False
+    return True
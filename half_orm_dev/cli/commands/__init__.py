@@ -3,62 +3,72 @@ Commands module for half-orm-dev CLI
 
 Provides all individual command implementations.
 REFACTORED in v0.16.0 - Git-centric patch workflow
-"""
 
-# ✅ New Git-centric commands (stubs for now)
-from .init import init
-from .clone import clone
-from .patch import patch
-from .release import release
-from .upgrade import upgrade
-from .check import check
-from .set_git_origin import set_git_origin
-from .migrate import migrate
-from .revert_migration import revert_migration
-from .rollback import rollback
-from .recover import recover
-from .todo import apply_release
+Command modules are not imported here: they pull in repo, patch_manager,
+release_manager, hgit (GitPython)... The CLI group imports the module of
+a command only when the command is invoked (see load_command()).
+"""
 
-# ♻️ Adapted existing commands
-from .todo import sync_package    # Unchanged
-from .todo import restore      # Adapted for new architecture
+import importlib
 
 # Registry of all available commands - Git-centric architecture
+# command name -> (module, attribute, short help)
+# The short help is displayed by `--help` and shell completion without
+# importing the module; it must match the first line of the command's
+# docstring.
 ALL_COMMANDS = {
     # Core workflow
-    'init': init,
-    'clone': clone,
-    'patch': patch,
-    'release': release,
-    'upgrade': upgrade,          # Adapted for production
-    'check': check,            # Project health check and updates
-    'set-git-origin': set_git_origin,  # Update git remote origin URL
-    'migrate': migrate,        # Repository migration after upgrade
-    'revert-migration': revert_migration,  # Revert last migration
+    'init': ('init', 'init',
+             'Initialize a new half_orm_dev project with database and code structure.'),
+    'clone': ('clone', 'clone',
+              'Clone existing half_orm_dev project and setup local database.'),
+    'patch': ('patch', 'patch',
+              'Patch development and management commands.'),
+    'release': ('release', 'release',
+                'Release management commands.'),
+    'upgrade': ('upgrade', 'upgrade',            # Adapted for production
+                'Apply releases sequentially to production database.'),
+    'check': ('check', 'check',                  # Project health check and updates
+              'Verify and update project configuration.'),
+    'set-git-origin': ('set_git_origin', 'set_git_origin',  # Update git remote origin URL
+                       'Update the git remote origin URL.'),
+    'migrate': ('migrate', 'migrate',            # Repository migration after upgrade
+                'Apply repository migrations after half_orm_dev upgrade.'),
+    'revert-migration': ('revert_migration', 'revert_migration',  # Revert last migration
+                         "Revert the last migration applied by 'half_orm dev migrate'."),
+    'serve': ('serve', 'serve',                  # Optional local daemon
+              'Keep the repository loaded in a local daemon to speed up commands.'),
     # 🚧 (stubs)
-    'apply_release': apply_release,
+    'apply_release': ('todo', 'apply_release',
+                      'Placeholder for unimplemented Git-centric commands.'),
 
     # 🚧 Emergency workflow (stubs)
-    'rollback': rollback,
-    'recover': recover,
+    'rollback': ('rollback', 'rollback',
+                 'Rollback production to a previous version.'),
+    'recover': ('recover', 'recover',
+                'Complete or clean up a sync interrupted by a crash or network failure.'),
 
     # ♻️ Adapted commands
-    'sync-package': sync_package, # Unchanged
-    'restore': restore,          # Adapted
+    'sync-package': ('todo', 'sync_package',     # Unchanged
+                     'Placeholder for unimplemented Git-centric commands.'),
+    'restore': ('todo', 'restore',               # Adapted
+                'Placeholder for unimplemented Git-centric commands.'),
 }
 
+
+def load_command(name):
+    """
+    Import the module of the command `name` and return the click command.
+
+    Raises:
+        KeyError: If `name` is not in ALL_COMMANDS
+    """
+    module_name, attribute, _ = ALL_COMMANDS[name]
+    module = importlib.import_module(f'{__name__}.{module_name}')
+    return getattr(module, attribute)
+
+
 __all__ = [
-    # New commands
-    'init',
-    'clone',
-    'patch',
-    'release',
-    'upgrade',
-    'check',
-    'migrate',
-    'rollback',
-    'recover',
-    # Adapted commands
-    'sync_package',
-    'ALL_COMMANDS'
-]
\ No newline at end of file
+    'ALL_COMMANDS',
+    'load_command',
+]
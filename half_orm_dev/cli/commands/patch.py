@@ -6,6 +6,7 @@ Groups all patch-related commands under 'half_orm dev patch':
 - patch apply: Apply current patch files to database
 - patch merge: Add patch to stage release with validation
 - patch detach: Detach a candidate patch from its release
+- patch where: Show the releases containing a patch
 
 Replaces legacy commands:
 - create-patch → patch create
@@ -14,12 +15,15 @@ Replaces legacy commands:
 """
 
 import click
+import sys
 from pathlib import Path
 from typing import Optional
 
 from half_orm_dev.repo import Repo
 from half_orm_dev.patch_manager import PatchManagerError
 from half_orm_dev.release_manager import ReleaseManagerError
+from half_orm_dev.release_history import ReleaseHistory
+from half_orm_dev.file_executor import TimingReport
 from half_orm import utils
 
 
@@ -111,11 +115,22 @@ def patch_create(patch_id: str, description: Optional[str] = None, before: Optio
 @patch.command('apply')
 @click.option(
     '--from-dump',
-    type=click.Path(exists=True, dir_okay=False, resolve_path=True),
-    help='Restore from pg_dump SQL file instead of schema.sql. '
-         'Useful for testing with production data.'
+    type=click.Path(exists=True, resolve_path=True),
+    help='Restore from a pg_dump file or directory (SQL, custom, directory or tar '
+         'format) instead of schema.sql. Useful for testing with production data.'
 )
-def patch_apply(from_dump: Optional[str]) -> None:
+@click.option(
+    '--jobs', '-j',
+    type=click.IntRange(min=1),
+    default=None,
+    help='Parallel pg_restore jobs for a custom or directory dump (default: CPUs, at most 8)'
+)
+@click.option(
+    '--no-dump-cache',
+    is_flag=True,
+    help='Restore the dump again instead of cloning its cached template database'
+)
+def patch_apply(from_dump: Optional[str], jobs: Optional[int], no_dump_cache: bool) -> None:
     """
     Apply current patch files to database.
 
@@ -149,6 +164,10 @@ def patch_apply(from_dump: Optional[str]) -> None:
         # Using production dump for realistic data:
         $ half_orm dev patch apply --from-dump /path/to/prod_dump.sql
 
+        # Custom format dump restored with 8 parallel jobs; the next applies
+        # clone the template database caching it (CREATEDB privilege)
+        $ half_orm dev patch apply --from-dump /path/to/prod.dump -j 8
+
     \b
     Output:
         ✓ Current branch: ho-patch/456-user-auth
@@ -173,6 +192,9 @@ def patch_apply(from_dump: Optional[str]) -> None:
     Raises:
         click.ClickException: If branch validation fails or application errors occur
     """
+    if (jobs is not None or no_dump_cache) and not from_dump:
+        raise click.UsageError("--jobs and --no-dump-cache require --from-dump")
+
     try:
         # Get repository instance
         repo = Repo()
@@ -200,12 +222,19 @@ def patch_apply(from_dump: Optional[str]) -> None:
         # Delegate to PatchManager
         click.echo("Applying patch...")
         dump_path = Path(from_dump) if from_dump else None
-        result = repo.patch_manager.apply_patch_complete_workflow(patch_id, from_dump=dump_path)
+        result = repo.patch_manager.apply_patch_complete_workflow(
+            patch_id, from_dump=dump_path, dump_jobs=jobs, dump_cache=not no_dump_cache)
 
         # Display success
         click.echo(f"✓ {utils.Color.green('Patch applied successfully!')}")
         if result.get('used_dump'):
-            click.echo(f"✓ Database restored from dump file")
+            restored = result.get('dump_restore') or {}
+            if restored.get('cache_hit'):
+                click.echo(f"✓ Database restored from dump file (cached in {restored['cache']})")
+            elif restored.get('cache'):
+                click.echo(f"✓ Database restored from dump file, now cached in {restored['cache']}")
+            else:
+                click.echo(f"✓ Database restored from dump file")
         else:
             click.echo(f"✓ Database restored from model/schema.sql")
         click.echo()
@@ -221,6 +250,15 @@ def patch_apply(from_dump: Optional[str]) -> None:
             click.echo("ℹ No patch files to apply (empty patch)")
             click.echo()
 
+        # Display the slowest statements (full report in .hop/timings/)
+        if result.get('slowest_statements'):
+            click.echo("⏱ Slowest statements:")
+            for line in TimingReport.format_statements(result['slowest_statements']):
+                click.echo(f"  {line}")
+            if result.get('timing_report'):
+                click.echo(f"  Timing report: {result['timing_report']}")
+            click.echo()
+
         # Display generated files
         if result['generated_files']:
             click.echo(f"✓ Generated {len(result['generated_files'])} Python file(s):")
@@ -450,3 +488,32 @@ def patch_detach(patch_id: Optional[str], force: bool) -> None:
     except PatchManagerError as e:
         click.echo(utils.Color.red(f"Error: {e}"), err=True)
         raise click.Abort()
+
+
+@patch.command('where')
+@click.argument('patch_id', type=str)
+def patch_where(patch_id: str) -> None:
+    """
+    Show the releases containing a patch.
+
+    Lists the release candidates, production and hotfix releases, and the
+    releases in development that contain PATCH_ID, with the merge commit
+    of the patch.
+
+    \b
+    EXAMPLES:
+        half_orm dev patch where 42-login
+    """
+    if patch_id.startswith('ho-patch/'):
+        patch_id = patch_id[len('ho-patch/'):]
+
+    found = ReleaseHistory(Repo()).where(patch_id)
+    if not found:
+        click.echo(utils.Color.red(f"Patch '{patch_id}' is in no release."), err=True)
+        sys.exit(1)
+
+    click.echo(utils.Color.bold(patch_id))
+    for release_info in found:
+        merge = release_info['merge_commit'] or release_info['status']
+        tag = f"  {release_info['tag']}" if release_info['tag'] else ''
+        click.echo(f"  {release_info['release']}  {release_info['kind']}  {merge}{tag}")
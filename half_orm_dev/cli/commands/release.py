@@ -5,10 +5,12 @@ Groups all release-related commands under 'half_orm dev release':
 - release create: Prepare next release stage file
 - release promote: Promote stage to rc or production
 - release attach-patch: Reattach orphaned patch to a release
+- release log: Show the release history
 """
 
 import click
 import sys
+import time
 from typing import Optional
 
 from half_orm_dev.repo import Repo
@@ -18,6 +20,7 @@ from half_orm_dev.release_manager import (
     ReleaseVersionError
 )
 from half_orm_dev.patch_manager import PatchManagerError
+from half_orm_dev.release_history import ReleaseHistory, ReleaseHistoryError
 from half_orm import utils
 
 
@@ -552,3 +555,51 @@ def release_attach_patch(patch_id: str, force: bool) -> None:
     except PatchManagerError as e:
         click.echo(f"❌ {utils.Color.red(str(e))}", err=True)
         sys.exit(1)
+
+
+def _format_date(timestamp: Optional[int]) -> str:
+    """YYYY-MM-DD of a Unix timestamp, '-' if unknown."""
+    if timestamp is None:
+        return '-'
+    return time.strftime('%Y-%m-%d', time.localtime(timestamp))
+
+
+@release.command('log')
+@click.argument('from_version', required=False)
+@click.argument('to_version', required=False)
+@click.option('--since', type=click.FloatRange(min=0), metavar='DAYS',
+              help='Only show the patches merged in the last DAYS days.')
+def release_log(from_version: Optional[str], to_version: Optional[str],
+                since: Optional[float]) -> None:
+    """
+    Show the releases and the patches they contain.
+
+    Lists the releases from FROM_VERSION to TO_VERSION (X.Y.Z, inclusive),
+    all of them by default, with their tag date and, for each patch, its
+    merge commit and merge date.
+
+    \b
+    EXAMPLES:
+        half_orm dev release log
+        half_orm dev release log 0.2.0 0.4.0
+        half_orm dev release log --since 30
+    """
+    try:
+        history = ReleaseHistory(Repo())
+        releases = history.log(from_version, to_version, since_days=since)
+    except ReleaseHistoryError as e:
+        raise click.BadParameter(str(e))
+
+    if not releases:
+        click.echo("No release found.")
+        return
+
+    for release_info in releases:
+        click.echo(
+            f"{utils.Color.bold(release_info['release'])}  {release_info['kind']}"
+            f"  {_format_date(release_info['date'])}"
+            + (f"  {release_info['tag']}" if release_info['tag'] else '')
+        )
+        for patch_info in release_info['patches']:
+            merge = patch_info['merge_commit'] or patch_info['status']
+            click.echo(f"  {patch_info['patch_id']}  {merge}  {_format_date(patch_info['date'])}")
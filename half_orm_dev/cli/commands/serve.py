@@ -0,0 +1,56 @@
+"""
+serve command - Run the local daemon of the repository
+"""
+
+import sys
+import click
+from half_orm import utils
+from half_orm_dev import daemon
+from half_orm_dev.utils import find_base_dir
+
+
+@click.command()
+@click.option('--idle-timeout', type=float, default=None, metavar='SECONDS',
+              help='Stop after SECONDS without request (default: never).')
+@click.option('--stop', 'stop_daemon', is_flag=True,
+              help='Stop the daemon serving the repository.')
+def serve(idle_timeout, stop_daemon):
+    """Keep the repository loaded in a local daemon to speed up commands.
+
+    Listens on .hop/hop.sock and holds the repository, the database model
+    and git in memory. The half_orm dev commands run in the repository are
+    executed by the daemon, which reloads the repository when HEAD or the
+    files of .hop/ change.
+
+    Commands run interactively (stdin is a terminal), with a pipe still
+    open as stdin, with HOP_NO_DAEMON set or with HALFORM_CONF_DIR,
+    HALF_ORM_BACKUPS_DIR or PG* variables differing from the daemon's are
+    not forwarded. POSIX systems only. A file
+    redirected to the stdin of a forwarded command answers its prompts,
+    then they get end of file.
+
+    \b
+    Examples:
+        half_orm dev serve &
+        half_orm dev serve --idle-timeout 3600 &
+        half_orm dev serve --stop
+    """
+    base_dir = find_base_dir()
+
+    if stop_daemon:
+        if not daemon.stop(base_dir):
+            click.echo("No daemon is serving this repository.", err=True)
+            sys.exit(1)
+        click.echo("✓ Daemon stopped")
+        return
+
+    server = daemon.HopDaemon(base_dir, idle_timeout=idle_timeout, log=sys.stdout)
+    click.echo(f"Serving {utils.Color.bold(base_dir)} on {server.socket_path}")
+    try:
+        server.serve_forever()
+    except daemon.DaemonError as e:
+        click.echo(utils.Color.red(f"❌ {e}"), err=True)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        pass
+    click.echo("✓ Daemon stopped")
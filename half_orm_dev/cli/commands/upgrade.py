@@ -7,7 +7,13 @@ to existing production database without data destruction.
 
 import click
 from half_orm_dev.repo import Repo
-from half_orm_dev.release_manager import ReleaseManagerError
+from half_orm_dev.release_manager import ReleaseManagerError, TRANSACTION_SCOPES
+from half_orm_dev.backup import (
+    BACKUP_FORMATS, BACKUP_STRATEGIES, BackupOptions, restore_command, format_size
+)
+from half_orm_dev import upgrade_plan, duration_estimate
+from half_orm_dev.lock_retry import LockRetryPolicy
+from half_orm_dev.file_executor import TimingReport
 from half_orm import utils
 
 
@@ -33,18 +39,112 @@ from half_orm import utils
     is_flag=True,
     help='Skip backup creation (DANGEROUS - for testing only)'
 )
+@click.option(
+    '--backup-strategy',
+    type=click.Choice(BACKUP_STRATEGIES),
+    default=None,
+    help='Snapshot (CREATE DATABASE ... TEMPLATE), pg_dump or both '
+         '(default: backup_strategy of .hop/local_config, or auto)'
+)
+@click.option(
+    '--backup-format',
+    type=click.Choice(BACKUP_FORMATS),
+    default=None,
+    help='pg_dump backup format (default: backup_format of .hop/local_config, or plain)'
+)
+@click.option(
+    '--jobs', '-j',
+    type=click.IntRange(min=1),
+    default=None,
+    help='Parallel pg_dump/pg_restore jobs (requires --backup-format=directory)'
+)
+@click.option(
+    '--compress',
+    type=str,
+    default=None,
+    help='pg_dump compression (e.g. 6, gzip:6, zstd:3)'
+)
+@click.option(
+    '--keep-backups',
+    type=click.IntRange(min=1),
+    default=None,
+    help='Drop the oldest snapshots and backups after a successful upgrade, keeping N (default: 3)'
+)
+@click.option(
+    '--transaction',
+    'transaction_scope',
+    type=click.Choice(TRANSACTION_SCOPES),
+    default='release',
+    show_default=True,
+    help='Apply each release in one transaction, the whole upgrade, or none'
+)
+@click.option(
+    '--lock-timeout',
+    type=click.FloatRange(min=0, min_open=True),
+    default=None,
+    help='Give up waiting for a lock after SECONDS, report its holders and retry'
+)
+@click.option(
+    '--lock-retries',
+    type=click.IntRange(min=0),
+    default=None,
+    help='Retries after a lock timeout (default: 5, requires --lock-timeout)'
+)
+@click.option(
+    '--plan',
+    'compile_plan',
+    is_flag=True,
+    help='Compile the upgrade into a checksummed plan in .hop/plans/ (no changes)'
+)
+@click.option(
+    '--execute-plan',
+    'plan_file',
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help='Execute a plan compiled with --plan (no fetch)'
+)
+@click.option(
+    '--timings-from',
+    type=click.Path(exists=True),
+    multiple=True,
+    help='With --dry-run: timing reports (file or directory) to estimate the duration from, preferred to .hop/timings/'
+)
 @click.option(
     '--yes', '-y',
     is_flag=True,
     help='Skip confirmation prompt'
 )
-def upgrade(to_release, dry_run, force, skip_backup, yes):
+def upgrade(to_release, dry_run, force, skip_backup, backup_strategy, backup_format, jobs, compress,
+            keep_backups, transaction_scope, lock_timeout, lock_retries, compile_plan,
+            plan_file, timings_from, yes):
     """
     Apply releases sequentially to production database.
 
     Fetches available releases, lets you choose a target version interactively,
     then upgrades the production database incrementally without data destruction.
-    Creates automatic backup before any changes.
+    Creates automatic backup before any changes: an instant snapshot
+    database ({db}_hop_snap_<version>) when the role has the CREATEDB
+    privilege, unless the server is known to lack room for it, a pg_dump otherwise
+    (--backup-strategy to choose). After a successful upgrade, the snapshots
+    and backups of the oldest versions are deleted: the 3 most recent are
+    kept by default (--keep-backups or backup_retention in
+    .hop/local_config to keep more).
+
+    Each release is applied in one transaction: if a patch fails, its release
+    is rolled back and the database stays at the previous release.
+    Non-transactional steps (.psql and Python files, SQL files annotated
+    "-- hop: no-transaction") commit the work done before them, so
+    --transaction=upgrade is refused when the upgrade path contains one.
+
+    With --lock-timeout, a SQL file that cannot get a lock in time (e.g. an
+    ALTER TABLE behind a long transaction) is rolled back instead of
+    blocking the table, the sessions holding locks are reported and the file
+    is retried with an increasing delay.
+
+    --dry-run estimates the duration of each patch from its timings recorded
+    in .hop/timings/ (release validation, staging upgrade...), scaled by the
+    size of the tables in this database, and flags the patches that will
+    dominate the maintenance window.
 
     Examples:
         # Interactive: choose target from list
@@ -56,12 +156,61 @@ def upgrade(to_release, dry_run, force, skip_backup, yes):
         # Simulate upgrade (no changes, no prompt)
         half_orm dev upgrade --dry-run
 
+        # Estimate the duration from the timings of the staging upgrade
+        half_orm dev upgrade --dry-run --timings-from staging-timings/
+
         # Apply all without confirmation
         half_orm dev upgrade --yes
+
+        # All releases or none (only SQL files, no "-- hop: no-transaction")
+        half_orm dev upgrade --transaction=upgrade
+
+        # Never wait more than 3s for a lock, retry up to 10 times
+        half_orm dev upgrade --lock-timeout=3 --lock-retries=10
+
+        # Snapshot for a quick rollback and a dump for archival
+        half_orm dev upgrade --backup-strategy=both
+
+        # Parallel compressed backup, keep the 5 most recent ones
+        half_orm dev upgrade --backup-format=directory -j 4 --compress=zstd:3 --keep-backups=5
+
+        # Before the maintenance window: compile the plan...
+        half_orm dev upgrade --plan --to-release=1.3.7
+        # ...then during the window: run only the planned SQL
+        half_orm dev upgrade --execute-plan .hop/plans/1.3.5-to-1.3.7.json
     """
+    if compile_plan and plan_file:
+        raise click.UsageError("--plan and --execute-plan are mutually exclusive")
+    if plan_file and to_release:
+        raise click.UsageError("--to-release cannot be used with --execute-plan")
+    if lock_retries is not None and lock_timeout is None:
+        raise click.UsageError("--lock-retries requires --lock-timeout")
+    if timings_from and not dry_run:
+        raise click.UsageError("--timings-from requires --dry-run")
+
+    lock_retry = None
+    if lock_timeout is not None:
+        lock_retry = LockRetryPolicy(lock_timeout=lock_timeout)
+        if lock_retries is not None:
+            lock_retry.retries = lock_retries
+
     try:
         repo = Repo()
 
+        backup_options = None
+        overrides = {'strategy': backup_strategy, 'format': backup_format, 'jobs': jobs,
+                     'compress': compress, 'retention': keep_backups}
+        if any(value is not None for value in overrides.values()):
+            try:
+                backup_options = BackupOptions.from_local_config(repo.local_config, **overrides)
+            except ValueError as e:
+                raise click.UsageError(str(e))
+
+        if plan_file:
+            _execute_plan(repo, plan_file, dry_run, force, skip_backup, backup_options,
+                          transaction_scope, lock_retry, timings_from, yes)
+            return
+
         # === Fetch and display available releases ===
         click.echo("🔄 Fetching available releases...\n")
         update_info = repo.release_manager.update_production()
@@ -102,6 +251,17 @@ def upgrade(to_release, dry_run, force, skip_backup, yes):
                 raise click.Abort()
             to_release = raw if raw != latest else None  # None means "all"
 
+        if compile_plan:
+            plan = repo.release_manager.compile_upgrade_plan(
+                to_version=to_release, update_info=update_info)
+            path = upgrade_plan.save(plan, upgrade_plan.plan_path(repo.base_dir, plan))
+            click.echo(f"\n✓ {utils.Color.green('Upgrade plan compiled:')} {utils.Color.bold(str(path))}")
+            click.echo(f"   {plan['from_version']} → {plan['to_version']}  (sha256 {plan['checksum']})")
+            for line in upgrade_plan.summary(plan):
+                click.echo(f"   • {line}")
+            click.echo(f"\n📝 To execute it: half_orm dev upgrade --execute-plan {path}")
+            return
+
         # === Confirmation (unless --dry-run or --yes) ===
         if not dry_run and not yes:
             apply_path = upgrade_path
@@ -125,6 +285,10 @@ def upgrade(to_release, dry_run, force, skip_backup, yes):
             force_backup=force,
             skip_backup=skip_backup,
             update_info=update_info,
+            backup_options=backup_options,
+            transaction_scope=transaction_scope,
+            lock_retry=lock_retry,
+            timing_sources=list(timings_from),
         )
 
         _display_upgrade_results(result)
@@ -135,6 +299,41 @@ def upgrade(to_release, dry_run, force, skip_backup, yes):
         raise click.Abort()
 
 
+def _execute_plan(repo, plan_file, dry_run, force, skip_backup, backup_options,
+                  transaction_scope, lock_retry, timings_from, yes):
+    """Check and execute an upgrade plan compiled with --plan."""
+    try:
+        plan = upgrade_plan.load(plan_file)
+    except upgrade_plan.UpgradePlanError as e:
+        click.echo(f"\n❌ {utils.Color.red(str(e))}", err=True)
+        raise click.Abort()
+
+    click.echo(f"Upgrade plan: {utils.Color.bold(plan['from_version'])} → "
+               f"{utils.Color.bold(plan['to_version'])}  (sha256 {plan['checksum']})")
+    for line in upgrade_plan.summary(plan):
+        click.echo(f"  • {line}")
+
+    if not dry_run and not yes:
+        if not skip_backup:
+            click.echo("Will create backup before starting.")
+        if not click.confirm("\nProceed?", default=True):
+            click.echo("\nUpgrade cancelled.")
+            return
+
+    click.echo()
+    result = repo.release_manager.upgrade_production(
+        dry_run=dry_run,
+        force_backup=force,
+        skip_backup=skip_backup,
+        backup_options=backup_options,
+        transaction_scope=transaction_scope,
+        plan=plan,
+        lock_retry=lock_retry,
+        timing_sources=list(timings_from),
+    )
+    _display_upgrade_results(result)
+
+
 def _display_upgrade_results(result):
     """Format and display upgrade results."""
     if result.get('dry_run'):
@@ -147,7 +346,12 @@ def _display_upgrade_results(result):
             click.echo(f"\n✓ {utils.Color.green('Already at latest version')}")
             return
 
-        click.echo(f"\nWould create backup: {utils.Color.bold(result.get('backup_would_be_created', ''))}")
+        if result.get('snapshot_would_be_created'):
+            click.echo(f"\nWould create snapshot: {utils.Color.bold(result['snapshot_would_be_created'])}")
+        if result.get('backup_would_be_created'):
+            click.echo(f"\nWould create backup: {utils.Color.bold(result['backup_would_be_created'])}")
+        if result.get('backup_usage'):
+            _display_backup_usage(result['backup_usage'])
         click.echo(f"\nWould apply releases:")
         for version in result['releases_would_apply']:
             patches = result['patches_would_apply'][version]
@@ -155,6 +359,10 @@ def _display_upgrade_results(result):
             for patch_id in patches:
                 click.echo(f"      • {patch_id}")
 
+        estimation = result.get('duration_estimate')
+        if estimation:
+            _display_duration_estimate(estimation)
+
         final = result['final_version']
         click.echo(f"\nWould upgrade: {current} → {utils.Color.green(final)}")
         click.echo(f"\n{utils.Color.bold('To apply this upgrade, run without --dry-run')}")
@@ -162,11 +370,11 @@ def _display_upgrade_results(result):
 
     current = result['current_version']
 
+    if result.get('snapshot_used'):
+        click.echo(f"✓ Snapshot created: {utils.Color.bold(result['snapshot_used'])}")
     if result.get('backup_created'):
         click.echo(f"✓ Backup created: {utils.Color.bold(result['backup_created'])}")
-    elif result.get('snapshot_used'):
-        click.echo(f"✓ Snapshot created: {utils.Color.bold(result['snapshot_used'])}")
-    elif result.get('releases_applied'):
+    elif not result.get('snapshot_used') and result.get('releases_applied'):
         click.echo(f"⚠️  {utils.Color.bold('No backup created (--skip-backup used)')}")
 
     if not result['releases_applied']:
@@ -183,6 +391,13 @@ def _display_upgrade_results(result):
         else:
             click.echo(f"  ✓ {utils.Color.bold(version)} - (empty release)")
 
+    if result.get('slowest_statements'):
+        click.echo(f"\n⏱ Slowest statements:")
+        for line in TimingReport.format_statements(result['slowest_statements']):
+            click.echo(f"  {line}")
+        if result.get('timing_report'):
+            click.echo(f"  Timing report: {result['timing_report']}")
+
     final = result['final_version']
     click.echo(f"\n{utils.Color.green('✓ Upgrade complete!')}")
     click.echo(f"   {current} → {utils.Color.bold(utils.Color.green(final))}")
@@ -193,6 +408,40 @@ def _display_upgrade_results(result):
     else:
         click.echo(f"\n📝 Production is now at latest version.")
 
+    if result.get('retention'):
+        _display_backup_usage(result['retention']['usage'])
+
     if result.get('backup_created'):
         click.echo(f"\n💡 To rollback if needed:")
-        click.echo(f"   psql -d {result.get('db_name', 'DATABASE')} -f {result['backup_created']}")
+        command = restore_command(result.get('db_name', 'DATABASE'), result['backup_created'],
+                                  result.get('backup_jobs', 1))
+        click.echo(f"   {command}")
+
+    thread = (result.get('retention') or {}).get('thread')
+    if thread is not None and thread.is_alive():
+        click.echo(f"\n⏳ Waiting for the expired snapshots to be dropped...")
+        thread.join()
+
+
+def _display_backup_usage(usage):
+    """Disk usage of the snapshots and backups of the production database."""
+    if not usage['snapshots'] and not usage['backups']:
+        return
+    click.echo(f"\n💾 Snapshots and backups: {utils.Color.bold(format_size(usage['size']))}")
+    for snapshot in usage['snapshots']:
+        click.echo(f"  • {snapshot['name']} ({format_size(snapshot['size'])})")
+    for backup in usage['backups']:
+        click.echo(f"  • {backup['path'].name} ({format_size(backup['size'])})")
+
+
+def _display_duration_estimate(estimation):
+    """Estimated duration of a dry run, dominant patches first."""
+    if not estimation['patches']:
+        click.echo(f"\n⏱ No timing recorded for these patches: duration unknown")
+        return
+    total = duration_estimate.format_duration(estimation['seconds'])
+    click.echo(f"\n⏱ Estimated duration: {utils.Color.bold('~' + total)}")
+    for version, seconds in estimation['releases'].items():
+        click.echo(f"  → {version}: ~{duration_estimate.format_duration(seconds)}")
+    for line in duration_estimate.summary(estimation):
+        click.echo(f"  ⚠️  {line}")
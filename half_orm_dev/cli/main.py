@@ -4,30 +4,62 @@ Main CLI module - Creates and configures the CLI group
 
 import click
 import functools
+import io
 import os
 import subprocess
 import sys
-from half_orm_dev.repo import Repo, OutdatedHalfORMDevError
+from configparser import ConfigParser
+from packaging import version
 from half_orm import utils
-from .commands import ALL_COMMANDS
+from half_orm_dev.utils import hop_version, find_base_dir, is_production
+from .commands import ALL_COMMANDS, load_command
 
 
 class Hop:
-    """Sets the options available to the hop command"""
+    """Sets the options available to the hop command
 
-    def __init__(self):
-        self.__repo: Repo = None
-        self.__hop_upgrade_error: OutdatedHalfORMDevError = None
+    The available commands are computed from cheap facts read on disk
+    (.hop/config, .hop/production, the halfORM connection file). The
+    Repo, and with it the database connection and git, is only created
+    when a command or the repository state needs it.
+    """
 
-        # Try to initialize Repo, catch version errors
-        try:
-            self.__repo = Repo()  # Utilise le singleton
-        except OutdatedHalfORMDevError as e:
+    def __init__(self):
+        self.__repo = None
+        self.__hop_upgrade_error = None
+        self.__base_dir = find_base_dir()
+        self.__hop_version = None
+        self.__devel = False
+        if self.__base_dir:
+            config = ConfigParser()
+            config.read(os.path.join(self.__base_dir, '.hop', 'config'))
+            if 'halfORM' in config:
+                self.__hop_version = config['halfORM'].get('hop_version', '')
+                self.__devel = config['halfORM'].getboolean('devel', False)
+
+        if self.__compare_hop_version() < 0:
             # Capture the error but don't raise it yet
-            self.__hop_upgrade_error = e
+            from half_orm_dev.repo import OutdatedHalfORMDevError
+            self.__hop_upgrade_error = OutdatedHalfORMDevError(
+                self.__hop_version, hop_version())
 
         self.__available_cmds = self._determine_available_commands()
 
+    def __compare_hop_version(self):
+        """Compares the installed version with the hop_version of .hop/config.
+
+        Returns -1, 0 or 1 like Repo.compare_versions(), 0 if the repository
+        has no (valid) hop_version.
+        """
+        if not self.__hop_version:
+            return 0
+        try:
+            installed = version.parse(hop_version())
+            required = version.parse(self.__hop_version)
+        except version.InvalidVersion:
+            return 0
+        return (installed > required) - (installed < required)
+
     def _determine_available_commands(self):
         """
         Determine which commands are available based on context.
@@ -48,25 +80,48 @@ class Hop:
             return ['init', 'clone']
 
         # PRODUCTION ENVIRONMENT — read-only, no migrations, no dev commands
-        if self.__repo.database.production:
+        if self.production:
             return ['upgrade', 'rollback']
 
-        if self.__repo.needs_migration():
+        if self.needs_migration:
             return ['migrate']
 
         # Inside hop repository
-        if not self.__repo.devel:
+        if not self.__devel:
             # Sync-only mode (no metadata)
             return ['sync-package', 'check']
 
         # DEVELOPMENT ENVIRONMENT - Patch development
         return ['patch', 'release', 'check', 'set-git-origin',
-                'revert-migration', 'recover']
+                'revert-migration', 'recover', 'serve']
+
+    @property
+    def repo(self):
+        """Returns the Repo singleton, created on first access."""
+        if self.__repo is None:
+            from half_orm_dev.repo import Repo
+            self.__repo = Repo()
+        return self.__repo
 
     @property
     def repo_checked(self):
         """Returns whether we are in a repo or not."""
-        return self.__repo and self.__repo.checked
+        return self.__base_dir is not None
+
+    @property
+    def production(self):
+        """Returns whether the repo runs against a production database."""
+        return self.repo_checked and is_production(self.__base_dir)
+
+    @property
+    def needs_migration(self):
+        """Returns whether the repository needs a migration (installed version is newer)."""
+        return self.__compare_hop_version() > 0
+
+    @property
+    def config_hop_version(self):
+        """Returns the hop_version required by .hop/config."""
+        return self.__hop_version
 
     @property
     def needs_hop_upgrade(self):
@@ -81,18 +136,104 @@ class Hop:
     @property
     def state(self):
         """Returns the state of the repo."""
-        return self.__repo.state if self.__repo else "Not in a repository"
+        return self.repo.state if self.repo_checked else "Not in a repository"
 
     @property
     def available_commands(self):
         """Returns the list of available commands."""
         return self.__available_cmds
 
+    def run_in_daemon(self, args):
+        """Runs `half_orm dev <args>` through the daemon of the repository.
+
+        The command is forwarded only on POSIX systems, when HOP_NO_DAEMON
+        is not set, a daemon of the same version and environment serves the
+        repository and stdin can be read at once: a regular file (answers
+        to the prompts, sent with the command) or an input at end of file
+        (see half_orm_dev.daemon).
 
-def create_cli_group():
+        Returns the exit code of the command, None if it must run here.
+        """
+        if os.name != 'posix':
+            # No unix socket: the daemon module is not even imported
+            return None
+        from half_orm_dev import daemon
+
+        if (not self.repo_checked or self.needs_hop_upgrade
+                or os.environ.get(daemon.NO_DAEMON_ENV)
+                or sys.stdin is None or sys.stdin.isatty()
+                or not os.path.exists(daemon.socket_path(self.__base_dir))):
+            return None
+        if not daemon.ping(self.__base_dir):
+            return None
+        stdin = daemon.stdin_input(sys.stdin)
+        if stdin is None:
+            return None
+        exit_code = daemon.forward(self.__base_dir, args, stdin)
+        if exit_code is None:
+            # The command runs here: give it back the input already read
+            sys.stdin = io.StringIO(stdin)
+        return exit_code
+
+
+class LazyGroup(click.Group):
+    """
+    click.Group whose commands are imported on first use.
+
+    `lazy_commands` maps the command names to their entry in
+    commands.ALL_COMMANDS. A command module is only imported when the
+    command is resolved for invocation; `--help` and shell completion
+    list the commands with the short help of the registry.
+    """
+
+    def __init__(self, *args, lazy_commands=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = list(lazy_commands)
+
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name in self.lazy_commands and cmd_name not in self.commands:
+            self.add_command(load_command(cmd_name), cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+    def _short_help(self, cmd_name, limit=45):
+        """Short help of a command, without importing it if not loaded yet."""
+        if cmd_name in self.commands:
+            return self.commands[cmd_name].get_short_help_str(limit)
+        return click.Command(cmd_name, help=ALL_COMMANDS[cmd_name][2]).get_short_help_str(limit)
+
+    def format_commands(self, ctx, formatter):
+        names = self.list_commands(ctx)
+        if not names:
+            return
+        limit = formatter.width - 6 - max(len(name) for name in names)
+        with formatter.section('Commands'):
+            formatter.write_dl([(name, self._short_help(name, limit)) for name in names])
+
+    def shell_complete(self, ctx, incomplete):
+        from click.shell_completion import CompletionItem
+
+        results = [
+            CompletionItem(name, help=self._short_help(name))
+            for name in self.list_commands(ctx) if name.startswith(incomplete)
+        ]
+        results.extend(click.Command.shell_complete(self, ctx, incomplete))
+        return results
+
+
+def create_cli_group(group_cls=click.Group):
     """
     Creates and returns the CLI group with appropriate commands.
 
+    The command modules are imported lazily, when a command is invoked
+    (see LazyGroup).
+
+    Args:
+        group_cls: click.Group subclass the CLI group also derives from
+            (e.g. half_orm.cli.CustomGroup when registered as an extension)
+
     Returns:
         click.Group: Configured CLI group
     """
@@ -126,22 +267,30 @@ def create_cli_group():
         return wrapper
 
     # Create custom Group that auto-decorates commands
-    class VersionCheckGroup(click.Group):
+    class VersionCheckGroup(LazyGroup, group_cls):
         def add_command(self, cmd, name=None):
             """Override to decorate all commands with version check."""
             if isinstance(cmd, click.Command) and cmd.callback:
                 cmd.callback = check_version_before_invoke(cmd.callback)
             super().add_command(cmd, name)
 
+        def resolve_command(self, ctx, args):
+            """Run the command through the daemon when one serves the repository."""
+            if (args and args[0] in self.lazy_commands and args[0] != 'serve'
+                    and not ctx.resilient_parsing):
+                exit_code = hop.run_in_daemon(args)
+                if exit_code is not None:
+                    ctx.exit(exit_code)
+            return super().resolve_command(ctx, args)
+
         def get_command(self, ctx, cmd_name):
             cmd = super().get_command(ctx, cmd_name)
             if cmd is not None:
                 return cmd
             # Unknown command — show a specific message when migration is needed.
-            if hop.repo_checked and hop._Hop__repo.needs_migration():
-                from half_orm_dev.utils import hop_version
+            if hop.repo_checked and hop.needs_migration:
                 installed_version = hop_version()
-                config_version = hop._Hop__repo.repo.config.hop_version
+                config_version = hop.config_hop_version
 
                 @click.command(
                     cmd_name,
@@ -165,7 +314,11 @@ def create_cli_group():
                 return _migration_required
             return None
 
-    @click.group(cls=VersionCheckGroup, invoke_without_command=True)
+    # Add only available commands to the group
+    available = [name for name in hop.available_commands if name in ALL_COMMANDS]
+
+    @click.group(cls=VersionCheckGroup, invoke_without_command=True,
+                 lazy_commands=available)
     @click.pass_context
     def dev(ctx):
         """halfORM development tools - Git-centric patch management and database synchronization"""
@@ -193,13 +346,12 @@ def create_cli_group():
             # Show repo state when no subcommand is provided
             if hop.repo_checked:
                 # Check if migration is needed
-                if hop._Hop__repo.needs_migration():
+                if hop.needs_migration:
                     # Propose automatic migration
-                    from half_orm_dev.utils import hop_version
                     from half_orm_dev.repo import RepoError
                     installed_version = hop_version()
-                    config_version = hop._Hop__repo.repo.config.hop_version
-                    current_branch = hop._Hop__repo.hgit.branch if hop._Hop__repo.hgit else 'unknown'
+                    config_version = hop.config_hop_version
+                    current_branch = hop.repo.hgit.branch if hop.repo.hgit else 'unknown'
 
                     click.echo(f"\n{'='*70}")
                     click.echo(f"✨ {utils.Color.bold('Repository Migration Available')} ✨")
@@ -223,7 +375,7 @@ def create_cli_group():
                         if current_branch != 'ho-prod':
                             try:
                                 click.echo(f"  Switching to ho-prod...")
-                                hop._Hop__repo.hgit.checkout('ho-prod')
+                                hop.repo.hgit.checkout('ho-prod')
                                 click.echo(f"  ✓ Now on ho-prod")
                                 click.echo()
                             except Exception as e:
@@ -235,7 +387,7 @@ def create_cli_group():
                         # Run migration
                         try:
                             click.echo(f"  Running migrations...")
-                            result = hop._Hop__repo.run_migrations_if_needed(silent=False)
+                            result = hop.repo.run_migrations_if_needed(silent=False)
 
                             if result['migration_run']:
                                 click.echo(f"\n✓ {utils.Color.green('Migration completed successfully')}")
@@ -247,7 +399,7 @@ def create_cli_group():
                                 if current_branch != 'ho-prod':
                                     try:
                                         click.echo(f"  Returning to {current_branch}...")
-                                        hop._Hop__repo.hgit.checkout(current_branch)
+                                        hop.repo.hgit.checkout(current_branch)
                                         click.echo(f"  ✓ Back on {current_branch}\n")
                                     except Exception:
                                         click.echo(f"  ⚠️  Could not return to {current_branch}", err=True)
@@ -271,7 +423,7 @@ def create_cli_group():
                     click.echo(f"\n{utils.Color.bold('Available commands:')}")
 
                     # Adapt displayed commands based on environment
-                    if hop._Hop__repo.database.production:
+                    if hop.production:
                         # Production commands
                         click.echo(f"  • {utils.Color.bold('update')} - Fetch and list available releases")
                         click.echo(f"  • {utils.Color.bold('upgrade [--to-release=X.Y.Z]')} - Apply releases to production")
@@ -289,9 +441,4 @@ def create_cli_group():
                 click.echo(f"\n  • {utils.Color.bold('init <package_name>')} - Create new halfORM project.")
                 click.echo(f"\n  • {utils.Color.bold('clone <git origin>')} - Clone an existing halfORM project.\n")
 
-    # Add only available commands to the group
-    for cmd_name in hop.available_commands:
-        if cmd_name in ALL_COMMANDS:
-            dev.add_command(ALL_COMMANDS[cmd_name])
-
     return dev
\ No newline at end of file
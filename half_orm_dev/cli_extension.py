@@ -21,18 +21,12 @@ def add_commands(main_group):
         main_group: The main Click group for the half_orm command
     """
 
-    # Create the dev CLI group with all commands
-    dev_group = create_cli_group()
+    # Create the dev CLI group; its command modules are imported on first use
+    dev_group = create_cli_group(group_cls=CustomGroup)
+    dev_group.help = "halfORM development tools - project management, patches, and database synchronization"
+    # Without a subcommand, `half_orm dev` shows the help (as before)
+    dev_group.invoke_without_command = False
+    dev_group.no_args_is_help = True
 
     # Register it as an extension
-    @main_group.group(name='dev', cls=CustomGroup)
-    def dev():
-        """halfORM development tools - project management, patches, and database synchronization"""
-        pass
-
-    # Copy all commands from the created group to the registered extension
-    for name, command in dev_group.commands.items():
-        dev.add_command(command)
-
-    # Copy the callback from the created group
-    dev.callback = dev_group.callback
\ No newline at end of file
+    main_group.add_command(dev_group, name='dev')
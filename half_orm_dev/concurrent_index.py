@@ -0,0 +1,277 @@
+"""
+CREATE INDEX CONCURRENTLY and REINDEX CONCURRENTLY in patch files.
+
+These statements cannot run in a transaction block: they go in a SQL file
+annotated "-- hop: no-transaction" (see file_executor.sql_is_transactional),
+which runs between the transactions of the release on the connection of
+the model. file_executor.execute_sql executes each of them with
+execute_concurrently:
+
+- an invalid index left by a previous failed CREATE INDEX CONCURRENTLY
+  (IF NOT EXISTS would silently keep it) is dropped first;
+- the progress of the build (pg_stat_progress_create_index) is polled on
+  a second connection and printed every PROGRESS_INTERVAL seconds;
+- when the build fails, the invalid index it left is dropped, and the
+  build is retried INDEX_RETRIES times if the error is transient (lock
+  timeout, deadlock, serialization failure).
+
+The invalid index of a failed CREATE INDEX CONCURRENTLY can only be found
+if the index is named. A failed REINDEX INDEX/TABLE CONCURRENTLY leaves
+<index>_ccnew[N] (or _ccold[N]) indexes on the table of its target: only
+the ones that appeared during the failed attempt are dropped, never the
+ones of a REINDEX running in another session. The leftovers of REINDEX
+SCHEMA/DATABASE/SYSTEM are not cleaned up.
+"""
+
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import click
+import psycopg
+from psycopg import errors
+
+INDEX_RETRIES = 2
+RETRY_DELAY = 5.0
+PROGRESS_INTERVAL = 10.0
+
+# Errors after which a concurrent build is worth retrying
+TRANSIENT_ERRORS = (errors.LockNotAvailable, errors.DeadlockDetected, errors.SerializationFailure)
+
+_NAME = r'(?:"(?:[^"]|"")+"|[\w$]+)'
+_CONCURRENT_INDEX = re.compile(
+    r'^\s*(?:CREATE\s+(?:UNIQUE\s+)?INDEX|REINDEX(?:\s*\([^)]*\))?\s+\w+)\s+CONCURRENTLY\b',
+    re.IGNORECASE)
+_REINDEX = re.compile(
+    r'^\s*REINDEX(?:\s*\([^)]*\))?\s+(?P<kind>INDEX|TABLE)\s+CONCURRENTLY\s+'
+    r'(?:(?P<schema>' + _NAME + r')\s*\.\s*)?(?P<name>' + _NAME + r')',
+    re.IGNORECASE)
+_CREATE_INDEX = re.compile(
+    r'^\s*CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+(?:IF\s+NOT\s+EXISTS\s+)?'
+    r'(?P<name>' + _NAME + r')\s+ON\s+(?:ONLY\s+)?'
+    r'(?:(?P<schema>' + _NAME + r')\s*\.\s*)?' + _NAME,
+    re.IGNORECASE)
+
+INVALID_INDEX_QUERY = """
+SELECT NOT i.indisvalid AS invalid
+FROM pg_index i
+WHERE i.indexrelid = to_regclass(%(index)s)
+"""
+
+# Invalid indexes of a REINDEX CONCURRENTLY on the table of its target
+# (the table itself or the table of the index) and on its TOAST table
+INVALID_REINDEX_QUERY = """
+WITH target AS (
+    SELECT COALESCE(
+        (SELECT t.indrelid FROM pg_index t WHERE t.indexrelid = to_regclass(%(index)s::text)),
+        to_regclass(%(table)s::text)::oid) AS relid
+)
+SELECT i.indexrelid::regclass::text AS index
+FROM target
+JOIN pg_index i ON i.indrelid IN (
+    target.relid, (SELECT r.reltoastrelid FROM pg_class r WHERE r.oid = target.relid))
+JOIN pg_class c ON c.oid = i.indexrelid
+WHERE NOT i.indisvalid AND c.relname ~ '_cc(new|old)[0-9]*$'
+"""
+
+PROGRESS_QUERY = """
+SELECT phase, blocks_done, blocks_total, tuples_done, tuples_total,
+       lockers_done, lockers_total
+FROM pg_stat_progress_create_index
+WHERE pid = %(pid)s
+"""
+
+
+def is_concurrent_index(sql: str) -> bool:
+    """True for CREATE INDEX CONCURRENTLY and REINDEX ... CONCURRENTLY."""
+    return _CONCURRENT_INDEX.match(sql) is not None
+
+
+def index_name(sql: str) -> Optional[str]:
+    """
+    Name of the index built by a CREATE INDEX CONCURRENTLY, qualified by
+    the schema of its table when it is; None if the index is not named.
+
+    Examples:
+        index_name('CREATE INDEX CONCURRENTLY ix_users ON blog.users (id)')  # → 'blog.ix_users'
+    """
+    match = _CREATE_INDEX.match(sql)
+    if match is None:
+        return None
+    if match.group('schema'):
+        return f"{match.group('schema')}.{match.group('name')}"
+    return match.group('name')
+
+
+def reindex_target(sql: str) -> Optional[Tuple[str, str]]:
+    """
+    Kind ('index' or 'table') and name of the target of a REINDEX INDEX/TABLE
+    CONCURRENTLY, None for another statement.
+
+    Examples:
+        reindex_target('REINDEX INDEX CONCURRENTLY blog.ix_users')  # → ('index', 'blog.ix_users')
+    """
+    match = _REINDEX.match(sql)
+    if match is None:
+        return None
+    name = match.group('name')
+    if match.group('schema'):
+        name = f"{match.group('schema')}.{name}"
+    return match.group('kind').lower(), name
+
+
+def invalid_indexes(cursor, sql: str) -> List[str]:
+    """
+    Invalid indexes a failed build of the statement sql may have left: the
+    index of a named CREATE INDEX CONCURRENTLY, the _ccnew/_ccold indexes on
+    the table of a REINDEX INDEX/TABLE CONCURRENTLY.
+    """
+    name = index_name(sql)
+    if name is not None:
+        cursor.execute(INVALID_INDEX_QUERY, {'index': name})
+        row = cursor.fetchone()
+        return [name] if row and _first(row) else []
+    target = reindex_target(sql)
+    if target is not None:
+        kind, name = target
+        cursor.execute(INVALID_REINDEX_QUERY, {'index': name if kind == 'index' else None,
+                                               'table': name if kind == 'table' else None})
+        return [_first(row) for row in cursor.fetchall()]
+    return []
+
+
+def drop_invalid_indexes(cursor, sql: str, keep: Iterable[str] = ()) -> List[str]:
+    """
+    Drop the invalid indexes left by a failed build of the statement sql.
+
+    Args:
+        keep: Invalid indexes that existed before the build (the in-progress
+            REINDEX of another session): they are not dropped
+
+    Returns:
+        Names of the indexes dropped
+    """
+    keep = set(keep)
+    dropped = [index for index in invalid_indexes(cursor, sql) if index not in keep]
+    for index in dropped:
+        cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index}")
+    return dropped
+
+
+def format_progress(label: str, progress: Dict) -> str:
+    """One line of pg_stat_progress_create_index: phase and its advancement."""
+    line = f"    ⏳ {label}: {progress['phase']}"
+    for unit, done, total in (('blocks', 'blocks_done', 'blocks_total'),
+                              ('tuples', 'tuples_done', 'tuples_total'),
+                              ('transactions', 'lockers_done', 'lockers_total')):
+        if progress.get(total):
+            return (f"{line} {progress[done] / progress[total]:.0%} "
+                    f"({progress[done]}/{progress[total]} {unit})")
+    return line
+
+
+class IndexProgress:
+    """
+    Polls pg_stat_progress_create_index for the backend of a connection,
+    on a connection of its own, in a background thread.
+
+    Examples:
+        with IndexProgress(model._connection, "02_index.sql:3", 10):
+            cursor.execute("CREATE INDEX CONCURRENTLY ...")
+    """
+
+    def __init__(self, connection, label: str, interval: Optional[float] = PROGRESS_INTERVAL):
+        self._info = connection.info
+        self._label = label
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        if self._interval:
+            self._thread = threading.Thread(target=self._poll, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return False
+
+    def _poll(self):
+        password = {'password': self._info.password} if self._info.password else {}
+        try:
+            with psycopg.connect(self._info.dsn, autocommit=True, **password) as connection:
+                while not self._stop.wait(self._interval):
+                    cursor = connection.execute(PROGRESS_QUERY, {'pid': self._info.backend_pid})
+                    row = cursor.fetchone()
+                    if row is not None:
+                        columns = [column.name for column in cursor.description]
+                        click.echo(format_progress(self._label, dict(zip(columns, row))))
+        except psycopg.Error:
+            # The progress is informative: the build goes on without it
+            return
+
+
+def execute_concurrently(model, sql: str, label: str = 'SQL', lock_retry=None,
+                         retries: int = INDEX_RETRIES,
+                         progress_interval: Optional[float] = PROGRESS_INTERVAL,
+                         sleep: Callable[[float], None] = time.sleep) -> int:
+    """
+    Execute a CREATE INDEX / REINDEX ... CONCURRENTLY in autocommit mode.
+
+    Args:
+        model: halfORM Model (its connection is used)
+        sql: The statement
+        label: Name of the statement in the messages (e.g. "02_index.sql:3")
+        lock_retry: Optional LockRetryPolicy: its lock_timeout is applied to
+            the build, its retries and backoff replace retries and RETRY_DELAY
+        retries: Number of retries after a transient error
+        progress_interval: Seconds between two progress lines (None: no polling)
+        sleep: Wait function (for tests)
+
+    Returns:
+        Number of attempts
+
+    Raises:
+        psycopg.Error: If the build fails (its invalid index is dropped)
+    """
+    connection = model._connection
+    if lock_retry is not None:
+        retries = lock_retry.retries
+    if index_name(sql) is not None:
+        with connection.cursor() as cursor:
+            for index in drop_invalid_indexes(cursor, sql):
+                click.echo(f"    ↻ {label}: dropped the invalid index {index} of a previous build")
+    attempts = retries + 1
+    for attempt in range(1, attempts + 1):
+        # Invalid indexes before the attempt are not ours: kept if it fails
+        with connection.cursor() as cursor:
+            existing = invalid_indexes(cursor, sql)
+        try:
+            with IndexProgress(connection, label, progress_interval), connection.cursor() as cursor:
+                if lock_retry is not None:
+                    cursor.execute(f"SET lock_timeout = {int(lock_retry.lock_timeout * 1000)}")
+                try:
+                    cursor.execute(sql)
+                finally:
+                    if lock_retry is not None:
+                        cursor.execute("RESET lock_timeout")
+            return attempt
+        except psycopg.Error as error:
+            with connection.cursor() as cursor:
+                dropped = drop_invalid_indexes(cursor, sql, keep=existing)
+            for index in dropped:
+                click.echo(f"    ↻ {label}: dropped the invalid index {index}")
+            if not isinstance(error, TRANSIENT_ERRORS) or attempt == attempts:
+                raise
+            delay = lock_retry.delay(attempt) if lock_retry is not None else RETRY_DELAY
+            click.echo(f"    ⏳ {label}: {str(error).strip()} (attempt {attempt}/{attempts}), "
+                       f"retrying in {delay:g}s")
+            sleep(delay)
+
+
+def _first(row):
+    return next(iter(row.values())) if isinstance(row, dict) else row[0]
@@ -0,0 +1,507 @@
+"""
+Local daemon keeping a hop repository warm between CLI invocations.
+
+`half_orm dev serve` listens on a unix socket inside .hop/ and holds the
+Repo singleton (with its database Model and HGit) in memory. The
+`half_orm dev` commands run in the repository are forwarded to it and
+executed in-process, so they no longer pay for the imports, the database
+connection and the model loading on every call.
+
+The daemon is optional: the CLI falls back to running the command itself
+when no daemon answers, when the daemon runs another half_orm_dev version,
+when HOP_NO_DAEMON is set, when the client's environment (see
+CLIENT_ENV) differs from the daemon's, or when stdin cannot be read at
+once (a terminal for interactive prompts, a pipe still open). A regular
+file redirected to stdin (answers to the prompts) is sent with the
+command. The daemon relies on unix sockets: it is only available on
+POSIX systems.
+
+The output of the command, including the one of its subprocesses (psql,
+pg_dump, git...) written to the file descriptors 1 and 2, is relayed to
+the client as it is produced.
+
+Protocol: one JSON line per request and one per message of the reply.
+    request: {"hop_version": ..., "argv": [...], "cwd": ..., "stdin": str, "env": {...}}
+             {"hop_version": ..., "ping": true} or {..., "stop": true}
+    output:  {"stream": "stdout" | "stderr", "data": str} (any number)
+    reply:   {"exit_code": int, "stdout": str, "stderr": str}
+             {"error": str} when the request is refused
+
+Before each request the daemon compares a fingerprint of the repository
+state (git HEAD and the ref it points to, the files of .hop/ including the
+model) with the one of the previous request. When it changed, the Repo
+singletons are cleared and rebuilt on the next command.
+"""
+
+import codecs
+import contextlib
+import io
+import json
+import os
+import select
+import socket
+import socketserver
+import stat
+import struct
+import sys
+import threading
+import time
+import traceback
+from typing import Callable, Dict, List, Optional
+
+try:
+    import fcntl
+    import termios
+except ImportError:  # not POSIX: no daemon (see available)
+    fcntl = termios = None
+
+from half_orm_dev.utils import hop_version, find_base_dir
+
+SOCKET_NAME = 'hop.sock'
+NO_DAEMON_ENV = 'HOP_NO_DAEMON'
+
+# Environment variables the commands depend on (configuration directory,
+# backups directory and the libpq PG* variables): a command is only
+# forwarded when the client's ones match the daemon's.
+CLIENT_ENV = ('HALFORM_CONF_DIR', 'HALF_ORM_BACKUPS_DIR')
+CLIENT_ENV_PREFIX = 'PG'
+
+# Files of .hop/ that do not describe the repository state: the socket
+# itself and the machine-local settings (last_fetch is written by fetches).
+_IGNORED_HOP_FILES = (SOCKET_NAME, 'local_config', '.fetching')
+_IGNORED_HOP_DIRS = ('backups', 'cache', 'plans', 'timings')
+
+# Client side timeouts (seconds)
+CONNECT_TIMEOUT = 1.0
+
+# Seconds to wait for the output of the subprocesses still running when the
+# command returns (they keep the relay pipes open)
+RELAY_TIMEOUT = 5.0
+
+
+class DaemonError(Exception):
+    """Raised when the daemon cannot be started."""
+
+
+def available() -> bool:
+    """Returns whether the daemon can run on this system (unix sockets)."""
+    return os.name == 'posix' and fcntl is not None
+
+
+def client_environment(environ=None) -> Dict[str, str]:
+    """The variables of environ (default os.environ) the commands depend on."""
+    environ = os.environ if environ is None else environ
+    return {name: value for name, value in environ.items()
+            if name in CLIENT_ENV or name.startswith(CLIENT_ENV_PREFIX)}
+
+
+def socket_path(base_dir: str) -> str:
+    """Path of the daemon socket of the repository at base_dir."""
+    return os.path.join(base_dir, '.hop', SOCKET_NAME)
+
+
+def state_fingerprint(base_dir: str) -> tuple:
+    """
+    Fingerprint of the repository state the daemon's Repo depends on.
+
+    Made of the content of .git/HEAD, the stat of the ref it points to
+    (loose ref or packed-refs) and the (path, mtime, size) of the files of
+    .hop/, the model included.
+    """
+    entries = []
+    git_dir = os.path.join(base_dir, '.git')
+    head = _read(os.path.join(git_dir, 'HEAD'))
+    entries.append(('HEAD', head))
+    if head.startswith('ref:'):
+        ref = head[len('ref:'):].strip()
+        entries.append((ref, _stat(os.path.join(git_dir, ref))))
+        entries.append(('packed-refs', _stat(os.path.join(git_dir, 'packed-refs'))))
+
+    hop_dir = os.path.join(base_dir, '.hop')
+    for root, dirs, files in os.walk(hop_dir):
+        if root == hop_dir:
+            dirs[:] = [name for name in dirs if name not in _IGNORED_HOP_DIRS]
+        dirs.sort()
+        for name in sorted(files):
+            if root == hop_dir and name in _IGNORED_HOP_FILES:
+                continue
+            path = os.path.join(root, name)
+            entries.append((os.path.relpath(path, base_dir), _stat(path)))
+    return tuple(entries)
+
+
+def _read(path: str) -> str:
+    try:
+        with open(path, encoding='utf-8') as file:
+            return file.read().strip()
+    except OSError:
+        return ''
+
+
+def _stat(path: str) -> Optional[tuple]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class HopDaemon:
+    """
+    Runs `half_orm dev` commands on behalf of the clients of a repository.
+
+    Requests are handled one at a time, in the daemon's process: the
+    commands share the Repo singleton and the database connection of the
+    previous ones as long as the repository state does not change.
+
+    Args:
+        base_dir: Root of the hop repository
+        idle_timeout: Stop after this many seconds without request
+            (None: run until stopped)
+        log: Stream the handled requests are logged to (None: no log)
+    """
+
+    def __init__(self, base_dir: str, idle_timeout: Optional[float] = None, log=None):
+        self.base_dir = os.path.abspath(base_dir)
+        self.socket_path = socket_path(self.base_dir)
+        self.idle_timeout = idle_timeout
+        self.log = log
+        # The environment the Repo and the commands run with
+        self.environment = client_environment()
+        self.__fingerprint = None
+        self.__server = None
+        self.__running = False
+
+    def refresh(self) -> bool:
+        """
+        Clear the Repo singletons if the repository state changed.
+
+        Returns:
+            bool: True if the state changed since the last call
+        """
+        fingerprint = state_fingerprint(self.base_dir)
+        changed = fingerprint != self.__fingerprint
+        if changed and self.__fingerprint is not None:
+            from half_orm_dev.repo import Repo
+            Repo.clear_instances()
+        self.__fingerprint = fingerprint
+        return changed
+
+    def handle(self, request: dict, output: Optional[Callable[[str, str], None]] = None) -> dict:
+        """
+        Handle a decoded request and return the reply.
+
+        output(stream, data) receives the output of the command as it is
+        produced; without it, the output is returned in the reply.
+        """
+        if request.get('hop_version') != hop_version():
+            return {'error': f"daemon runs half_orm_dev {hop_version()}"}
+        if request.get('ping') or request.get('stop'):
+            if request.get('stop'):
+                self.stop()
+            return {'exit_code': 0, 'stdout': '', 'stderr': ''}
+        cwd = request.get('cwd') or self.base_dir
+        if find_base_dir(cwd) != self.base_dir:
+            return {'error': f"{cwd} is not in {self.base_dir}"}
+        # The Repo, its connection and the subprocesses use the daemon's
+        # environment: the client runs the command itself when it differs
+        env = request.get('env')
+        if env != self.environment:
+            differing = set(self.environment.items()) ^ set((env or {}).items())
+            names = sorted({name for name, _ in differing}) or ['env']
+            return {'error': f"environment differs from the daemon's ({', '.join(names)})"}
+        argv = [str(arg) for arg in request.get('argv', [])]
+        self.refresh()
+        start = time.perf_counter()
+        reply = self.run(argv, cwd, color=request.get('color'), stdin=request.get('stdin') or '',
+                         output=output)
+        if self.log:
+            elapsed = time.perf_counter() - start
+            print(f"{' '.join(argv)} -> {reply['exit_code']} ({elapsed:.2f}s)",
+                  file=self.log, flush=True)
+        # The command may have changed the state itself (checkout, new patch...)
+        self.refresh()
+        return reply
+
+    def run(self, argv: List[str], cwd: str, color: Optional[bool] = None,
+            stdin: str = '', output: Optional[Callable[[str, str], None]] = None) -> dict:
+        """
+        Run `half_orm dev <argv>` in-process, from cwd, capturing its output.
+
+        color is the click color setting of the client's terminal, stdin the
+        content of its standard input. The output, of the command and of its
+        subprocesses, goes to output(stream, data) when given, to the
+        'stdout' and 'stderr' of the reply otherwise.
+        """
+        from half_orm_dev.cli.main import create_cli_group
+
+        captured = {'stdout': [], 'stderr': []}
+        if output is None:
+            output = lambda stream, data: captured[stream].append(data)
+        exit_code = 0
+        previous_cwd = os.getcwd()
+        previous_stdin = sys.stdin
+        previous_env = os.environ.get(NO_DAEMON_ENV)
+        # The prompts read the client's input, then get EOF and abort
+        sys.stdin = io.StringIO(stdin)
+        # The command runs here, it must not be forwarded to ourselves
+        os.environ[NO_DAEMON_ENV] = '1'
+        try:
+            os.chdir(cwd)
+            with _relayed_output(output) as (stdout, stderr), \
+                    contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                try:
+                    create_cli_group().main(args=argv, prog_name='half_orm dev', color=color)
+                except SystemExit as exc:
+                    exit_code = _exit_code(exc.code)
+                except Exception:
+                    traceback.print_exc()
+                    exit_code = 1
+        finally:
+            sys.stdin = previous_stdin
+            if previous_env is None:
+                del os.environ[NO_DAEMON_ENV]
+            else:
+                os.environ[NO_DAEMON_ENV] = previous_env
+            os.chdir(previous_cwd)
+        return {'exit_code': exit_code, 'stdout': ''.join(captured['stdout']),
+                'stderr': ''.join(captured['stderr'])}
+
+    def serve_forever(self) -> None:
+        """
+        Listen on .hop/hop.sock until stopped or idle for idle_timeout.
+
+        Raises:
+            DaemonError: If the system has no unix sockets, a daemon already
+                serves the repository or the socket path is too long for a
+                unix socket
+        """
+        if not available():
+            raise DaemonError("The daemon needs unix sockets (POSIX systems only)")
+        if _request(self.base_dir, {'ping': True}, timeout=CONNECT_TIMEOUT) is not None:
+            raise DaemonError(f"A daemon is already serving {self.base_dir}")
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.socket_path)  # left over by a killed daemon
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                lock = threading.Lock()
+
+                def send(message):
+                    with lock, contextlib.suppress(OSError):
+                        self.wfile.write(json.dumps(message).encode('utf-8') + b'\n')
+
+                try:
+                    request = json.loads(self.rfile.readline().decode('utf-8'))
+                    reply = daemon.handle(
+                        request, output=lambda stream, data: send({'stream': stream, 'data': data}))
+                except Exception as exc:
+                    reply = {'error': str(exc)}
+                send(reply)
+
+        # Created 0600: no window where another user could connect
+        previous_umask = os.umask(0o177)
+        try:
+            self.__server = socketserver.UnixStreamServer(self.socket_path, Handler)
+        except OSError as exc:
+            raise DaemonError(f"Cannot listen on {self.socket_path}: {exc}") from exc
+        finally:
+            os.umask(previous_umask)
+        self.__server.timeout = self.idle_timeout
+        self.__server.handle_timeout = self.stop
+        os.chdir(self.base_dir)
+        self.refresh()
+        self.warm_up()
+        try:
+            self.__running = True
+            while self.__running:
+                self.__server.handle_request()
+        finally:
+            self.__server.server_close()
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.socket_path)
+            from half_orm_dev.repo import Repo
+            Repo.clear_instances()
+
+    def warm_up(self) -> None:
+        """Import the commands and create the Repo before the first request."""
+        from half_orm_dev.cli.commands import ALL_COMMANDS, load_command
+        from half_orm_dev.repo import Repo
+        for name in ALL_COMMANDS:
+            load_command(name)
+        try:
+            Repo()
+        except Exception as exc:
+            # The commands will report it
+            if self.log:
+                print(f"Repository not loaded: {exc}", file=self.log, flush=True)
+
+    def stop(self) -> None:
+        """Stop serving after the current request."""
+        self.__running = False
+
+
+@contextlib.contextmanager
+def _relayed_output(output: Callable[[str, str], None]):
+    """
+    Relay what is written to the file descriptors 1 and 2 to output(stream, data).
+
+    The descriptors are redirected to pipes, so that the output of the
+    subprocesses is relayed too. Yields line buffered text streams on
+    them, for sys.stdout and sys.stderr.
+    """
+    for stream in (sys.stdout, sys.stderr):
+        with contextlib.suppress(Exception):
+            stream.flush()
+    saved, relays, streams = [], [], []
+    try:
+        for fd, name in ((1, 'stdout'), (2, 'stderr')):
+            read_end, write_end = os.pipe()
+            saved.append((fd, os.dup(fd)))
+            os.dup2(write_end, fd)
+            os.close(write_end)
+            relay = threading.Thread(target=_relay, args=(read_end, name, output),
+                                     name=f'hop-relay-{name}', daemon=True)
+            relay.start()
+            relays.append(relay)
+            streams.append(open(fd, 'w', encoding='utf-8', errors='replace',
+                                buffering=1, closefd=False))
+        yield tuple(streams)
+    finally:
+        for stream in streams:
+            with contextlib.suppress(Exception):
+                stream.flush()
+        for fd, saved_fd in saved:
+            os.dup2(saved_fd, fd)
+            os.close(saved_fd)
+        for relay in relays:
+            relay.join(RELAY_TIMEOUT)
+
+
+def _relay(read_end: int, name: str, output: Callable[[str, str], None]) -> None:
+    """Send the data read from the pipe read_end to output until end of file."""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    with open(read_end, 'rb', buffering=0) as pipe:
+        for chunk in iter(lambda: pipe.read(65536), b''):
+            data = decoder.decode(chunk)
+            if data:
+                output(name, data)
+    data = decoder.decode(b'', final=True)
+    if data:
+        output(name, data)
+
+
+def _exit_code(code) -> int:
+    """Exit status of a SystemExit code, like the interpreter does."""
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def _request(base_dir: str, request: dict, timeout: Optional[float] = None,
+             output: Optional[Callable[[str, str], None]] = None) -> Optional[dict]:
+    """
+    Send a request to the daemon of base_dir; None if no daemon answers.
+
+    The output messages received before the reply are passed to
+    output(stream, data).
+    """
+    path = socket_path(base_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(CONNECT_TIMEOUT)
+            client.connect(path)
+            client.settimeout(timeout)
+            client.sendall(json.dumps({'hop_version': hop_version(), **request}).encode('utf-8') + b'\n')
+            with client.makefile('rb') as reader:
+                for line in reader:
+                    message = json.loads(line.decode('utf-8'))
+                    if 'stream' not in message:
+                        return message
+                    if output is not None:
+                        output(message['stream'], message['data'])
+    except OSError:
+        return None
+    return None
+
+
+def ping(base_dir: str) -> bool:
+    """Returns whether a daemon of the same version serves base_dir."""
+    reply = _request(base_dir, {'ping': True}, timeout=CONNECT_TIMEOUT)
+    return reply is not None and 'error' not in reply
+
+
+def stop(base_dir: str) -> bool:
+    """Stop the daemon of base_dir. Returns False if no daemon answered."""
+    reply = _request(base_dir, {'stop': True}, timeout=CONNECT_TIMEOUT)
+    return reply is not None and 'error' not in reply
+
+
+def stdin_input(stdin) -> Optional[str]:
+    """
+    Content of stdin if it can be read without waiting, None otherwise.
+
+    Only a regular file or an input at end of file (/dev/null, a closed
+    empty pipe) is read: a terminal or a pipe still open (IDE task, CI
+    runner, subprocess.Popen(stdin=PIPE)) could block forever.
+    """
+    try:
+        fd = stdin.fileno()
+        mode = os.fstat(fd).st_mode
+    except (AttributeError, OSError, ValueError):
+        return None
+    if stat.S_ISREG(mode):
+        return stdin.read()
+    if stdin.isatty():
+        return None
+    if stat.S_ISCHR(mode):
+        return '' if os.fstat(fd).st_rdev == os.stat(os.devnull).st_rdev else None
+    if not select.select([fd], [], [], 0)[0]:
+        return None
+    try:
+        available = struct.unpack('i', fcntl.ioctl(fd, termios.FIONREAD, b'\0' * 4))[0]
+    except OSError:
+        return None
+    # Readable with nothing to read: the writer closed the pipe
+    return '' if available == 0 else None
+
+
+def forward(base_dir: str, argv: List[str], stdin: str = '') -> Optional[int]:
+    """
+    Run `half_orm dev <argv>` through the daemon of base_dir.
+
+    stdin is the input of the command. Its output is written to stdout and
+    stderr as it is produced.
+
+    Returns:
+        The exit code of the command, None if no daemon can run it (the
+        caller then runs the command itself)
+    """
+    started = False
+
+    def output(stream, data):
+        nonlocal started
+        started = True
+        target = sys.stdout if stream == 'stdout' else sys.stderr
+        target.write(data)
+        target.flush()
+
+    reply = _request(base_dir, {'argv': list(argv), 'cwd': os.getcwd(), 'stdin': stdin,
+                                'env': client_environment(),
+                                'color': sys.stdout.isatty() or None}, output=output)
+    if reply is None and started:
+        # The command ran (at least partly): it must not be run again here
+        sys.stderr.write("Connection to the half_orm dev daemon lost\n")
+        return 1
+    if reply is None or 'error' in reply:
+        return None
+    output('stdout', reply['stdout'])
+    output('stderr', reply['stderr'])
+    return reply['exit_code']
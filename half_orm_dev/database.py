@@ -7,6 +7,7 @@ import re
 import subprocess
 import sys
 from configparser import ConfigParser
+from contextlib import contextmanager
 
 from pathlib import Path
 from psycopg import OperationalError
@@ -14,6 +15,25 @@ from half_orm.model import Model, CONF_DIR
 from half_orm.model_errors import UnknownRelation
 from half_orm import utils
 from .utils import HOP_PATH
+from . import dump_restore
+
+# Meta patch of the half_orm_meta tables added after the half_orm_meta.sql
+# of the existing databases (hop_upgrade_timing, hop_batch_checkpoint).
+# Idempotent: applied again on each restore of a development database
+# (see Database.apply_meta_patch)
+META_PATCH_DIR = os.path.join(HOP_PATH, 'patches', '1', '0', '0')
+
+# Estimated size of the tables and materialized views of the user schemas
+# (see Database.relation_sizes)
+RELATION_SIZES_QUERY = """
+SELECT n.nspname || '.' || c.relname AS relation,
+       c.reltuples::float8 AS reltuples, c.relpages
+FROM pg_class c
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE c.relkind IN ('r', 'p', 'm')
+  AND n.nspname NOT IN ('pg_catalog', 'information_schema')
+  AND n.nspname NOT LIKE 'pg_toast%'
+"""
 
 class DatabaseError(Exception):
     pass
@@ -69,6 +89,94 @@ class DockerContainerNotRunningError(Exception):
     pass
 
 
+class DatabaseTransaction:
+    """
+    Explicit transaction on the connection of a halfORM model.
+
+    Used as a context manager: commits on success, rolls back on exception.
+    Steps that cannot run in a transaction block (psql and Python patch
+    files, which run on their own connection or commit their own batches,
+    CREATE INDEX CONCURRENTLY, ...) are
+    run with suspended(): the work done so far is committed, the step runs
+    in autocommit mode and a new transaction begins after it.
+
+    Unlike half_orm.transaction.Transaction, the outermost block is rolled
+    back when an exception is raised.
+
+    Examples:
+        with database.transaction() as transaction:
+            model.execute_query("ALTER TABLE ...")
+            with transaction.suspended("02_index.psql"):
+                database.execute_pg_command('psql', ...)
+            model.execute_query("UPDATE ...")
+    """
+
+    def __init__(self, model):
+        self.__model = model
+        self.__active = False
+        self.suspended_steps = []
+
+    def __enter__(self):
+        self.begin()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if not self.__active:
+            return False
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+    @property
+    def active(self) -> bool:
+        "True while a transaction is open"
+        return self.__active
+
+    def begin(self):
+        "Start a transaction: the next statement opens it."
+        self.__model._connection.autocommit = False
+        self.__active = True
+
+    def commit(self):
+        "Commit the transaction and return to autocommit mode."
+        connection = self.__model._connection
+        connection.commit()
+        connection.autocommit = True
+        self.__active = False
+
+    def rollback(self):
+        "Roll back the transaction and return to autocommit mode."
+        connection = self.__model._connection
+        connection.rollback()
+        connection.autocommit = True
+        self.__active = False
+
+    @contextmanager
+    def suspended(self, step: str):
+        """
+        Run a non-transactional step between two transactions.
+
+        The next transaction begins only when the step succeeds. When it
+        fails, the transaction stays closed (active is False, autocommit
+        mode): the work done before the step is committed and the failed
+        step ran outside any transaction, so there is nothing to roll back.
+
+        Args:
+            step: Name of the step, recorded in suspended_steps
+        """
+        self.commit()
+        self.suspended_steps.append(step)
+        try:
+            yield
+        except BaseException:
+            self.__model._connection.autocommit = True
+            raise
+        else:
+            self.begin()
+
+
 class Database:
     """Reads and writes the halfORM connection file
     """
@@ -203,6 +311,72 @@ class Database:
             changelog=changelog
         ).ho_insert()
 
+    def record_upgrade_timings(self, release, steps):
+        """
+        Store the timing summary of the files of a production release into
+        half_orm_meta.hop_upgrade_timing (one row per file).
+
+        Args:
+            release: Release version (X.Y.Z)
+            steps: Steps of a TimingReport (see file_executor.TimingReport)
+        """
+        if not steps:
+            return
+        if not self.has_meta_relation('hop_upgrade_timing'):
+            sys.stderr.write(
+                f"half_orm_meta.hop_upgrade_timing does not exist: timings of {release} "
+                f"not recorded (meta patch {META_PATCH_DIR} not applied)\n")
+            return
+        for step in steps:
+            statements = step['statements']
+            slowest = max(statements, key=lambda statement: statement['seconds'], default=None)
+            rows = [statement['rows'] for statement in statements if statement['rows'] is not None]
+            self.__model.execute_query(
+                "INSERT INTO half_orm_meta.hop_upgrade_timing "
+                "(release, patch_id, file, kind, statements, seconds, rows, "
+                "slowest_line, slowest_seconds) "
+                "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)",
+                (release, step['patch_id'], step['file'], step['kind'], len(statements),
+                 step['seconds'], sum(rows) if rows else None,
+                 slowest['line'] if slowest else None,
+                 slowest['seconds'] if slowest else None))
+
+    def has_meta_relation(self, name) -> bool:
+        """Whether the relation half_orm_meta.<name> exists (see META_PATCH_DIR)."""
+        return self.__model.execute_query(
+            "SELECT to_regclass(%s) IS NOT NULL AS exists", (f"half_orm_meta.{name}",)
+        ).fetchone()['exists']
+
+    def apply_meta_patch(self):
+        """
+        Create the half_orm_meta tables missing from a database initialized
+        with an older half_orm_meta.sql (files of META_PATCH_DIR, in order).
+        """
+        for sql_file in sorted(Path(META_PATCH_DIR).glob('*.sql')):
+            self.execute_pg_command('psql', '-d', self.__name, '-f', str(sql_file))
+
+    def relation_sizes(self):
+        """
+        Size of the user relations from the planner statistics (pg_class).
+
+        Returns:
+            dict: {"schema.table": {"reltuples": 18000000.0, "relpages": 230000}, ...}
+        """
+        return {
+            row['relation']: {'reltuples': row['reltuples'], 'relpages': row['relpages']}
+            for row in self.__model.execute_query(RELATION_SIZES_QUERY)
+        }
+
+    def transaction(self) -> DatabaseTransaction:
+        """
+        Explicit transaction on the connection of the model.
+
+        Examples:
+            with repo.database.transaction():
+                ...  # committed together or not at all
+        """
+        return DatabaseTransaction(self.__model)
+
     def _generate_schema_sql(self, version: str, model_dir: Path) -> Path:
         """
         Generate versioned schema SQL dump.
@@ -1353,6 +1527,49 @@ class Database:
         )
         return [line.strip() for line in result.stdout.splitlines() if line.strip()]
 
+    def list_dump_caches(self) -> list:
+        """Return the template databases caching the dumps of patch apply --from-dump."""
+        prefix = dump_restore.cache_prefix(self.__name)
+        result = self.execute_pg_command(
+            'psql', '-d', 'postgres', '-t', '-c',
+            f"SELECT datname FROM pg_database WHERE datname LIKE '{prefix}%' ORDER BY datname",
+            database_name='postgres'
+        )
+        # '_' is a LIKE wildcard: keep the exact prefix only
+        return [line.strip() for line in result.stdout.splitlines()
+                if line.strip().startswith(prefix)]
+
+    def database_size(self, database_name=None) -> int:
+        """Return the size in bytes (pg_database_size) of this database or of database_name."""
+        result = self.execute_pg_command(
+            'psql', '-d', 'postgres', '-t', '-c',
+            f"SELECT pg_database_size('{database_name or self.__name}')",
+            database_name='postgres'
+        )
+        return int(result.stdout.strip())
+
+    def data_directory(self):
+        """Return the data directory of the server, None if it is not readable locally.
+
+        The setting is only readable by superusers and pg_read_all_settings
+        members; the path is meaningless on this host when the server is
+        remote (host other than localhost or a Unix socket directory) or in
+        Docker mode.
+        """
+        params = self._get_connection_params()
+        host = params.get('host') or ''
+        local = not host or host.startswith('/') or host in ('localhost', '127.0.0.1', '::1')
+        if params.get('docker_container') or not local:
+            return None
+        try:
+            result = self.execute_pg_command(
+                'psql', '-d', 'postgres', '-t', '-c', "SHOW data_directory",
+                database_name='postgres'
+            )
+        except subprocess.CalledProcessError:
+            return None
+        return result.stdout.strip() or None
+
     def get_postgres_version(self) -> tuple:
         """
         Get PostgreSQL server version.
@@ -105,7 +105,7 @@ def with_dynamic_branch_lock(branch_getter, timeout_minutes: int = 30):
             finally:
                 if lock_tag and not _keep_lock_for_recovery:
                     # Normal completion or pre-sync failure: release lock and clean up.
-                    # Block SIGINT to prevent Ctrl+C from leaving an orphan lock tag.
+                    # Block SIGINT to prevent Ctrl+C from leaving an orphan lock.
                     interrupted = False
                     original_handler = signal.getsignal(signal.SIGINT)
                     signal.signal(signal.SIGINT, lambda s, f: setattr(
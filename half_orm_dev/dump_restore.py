@@ -0,0 +1,161 @@
+"""
+Restoring a pg_dump for patch apply --from-dump.
+
+The dump may be in any pg_dump format:
+    plain       SQL script, loaded with psql
+    custom      pg_dump -Fc, restored with pg_restore -j N
+    directory   pg_dump -Fd, restored with pg_restore -j N
+    tar         pg_dump -Ft, restored with pg_restore (no parallel restore)
+
+pg_restore runs with --no-owner --no-acl: the roles of the production
+database usually do not exist on a development server.
+
+When the role has the CREATEDB privilege, the dump is restored once into
+a template database, {db}_<db hash>_hop_dump_<key>, keyed by the SHA-256
+of the size and content of the dump ({db} truncated to fit the 63 bytes of
+an identifier, <db hash> telling apart the databases it truncates alike). The development database is then recreated from
+this template (CREATE DATABASE ... TEMPLATE, a file copy on the server),
+so the next applies against the same dump take seconds instead of a full
+restore. One dump is cached per database: caching a new dump drops the
+template of the previous one.
+"""
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple, Union
+
+from half_orm_dev.backup import format_size
+
+DUMP_FORMATS = ('plain', 'custom', 'directory', 'tar')
+
+# Parallel jobs of pg_restore by default
+DEFAULT_JOBS = min(os.cpu_count() or 1, 8)
+
+CACHE_INFIX = '_hop_dump_'
+
+# PostgreSQL identifiers are truncated to 63 bytes:
+# 32 (database) + 1 + 8 (database hash) + 10 (infix) + 12 (key)
+_DATABASE_PREFIX_LENGTH = 32
+_DATABASE_HASH_LENGTH = 8
+_KEY_LENGTH = 12
+_CHUNK = 1 << 20
+
+
+def dump_format(path: Union[str, Path]) -> str:
+    """
+    Format of the dump at path, from its content.
+
+    Examples:
+        dump_format('prod.dump')  # → 'custom' (starts with PGDMP)
+        dump_format('prod.dir')   # → 'directory' (contains toc.dat)
+    """
+    path = Path(path)
+    if path.is_dir():
+        if not (path / 'toc.dat').exists():
+            raise ValueError(f"{path} is not a pg_dump directory (no toc.dat)")
+        return 'directory'
+    with open(path, 'rb') as dump:
+        header = dump.read(512)
+    if header.startswith(b'PGDMP'):
+        return 'custom'
+    if header[257:262] == b'ustar':
+        return 'tar'
+    return 'plain'
+
+
+def dump_cache_key(path: Union[str, Path]) -> Tuple[str, int]:
+    """
+    SHA-256 and size in bytes of a dump (of all its files for a directory).
+
+    The size is part of the hashed content, so that a truncated copy of a
+    dump never matches its cache.
+    """
+    path = Path(path)
+    if path.is_dir():
+        files = sorted(child for child in path.rglob('*') if child.is_file())
+        names = [child.relative_to(path).as_posix() for child in files]
+    else:
+        files, names = [path], ['']
+    size = sum(child.stat().st_size for child in files)
+    digest = hashlib.sha256(str(size).encode())
+    for child, name in zip(files, names):
+        digest.update(name.encode())
+        with open(child, 'rb') as content:
+            for chunk in iter(lambda: content.read(_CHUNK), b''):
+                digest.update(chunk)
+    return digest.hexdigest(), size
+
+
+def cache_prefix(database_name: str) -> str:
+    """
+    Prefix of the template databases caching the dumps of database_name.
+
+    The name is truncated and followed by a hash of the full name: two
+    databases sharing their first characters get different prefixes, so
+    caching a dump for one never drops the template of the other.
+    """
+    truncated = database_name.encode()[:_DATABASE_PREFIX_LENGTH].decode(errors='ignore')
+    name_hash = hashlib.sha256(database_name.encode()).hexdigest()[:_DATABASE_HASH_LENGTH]
+    return f"{truncated}_{name_hash}{CACHE_INFIX}"
+
+
+def cache_name(database_name: str, digest: str) -> str:
+    """Template database caching the dump of SHA-256 digest: {db}_<db hash>_hop_dump_3f2a9c1b7d4e"""
+    return f"{cache_prefix(database_name)}{digest[:_KEY_LENGTH]}"
+
+
+def restore_args(fmt: str, database_name: str, path: Union[str, Path],
+                 jobs: int = DEFAULT_JOBS) -> List[str]:
+    """Command restoring the dump at path (of format fmt) into database_name."""
+    if fmt == 'plain':
+        return ['psql', '-d', database_name, '-f', str(path)]
+    args = ['pg_restore', '--no-owner', '--no-acl']
+    if fmt in ('custom', 'directory') and jobs > 1:
+        args += ['-j', str(jobs)]
+    return args + ['-d', database_name, str(path)]
+
+
+def restore_dump(database, path: Union[str, Path], reset: Callable[[], None],
+                 jobs: Optional[int] = None, use_cache: bool = True,
+                 report: Callable[[str], None] = print) -> dict:
+    """
+    Restore a dump into the database, through its template cache if possible.
+
+    Args:
+        database: half_orm_dev Database (its model connection is terminated
+            when the database is recreated from the cache: reconnect it)
+        path: Dump file or directory
+        reset: Empties the database before a direct restore (no cache)
+        jobs: Parallel jobs of pg_restore (default: DEFAULT_JOBS)
+        use_cache: Use and fill the template cache (requires CREATEDB)
+        report: Output of the progress messages
+
+    Returns:
+        dict: {'format': str, 'cache': template name or None, 'cache_hit': bool}
+    """
+    fmt = dump_format(path)
+    jobs = jobs or DEFAULT_JOBS
+    if not (use_cache and database.has_createdb_privilege()):
+        reset()
+        database.execute_pg_command(*restore_args(fmt, database.name, path, jobs))
+        return {'format': fmt, 'cache': None, 'cache_hit': False}
+
+    digest, size = dump_cache_key(path)
+    template = cache_name(database.name, digest)
+    cached = database.list_dump_caches()
+    if template not in cached:
+        for stale in cached:
+            database.drop_snapshot(stale)
+            report(f"  ✓ Dropped the cache of a previous dump ({stale})")
+        report(f"  ⏳ Restoring the {fmt} dump ({format_size(size)}) into the cache {template}...")
+        database.execute_pg_command('createdb', template, database_name='postgres')
+        try:
+            database.execute_pg_command(*restore_args(fmt, template, path, jobs),
+                                        database_name=template)
+        except Exception:
+            database.drop_snapshot(template)
+            raise
+    database.terminate_active_connections()
+    database.restore_from_snapshot(template)
+    return {'format': fmt, 'cache': template, 'cache_hit': template in cached}
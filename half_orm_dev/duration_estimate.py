@@ -0,0 +1,265 @@
+"""
+Duration estimate of a production upgrade.
+
+`half_orm dev upgrade --dry-run` estimates the time each patch of the
+upgrade path will take from the timing reports of the runs that already
+applied it (see file_executor.TimingReport): release validations, patch
+applies and the upgrades of a staging database.
+
+The successful run of a patch is chosen among the reports given with
+--timings-from (e.g. the upgrade of a staging database) first, then among
+the runs whose recorded sizes of the relations of the patch are the
+closest to the target database, the most recent on a tie. The time of
+each of its statements is scaled by the size of the relation it works on
+(pg_class.relpages) in the target database, relative to its size when the
+run was recorded:
+
+    seconds × target relpages / recorded relpages
+
+An upgrade of a copy of production is scaled by ~1. A run on a database
+restored from the schema (validation, patch apply) recorded empty tables:
+a fixed per-statement cost cannot be told from a cost proportional to the
+size of the table, so these statements keep their recorded time and are
+reported as unscaled (their duration is unknown). Statements that do not
+work on an existing relation, .psql and Python files are not scaled.
+
+The patches taking at least DOMINANT_SHARE of the estimate are flagged:
+they are the ones that will dominate the maintenance window.
+"""
+
+import json
+import math
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+DOMINANT_SHARE = 0.2
+
+_NAME = r'("(?:[^"]|"")+"|[\w$]+)'
+_RELATION = _NAME + r'(?:\s*\.\s*' + _NAME + r')?'
+_RELATION_STATEMENTS = re.compile(
+    r'^\s*(?:'
+    r'ALTER\s+TABLE(?:\s+IF\s+EXISTS)?(?:\s+ONLY)?'
+    r'|UPDATE(?:\s+ONLY)?'
+    r'|INSERT\s+INTO'
+    r'|DELETE\s+FROM(?:\s+ONLY)?'
+    r'|TRUNCATE(?:\s+TABLE)?(?:\s+ONLY)?'
+    r'|COPY'
+    r'|CLUSTER(?:\s+VERBOSE)?'
+    r'|VACUUM(?:\s+\([^)]*\))?(?:\s+(?:FULL|FREEZE|VERBOSE|ANALYZE))*'
+    r'|ANALYZE(?:\s+VERBOSE)?'
+    r'|REINDEX(?:\s+\([^)]*\))?\s+TABLE(?:\s+CONCURRENTLY)?'
+    r'|REFRESH\s+MATERIALIZED\s+VIEW(?:\s+CONCURRENTLY)?'
+    r'|CREATE\s+(?:UNIQUE\s+)?INDEX\b.*?\bON(?:\s+ONLY)?'
+    r')\s+' + _RELATION,
+    re.IGNORECASE | re.DOTALL)
+
+
+def _identifier(name: str) -> str:
+    if name.startswith('"'):
+        return name[1:-1].replace('""', '"')
+    return name.lower()
+
+
+def statement_relation(sql: str) -> Optional[str]:
+    """
+    The relation a statement works on ("schema.table"), None if unknown.
+
+    Unqualified names are resolved in the public schema.
+
+    Examples:
+        statement_relation('UPDATE "Users" SET ...')  # → 'public.Users'
+        statement_relation('CREATE INDEX CONCURRENTLY i ON blog.post (id)')  # → 'blog.post'
+    """
+    match = _RELATION_STATEMENTS.match(sql)
+    if match is None:
+        return None
+    first, second = match.groups()
+    if second is None:
+        return f"public.{_identifier(first)}"
+    return f"{_identifier(first)}.{_identifier(second)}"
+
+
+def load_reports(sources: Iterable[Union[str, Path]],
+                 preferred: Iterable[Union[str, Path]] = ()) -> List[Dict]:
+    """
+    Timing reports found in sources and preferred (report files or
+    directories of reports), the most recent first. The reports of preferred
+    ("preferred": True) are chosen first by estimate_patch. Unreadable files
+    are ignored.
+    """
+    reports = {}
+    for is_preferred, group in ((True, preferred), (False, sources)):
+        for source in group:
+            source = Path(source)
+            paths = sorted(source.glob('*.json')) if source.is_dir() else [source]
+            for path in paths:
+                if path.resolve() in reports:
+                    continue
+                try:
+                    with open(path, encoding='utf-8') as file:
+                        report = json.load(file)
+                except (OSError, ValueError):
+                    continue
+                if isinstance(report, dict) and isinstance(report.get('steps'), list):
+                    report['path'] = str(path)
+                    report['preferred'] = is_preferred
+                    reports[path.resolve()] = report
+    return sorted(reports.values(), key=lambda report: report.get('started') or 0, reverse=True)
+
+
+def _patch_steps(report: Dict, patch_id: str) -> List[Dict]:
+    steps = [step for step in report['steps'] if step.get('patch_id') == patch_id]
+    if steps and all(step.get('status') == 'ok' for step in steps):
+        return steps
+    return []
+
+
+def _pages(sizes: Dict, relation: str) -> int:
+    return sizes.get(relation, {}).get('relpages') or 0
+
+
+def _scale(relation: Optional[str], recorded: Dict, target: Dict) -> Optional[float]:
+    """Size ratio of relation in the target and in the run, None if the run had it empty."""
+    if relation is None or relation not in target:
+        return 1.0
+    target_pages, recorded_pages = _pages(target, relation), _pages(recorded, relation)
+    if not recorded_pages:
+        return None if target_pages else 1.0
+    return target_pages / recorded_pages
+
+
+def _size_distance(steps: List[Dict], recorded: Dict, target: Dict) -> float:
+    """How far the sizes recorded by a run are from the target, for the relations of steps."""
+    relations = {statement_relation(statement['sql'])
+                 for step in steps for statement in step.get('statements') or []}
+    return sum(abs(math.log1p(_pages(target, relation)) - math.log1p(_pages(recorded, relation)))
+               for relation in relations if relation in target)
+
+
+def estimate_patch(patch_id: str, reports: List[Dict], target_sizes: Dict) -> Optional[Dict]:
+    """
+    Estimated duration of a patch on the target database.
+
+    The run used is the first successful one of a preferred report, then
+    of the report whose sizes are the closest to target_sizes.
+
+    Args:
+        patch_id: Patch identifier
+        reports: Timing reports, the most recent first (see load_reports)
+        target_sizes: Relation sizes of the target database (see
+            Database.relation_sizes)
+
+    Returns:
+        dict: {"patch_id", "seconds", "recorded_seconds", "run", "slowest",
+        "unscaled"}, slowest being the statement with the longest estimate
+        and unscaled the statements on relations the run had empty (their
+        recorded time is counted, their duration on the target is
+        unknown); None if no report has a successful run of the patch
+    """
+    runs = [(report, steps) for report in reports
+            for steps in [_patch_steps(report, patch_id)] if steps]
+    if not runs:
+        return None
+    report, steps = min(runs, key=lambda run: (
+        not run[0].get('preferred'),
+        _size_distance(run[1], run[0].get('relations') or {}, target_sizes)))
+    recorded = report.get('relations') or {}
+    seconds = recorded_seconds = 0.0
+    slowest = None
+    unscaled = []
+    for step in steps:
+        step_seconds = step.get('seconds') or 0
+        recorded_seconds += step_seconds
+        statements = step.get('statements') or []
+        if not statements:
+            seconds += step_seconds
+            continue
+        for statement in statements:
+            relation = statement_relation(statement['sql'])
+            scale = _scale(relation, recorded, target_sizes)
+            estimated = statement['seconds'] * (scale if scale is not None else 1.0)
+            seconds += estimated
+            details = {'file': step['file'], 'line': statement['line'],
+                       'sql': statement['sql'], 'relation': relation, 'seconds': estimated}
+            if scale is None:
+                unscaled.append(details)
+            if slowest is None or estimated > slowest['seconds']:
+                slowest = details
+    return {'patch_id': patch_id, 'seconds': seconds,
+            'recorded_seconds': recorded_seconds, 'run': report.get('run'),
+            'slowest': slowest, 'unscaled': unscaled}
+
+
+def estimate(patches_by_release: Dict[str, List[str]], reports: List[Dict],
+             target_sizes: Dict) -> Dict:
+    """
+    Estimated duration of an upgrade path.
+
+    Args:
+        patches_by_release: {version: [patch_id, ...]} in application order
+        reports: Timing reports, the most recent first (see load_reports)
+        target_sizes: Relation sizes of the target database (see
+            Database.relation_sizes)
+
+    Returns:
+        dict: {"seconds": total of the estimated patches,
+               "releases": {version: seconds},
+               "patches": [{"release", "patch_id", "seconds", "recorded_seconds",
+                            "run", "slowest", "unscaled", "dominant"}, ...],
+               "unknown": [patch_id, ...]}  # no timing recorded
+    """
+    patches = []
+    unknown = []
+    releases = {}
+    for version, patch_ids in patches_by_release.items():
+        releases[version] = 0.0
+        for patch_id in patch_ids:
+            patch = estimate_patch(patch_id, reports, target_sizes)
+            if patch is None:
+                unknown.append(patch_id)
+                continue
+            patch['release'] = version
+            releases[version] += patch['seconds']
+            patches.append(patch)
+    total = sum(releases.values())
+    for patch in patches:
+        patch['dominant'] = total > 0 and patch['seconds'] >= DOMINANT_SHARE * total
+    return {'seconds': total, 'releases': releases, 'patches': patches, 'unknown': unknown}
+
+
+def format_duration(seconds: float) -> str:
+    """Human readable duration: 0.4s, 12s, 7m05s, 2h14m."""
+    if seconds < 10:
+        return f"{seconds:.1f}s"
+    seconds = round(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+
+
+def summary(estimation: Dict) -> List[str]:
+    """One line per dominant patch, per patch with unscaled statements and per patch without timing."""
+    lines = []
+    total = estimation['seconds']
+    for patch in sorted(estimation['patches'], key=lambda patch: patch['seconds'], reverse=True):
+        if not patch['dominant']:
+            continue
+        line = (f"{patch['release']}/{patch['patch_id']}: ~{format_duration(patch['seconds'])} "
+                f"({patch['seconds'] / total:.0%}, {format_duration(patch['recorded_seconds'])} "
+                f"in {patch['run']})")
+        slowest = patch['slowest']
+        if slowest:
+            line += f"\n    {slowest['file']}:{slowest['line']}  {slowest['sql']}"
+        lines.append(line)
+    for patch in estimation['patches']:
+        if patch['unscaled']:
+            relations = sorted({statement['relation'] for statement in patch['unscaled']})
+            lines.append(
+                f"{patch['release']}/{patch['patch_id']}: {len(patch['unscaled'])} unscaled "
+                f"statement(s), {', '.join(relations)} empty in {patch['run']}: duration unknown")
+    if estimation['unknown']:
+        lines.append(f"no timing recorded for: {', '.join(estimation['unknown'])}")
+    return lines
@@ -7,10 +7,34 @@ and bootstrap initialization.
 
 import ast
 import importlib.util
+import json
+import re
 import subprocess
 import sys
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Union
+
+from psycopg.pq import TransactionStatus
+
+from half_orm_dev.database import DatabaseTransaction
+from half_orm_dev import concurrent_index
+from half_orm_dev.utils import make_ignored_dir
+
+
+# Header annotation of the SQL files that must run outside a transaction
+# (CREATE INDEX CONCURRENTLY, VACUUM, ...), e.g. "-- hop: no-transaction"
+NO_TRANSACTION_MARKER = re.compile(r'^--\s*hop:\s*no-transaction\b', re.IGNORECASE)
+
+# Timing reports of the patch applications, in .hop/<TIMINGS_DIR>/
+TIMINGS_DIR = 'timings'
+
+_COPY_FROM_STDIN = re.compile(r'^COPY\b.*\bFROM\s+STDIN\b', re.IGNORECASE | re.DOTALL)
+_DOLLAR_TAG = re.compile(r'\$(?:[A-Za-z_][A-Za-z0-9_]*)?\$')
+_SQL_PREVIEW_LENGTH = 200
+_CONCURRENTLY = re.compile(r'\bCONCURRENTLY\b', re.IGNORECASE)
 
 
 class FileExecutionError(Exception):
@@ -18,13 +42,312 @@ class FileExecutionError(Exception):
     pass
 
 
-def execute_sql_file(file_path: Path, database_model) -> None:
+@dataclass
+class SqlStatement:
+    """
+    A statement of a SQL file.
+
+    Attributes:
+        sql: Statement text, up to and including its semicolon
+        line: Line of the file where the statement starts (1-based)
+        copy_data: Data lines of a COPY ... FROM STDIN statement (up to the
+            "\\." line, excluded), None for the other statements
+    """
+    sql: str
+    line: int
+    copy_data: Optional[str] = None
+
+    @property
+    def preview(self) -> str:
+        """The statement on one line, truncated."""
+        text = ' '.join(self.sql.split())
+        if len(text) > _SQL_PREVIEW_LENGTH:
+            text = text[:_SQL_PREVIEW_LENGTH - 3] + '...'
+        return text
+
+
+def split_sql_statements(sql: str) -> List[SqlStatement]:
+    """
+    Split SQL into statements.
+
+    Semicolons in comments, quoted strings and identifiers, E'' strings and
+    dollar-quoted bodies ($$...$$, $tag$...$tag$) do not end a statement.
+    The data of a COPY ... FROM STDIN statement, up to the "\\." line, is
+    attached to it. Comments between statements are dropped.
+    """
+    statements = []
+    length = len(sql)
+    position = 0
+    start = None  # first significant character of the current statement
+
+    def add_statement(end):
+        nonlocal start
+        text = sql[start:end].strip()
+        statements.append(SqlStatement(text, sql.count('\n', 0, start) + 1))
+        start = None
+
+    while position < length:
+        char = sql[position]
+        if sql.startswith('--', position):
+            newline = sql.find('\n', position)
+            position = length if newline < 0 else newline + 1
+            continue
+        if sql.startswith('/*', position):
+            depth, position = 1, position + 2
+            while position < length and depth:
+                if sql.startswith('/*', position):
+                    depth, position = depth + 1, position + 2
+                elif sql.startswith('*/', position):
+                    depth, position = depth - 1, position + 2
+                else:
+                    position += 1
+            continue
+        if char.isspace():
+            position += 1
+            continue
+
+        if start is None:
+            start = position
+        if char == ';':
+            add_statement(position + 1)
+            position += 1
+            statement = statements[-1]
+            if _COPY_FROM_STDIN.match(statement.sql):
+                position = _read_copy_data(sql, position, statement)
+        elif char in ("'", '"'):
+            backslash_escapes = (
+                char == "'" and position > 0 and sql[position - 1] in 'eE'
+                and (position == 1 or not (sql[position - 2].isalnum() or sql[position - 2] == '_')))
+            position = _skip_quoted(sql, position, char, backslash_escapes)
+        elif char == '$' and not (position > 0 and (sql[position - 1].isalnum()
+                                                    or sql[position - 1] in '_$')):
+            match = _DOLLAR_TAG.match(sql, position)
+            if match:
+                end = sql.find(match.group(), match.end())
+                position = length if end < 0 else end + len(match.group())
+            else:
+                position += 1
+        else:
+            position += 1
+
+    if start is not None:
+        add_statement(length)
+    return statements
+
+
+def _skip_quoted(sql: str, position: int, quote: str, backslash_escapes: bool) -> int:
+    """Position after the quoted string or identifier starting at position."""
+    position += 1
+    while position < len(sql):
+        char = sql[position]
+        if backslash_escapes and char == '\\':
+            position += 2
+        elif char == quote:
+            if sql.startswith(quote * 2, position):
+                position += 2
+            else:
+                return position + 1
+        else:
+            position += 1
+    return position
+
+
+def _read_copy_data(sql: str, position: int, statement: SqlStatement) -> int:
+    """Attach the COPY data following position to statement, return the position after it."""
+    newline = sql.find('\n', position)
+    if newline < 0:
+        statement.copy_data = ''
+        return len(sql)
+    data_start = newline + 1
+    lines = sql[data_start:].split('\n')
+    consumed = 0
+    for index, line in enumerate(lines):
+        if line.rstrip('\r') == '\\.':
+            statement.copy_data = '\n'.join(lines[:index]) + ('\n' if index else '')
+            return data_start + consumed + len(line) + 1
+        consumed += len(line) + 1
+    statement.copy_data = sql[data_start:]
+    return len(sql)
+
+
+def execute_statement(cursor, statement: Union[SqlStatement, str]) -> Optional[int]:
+    """
+    Execute a statement on a psycopg cursor.
+
+    Returns:
+        Number of rows affected (None when not applicable)
+    """
+    if isinstance(statement, str):
+        cursor.execute(statement)
+    elif statement.copy_data is not None:
+        with cursor.copy(statement.sql) as copy:
+            copy.write(statement.copy_data)
+    else:
+        cursor.execute(statement.sql)
+    return _rowcount(cursor)
+
+
+def _rowcount(cursor) -> Optional[int]:
+    rowcount = getattr(cursor, 'rowcount', -1)
+    return rowcount if isinstance(rowcount, int) and rowcount >= 0 else None
+
+
+class TimingReport:
+    """
+    Wall time and affected rows of the statements executed by a run
+    (patch apply, release validation, production upgrade).
+
+    The steps are the patch files, in execution order; the statements of
+    the SQL files are executed and timed one by one. relations holds the
+    sizes of the user relations before the run, when known (see
+    Database.relation_sizes). The report is written to
+    .hop/timings/<run>-<timestamp>.json (the directory is ignored by git).
+
+    Examples:
+        timings = TimingReport("upgrade-1.3.5-to-1.3.7")
+        patch_mgr.apply_patch_files("456-auth", model, timings=timings)
+        timings.slowest(3)
+        # → [{"patch_id": "456-auth", "file": "01_users.sql", "line": 12,
+        #     "sql": "UPDATE users SET ...", "seconds": 2412.3, "rows": 18000000}, ...]
+        timings.save(repo.base_dir)
+    """
+
+    def __init__(self, run: str):
+        self.run = run
+        self.started = time.time()
+        self.release: Optional[str] = None
+        self.steps: List[Dict] = []
+        self.relations: Dict[str, Dict] = {}
+
+    @contextmanager
+    def step(self, patch_id: str, file: str, kind: str = 'sql'):
+        """
+        Time a patch file.
+
+        Yields:
+            list: Statement records of the file (see execute_sql), empty for
+            the .psql and Python files
+        """
+        step = {"release": self.release, "patch_id": patch_id, "file": file, "kind": kind,
+                "status": "ok", "seconds": None, "statements": []}
+        self.steps.append(step)
+        start = time.perf_counter()
+        try:
+            yield step["statements"]
+        except BaseException:
+            step["status"] = "failed"
+            raise
+        finally:
+            step["seconds"] = round(time.perf_counter() - start, 6)
+
+    def release_steps(self, release: str) -> List[Dict]:
+        """Steps recorded while self.release was release."""
+        return [step for step in self.steps if step["release"] == release]
+
+    def patch_seconds(self) -> Dict[str, float]:
+        """Total wall time of each patch."""
+        totals = {}
+        for step in self.steps:
+            totals[step["patch_id"]] = totals.get(step["patch_id"], 0) + (step["seconds"] or 0)
+        return totals
+
+    def slowest(self, count: int = 5) -> List[Dict]:
+        """The count slowest statements, with their patch and file."""
+        statements = [
+            {"patch_id": step["patch_id"], "file": step["file"], **statement}
+            for step in self.steps for statement in step["statements"]
+        ]
+        statements.sort(key=lambda statement: statement["seconds"], reverse=True)
+        return statements[:count]
+
+    def to_dict(self) -> Dict:
+        return {
+            "run": self.run,
+            "started": self.started,
+            "seconds": round(sum(step["seconds"] or 0 for step in self.steps), 6),
+            "patches": self.patch_seconds(),
+            "steps": self.steps,
+            "relations": self.relations,
+        }
+
+    @staticmethod
+    def format_statements(statements: List[Dict]) -> List[str]:
+        """One line per statement of slowest(): seconds, location, rows and SQL."""
+        lines = []
+        for statement in statements:
+            rows = f"{statement['rows']} rows  " if statement['rows'] is not None else ''
+            lines.append(f"{statement['seconds']:9.2f}s  {statement['patch_id']}/"
+                         f"{statement['file']}:{statement['line']}  {rows}{statement['sql']}")
+        return lines
+
+    def save(self, base_dir: Union[str, Path]) -> Optional[Path]:
+        """
+        Write the report to .hop/timings/.
+
+        The name is stamped to the millisecond and never overwrites the
+        report of another run: <run>-20261018T101500.123[-N].json
+
+        Returns:
+            Path of the report, None if it could not be written (a timing
+            report never fails a run)
+        """
+        stamp = (time.strftime('%Y%m%dT%H%M%S', time.localtime(self.started))
+                 + f".{int(self.started * 1000) % 1000:03d}")
+        try:
+            directory = make_ignored_dir(Path(base_dir) / '.hop' / TIMINGS_DIR)
+            suffix = 0
+            while True:
+                path = directory / f"{self.run}-{stamp}{f'-{suffix}' if suffix else ''}.json"
+                try:
+                    file = open(path, 'x', encoding='utf-8')
+                except FileExistsError:
+                    suffix += 1
+                    continue
+                with file:
+                    json.dump(self.to_dict(), file, indent=1)
+                return path
+        except OSError:
+            return None
+
+
+def sql_is_transactional(lines: Iterable[str]) -> bool:
+    """
+    Return False if the SQL lines must run outside a transaction.
+
+    The annotation "-- hop: no-transaction" is looked for in the comment
+    lines at the top.
+    """
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if not line.startswith('--'):
+            return True
+        if NO_TRANSACTION_MARKER.match(line):
+            return False
+    return True
+
+
+def is_transactional(file_path: Path) -> bool:
+    """Return False if the SQL file must run outside a transaction."""
+    try:
+        with open(file_path, encoding='utf-8') as file:
+            return sql_is_transactional(file)
+    except OSError:
+        return True
+
+
+def execute_sql_file(file_path: Path, database_model, lock_retry=None,
+                     timings: Optional[List[Dict]] = None) -> None:
     """
     Execute SQL file against database using halfORM Model.
 
     Args:
         file_path: Path to SQL file
         database_model: halfORM Model instance
+        lock_retry: Optional LockRetryPolicy (lock_timeout and retries)
+        timings: Optional list receiving the timing of each statement
+            (see execute_sql)
 
     Raises:
         FileExecutionError: If SQL execution fails
@@ -36,12 +359,83 @@ def execute_sql_file(file_path: Path, database_model) -> None:
         if not sql_content.strip():
             return
 
-        database_model.execute_query(sql_content)
+        execute_sql(sql_content, database_model, lock_retry, timings, label=file_path.name)
 
     except Exception as e:
         raise FileExecutionError(f"SQL execution failed in {file_path.name}: {e}") from e
 
 
+def execute_sql(sql_content: str, database_model, lock_retry=None,
+                timings: Optional[List[Dict]] = None, label: str = 'SQL') -> None:
+    """
+    Execute SQL on the connection of a halfORM Model.
+
+    Without timings the SQL is sent at once. With timings it is split into
+    statements (see split_sql_statements), executed one by one and
+    {"line", "sql", "seconds", "rows"} is appended to timings for each of
+    them ("error" is added for the failing one). In autocommit mode the
+    statements of transactional SQL still run in one transaction.
+
+    Outside a transaction, CREATE INDEX CONCURRENTLY and REINDEX ...
+    CONCURRENTLY are executed one by one, with progress polling and retry
+    of the invalid indexes (see half_orm_dev.concurrent_index), timed or
+    not; their record gets the number of "attempts".
+
+    Args:
+        sql_content: SQL to execute
+        database_model: halfORM Model instance
+        lock_retry: Optional LockRetryPolicy (lock_timeout and retries,
+            applied to each statement when timed)
+        timings: Optional list receiving the timing of each statement
+        label: Name of the SQL in the messages (e.g. the file name)
+    """
+    if timings is None:
+        if not _CONCURRENTLY.search(sql_content):
+            if lock_retry is not None:
+                lock_retry.execute(database_model, sql_content, label=label)
+            else:
+                database_model.execute_query(sql_content)
+            return
+        timings = []
+
+    statements = split_sql_statements(sql_content)
+    transaction = nullcontext()
+    if (database_model._connection.autocommit and len(statements) > 1
+            and sql_is_transactional(sql_content.splitlines())):
+        transaction = DatabaseTransaction(database_model)
+    with transaction:
+        for statement in statements:
+            record = {"line": statement.line, "sql": statement.preview,
+                      "seconds": None, "rows": None}
+            timings.append(record)
+            start = time.perf_counter()
+            try:
+                if (concurrent_index.is_concurrent_index(statement.sql)
+                        and _outside_transaction(database_model._connection)):
+                    record["attempts"] = concurrent_index.execute_concurrently(
+                        database_model, statement.sql, label=f"{label}:{statement.line}",
+                        lock_retry=lock_retry)
+                    rows = None
+                elif lock_retry is not None:
+                    rows = lock_retry.execute(database_model, statement,
+                                              label=f"{label}:{statement.line}")
+                elif statement.copy_data is not None:
+                    with database_model._connection.cursor() as cursor:
+                        rows = execute_statement(cursor, statement)
+                else:
+                    rows = _rowcount(database_model.execute_query(statement.sql))
+            except Exception as e:
+                record["error"] = str(e).strip()
+                raise
+            finally:
+                record["seconds"] = round(time.perf_counter() - start, 6)
+            record["rows"] = rows
+
+
+def _outside_transaction(connection) -> bool:
+    return connection.autocommit and connection.info.transaction_status == TransactionStatus.IDLE
+
+
 def execute_sql_file_psql(file_path: Path, database, database_name: str) -> None:
     """
     Execute SQL file using psql command.
@@ -111,9 +505,9 @@ def _has_run_entrypoint(file_path: Path) -> bool:
     )
 
 
-def execute_python_bootstrap(file_path: Path, model, cwd: Optional[Path] = None) -> str:
+def execute_python_script(file_path: Path, model, cwd: Optional[Path] = None) -> str:
     """
-    Execute a Python bootstrap script.
+    Execute a Python patch or bootstrap script.
 
     Fast path — if the script defines a top-level run(model) function it is
     loaded in-process via importlib and called with the live database model,
@@ -123,7 +517,7 @@ def execute_python_bootstrap(file_path: Path, model, cwd: Optional[Path] = None)
     (backwards-compatible with pre-API scripts).
 
     Args:
-        file_path: Path to Python bootstrap script
+        file_path: Path to Python script
         model: halfORM Model instance (shared database connection)
         cwd: Working directory for execution (default: file's parent)
 
@@ -140,7 +534,7 @@ def execute_python_bootstrap(file_path: Path, model, cwd: Optional[Path] = None)
     if not _has_run_entrypoint(file_path):
         return execute_python_file(file_path, cwd)
 
-    module_name = f"_hop_bootstrap_{file_path.stem.replace('-', '_').replace('.', '_')}"
+    module_name = f"_hop_script_{file_path.stem.replace('-', '_').replace('.', '_')}"
     spec = importlib.util.spec_from_file_location(module_name, file_path)
     module = importlib.util.module_from_spec(spec)
 
@@ -165,6 +559,10 @@ def execute_python_bootstrap(file_path: Path, model, cwd: Optional[Path] = None)
         sys.modules.pop(module_name, None)
 
 
+# Bootstrap scripts were the first to get the run(model) entry point
+execute_python_bootstrap = execute_python_script
+
+
 def execute_bootstrap_files(bootstrap_dir: Path, model) -> None:
     """
     Execute all bootstrap files in alphabetic order.
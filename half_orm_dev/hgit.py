@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import os
+import platform
 import sys
 import subprocess
 import fnmatch
@@ -17,6 +18,9 @@ from pathlib import Path
 
 from half_orm import utils
 
+# Branch locks: refs/hop-locks/<branch> on origin
+LOCK_REF_PREFIX = 'refs/hop-locks/'
+
 class HGit:
     "Manages the git operations on the repo."
     def __init__(self, repo=None):
@@ -80,7 +84,9 @@ class HGit:
             )
 
         self.__current_branch = self.branch
-        self.__snapshot = self.capture_branches_snapshot()
+        # Local refs only: Repo.check_and_update() fetches when needed
+        # and refreshes the snapshot afterwards.
+        self.__snapshot = self.capture_branches_snapshot(fetch=False)
 
     def __str__(self):
         res = ['[Git]']
@@ -301,15 +307,19 @@ class HGit:
         """Return the last stored branches snapshot."""
         return self.__snapshot
 
-    def update_snapshot(self) -> None:
+    def update_snapshot(self, fetch: bool = True) -> None:
         """Refresh the stored snapshot to reflect current branch HEADs."""
-        self.__snapshot = self.capture_branches_snapshot()
+        self.__snapshot = self.capture_branches_snapshot(fetch=fetch)
+
+    def capture_branches_snapshot(self, fetch: bool = True) -> dict:
+        """Return {branch_name: HEAD_SHA} for all active local branches.
 
-    def capture_branches_snapshot(self) -> dict:
-        """Return {branch_name: HEAD_SHA} for all active local branches."""
+        With fetch=False, the remote state is read from the local
+        remote-tracking refs instead of fetching origin first.
+        """
         snapshot = {}
         try:
-            branches_status = self.get_active_branches_status()
+            branches_status = self.get_active_branches_status(fetch=fetch)
         except Exception:
             return snapshot
 
@@ -445,6 +455,41 @@ class HGit:
         # Push branch with or without upstream tracking
         origin.push(branch_name, set_upstream=set_upstream)
 
+    def push_branches(
+        self, branches: List[str], atomic: bool = True, set_upstream: bool = True,
+        remote: str = 'origin'
+    ) -> None:
+        """
+        Push several branches to remote with a single `git push`.
+
+        One connection and one run of the server-side hooks for all the
+        branches. With atomic=True (`git push --atomic`), either every ref
+        is updated on the remote or none is.
+
+        Args:
+            branches: Branch names to push (duplicates are pushed once)
+            atomic: If True, all-or-nothing update of the remote refs
+            set_upstream: If True, set upstream tracking with --set-upstream
+            remote: Remote name (default: 'origin')
+
+        Raises:
+            GitCommandError: If the push fails (with atomic=True, no branch
+                was updated on the remote)
+
+        Examples:
+            # After sync_hop_to_active_branches(defer_push=True, modified_branches=branches)
+            hgit.push_branches(['ho-release/0.17.0'] + branches)
+        """
+        branches = list(dict.fromkeys(branches))
+        if not branches:
+            return
+        options = []
+        if atomic:
+            options.append('--atomic')
+        if set_upstream:
+            options.append('--set-upstream')
+        self.__git_repo.git.push(*options, remote, *branches)
+
     def read_file_at_ref(self, ref: str, relative_path: str) -> str:
         """
         Read a file's content from a git ref (tag or commit) without checking it out.
@@ -461,6 +506,83 @@ class HGit:
         except Exception:
             return ''
 
+    def list_tree(self, ref: str, *paths: str) -> dict:
+        """
+        List the files under `paths` at a git ref without checking it out.
+
+        Args:
+            ref: Git ref (branch, tag or commit SHA)
+            *paths: Paths relative to repo root (e.g., ".hop/"); all files if omitted
+
+        Returns:
+            dict {path: (mode, blob_sha)}. Paths missing at ref are ignored.
+
+        Examples:
+            hgit.list_tree('ho-prod', '.hop/')
+            # → {'.hop/config': ('100644', 'a1b2...'), ...}
+        """
+        output = self.__git_repo.git.ls_tree('-r', '-z', '--full-tree', ref, '--', *paths)
+        entries = {}
+        for record in output.split('\0'):
+            if not record:
+                continue
+            meta, path = record.split('\t', 1)
+            mode, _, sha = meta.split()
+            entries[path] = (mode, sha)
+        return entries
+
+    def commit_tree_update(
+        self, branch: str, base: str, changes: dict, message: str, old_sha: str = None
+    ) -> Optional[str]:
+        """
+        Commit file changes on top of `base` and move `branch` to the new commit.
+
+        Uses git plumbing only (read-tree/update-index/write-tree in a
+        temporary index, then commit-tree and update-ref): the working tree,
+        the index and HEAD are left untouched and no hook runs.
+
+        Args:
+            branch: Local branch to update (e.g., "ho-patch/456-user-auth")
+            base: Parent commit of the new commit
+            changes: {path: (mode, blob_sha)} to add or replace, {path: None} to remove
+            message: Commit message
+            old_sha: Expected current SHA of `branch` (default: base). update-ref
+                fails if the branch moved meanwhile.
+
+        Returns:
+            SHA of the new commit, or None if `changes` leave the tree of
+            `base` unchanged (branch not moved).
+
+        Raises:
+            GitCommandError: If a plumbing command fails or the branch moved
+        """
+        git_cmd = self.__git_repo.git
+        index_file = os.path.join(self.__git_repo.git_dir, f'hop-index-{os.getpid()}')
+        removed = [path for path, entry in changes.items() if entry is None]
+        cacheinfo = []
+        for path, entry in changes.items():
+            if entry is not None:
+                cacheinfo += ['--cacheinfo', f'{entry[0]},{entry[1]},{path}']
+        try:
+            with git_cmd.custom_environment(GIT_INDEX_FILE=index_file):
+                git_cmd.read_tree(base)
+                if removed:
+                    git_cmd.update_index('--force-remove', '--', *removed)
+                if cacheinfo:
+                    git_cmd.update_index('--add', *cacheinfo)
+                tree = git_cmd.write_tree()
+        finally:
+            if os.path.exists(index_file):
+                os.unlink(index_file)
+
+        if tree == git_cmd.rev_parse(f'{base}^{{tree}}'):
+            return None
+        new_sha = git_cmd.commit_tree(tree, '-p', base, '-m', message)
+        git_cmd.update_ref(
+            '-m', message.splitlines()[0], f'refs/heads/{branch}', new_sha, old_sha or base
+        )
+        return new_sha
+
     def fetch_tags(self) -> None:
         """
         Fetch all tags from remote.
@@ -559,6 +681,22 @@ class HGit:
             origin.fetch(prune=True)
         finally:
             marker.unlink(missing_ok=True)
+        self._record_fetch()
+
+    def _record_fetch(self) -> None:
+        """
+        Record the time of a successful fetch in .hop/local_config.
+
+        Repo.check_and_update() skips fetching origin while this timestamp
+        is within the configured freshness window.
+        """
+        local_config = getattr(self.__repo, 'local_config', None)
+        if local_config is None:
+            return
+        try:
+            local_config.last_fetch = time.time()
+        except OSError:
+            pass  # Read-only checkout: the next check just fetches again
 
     def setup_production_branches(self) -> None:
         """
@@ -944,172 +1082,251 @@ class HGit:
             # Merge base different from both → diverged
             return (False, "diverged")
 
+    @staticmethod
+    def lock_ref(branch_name: str) -> str:
+        """Ref holding the lock on branch_name (e.g., "refs/hop-locks/ho-prod")."""
+        return f"{LOCK_REF_PREFIX}{branch_name}"
+
+    def _new_lock_commit(self, branch_name: str, parent: str = None) -> str:
+        """
+        Create the lock payload: a commit on the empty tree whose message
+        records the branch, the creation time (UTC ms) and the owner.
+        """
+        git_cmd = self.__git_repo.git
+        empty_tree = git_cmd.hash_object('-t', 'tree', os.devnull)
+        payload = (
+            f"hop lock on {branch_name}\n\n"
+            f"created: {int(time.time() * 1000)}\n"
+            f"owner: {os.environ.get('USER', 'unknown')}@{platform.node()} pid {os.getpid()}"
+        )
+        args = [empty_tree, '-m', payload]
+        if parent:
+            args += ['-p', parent]
+        return git_cmd.commit_tree(*args)
+
+    @staticmethod
+    def _lock_created_ms(payload: str) -> Optional[int]:
+        """Creation time (UTC ms) recorded in a lock payload, None if missing."""
+        match = re.search(r'^created: (\d+)$', payload, re.MULTILINE)
+        return int(match.group(1)) if match else None
+
+    @staticmethod
+    def _lock_age_minutes(created_ms: int) -> float:
+        lock_time = datetime.fromtimestamp(created_ms / 1000.0, tz=timezone.utc)
+        return (datetime.now(timezone.utc) - lock_time).total_seconds() / 60
+
+    def _push_lock(self, lock_ref: str, new_sha: str, expected_sha: str = '') -> None:
+        """
+        Compare-and-swap the lock ref on origin in one push.
+
+        The push only succeeds if origin's lock_ref is still expected_sha
+        ('' = must not exist). new_sha '' deletes the ref.
+        """
+        self.__git_repo.git.push(
+            f'--force-with-lease={lock_ref}:{expected_sha}', 'origin', f'{new_sha}:{lock_ref}'
+        )
+
+    def _read_remote_lock(self, lock_ref: str) -> Optional[tuple]:
+        """
+        Fetch the lock held on origin, if any.
+
+        Returns:
+            (sha, payload) or None if origin has no such lock
+        """
+        git_cmd = self.__git_repo.git
+        try:
+            git_cmd.fetch('--no-tags', 'origin', lock_ref)
+        except GitCommandError as e:
+            if "couldn't find remote ref" in str(e):
+                return None
+            raise
+        sha = git_cmd.rev_parse('FETCH_HEAD')
+        return sha, git_cmd.log('-1', '--format=%B', sha)
+
     def acquire_branch_lock(self, branch_name: str, timeout_minutes: int = 30) -> str:
         """
-        Acquire exclusive lock on branch using Git tag.
+        Acquire exclusive lock on branch using a dedicated ref.
 
-        Creates lock tag with format: lock-{branch}-{utc_timestamp_ms}
-        Only one process can hold lock on a branch at a time.
+        The lock is the ref refs/hop-locks/{branch} on origin, pointing to a
+        commit whose message records its creation time and owner. It is
+        created with a single compare-and-swap push
+        (`--force-with-lease=<ref>:`, i.e. only if the ref does not exist):
+        one network round-trip when the branch is free.
 
-        Automatically cleans up stale locks (older than timeout).
+        A stale lock (older than timeout) is taken over with a second
+        compare-and-swap push against the stale lock SHA.
 
         Args:
             branch_name: Branch to lock (e.g., "ho-prod", "ho-patch/456")
             timeout_minutes: Consider lock stale after this many minutes (default: 30)
 
         Returns:
-            Lock tag name (e.g., "lock-ho-prod-1704123456789")
+            Lock identifier "<lock ref>:<sha>"
+            (e.g., "refs/hop-locks/ho-prod:3f2a...")
 
         Raises:
             GitCommandError: If lock acquisition fails
 
         Examples:
             # Lock ho-prod for release operations
-            lock_tag = hgit.acquire_branch_lock("ho-prod")
+            lock = hgit.acquire_branch_lock("ho-prod")
             try:
                 # ... do work on ho-prod ...
             finally:
-                hgit.release_branch_lock(lock_tag)
+                hgit.release_branch_lock(lock)
 
             # Lock with custom timeout
-            lock_tag = hgit.acquire_branch_lock("ho-prod", timeout_minutes=60)
+            lock = hgit.acquire_branch_lock("ho-prod", timeout_minutes=60)
         """
+        lock_ref = self.lock_ref(branch_name)
+        lock_sha = self._new_lock_commit(branch_name)
 
-        # Sanitize branch name for tag (replace / with -)
-        safe_branch_name = branch_name.replace('/', '-')
-
-        # Fetch latest tags
-        self.fetch_tags()
-
-        # Check for existing locks on this branch
-        lock_pattern = f"lock-{safe_branch_name}-*"
-        existing_locks = self.list_tags(pattern=lock_pattern)
-
-        if existing_locks:
-            lock_name = existing_locks[0]
-
-            # Check if the lock tag still exists on remote.
-            # A local-only tag is an orphan left by a failed release_branch_lock
-            # and must be cleaned up immediately regardless of age.
-            remote_ref = self.__git_repo.git.ls_remote(
-                '--tags', 'origin', f'refs/tags/{lock_name}'
-            ).strip()
-
-            if not remote_ref:
-                # Orphaned local tag — remote was already deleted
-                print(f"⚠️  Cleaning up orphaned local lock tag: {lock_name}")
-                try:
-                    self.delete_local_tag(lock_name)
-                except GitCommandError as e:
-                    print(f"Warning: Failed to delete orphaned local lock: {e}")
-                # Continue to create new lock
-            else:
-                # Extract timestamp from first lock
-                match = re.search(r'-(\d+)$', lock_name)
-                if match:
-                    lock_timestamp_ms = int(match.group(1))
-                    lock_time = datetime.fromtimestamp(lock_timestamp_ms / 1000.0, tz=timezone.utc)
-                    current_time = datetime.now(timezone.utc)
-
-                    # Check if lock is stale
-                    age_minutes = (current_time - lock_time).total_seconds() / 60
-
-                    if age_minutes > timeout_minutes:
-                        # Stale lock - delete it
-                        print(f"⚠️  Cleaning up stale lock: {lock_name} (age: {age_minutes:.1f} min)")
-                        try:
-                            self.__git_repo.git.push("origin", "--delete", lock_name)
-                            self.delete_local_tag(lock_name)
-                        except GitCommandError as e:
-                            print(f"Warning: Failed to delete stale lock: {e}")
-                        # Continue to create new lock
-                    else:
-                        # Recent lock - respect it
-                        raise GitCommandError(
-                            f"Branch '{branch_name}' is locked by another process.\n"
-                            f"Lock: {lock_name}\n"
-                            f"Age: {age_minutes:.1f} minutes\n"
-                            f"Wait a few minutes and retry, or manually delete the lock tag if the process died.",
-                            status=1
-                        )
-
-        # Create new lock with UTC timestamp in milliseconds
-        timestamp_ms = int(time.time() * 1000)
-        lock_tag = f"lock-{safe_branch_name}-{timestamp_ms}"
-
-        # Create local tag
-        self.create_tag(lock_tag, message=f"Lock on {branch_name} at {datetime.now(timezone.utc).isoformat()}")
-
-        # Push tag (ATOMIC - this is the lock acquisition)
         try:
-            self.push_tag(lock_tag)
+            self._push_lock(lock_ref, lock_sha)
         except GitCommandError as e:
-            # Push failed - someone else got the lock first
-            # Cleanup local tag
-            self.delete_local_tag(lock_tag)
+            existing = self._read_remote_lock(lock_ref)
+            # A local copy of a lock origin no longer holds was left behind
+            # by a crashed process: it would let the hooks through
+            self._delete_stale_local_lock(lock_ref, existing[0] if existing else None)
+            if existing is None:
+                raise GitCommandError(
+                    f"Failed to acquire lock on '{branch_name}': {e}\n"
+                    f"Retry in a few seconds.",
+                    status=1
+                ) from e
 
-            raise GitCommandError(
-                f"Failed to acquire lock on '{branch_name}'.\n"
-                f"Another process acquired it first.\n"
-                f"Retry in a few seconds.",
-                status=1
-            ) from e
+            stale_sha, payload = existing
+            created_ms = self._lock_created_ms(payload)
+            age_minutes = self._lock_age_minutes(created_ms) if created_ms else 0.0
+            if created_ms is None or age_minutes <= timeout_minutes:
+                # Recent lock - respect it
+                raise GitCommandError(
+                    f"Branch '{branch_name}' is locked by another process.\n"
+                    f"Lock: {lock_ref} ({payload.splitlines()[-1] if payload else stale_sha})\n"
+                    f"Age: {age_minutes:.1f} minutes\n"
+                    f"Wait a few minutes and retry, or if the process died delete the lock:\n"
+                    f"  git push origin --delete {lock_ref}",
+                    status=1
+                ) from e
+
+            # Stale lock - take it over only if nobody did meanwhile
+            print(f"⚠️  Taking over stale lock: {lock_ref} (age: {age_minutes:.1f} min)")
+            lock_sha = self._new_lock_commit(branch_name, parent=stale_sha)
+            try:
+                self._push_lock(lock_ref, lock_sha, stale_sha)
+            except GitCommandError as e2:
+                self._delete_stale_local_lock(lock_ref)
+                raise GitCommandError(
+                    f"Failed to acquire lock on '{branch_name}'.\n"
+                    f"Another process acquired it first.\n"
+                    f"Retry in a few seconds.",
+                    status=1
+                ) from e2
 
-        return lock_tag
+        # Local copy: tells the hooks that this clone holds the lock
+        self.__git_repo.git.update_ref('-m', 'hop lock', lock_ref, lock_sha)
+        return f"{lock_ref}:{lock_sha}"
 
 
     def release_branch_lock(self, lock_tag: str) -> None:
         """
-        Release branch lock by deleting lock tag.
+        Release branch lock by deleting its ref on origin.
+
+        The ref is deleted with one compare-and-swap push: a lock taken over
+        by another process meanwhile is left alone.
 
         Always called in finally block to ensure cleanup.
         Non-fatal if deletion fails (logs warning).
 
         Args:
-            lock_tag: Lock tag name to release (e.g., "lock-ho-prod-1704123456789")
+            lock_tag: Lock identifier returned by acquire_branch_lock()
+                (legacy "lock-{branch}-{timestamp}" tag names are still accepted)
 
         Examples:
-            lock_tag = hgit.acquire_branch_lock("ho-prod")
+            lock = hgit.acquire_branch_lock("ho-prod")
             try:
                 # ... work ...
             finally:
-                hgit.release_branch_lock(lock_tag)
+                hgit.release_branch_lock(lock)
         """
+        if ':' not in lock_tag:
+            # Legacy lock tag (lock-{branch}-{timestamp})
+            try:
+                self.__git_repo.git.push("origin", "--delete", lock_tag)
+            except GitCommandError as e:
+                print(f"⚠️  Warning: Failed to delete remote lock tag {lock_tag}: {e}")
+            try:
+                self.delete_local_tag(lock_tag)
+            except GitCommandError as e:
+                print(f"⚠️  Warning: Failed to delete local lock tag {lock_tag}: {e}")
+            return
+
+        lock_ref, lock_sha = lock_tag.rsplit(':', 1)
         # Best effort - continue even if fails
         try:
-            # Delete remote tag
-            self.__git_repo.git.push("origin", "--delete", lock_tag)
+            self._push_lock(lock_ref, '', lock_sha)
         except GitCommandError as e:
-            print(f"⚠️  Warning: Failed to delete remote lock tag {lock_tag}: {e}")
+            print(f"⚠️  Warning: Failed to delete remote lock {lock_ref}: {e}")
 
         try:
-            # Delete local tag
-            self.delete_local_tag(lock_tag)
+            self.__git_repo.git.update_ref('-d', lock_ref)
+        except GitCommandError as e:
+            print(f"⚠️  Warning: Failed to delete local lock {lock_ref}: {e}")
+
+    def is_lock_held(self, lock_tag: str) -> bool:
+        """Return True if the lock returned by acquire_branch_lock() is still on origin."""
+        if ':' not in lock_tag:
+            # Legacy lock tag
+            return bool(self.__git_repo.git.ls_remote('--tags', 'origin', lock_tag).strip())
+        lock_ref, lock_sha = lock_tag.rsplit(':', 1)
+        output = self.__git_repo.git.ls_remote('origin', lock_ref).strip()
+        return output.split('\t')[0] == lock_sha if output else False
+
+    def _local_lock_sha(self, lock_ref: str) -> Optional[str]:
+        """SHA of the local copy of lock_ref, None if this clone has none."""
+        return self.__git_repo.git.for_each_ref('--format=%(objectname)', lock_ref).strip() or None
+
+    def _delete_stale_local_lock(self, lock_ref: str, live_sha: Optional[str] = None) -> None:
+        """
+        Delete the local copy of lock_ref unless it is live_sha, the lock
+        held on origin (compare-and-swap: a lock acquired meanwhile by
+        another process of this clone is left alone).
+        """
+        local_sha = self._local_lock_sha(lock_ref)
+        if local_sha is None or local_sha == live_sha:
+            return
+        try:
+            self.__git_repo.git.update_ref('-d', lock_ref, local_sha)
+            print(f"⚠️  Removed stale local lock {lock_ref} (not held on origin)")
         except GitCommandError as e:
-            print(f"⚠️  Warning: Failed to delete local lock tag {lock_tag}: {e}")
+            print(f"⚠️  Warning: Failed to delete stale local lock {lock_ref}: {e}")
 
+    def holds_branch_lock(self, branch_name: str) -> bool:
+        """
+        Return True if this clone holds the lock on branch_name.
 
-    def is_branch_locked(self, branch_name: str, timeout_minutes: int = 30) -> bool:
-        """Return True if a valid (non-stale) lock tag for branch_name exists on origin."""
-        self.fetch_tags()
-        safe_branch_name = branch_name.replace('/', '-')
-        lock_pattern = f"lock-{safe_branch_name}-*"
-        existing_locks = self.list_tags(pattern=lock_pattern)
-        if not existing_locks:
+        The local ref is only trusted while origin holds the same SHA: a
+        local ref left behind by a crashed process (the lock was released,
+        expired or taken over on origin) is stale and deleted.
+        """
+        lock_ref = self.lock_ref(branch_name)
+        local_sha = self._local_lock_sha(lock_ref)
+        if local_sha is None:
             return False
-        lock_name = existing_locks[0]
-        remote_ref = self.__git_repo.git.ls_remote(
-            '--tags', 'origin', f'refs/tags/{lock_name}'
-        ).strip()
-        if not remote_ref:
+        if self.is_lock_held(f"{lock_ref}:{local_sha}"):
+            return True
+        self._delete_stale_local_lock(lock_ref)
+        return False
+
+    def is_branch_locked(self, branch_name: str, timeout_minutes: int = 30) -> bool:
+        """Return True if a valid (non-stale) lock for branch_name exists on origin."""
+        existing = self._read_remote_lock(self.lock_ref(branch_name))
+        if existing is None:
             return False
-        match = re.search(r'-(\d+)$', lock_name)
-        if not match:
+        created_ms = self._lock_created_ms(existing[1])
+        if created_ms is None:
             return True
-        lock_timestamp_ms = int(match.group(1))
-        lock_time = datetime.fromtimestamp(lock_timestamp_ms / 1000.0, tz=timezone.utc)
-        age_minutes = (datetime.now(timezone.utc) - lock_time).total_seconds() / 60
-        return age_minutes <= timeout_minutes
+        return self._lock_age_minutes(created_ms) <= timeout_minutes
 
     def list_tags(self, pattern: Optional[str] = None) -> List[str]:
         """
@@ -1433,7 +1650,99 @@ class HGit:
             'errors': errors
         }
 
-    def get_active_branches_status(self, stage_files: list = None) -> dict:
+    def read_branch_refs(self, remote: str = 'origin') -> dict:
+        """
+        Read all local branches and branches of `remote` with one git call.
+
+        Runs a single `git for-each-ref` over refs/heads and
+        refs/remotes/<remote>, returning each branch SHA and, for local
+        branches, their upstream and its ahead/behind counts.
+
+        Args:
+            remote: Remote name (default: 'origin')
+
+        Returns:
+            dict with keys:
+                'local': {branch: {'sha': str, 'upstream': str, 'track': (ahead, behind) | None}}
+                'remote': {branch: sha} (without the '<remote>/' prefix, HEAD excluded)
+
+            'track' is None when git did not compute it (no upstream, or
+            upstream gone).
+
+        Examples:
+            refs = hgit.read_branch_refs()
+            refs['local']['ho-prod']
+            # → {'sha': 'abc...', 'upstream': 'refs/remotes/origin/ho-prod', 'track': (0, 2)}
+        """
+        output = self.__git_repo.git.for_each_ref(
+            '--format=%(refname)%00%(objectname)%00%(upstream)%00%(upstream:track,nobracket)',
+            'refs/heads', f'refs/remotes/{remote}'
+        )
+        local_prefix = 'refs/heads/'
+        remote_prefix = f'refs/remotes/{remote}/'
+        refs = {'local': {}, 'remote': {}}
+        for line in output.splitlines():
+            parts = line.split('\0')
+            if len(parts) != 4:
+                continue
+            refname, sha, upstream, track = parts
+            if refname.startswith(local_prefix):
+                refs['local'][refname[len(local_prefix):]] = {
+                    'sha': sha,
+                    'upstream': upstream,
+                    'track': self._parse_upstream_track(track) if upstream else None,
+                }
+            elif refname.startswith(remote_prefix):
+                name = refname[len(remote_prefix):]
+                if name != 'HEAD':
+                    refs['remote'][name] = sha
+        return refs
+
+    @staticmethod
+    def _parse_upstream_track(track: str) -> Optional[tuple]:
+        """
+        Parse `%(upstream:track,nobracket)` into (ahead, behind).
+
+        '' means in sync, 'gone' means the upstream no longer exists (None).
+        """
+        if track == 'gone':
+            return None
+        ahead = re.search(r'ahead (\d+)', track)
+        behind = re.search(r'behind (\d+)', track)
+        return (int(ahead.group(1)) if ahead else 0,
+                int(behind.group(1)) if behind else 0)
+
+    @staticmethod
+    def _sync_status_from_counts(ahead: int, behind: int) -> str:
+        """Map ahead/behind commit counts to a sync status."""
+        if ahead and behind:
+            return 'diverged'
+        if ahead:
+            return 'ahead'
+        if behind:
+            return 'behind'
+        return 'synced'
+
+    def _branch_sync_counts(self, branch: str, refs: dict, remote: str = 'origin') -> tuple:
+        """
+        Return (ahead, behind) of a local branch against <remote>/<branch>.
+
+        Uses the SHAs and upstream tracking data returned by read_branch_refs()
+        and only runs `git rev-list` when the branch differs from its remote
+        counterpart without tracking it.
+        """
+        local = refs['local'][branch]
+        if local['sha'] == refs['remote'][branch]:
+            return (0, 0)
+        if local['upstream'] == f'refs/remotes/{remote}/{branch}' and local['track'] is not None:
+            return local['track']
+        counts = self.__git_repo.git.rev_list(
+            '--left-right', '--count', f'{branch}...{remote}/{branch}'
+        )
+        ahead, behind = counts.strip().split()
+        return (int(ahead), int(behind))
+
+    def get_active_branches_status(self, stage_files: list = None, fetch: bool = True) -> dict:
         """
         Get status of active Half-ORM branches (branches that can still be modified).
 
@@ -1446,9 +1755,14 @@ class HGit:
         - Is it ahead/behind/synced/diverged with remote?
         - Number of commits ahead/behind
 
+        All branch SHAs and upstream ahead/behind counts are read with a
+        single `git for-each-ref` call (see read_branch_refs()).
+
         Args:
             stage_files: List of stage file paths to identify active ho-release branches.
                         If None, considers all ho-release branches as potentially active.
+            fetch: Fetch origin first (default). With False, the remote state
+                   comes from the local remote-tracking refs.
 
         Returns:
             dict with keys:
@@ -1479,10 +1793,11 @@ class HGit:
             # }
         """
         # Fetch to get latest remote refs
-        try:
-            self.fetch_from_origin()
-        except GitCommandError:
-            pass  # Best effort for a status method
+        if fetch:
+            try:
+                self.fetch_from_origin()
+            except GitCommandError:
+                pass  # Best effort for a status method
 
         # Get current branch
         try:
@@ -1491,29 +1806,25 @@ class HGit:
             # active_branch raises TypeError when HEAD is detached
             current_branch = None
 
-        # Get remote branches
-        remote_branches = self.get_remote_branches()
-        remote_branch_names = {b.replace('origin/', '') for b in remote_branches}
+        # Read every local and origin branch (SHA, upstream, ahead/behind)
+        # with a single git call
+        refs = self.read_branch_refs('origin')
+        remote_branch_names = set(refs['remote'])
+
+        def branches_matching(pattern: str) -> tuple:
+            local = [b for b in refs['local'] if fnmatch.fnmatch(b, pattern)]
+            remote = [b for b in remote_branch_names if fnmatch.fnmatch(b, pattern)]
+            # Combine local and remote, avoiding duplicates
+            return local, list(set(local + remote))
 
         # Get ho-patch branches (local + remote)
-        local_patch_branches = self.get_local_branches(pattern="ho-patch/*")
-        remote_patch_branches = [b.replace('origin/', '') for b in remote_branches
-                                if b.startswith('origin/ho-patch/')]
-        # Combine local and remote, avoiding duplicates
-        all_patch_branches = list(set(local_patch_branches + remote_patch_branches))
+        local_patch_branches, all_patch_branches = branches_matching("ho-patch/*")
 
         # Get ho-staged branches (patches merged into a release, awaiting prod promotion)
-        local_staged_branches = self.get_local_branches(pattern="ho-staged/*")
-        remote_staged_branches = [b.replace('origin/', '') for b in remote_branches
-                                  if b.startswith('origin/ho-staged/')]
-        all_staged_branches = list(set(local_staged_branches + remote_staged_branches))
+        local_staged_branches, all_staged_branches = branches_matching("ho-staged/*")
 
         # Get ho-release branches (local + remote)
-        local_release_branches = self.get_local_branches(pattern="ho-release/*")
-        remote_release_branches = [b.replace('origin/', '') for b in remote_branches
-                                  if b.startswith('origin/ho-release/')]
-        # Combine local and remote, avoiding duplicates
-        all_release_branches = list(set(local_release_branches + remote_release_branches))
+        local_release_branches, all_release_branches = branches_matching("ho-release/*")
 
         # Parse stage files to identify active release branches and their order
         active_release_patches = set()
@@ -1584,21 +1895,11 @@ class HGit:
             else:
                 # Both local and remote exist - check sync
                 try:
-                    is_synced, status = self.is_branch_synced(branch, remote='origin')
-                    info['sync_status'] = status
-
-                    if not is_synced and status in ('ahead', 'behind', 'diverged'):
-                        try:
-                            counts = self.__git_repo.git.rev_list(
-                                '--left-right', '--count',
-                                f'{branch}...origin/{branch}'
-                            )
-                            ahead, behind = counts.strip().split()
-                            info['ahead'] = int(ahead)
-                            info['behind'] = int(behind)
-                        except (GitCommandError, ValueError):
-                            pass
-                except GitCommandError:
+                    ahead, behind = self._branch_sync_counts(branch, refs)
+                    info['sync_status'] = self._sync_status_from_counts(ahead, behind)
+                    info['ahead'] = ahead
+                    info['behind'] = behind
+                except (GitCommandError, ValueError):
                     info['sync_status'] = 'error'
 
             return info
@@ -1621,7 +1922,7 @@ class HGit:
 
         # ho-prod is always active — include it without special treatment.
         prod_branch_info = None
-        local_prod = self.branch_exists('ho-prod')
+        local_prod = 'ho-prod' in refs['local']
         if local_prod or 'ho-prod' in remote_branch_names:
             prod_branch_info = get_branch_info('ho-prod', is_local=local_prod)
 
@@ -1633,23 +1934,31 @@ class HGit:
             'release_branches': release_branch_infos
         }
 
-    def sync_active_branches(self, pattern: str = "ho-*") -> dict:
+    def sync_active_branches(self, pattern: str = "ho-*", fetch: bool = True) -> dict:
         """
         Synchronize local branches with remote (origin is the source of truth).
 
         Remote-first approach:
         1. For each remote branch matching pattern:
-           - If local exists and is behind → fast-forward pull
+           - If local exists and is behind → fast-forward
            - If local exists and is synced → skip
            - If local exists and is ahead → skip (user must push)
            - If local exists and diverged → skip (conflict to resolve)
            - If local doesn't exist → create local tracking branch
 
+        Branches are never checked out: a branch that is behind is
+        fast-forwarded by moving its ref (`git update-ref` guarded by its
+        current SHA; being behind guarantees it is an ancestor of the
+        remote branch). Only the currently checked out branch touches the
+        working tree, with `git merge --ff-only`.
+
         Note: Local branches that no longer exist on remote are handled
         separately by stale branch detection/cleanup.
 
         Args:
             pattern: Glob pattern for branches to sync (default: "ho-*")
+            fetch: Fetch origin first (default). With False, branches are
+                   synced against the local remote-tracking refs.
 
         Returns:
             dict with keys:
@@ -1669,8 +1978,6 @@ class HGit:
             #     'current_branch': 'ho-patch/42-feature'
             # }
         """
-        import fnmatch
-
         synced = []
         created = []
         skipped = []
@@ -1684,58 +1991,60 @@ class HGit:
             original_branch = None
 
         # Fetch first to get latest remote state
-        try:
-            self.__git_repo.remotes.origin.fetch(prune=True)
-        except GitCommandError as e:
-            return {
-                'synced': [],
-                'created': [],
-                'skipped': [],
-                'errors': [('fetch', str(e))],
-                'current_branch': original_branch
-            }
-
-        # Get local and remote branches
-        local_branches = set(self.get_local_branches(pattern=pattern))
-        remote_branches = self.get_remote_branches()
-
-        # Filter remote branches matching pattern (strip origin/ prefix)
-        remote_branch_names = []
-        for rb in remote_branches:
-            branch_name = rb.replace('origin/', '')
-            if fnmatch.fnmatch(branch_name, pattern):
-                remote_branch_names.append(branch_name)
+        if fetch:
+            try:
+                self.__git_repo.remotes.origin.fetch(prune=True)
+            except GitCommandError as e:
+                return {
+                    'synced': [],
+                    'created': [],
+                    'skipped': [],
+                    'errors': [('fetch', str(e))],
+                    'current_branch': original_branch
+                }
+            self._record_fetch()
+
+        # Get local and remote branches in one call
+        refs = self.read_branch_refs('origin')
+
+        # Filter remote branches matching pattern
+        remote_branch_names = [
+            branch for branch in refs['remote'] if fnmatch.fnmatch(branch, pattern)
+        ]
 
         # Process each remote branch
         for branch in remote_branch_names:
-            if branch in local_branches:
+            if branch in refs['local']:
                 # Branch exists locally - check sync status
                 try:
-                    is_synced, status = self.is_branch_synced(branch, remote='origin')
-
-                    if is_synced:
-                        skipped.append((branch, 'already_synced'))
-                        continue
-
-                    if status == 'ahead':
-                        skipped.append((branch, 'ahead'))
-                        continue
+                    ahead, behind = self._branch_sync_counts(branch, refs)
+                except (GitCommandError, ValueError) as e:
+                    errors.append((branch, f"status check failed: {e}"))
+                    continue
 
-                    if status == 'diverged':
-                        skipped.append((branch, 'diverged'))
-                        continue
+                status = self._sync_status_from_counts(ahead, behind)
+                if status == 'synced':
+                    skipped.append((branch, 'already_synced'))
+                    continue
 
-                    if status == 'behind':
-                        # Fast-forward pull
-                        try:
-                            self.__git_repo.heads[branch].checkout()
-                            self.__git_repo.remotes.origin.pull(branch, ff_only=True)
-                            synced.append(branch)
-                        except GitCommandError as e:
-                            errors.append((branch, str(e)))
+                if status in ('ahead', 'diverged'):
+                    skipped.append((branch, status))
+                    continue
 
+                # Behind: fast-forward
+                try:
+                    if branch == original_branch:
+                        self.__git_repo.git.merge('--ff-only', f'origin/{branch}')
+                    else:
+                        self.__git_repo.git.update_ref(
+                            '-m', f'hop sync: fast-forward to origin/{branch}',
+                            f'refs/heads/{branch}',
+                            refs['remote'][branch],
+                            refs['local'][branch]['sha']
+                        )
+                    synced.append(branch)
                 except GitCommandError as e:
-                    errors.append((branch, f"status check failed: {e}"))
+                    errors.append((branch, str(e)))
             else:
                 # Branch doesn't exist locally - create it tracking remote
                 try:
@@ -1748,13 +2057,6 @@ class HGit:
                 except GitCommandError as e:
                     errors.append((branch, f"create failed: {e}"))
 
-        # Return to original branch
-        if original_branch:
-            try:
-                self.__git_repo.heads[original_branch].checkout()
-            except GitCommandError:
-                pass  # Best effort
-
         return {
             'synced': synced,
             'created': created,
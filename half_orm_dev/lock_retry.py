@@ -0,0 +1,157 @@
+"""
+Lock-aware execution of SQL during production upgrades.
+
+A DDL statement (ALTER TABLE, ...) waiting for a lock held by a long
+transaction queues every other access to the table behind it. With a
+LockRetryPolicy the SQL runs with a lock_timeout: if the lock cannot be
+acquired in time the SQL is rolled back, the sessions holding locks on user
+relations (pg_locks/pg_stat_activity) are reported, and it is retried after
+a backoff delay.
+
+Within a transaction the SQL runs in a savepoint, so that only the failed
+attempt is rolled back. When the patch files are timed (see
+file_executor.execute_sql) each statement is retried on its own.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Union
+
+import click
+from psycopg import errors
+from psycopg.pq import TransactionStatus
+
+from half_orm_dev.file_executor import SqlStatement, execute_statement
+
+# Sessions holding locks on the relations of the user schemas (the longest
+# transactions first)
+LOCK_HOLDERS_QUERY = """
+SELECT DISTINCT a.pid, a.usename, a.state,
+       extract(epoch FROM now() - a.xact_start)::int AS xact_seconds,
+       l.mode, l.relation::regclass::text AS relation,
+       left(regexp_replace(a.query, '\\s+', ' ', 'g'), 200) AS query
+FROM pg_locks l
+JOIN pg_stat_activity a ON a.pid = l.pid
+JOIN pg_class c ON c.oid = l.relation
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE l.granted AND l.locktype = 'relation'
+  AND l.pid <> pg_backend_pid()
+  AND a.datname = current_database()
+  AND n.nspname NOT IN ('pg_catalog', 'information_schema')
+  AND n.nspname NOT LIKE 'pg_toast%'
+ORDER BY xact_seconds DESC NULLS LAST
+LIMIT 20
+"""
+
+_SAVEPOINT = 'hop_lock_retry'
+
+
+class LockRetryError(Exception):
+    """Raised when a lock could not be acquired after all the retries."""
+    pass
+
+
+@dataclass
+class LockRetryPolicy:
+    """
+    lock_timeout and retries of the SQL of an upgrade.
+
+    Attributes:
+        lock_timeout: Maximum wait for a lock, in seconds
+        retries: Number of retries after the first attempt
+        backoff: Delay before the first retry, in seconds (doubled at each retry)
+        max_backoff: Maximum delay between two attempts, in seconds
+    """
+    lock_timeout: float = 5.0
+    retries: int = 5
+    backoff: float = 1.0
+    max_backoff: float = 30.0
+
+    def __post_init__(self):
+        if self.lock_timeout <= 0:
+            raise ValueError(f"Invalid lock timeout: {self.lock_timeout}")
+        if self.retries < 0:
+            raise ValueError(f"Invalid number of lock retries: {self.retries}")
+
+    def delay(self, attempt: int) -> float:
+        """Delay before the retry following the failed attempt (1-based)."""
+        return min(self.backoff * 2 ** (attempt - 1), self.max_backoff)
+
+    def execute(self, model, sql: Union[str, SqlStatement], label: str = 'SQL',
+                sleep: Callable[[float], None] = time.sleep) -> Optional[int]:
+        """
+        Execute sql, retrying when a lock cannot be acquired in time.
+
+        Args:
+            model: halfORM Model (its connection is used)
+            sql: SQL to execute (a SqlStatement for a COPY ... FROM STDIN)
+            label: Name of the SQL in the messages (e.g. the file name)
+            sleep: Wait function (for tests)
+
+        Returns:
+            Number of rows affected by the (last) statement, None when not applicable
+
+        Raises:
+            LockRetryError: If the lock could not be acquired after all the retries
+        """
+        connection = model._connection
+        in_transaction = (not connection.autocommit
+                          or connection.info.transaction_status != TransactionStatus.IDLE)
+        timeout_ms = int(self.lock_timeout * 1000)
+        attempts = self.retries + 1
+        for attempt in range(1, attempts + 1):
+            try:
+                with connection.cursor() as cursor:
+                    if in_transaction:
+                        cursor.execute(f"SAVEPOINT {_SAVEPOINT}")
+                        cursor.execute(f"SET LOCAL lock_timeout = {timeout_ms}")
+                    else:
+                        cursor.execute(f"SET lock_timeout = {timeout_ms}")
+                    rows = execute_statement(cursor, sql)
+                    if in_transaction:
+                        cursor.execute(f"RELEASE SAVEPOINT {_SAVEPOINT}")
+                return rows
+            except errors.LockNotAvailable:
+                with connection.cursor() as cursor:
+                    if in_transaction:
+                        cursor.execute(f"ROLLBACK TO SAVEPOINT {_SAVEPOINT}")
+                    holders = lock_holders(cursor)
+                report = format_lock_holders(holders)
+                if attempt == attempts:
+                    raise LockRetryError(
+                        f"{label}: lock not acquired within {self.lock_timeout:g}s "
+                        f"after {attempts} attempts\n" + '\n'.join(report))
+                delay = self.delay(attempt)
+                click.echo(
+                    f"    ⏳ {label}: lock not acquired within {self.lock_timeout:g}s "
+                    f"(attempt {attempt}/{attempts}), retrying in {delay:g}s")
+                for line in report:
+                    click.echo(f"       {line}")
+                sleep(delay)
+            finally:
+                if not in_transaction:
+                    with connection.cursor() as cursor:
+                        cursor.execute("RESET lock_timeout")
+
+
+def lock_holders(cursor) -> List[Dict]:
+    """Sessions holding locks on user relations (see LOCK_HOLDERS_QUERY)."""
+    cursor.execute(LOCK_HOLDERS_QUERY)
+    columns = [column.name for column in cursor.description]
+    holders = []
+    for row in cursor.fetchall():
+        holders.append(row if isinstance(row, dict) else dict(zip(columns, row)))
+    return holders
+
+
+def format_lock_holders(holders: List[Dict]) -> List[str]:
+    """One line per lock held: pid, user, state, transaction age, lock and query."""
+    if not holders:
+        return ["no session holds a lock on a user relation anymore"]
+    lines = []
+    for holder in holders:
+        age = f", {holder['xact_seconds']}s in transaction" if holder['xact_seconds'] is not None else ''
+        lines.append(
+            f"pid {holder['pid']} ({holder['usename']}, {holder['state']}{age}): "
+            f"{holder['mode']} on {holder['relation']}: {holder['query']}")
+    return lines
@@ -382,17 +382,21 @@ class MigrationManager:
             )
 
         # Revert sync commits on active branches first
+        reverted_branches = []
         for branch, sha in shas.items():
             if branch == 'ho-prod':
                 continue
             git_repo.git.checkout(branch)
             git_repo.git.revert(sha, '--no-edit')
-            self._repo.hgit.push_branch(branch)
+            reverted_branches.append(branch)
 
         # Revert migration commit on ho-prod last
         git_repo.git.checkout('ho-prod')
         git_repo.git.revert(shas['ho-prod'], '--no-edit')
-        self._repo.hgit.push_branch('ho-prod')
+        reverted_branches.append('ho-prod')
+
+        # Publish all reverts at once: origin gets every branch or none
+        self._repo.hgit.push_branches(reverted_branches, atomic=True)
 
         # Remove tag (local + remote)
         self._repo.hgit.delete_local_tag(tag.name)
@@ -526,6 +530,7 @@ class MigrationManager:
         # The developer re-runs `hop patch apply` to regenerate with the correct schema.
         all_branches = ['ho-prod'] + release_branches + patch_branches
 
+        regenerated_branches = []
         for branch in all_branches:
             try:
                 repo.hgit.checkout(branch)
@@ -553,13 +558,7 @@ class MigrationManager:
                 if not git_repo.git.diff('--cached', '--name-only').strip():
                     continue
                 repo.hgit.commit('-m', commit_msg)
-                try:
-                    repo.hgit.push_branch(branch)
-                except Exception as push_err:
-                    sys.stderr.write(
-                        f"Warning: could not push {branch} after module regeneration: "
-                        f"{push_err}\n"
-                    )
+                regenerated_branches.append(branch)
             except Exception as e:
                 sys.stderr.write(
                     f"Warning: could not regenerate modules on {branch}: {e}\n"
@@ -567,6 +566,14 @@ class MigrationManager:
 
         repo.hgit.checkout('ho-prod')
 
+        try:
+            repo.hgit.push_branches(regenerated_branches, atomic=True)
+        except Exception as push_err:
+            sys.stderr.write(
+                f"Warning: could not push {', '.join(regenerated_branches)} "
+                f"after module regeneration: {push_err}\n"
+            )
+
     def _create_migration_commit_message(
         self,
         from_version: str,
@@ -50,6 +50,8 @@ HO_TYPEDICTS: list = []
 HO_TYPEDICTS_IMPORTS: set = set()
 HO_BASECLASSES: list = []
 HO_BASECLASSES_DICT_NAMES: set = set()
+HO_ROW_TYPES: list = []
+HO_SCHEMA_BASECLASSES: dict = {}
 INIT_MODULE_TEMPLATE = read_template('init_module_template')
 MODULE_TEMPLATE_1 = read_template('module_template_1')
 MODULE_TEMPLATE_2 = read_template('module_template_2')
@@ -58,6 +60,7 @@ WARNING_TEMPLATE = read_template('warning')
 CONFTEST = read_template('conftest_template')
 TEST = read_template('relation_test')
 SQL_ADAPTER_TEMPLATE = read_template('sql_adapter')
+BASECLASSES_INIT_TEMPLATE = read_template('baseclasses_init_template')
 SKIP = re.compile('[A-Z]')
 
 MODULE_FORMAT = (
@@ -73,6 +76,8 @@ CONFTEST_PY = 'conftest.py'
 DO_NOT_REMOVE = [INIT_PY]
 TEST_PREFIX = 'test_'
 TEST_SUFFIX = '.py'
+BASECLASSES = 'ho_baseclasses'
+DC_RELATION_MODULE = '_dc_relation'
 
 MODEL = None
 
@@ -156,6 +161,11 @@ def __get_full_class_name(schemaname, relationname):
     return f'{schemaname}{relationname}'
 
 
+def __get_schema_module_name(schemaname):
+    """Name of the ho_baseclasses submodule holding the classes of a schema."""
+    return _to_valid_identifier(schemaname).lower()
+
+
 def __get_field_desc(field_name, field):
     #TODO: REFACTOR
     sql_type = field._metadata['fieldtype']
@@ -186,9 +196,15 @@ def __get_field_desc(field_name, field):
     return field_desc
 
 
-def __gen_dataclass(relation, fkeys):
+def __gen_dataclass(relation, fkeys, split=False):
+    """Generate the DC_* dataclass string of a relation.
+
+    With split=True (per-schema ho_baseclasses package), dataclasses of
+    other schemas are referenced through the lazy ho_baseclasses package.
+    """
     rel = relation()
     dc_name = relation._ho_dataclass_name()
+    schemaname = list(rel._t_fqrn)[1]
     fields = []
     post_init = ['    def __post_init__(self) -> None:']
     for field_name, field in rel._ho_fields.items():
@@ -207,6 +223,8 @@ def __gen_dataclass(relation, fkeys):
         try:
             fk_fqrn = list(fkey()._t_fqrn)
             fdc_name = f'DC_{__get_full_class_name(fk_fqrn[1], fk_fqrn[2])}'
+            if split and fk_fqrn[1] != schemaname:
+                fdc_name = f'{BASECLASSES}.{fdc_name}'
         except Exception:
             fdc_name = dc_name  # fallback: host class
         post_init.append(f"        self.{attr_name} = {fdc_name}")
@@ -579,9 +597,17 @@ def __update_this_module(
                 module=module_dotpath,
                 class_name=class_name))
 
-    HO_DATACLASSES.append(__gen_dataclass(rel, existing_fkeys))
+    row_types = __row_types(repo)
+    dataclass = __gen_dataclass(rel, existing_fkeys, split=__split_baseclasses(repo))
+    row_type = __gen_row_type(rel, row_types) if row_types else ''
+    baseclass = __gen_baseclass(rel, existing_fkeys, row_types=row_types)
+    HO_DATACLASSES.append(dataclass)
     HO_TYPEDICTS.extend(__gen_typedict(rel, existing_fkeys))
-    HO_BASECLASSES.append(__gen_baseclass(rel, existing_fkeys))
+    if row_type:
+        HO_ROW_TYPES.append(row_type)
+    HO_BASECLASSES.append(baseclass)
+    HO_SCHEMA_BASECLASSES.setdefault(__get_schema_module_name(t_qrn[0]), []).append(
+        (dataclass, row_type, baseclass, dict_class_name))
 
     return module_path
 
@@ -641,8 +667,61 @@ def __gen_dc_relation() -> tuple:
     return class_str, needed_typing
 
 
-def __gen_baseclass(relation, fkeys) -> str:
-    """Generate a BC_* base class string with TypedDict-typed method overrides."""
+def __get_row_type_fields(rel, row_types) -> list:
+    """Return [(field_name, type_str, error)] for the Row_* type of a relation.
+
+    error is None for the fields kept in the row type. NamedTuple field
+    names cannot start with an underscore.
+    """
+    fields = []
+    for field_name, field in rel._ho_fields.items():
+        type_str, imports = __get_type_annotation(field)
+        HO_DATACLASSES_IMPORTS.update(imports)
+        error = utils.check_attribute_name(field_name)
+        if not error and row_types == 'tuple' and field_name.startswith('_'):
+            error = f'"{field_name}" cannot be a NamedTuple field name.'
+        fields.append((field_name, type_str, error))
+    return fields
+
+
+def __gen_row_type(relation, row_types) -> str:
+    """Generate the compact, immutable Row_* type of a relation.
+
+    row_types is 'slots' (frozen dataclass with __slots__: slots=True on
+    Python >= 3.10, an explicit __slots__ on 3.9) or 'tuple' (NamedTuple).
+    Row_* instances are built by BC_*.ho_select_rows().
+    """
+    rel = relation()
+    t_qrn = list(rel._t_fqrn)[1:]
+    row_name = f'Row_{__get_full_class_name(*t_qrn)}'
+    fields = __get_row_type_fields(rel, row_types)
+    names = [name for name, _, error in fields if not error]
+    body = []
+    for field_name, type_str, error in fields:
+        line = f"    {field_name}: Optional[{type_str}]"
+        if error:
+            line = f"# {line}  # FIX ME! {error}"
+        body.append(line)
+    if row_types == 'tuple':
+        lines = [f'class {row_name}(NamedTuple):']
+    else:
+        slots = ''.join(f"'{name}', " for name in names)
+        lines = [
+            '@dataclasses.dataclass(frozen=True, **_ROW_SLOTS)',
+            f'class {row_name}:',
+            '    if not _ROW_SLOTS:',
+            f'        __slots__ = ({slots.rstrip()})',
+        ]
+    if not names:
+        body.append('    pass')
+    return '\n'.join(lines + body)
+
+
+def __gen_baseclass(relation, fkeys, row_types='') -> str:
+    """Generate a BC_* base class string with TypedDict-typed method overrides.
+
+    With row_types set, also generate ho_select_rows() yielding Row_* instances.
+    """
     rel = relation()
     t_qrn = list(rel._t_fqrn)[1:]
     full_name = __get_full_class_name(*t_qrn)
@@ -678,11 +757,48 @@ def __gen_baseclass(relation, fkeys) -> str:
         f"    async def ho_ainsert(self, *args, upsert: bool = False) -> {d}:  # type: ignore[override]",
         f"        return await super().ho_ainsert(*args, upsert=upsert)  # type: ignore[return-value]",
     ]
+    if row_types:
+        row_name = f'Row_{full_name}'
+        names = tuple(name for name, _, error in __get_row_type_fields(rel, row_types) if not error)
+        lines += [
+            f"",
+            f"    def ho_select_rows(self, *args, distinct: bool = False, order_by: Optional[str] = None, limit: Optional[int] = None, offset: Optional[int] = None) -> Iterator[{row_name}]:",
+            f"        for row in self.ho_select(*args, distinct=distinct, order_by=order_by, limit=limit, offset=offset):",
+            f"            yield {row_name}(*[row.get(name) for name in {names!r}])",
+        ]
     return '\n'.join(lines)
 
 
+def __row_types(repo) -> str:
+    """Kind of Row_* types to generate: 'slots', 'tuple' or '' (.hop/config)."""
+    row_types = getattr(repo, 'row_types', '')
+    return row_types if row_types in ('slots', 'tuple') else ''
+
+
+def __split_baseclasses(repo) -> bool:
+    """True if ho_baseclasses is generated as a per-schema package (.hop/config)."""
+    return getattr(repo, 'split_baseclasses', False) is True
+
+
 def __reset_baseclasses(repo, package_dir):
-    with open(os.path.join(package_dir, "ho_baseclasses.py"), "w", encoding='utf-8') as file_:
+    """Write placeholder DC_*/BC_* classes before the relation modules are generated.
+
+    Also removes the layout (module or package) that is not in use anymore.
+    """
+    module_path = os.path.join(package_dir, f"{BASECLASSES}.py")
+    package_path = os.path.join(package_dir, BASECLASSES)
+    if __split_baseclasses(repo):
+        if os.path.exists(module_path):
+            os.remove(module_path)
+        if os.path.isdir(package_path):
+            shutil.rmtree(package_path)
+        os.makedirs(package_path)
+        stub_path = os.path.join(package_path, INIT_PY)
+    else:
+        if os.path.isdir(package_path):
+            shutil.rmtree(package_path)
+        stub_path = module_path
+    with open(stub_path, "w", encoding='utf-8') as file_:
         for relation in repo.database.model._relations():
             t_qrn = relation[1][1:]
             if t_qrn[0].find('half_orm') == 0:
@@ -692,32 +808,106 @@ def __reset_baseclasses(repo, package_dir):
             file_.write(f'class BC_{full_name}: ...\n')
 
 
-def __gen_baseclasses(package_dir, package_name):
+def __write_baseclasses_header(file_, package_name, typing_names, dict_names, row_types=''):
+    """Write the imports shared by the generated base class modules."""
+    if row_types == 'tuple':
+        typing_names = typing_names | {'NamedTuple'}
+    file_.write("# DO NOT EDIT — auto-generated by half-orm-dev\n\n")
+    file_.write("from __future__ import annotations\n")
+    file_.write(f"from typing import {', '.join(sorted(typing_names))}\n")
+    file_.write("import dataclasses\n")
+    if row_types == 'slots':
+        file_.write("import sys\n")
+    file_.write("from half_orm.field import Field  # type: ignore[import-not-found]\n")
+    for mod in sorted(HO_DATACLASSES_IMPORTS):
+        file_.write(f"import {mod}\n")
+    file_.write(f"from {package_name} import MODEL  # type: ignore[import-not-found]\n")
+    if dict_names:
+        file_.write("if TYPE_CHECKING:\n")
+        file_.write(f"    from {package_name}.ho_typeddicts import (\n")
+        for name in sorted(dict_names):
+            file_.write(f"        {name},\n")
+        file_.write("    )\n")
+    if row_types == 'slots':
+        file_.write("\n_ROW_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}\n")
+
+
+def __gen_baseclasses(package_dir, package_name, split=False, row_types=''):
+    if split:
+        __gen_baseclasses_package(package_dir, package_name, row_types=row_types)
+        return
     dc_relation_str, dc_typing = __gen_dc_relation()
-    with open(os.path.join(package_dir, "ho_baseclasses.py"), "w", encoding='utf-8') as file_:
-        file_.write("# DO NOT EDIT — auto-generated by half-orm-dev\n\n")
-        file_.write("from __future__ import annotations\n")
-        typing_names = sorted(dc_typing | {'Iterator', 'List', 'Optional', 'TYPE_CHECKING'})
-        file_.write(f"from typing import {', '.join(typing_names)}\n")
-        file_.write("import dataclasses\n")
-        file_.write("from half_orm.field import Field  # type: ignore[import-not-found]\n")
-        for mod in sorted(HO_DATACLASSES_IMPORTS):
-            file_.write(f"import {mod}\n")
-        file_.write(f"from {package_name} import MODEL  # type: ignore[import-not-found]\n")
-        if HO_BASECLASSES_DICT_NAMES:
-            file_.write("if TYPE_CHECKING:\n")
-            file_.write(f"    from {package_name}.ho_typeddicts import (\n")
-            for name in sorted(HO_BASECLASSES_DICT_NAMES):
-                file_.write(f"        {name},\n")
-            file_.write("    )\n")
+    with open(os.path.join(package_dir, f"{BASECLASSES}.py"), "w", encoding='utf-8') as file_:
+        __write_baseclasses_header(
+            file_, package_name,
+            dc_typing | {'Iterator', 'List', 'Optional', 'TYPE_CHECKING'},
+            HO_BASECLASSES_DICT_NAMES, row_types=row_types)
         file_.write("\n\n")
         file_.write(dc_relation_str)
         for dc in HO_DATACLASSES:
             file_.write(f"\n\n{dc}\n")
+        for row in HO_ROW_TYPES:
+            file_.write(f"\n\n{row}\n")
         for bc in HO_BASECLASSES:
             file_.write(f"\n\n{bc}\n")
 
 
+def __gen_baseclasses_package(package_dir, package_name, row_types=''):
+    """Generate ho_baseclasses/ as a package with one module per schema.
+
+    The package __init__ maps every DC_*/BC_* name to its schema module and
+    imports that module on first attribute access (PEP 562 __getattr__), so
+    only the schemas actually used are loaded.
+    """
+    package_path = os.path.join(package_dir, BASECLASSES)
+    os.makedirs(package_path, exist_ok=True)
+    dc_relation_str, dc_typing = __gen_dc_relation()
+    with open(os.path.join(package_path, f"{DC_RELATION_MODULE}.py"), "w", encoding='utf-8') as file_:
+        file_.write("# DO NOT EDIT — auto-generated by half-orm-dev\n\n")
+        file_.write("from __future__ import annotations\n")
+        if dc_typing:
+            file_.write(f"from typing import {', '.join(sorted(dc_typing))}\n")
+        file_.write("\n\n")
+        file_.write(dc_relation_str)
+
+    names = {'DC_Relation': DC_RELATION_MODULE}
+    for schema_module, classes in sorted(HO_SCHEMA_BASECLASSES.items()):
+        dict_names = {dict_name for _, _, _, dict_name in classes}
+        with open(os.path.join(package_path, f"{schema_module}.py"), "w", encoding='utf-8') as file_:
+            __write_baseclasses_header(
+                file_, package_name,
+                {'Iterator', 'List', 'Optional', 'TYPE_CHECKING'},
+                dict_names, row_types=row_types)
+            file_.write(f"from {package_name} import {BASECLASSES}  # type: ignore[import-not-found]\n")
+            file_.write(f"from .{DC_RELATION_MODULE} import DC_Relation\n")
+            for dc, _, _, _ in classes:
+                file_.write(f"\n\n{dc}\n")
+            for _, row, _, _ in classes:
+                if row:
+                    file_.write(f"\n\n{row}\n")
+            for _, _, bc, _ in classes:
+                file_.write(f"\n\n{bc}\n")
+        for dc, row, bc, _ in classes:
+            for class_str in (dc, row, bc):
+                if class_str:
+                    class_name = re.search(r'^class (\w+)', class_str, re.MULTILINE).group(1)
+                    names[class_name] = schema_module
+
+    by_module: dict = {}
+    for name, module in names.items():
+        by_module.setdefault(module, []).append(name)
+    type_checking_imports = '\n'.join(
+        f"    from .{module} import {', '.join(sorted(module_names))}"
+        for module, module_names in sorted(by_module.items()))
+    schema_modules = '\n'.join(
+        f"    '{name}': '{module}'," for name, module in sorted(names.items()))
+    with open(os.path.join(package_path, INIT_PY), "w", encoding='utf-8') as file_:
+        file_.write(BASECLASSES_INIT_TEMPLATE.format(
+            package_name=package_name,
+            schema_modules=schema_modules,
+            type_checking_imports=type_checking_imports))
+
+
 def generate(repo):
     """Synchronize the modules with the structure of the relation in PG."""
     # Reset accumulators — allows safe repeated calls in the same process
@@ -727,6 +917,8 @@ def generate(repo):
     HO_TYPEDICTS_IMPORTS.clear()
     HO_BASECLASSES.clear()
     HO_BASECLASSES_DICT_NAMES.clear()
+    HO_ROW_TYPES.clear()
+    HO_SCHEMA_BASECLASSES.clear()
     NO_APAPTER.clear()
 
     package_name = repo.name
@@ -790,7 +982,9 @@ def generate(repo):
             # Tests are no longer added to files_list (they live in tests/ directory)
 
     __gen_typedicts(str(package_dir), package_name)
-    __gen_baseclasses(str(package_dir), package_name)
+    __gen_baseclasses(
+        str(package_dir), package_name,
+        split=__split_baseclasses(repo), row_types=__row_types(repo))
 
     if len(NO_APAPTER):
         print("MISSING ADAPTER FOR SQL TYPE")
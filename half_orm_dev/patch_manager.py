@@ -13,6 +13,7 @@ import sys
 import shutil
 import subprocess
 import time
+from contextlib import nullcontext
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple, Any
 from dataclasses import dataclass
@@ -21,15 +22,18 @@ from git.exc import GitCommandError
 from packaging.version import Version, InvalidVersion
 
 from half_orm import utils
-from half_orm_dev import modules
+from half_orm_dev import modules, cache
 from half_orm_dev.release_file import ReleaseFile, ReleaseFileError
 from half_orm_dev.file_executor import (
-    execute_sql_file, execute_sql_file_psql, execute_python_file,
-    FileExecutionError
+    execute_sql_file, execute_sql_file_psql, execute_python_script,
+    is_transactional, FileExecutionError, TimingReport
 )
 from .patch_validator import PatchValidator, PatchInfo
 from .decorators import with_dynamic_branch_lock
 
+# Persistent patch status index, in .hop/cache/
+PATCH_STATUS_INDEX = 'patch_status.json'
+
 
 class PatchManagerError(Exception):
     """Base exception for PatchManager operations."""
@@ -495,7 +499,8 @@ class PatchManager:
         pass
 
     def apply_patch_complete_workflow(
-        self, patch_id: str, from_dump: Optional[Path] = None
+        self, patch_id: str, from_dump: Optional[Path] = None,
+        dump_jobs: Optional[int] = None, dump_cache: bool = True
     ) -> dict:
         """
         Apply patch with full release context.
@@ -518,8 +523,12 @@ class PatchManager:
 
         Args:
             patch_id: Patch identifier
-            from_dump: Optional path to pg_dump SQL file to restore from
-                      instead of schema.sql. Useful for testing with prod data.
+            from_dump: Optional path to a pg_dump file or directory (any
+                      format) to restore from instead of schema.sql. Useful
+                      for testing with prod data.
+            dump_jobs: Parallel jobs of pg_restore for from_dump
+            dump_cache: Recreate the database from the template caching
+                      from_dump (see half_orm_dev.dump_restore)
 
         Examples:
             # With release schema (new workflow):
@@ -545,21 +554,25 @@ class PatchManager:
             # 3. Generate code
         """
 
+        # Wall time of each file and statement, in .hop/timings/
+        timings = TimingReport(f"patch-{patch_id}")
         try:
             applied_release_files = []
             applied_current_files = []
             patch_was_in_release = False
             used_dump = False
+            dump_restored = None
             release_schema_path = None
 
             # If from_dump is provided, use simplified workflow
             if from_dump:
                 # Restore from dump file (no bootstrap, data already present)
-                self._repo.restore_database_from_dump(from_dump)
+                dump_restored = self._repo.restore_database_from_dump(
+                    from_dump, jobs=dump_jobs, use_cache=dump_cache)
                 used_dump = True
 
                 # Apply only the current patch
-                files = self.apply_patch_files(patch_id, self._repo.model)
+                files = self.apply_patch_files(patch_id, self._repo.model, timings=timings)
                 applied_current_files = files
 
             else:
@@ -579,7 +592,7 @@ class PatchManager:
                     self._repo.restore_database_from_release_schema(version)
 
                     # Apply only the current patch
-                    files = self.apply_patch_files(patch_id, self._repo.model)
+                    files = self.apply_patch_files(patch_id, self._repo.model, timings=timings)
                     applied_current_files = files
                 else:
                     # Backward compatibility: old workflow
@@ -592,7 +605,7 @@ class PatchManager:
                     for patch in release_patches:
                         if patch == patch_id:
                             patch_was_in_release = True
-                        files = self.apply_patch_files(patch, self._repo.model)
+                        files = self.apply_patch_files(patch, self._repo.model, timings=timings)
                         applied_release_files.extend(files)
 
                     # Generate release schema for existing projects migration
@@ -605,7 +618,8 @@ class PatchManager:
 
                     # If current patch not in release (candidate), apply it now
                     if not patch_was_in_release:
-                        files = self.apply_patch_files(patch_id, self._repo.model)
+                        files = self.apply_patch_files(
+                            patch_id, self._repo.model, timings=timings)
                         applied_current_files = files
 
             # Generate Python code
@@ -632,26 +646,32 @@ class PatchManager:
                 'generated_files': generated_files,
                 'used_dump': used_dump,
                 'from_dump': str(from_dump) if from_dump else None,
+                'dump_restore': dump_restored,
                 'used_release_schema': (
                     not used_dump and
                     release_schema_path is not None and
                     release_schema_path.exists()
                 ),
+                'timing_report': timings.save(self._base_dir),
+                'slowest_statements': timings.slowest(),
                 'status': 'success',
                 'error': None
             }
 
         except PatchManagerError:
+            timings.save(self._base_dir)
             self._repo.restore_database_from_schema()
             raise
 
         except Exception as e:
+            timings.save(self._base_dir)
             self._repo.restore_database_from_schema()
             raise PatchManagerError(
                 f"Apply patch workflow failed for {patch_id}: {e}"
             ) from e
 
-    def apply_patch_files(self, patch_id: str, database_model) -> List[str]:
+    def apply_patch_files(self, patch_id: str, database_model, transaction=None,
+                          lock_retry=None, timings: Optional[TimingReport] = None) -> List[str]:
         """
         Apply all patch files in correct order.
 
@@ -659,9 +679,19 @@ class PatchManager:
         lexicographic order. Integrates with halfORM modules.py for
         code generation after schema changes.
 
+        Within a transaction, the steps that cannot be part of it (.psql and
+        Python files, run on their own connection, and the SQL files
+        annotated "-- hop: no-transaction") are run between two
+        transactions (see DatabaseTransaction.suspended).
+
         Args:
             patch_id: Patch identifier to apply
             database_model: halfORM Model instance for SQL execution
+            transaction: Optional DatabaseTransaction the files are applied in
+            lock_retry: Optional LockRetryPolicy of the SQL files (lock_timeout
+                and retries, see half_orm_dev.lock_retry)
+            timings: Optional TimingReport recording the wall time of each
+                file and of each statement of the SQL files
 
         Returns:
             List of applied filenames in execution order
@@ -688,26 +718,46 @@ class PatchManager:
             error_msg = "; ".join(structure.validation_errors)
             raise PatchManagerError(f"Cannot apply invalid patch {patch_id}: {error_msg}")
 
+        def outside_transaction(patch_file):
+            if transaction is None:
+                return nullcontext()
+            return transaction.suspended(f"{patch_id}/{patch_file.name}")
+
+        def timed(patch_file, kind):
+            if timings is None:
+                return nullcontext()
+            return timings.step(patch_id, patch_file.name, kind)
+
         # Apply files in lexicographic order
         for patch_file in structure.files:
             if patch_file.is_sql:
-                click.echo(f"  • {patch_file.name}")
+                transactional = is_transactional(patch_file.path)
+                click.echo(f"  • {patch_file.name}{'' if transactional else ' (no transaction)'}")
                 try:
-                    execute_sql_file(patch_file.path, database_model)
+                    with timed(patch_file, 'sql') as statements:
+                        if transactional:
+                            execute_sql_file(patch_file.path, database_model, lock_retry, statements)
+                        else:
+                            with outside_transaction(patch_file):
+                                execute_sql_file(
+                                    patch_file.path, database_model, lock_retry, statements)
                 except FileExecutionError as e:
                     raise PatchManagerError(str(e)) from e
                 applied_files.append(patch_file.name)
             elif patch_file.is_psql:
                 click.echo(f"  • {patch_file.name} (psql)")
                 try:
-                    execute_sql_file_psql(patch_file.path, self._repo.database, self._repo.database_name)
+                    with outside_transaction(patch_file), timed(patch_file, 'psql'):
+                        execute_sql_file_psql(
+                            patch_file.path, self._repo.database, self._repo.database_name)
                 except FileExecutionError as e:
                     raise PatchManagerError(str(e)) from e
                 applied_files.append(patch_file.name)
             elif patch_file.is_python:
                 click.echo(f"  • {patch_file.name}")
                 try:
-                    output = execute_python_file(patch_file.path)
+                    with outside_transaction(patch_file), timed(patch_file, 'python'):
+                        output = execute_python_script(patch_file.path, database_model)
                     if output:
                         print(f"Python output from {patch_file.name}: {output}")
                 except FileExecutionError as e:
@@ -742,6 +792,7 @@ class PatchManager:
         if self._patch_status_map is None:
             self._patch_status_map = self._build_patch_status_map()
         self._patch_status_map[patch_id] = {"status": status, "version": version}
+        self._refresh_patch_status_index()
 
     def _update_patch_status_cache(self, patch_id: str, status: str, merge_commit: Optional[str] = None) -> None:
         """Update a patch's status in the cache without rebuilding."""
@@ -751,6 +802,7 @@ class PatchManager:
             self._patch_status_map[patch_id]["status"] = status
             if merge_commit:
                 self._patch_status_map[patch_id]["merge_commit"] = merge_commit
+        self._refresh_patch_status_index()
 
     def _build_patch_status_map(self) -> Dict[str, Dict]:
         """
@@ -761,57 +813,119 @@ class PatchManager:
         - TXT files: production releases (all staged)
         - Filesystem: patches not in any file are orphaned
 
+        The patches of each source are taken from the persistent index
+        (see _refresh_patch_status_index()), which re-reads only the
+        sources changed since the previous command.
+
         Returns:
             Dict mapping patch_id to status info
         """
+        index = self._refresh_patch_status_index()
         patch_map = {}
 
         # 1. TOML files (development releases)
-        for toml_file in self._releases_dir.glob("*-patches.toml"):
-            version = toml_file.stem.replace('-patches', '')
-            try:
-                release_file = ReleaseFile(version, self._releases_dir)
-                for patch_id in release_file.get_patches():
-                    patch_map[patch_id] = {
-                        "status": release_file.get_patch_status(patch_id),
-                        "version": version,
-                        "merge_commit": release_file.get_merge_commit(patch_id)
-                    }
-            except ReleaseFileError:
-                # Skip invalid files
-                continue
+        for entry in index["toml"].values():
+            for patch_id, info in entry["patches"].items():
+                patch_map[patch_id] = dict(info)
 
         # 2. TXT files (production releases)
+        for entry in index["txt"].values():
+            for patch_id, info in entry["patches"].items():
+                if patch_id not in patch_map:
+                    patch_map[patch_id] = dict(info)
+
+        # 3. Staged/orphaned patches on filesystem
+        # NOTE: Patches at root (Patches/) are considered "candidate" by default
+        # and don't need to be in the cache. Only staged/ and orphaned/ are scanned.
+        for entry in index["dirs"].values():
+            for patch_id, info in entry["patches"].items():
+                if patch_id not in patch_map:
+                    patch_map[patch_id] = dict(info)
+
+        return patch_map
+
+    def _refresh_patch_status_index(self) -> Dict[str, Dict]:
+        """
+        Bring the persistent patch status index up to date and return it.
+
+        The index (.hop/cache/patch_status.json) keeps the patches found in
+        each source (release TOML and TXT files, Patches/staged and
+        Patches/orphaned) with the inode, mtime and size of the source.
+        Only the sources whose stat changed are read again; the index is
+        rewritten when one of them changed, appeared or disappeared.
+
+        Returns:
+            {"toml": {...}, "txt": {...}, "dirs": {...}}, each mapping a
+            source name to {"key": [...], "patches": {patch_id: info}}, in
+            file system order
+        """
+        previous = cache.load(self._base_dir, PATCH_STATUS_INDEX)
+        index = {"toml": {}, "txt": {}, "dirs": {}}
+        changed = False
+
+        def add(kind, name, path, read):
+            nonlocal changed
+            key = cache.file_key(path)
+            entry = previous.get(kind, {}).get(name)
+            if entry is None or entry.get("key") != key:
+                entry = {"key": key, "patches": read(path)}
+                changed = True
+            index[kind][name] = entry
+
+        for toml_file in self._releases_dir.glob("*-patches.toml"):
+            add("toml", toml_file.name, toml_file, self._read_toml_patches)
+
         for txt_file in self._releases_dir.glob("*.txt"):
             if '-patches' in txt_file.stem:
                 continue  # Skip TOML companion files
-            version = txt_file.stem
-            content = txt_file.read_text()
-            for line in content.strip().split('\n'):
-                patch_id = line.strip()
-                if patch_id and not patch_id.startswith('#'):
-                    if patch_id not in patch_map:
-                        patch_map[patch_id] = {"status": "staged", "version": version}
-
-        # 3. Scan subdirectories for staged/orphaned patches on filesystem
-        # NOTE: Patches at root (Patches/) are considered "candidate" by default
-        # and don't need to be in the cache. Only staged/ and orphaned/ are scanned.
-        subdir_status = {
-            self._schema_patches_dir / "staged": "staged",
-            self._schema_patches_dir / "orphaned": "orphaned"
-        }
-        for subdir, status in subdir_status.items():
+            add("txt", txt_file.name, txt_file, self._read_txt_patches)
+
+        for status in ("staged", "orphaned"):
+            subdir = self._schema_patches_dir / status
             try:
-                if not subdir.exists():
-                    continue
-                for patch_dir in subdir.iterdir():
-                    if patch_dir.is_dir() and patch_dir.name[0].isdigit():
-                        if patch_dir.name not in patch_map:
-                            patch_map[patch_dir.name] = {"status": status}
+                if subdir.exists():
+                    add("dirs", status, subdir,
+                        lambda path, status=status: self._read_patch_dirs(path, status))
             except (PermissionError, OSError):
                 continue
 
-        return patch_map
+        if changed or any(set(previous.get(kind, {})) != set(index[kind]) for kind in index):
+            cache.save(self._base_dir, PATCH_STATUS_INDEX, index)
+        return index
+
+    def _read_toml_patches(self, toml_file: Path) -> Dict[str, Dict]:
+        """Patches of a development release file, {} if it is invalid."""
+        version = toml_file.stem.replace('-patches', '')
+        try:
+            patches = ReleaseFile(version, self._releases_dir).get_all_patch_info()
+        except ReleaseFileError:
+            # Skip invalid files
+            return {}
+        return {
+            patch_id: {"status": info["status"], "version": version,
+                       "merge_commit": info["merge_commit"]}
+            for patch_id, info in patches.items()
+        }
+
+    @staticmethod
+    def _read_txt_patches(txt_file: Path) -> Dict[str, Dict]:
+        """Patches of a production release file (all staged)."""
+        version = txt_file.stem
+        patches = {}
+        for line in txt_file.read_text().strip().split('\n'):
+            patch_id = line.strip()
+            if patch_id and not patch_id.startswith('#'):
+                patches.setdefault(patch_id, {"status": "staged", "version": version})
+        return patches
+
+    @staticmethod
+    def _read_patch_dirs(subdir: Path, status: str) -> Dict[str, Dict]:
+        """Patch directories of Patches/staged or Patches/orphaned."""
+        return {
+            patch_dir.name: {"status": status}
+            for patch_dir in subdir.iterdir()
+            if patch_dir.is_dir() and patch_dir.name[0].isdigit()
+        }
 
     def get_patch_directory_path(self, patch_id: str, status: Optional[str] = None) -> Path:
         """
@@ -1992,8 +2106,7 @@ class PatchManager:
             )
 
             # 7d. COMMIT POINT: Push all modified branches atomically
-            for branch in modified_branches:
-                self._repo.hgit.push_branch(branch)
+            self._repo.push_synced_branches(modified_branches)
 
         except Exception as e:
             # ROLLBACK: Reset all branches to original state
@@ -0,0 +1,15 @@
+create table if not exists half_orm_meta.hop_upgrade_timing (
+    id serial primary key,
+    release text not null,
+    patch_id text not null,
+    file text not null,
+    kind text not null,
+    statements integer not null,
+    seconds double precision not null,
+    rows bigint,
+    slowest_line integer,
+    slowest_seconds double precision,
+    applied_at timestamp with time zone not null default now()
+);
+
+comment on table half_orm_meta.hop_upgrade_timing is 'Timing summary of the files applied by the production upgrades (one row per file)';
@@ -0,0 +1,11 @@
+create table if not exists half_orm_meta.hop_batch_checkpoint (
+    name text primary key,
+    relation text not null,
+    last_key text,
+    rows bigint not null default 0,
+    batches integer not null default 0,
+    done boolean not null default false,
+    updated_at timestamp with time zone not null default now()
+);
+
+comment on table half_orm_meta.hop_batch_checkpoint is 'Progress of the batched data migrations of the Python patches (one row per migration)';
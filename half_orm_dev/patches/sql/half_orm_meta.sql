@@ -146,6 +146,74 @@ COMMENT ON COLUMN half_orm_meta.bootstrap.version IS 'Release version from filen
 COMMENT ON COLUMN half_orm_meta.bootstrap.executed_at IS 'Timestamp when the script was executed';
 
 
+--
+-- Name: hop_batch_checkpoint; Type: TABLE; Schema: half_orm_meta; Owner: -
+--
+
+CREATE TABLE half_orm_meta.hop_batch_checkpoint (
+    name text NOT NULL,
+    relation text NOT NULL,
+    last_key text,
+    rows bigint DEFAULT 0 NOT NULL,
+    batches integer DEFAULT 0 NOT NULL,
+    done boolean DEFAULT false NOT NULL,
+    updated_at timestamp with time zone DEFAULT now() NOT NULL
+);
+
+
+--
+-- Name: TABLE hop_batch_checkpoint; Type: COMMENT; Schema: half_orm_meta; Owner: -
+--
+
+COMMENT ON TABLE half_orm_meta.hop_batch_checkpoint IS 'Progress of the batched data migrations of the Python patches (one row per migration)';
+
+
+--
+-- Name: hop_upgrade_timing; Type: TABLE; Schema: half_orm_meta; Owner: -
+--
+
+CREATE TABLE half_orm_meta.hop_upgrade_timing (
+    id integer NOT NULL,
+    release text NOT NULL,
+    patch_id text NOT NULL,
+    file text NOT NULL,
+    kind text NOT NULL,
+    statements integer NOT NULL,
+    seconds double precision NOT NULL,
+    rows bigint,
+    slowest_line integer,
+    slowest_seconds double precision,
+    applied_at timestamp with time zone DEFAULT now() NOT NULL
+);
+
+
+--
+-- Name: TABLE hop_upgrade_timing; Type: COMMENT; Schema: half_orm_meta; Owner: -
+--
+
+COMMENT ON TABLE half_orm_meta.hop_upgrade_timing IS 'Timing summary of the files applied by the production upgrades (one row per file)';
+
+
+--
+-- Name: hop_upgrade_timing_id_seq; Type: SEQUENCE; Schema: half_orm_meta; Owner: -
+--
+
+CREATE SEQUENCE half_orm_meta.hop_upgrade_timing_id_seq
+    AS integer
+    START WITH 1
+    INCREMENT BY 1
+    NO MINVALUE
+    NO MAXVALUE
+    CACHE 1;
+
+
+--
+-- Name: hop_upgrade_timing_id_seq; Type: SEQUENCE OWNED BY; Schema: half_orm_meta; Owner: -
+--
+
+ALTER SEQUENCE half_orm_meta.hop_upgrade_timing_id_seq OWNED BY half_orm_meta.hop_upgrade_timing.id;
+
+
 --
 -- Name: hop_last_release; Type: VIEW; Schema: half_orm_meta.view; Owner: -
 --
@@ -183,6 +251,13 @@ CREATE VIEW "half_orm_meta.view".hop_penultimate_release AS
  LIMIT 1;
 
 
+--
+-- Name: hop_upgrade_timing id; Type: DEFAULT; Schema: half_orm_meta; Owner: -
+--
+
+ALTER TABLE ONLY half_orm_meta.hop_upgrade_timing ALTER COLUMN id SET DEFAULT nextval('half_orm_meta.hop_upgrade_timing_id_seq'::regclass);
+
+
 --
 -- Name: database database_pkey; Type: CONSTRAINT; Schema: half_orm_meta; Owner: -
 --
@@ -215,6 +290,22 @@ ALTER TABLE ONLY half_orm_meta.bootstrap
     ADD CONSTRAINT bootstrap_pkey PRIMARY KEY (filename);
 
 
+--
+-- Name: hop_batch_checkpoint hop_batch_checkpoint_pkey; Type: CONSTRAINT; Schema: half_orm_meta; Owner: -
+--
+
+ALTER TABLE ONLY half_orm_meta.hop_batch_checkpoint
+    ADD CONSTRAINT hop_batch_checkpoint_pkey PRIMARY KEY (name);
+
+
+--
+-- Name: hop_upgrade_timing hop_upgrade_timing_pkey; Type: CONSTRAINT; Schema: half_orm_meta; Owner: -
+--
+
+ALTER TABLE ONLY half_orm_meta.hop_upgrade_timing
+    ADD CONSTRAINT hop_upgrade_timing_pkey PRIMARY KEY (id);
+
+
 --
 -- Name: hop_release hop_release_dbid_fkey; Type: FK CONSTRAINT; Schema: half_orm_meta; Owner: -
 --
@@ -5,8 +5,9 @@ This module handles the X.Y.Z-patches.toml files that track patches
 during development (candidate and staged status).
 """
 
+import copy
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 import sys
 
 if sys.version_info >= (3, 11):
@@ -41,8 +42,15 @@ class ReleaseFile:
         "2-api" = { status = "candidate" }
 
     The order of patches in the file is preserved and represents the application order.
+
+    Parsed documents are cached per file path and shared by all instances.
+    A cached document is reused while the (inode, mtime, size) of the file
+    is unchanged; the writes of ReleaseFile refresh it.
     """
 
+    # file path -> ((st_ino, st_mtime_ns, st_size), parsed document)
+    _cache: Dict[Path, Tuple[Tuple[int, int, int], Dict]] = {}
+
     def __init__(self, version: str, releases_dir: Path):
         """
         Initialize ReleaseFile for a specific version.
@@ -72,29 +80,64 @@ class ReleaseFile:
                 f"Failed to create release file {self.file_path}: {e}"
             )
 
-    def _read(self) -> Dict:
+    @classmethod
+    def clear_cache(cls) -> None:
+        """Forget all the parsed documents."""
+        cls._cache.clear()
+
+    def _file_key(self) -> Optional[Tuple[int, int, int]]:
+        """(inode, mtime, size) of the file, None if it doesn't exist."""
+        try:
+            stat = self.file_path.stat()
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _load(self) -> Dict:
         """
-        Read TOML file and return data.
+        Return the parsed TOML document, from the cache when the file is unchanged.
 
-        Returns:
-            Dict with 'patches' key containing ordered dict of patches
+        The document is shared: callers must not modify it (see _read()).
 
         Raises:
             ReleaseFileError: If file doesn't exist or read fails
         """
-        if not self.file_path.exists():
+        key = self._file_key()
+        if key is None:
+            ReleaseFile._cache.pop(self.file_path, None)
             raise ReleaseFileError(
                 f"Release file not found: {self.file_path}\n"
                 f"Hint: Run 'half_orm dev release create <level>' first"
             )
 
+        cached = ReleaseFile._cache.get(self.file_path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
         try:
             with self.file_path.open('rb') as f:
-                return tomli.load(f)
+                data = tomli.load(f)
         except Exception as e:
             raise ReleaseFileError(
                 f"Failed to read release file {self.file_path}: {e}"
             )
+        ReleaseFile._cache[self.file_path] = (key, data)
+        return data
+
+    def _read(self) -> Dict:
+        """
+        Read TOML file and return data.
+
+        Returns a copy of the parsed document that the caller may modify
+        before passing it to _write().
+
+        Returns:
+            Dict with 'patches' key containing ordered dict of patches
+
+        Raises:
+            ReleaseFileError: If file doesn't exist or read fails
+        """
+        return copy.deepcopy(self._load())
 
     def _write(self, data: Dict) -> None:
         """
@@ -110,9 +153,11 @@ class ReleaseFile:
             with self.file_path.open('wb') as f:
                 tomli_w.dump(data, f)
         except Exception as e:
+            ReleaseFile._cache.pop(self.file_path, None)
             raise ReleaseFileError(
                 f"Failed to write release file {self.file_path}: {e}"
             )
+        ReleaseFile._cache[self.file_path] = (self._file_key(), copy.deepcopy(data))
 
     def add_patch(self, patch_id: str, before: Optional[str] = None) -> None:
         """
@@ -220,7 +265,7 @@ class ReleaseFile:
             # Get only staged patches
             staged = release_file.get_patches(status="staged")
         """
-        data = self._read()
+        data = self._load()
         patches = data.get("patches", {})
 
         if status is None:
@@ -231,6 +276,27 @@ class ReleaseFile:
             if patch_data.get("status") == status
         ]
 
+    def get_all_patch_info(self) -> Dict[str, Dict]:
+        """
+        Get status and merge commit of all patches in a single read.
+
+        Returns:
+            Dict mapping patch ID to {"status": ..., "merge_commit": ...}
+            in file order (merge_commit is None for candidates)
+
+        Examples:
+            for patch_id, info in release_file.get_all_patch_info().items():
+                print(patch_id, info["status"], info["merge_commit"])
+        """
+        data = self._load()
+        return {
+            patch_id: {
+                "status": patch_data.get("status"),
+                "merge_commit": patch_data.get("merge_commit"),
+            }
+            for patch_id, patch_data in data.get("patches", {}).items()
+        }
+
     def get_patch_status(self, patch_id: str) -> Optional[str]:
         """
         Get status of a specific patch.
@@ -246,7 +312,7 @@ class ReleaseFile:
             if status == "staged":
                 print("Patch is integrated")
         """
-        data = self._read()
+        data = self._load()
         patches = data.get("patches", {})
         patch_data = patches.get(patch_id)
         if patch_data is None:
@@ -296,7 +362,7 @@ class ReleaseFile:
             if commit:
                 print(f"Patch was merged in commit {commit}")
         """
-        data = self._read()
+        data = self._load()
         patches = data.get("patches", {})
         patch_data = patches.get(patch_id)
         if patch_data is None:
@@ -336,8 +402,8 @@ class ReleaseFile:
             if metadata.get("created_from_promotion"):
                 print("This release was created from promotion")
         """
-        data = self._read()
-        return data.get("metadata", {})
+        data = self._load()
+        return copy.deepcopy(data.get("metadata", {}))
 
     def clear_metadata(self) -> None:
         """
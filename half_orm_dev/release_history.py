@@ -0,0 +1,283 @@
+"""
+Indexed history of the releases.
+
+Answers "which release shipped patch X", "which patches went into versions
+A..B" and "what was merged in the last N days" without reading the whole
+history at each query.
+
+The index (.hop/cache/release_history.json) is built from the release files
+of .hop/releases/:
+    X.Y.Z.txt            production release
+    X.Y.Z-rcN.txt        release candidate (patch_id:merge_commit lines)
+    X.Y.Z.postN.txt      hotfix release
+    X.Y.Z-patches.toml   release in development (candidate/staged patches)
+and from the release tags (HGit.list_tags). A release file is read again
+only when its stat changed; tags and merge commits are resolved once, git
+objects being immutable.
+"""
+
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from packaging.version import Version
+
+from half_orm_dev import cache
+from half_orm_dev.release_file import ReleaseFile, ReleaseFileError
+
+RELEASE_HISTORY_INDEX = 'release_history.json'
+
+TXT_RELEASE_FILE = re.compile(r'^(?P<version>\d+\.\d+\.\d+)(?P<label>-rc\d+|\.post\d+)?\.txt$')
+TOML_RELEASE_FILE = re.compile(r'^(?P<version>\d+\.\d+\.\d+)-patches\.toml$')
+RELEASE_TAG = re.compile(r'^v\d+\.\d+\.\d+(-rc\d+|\.post\d+)?$')
+
+# Order of the releases of a same version
+_KIND_RANK = {'rc': 0, 'production': 1, 'hotfix': 2, 'development': 3}
+
+
+class ReleaseHistoryError(Exception):
+    """Raised when a release history query is invalid."""
+    pass
+
+
+class ReleaseHistory:
+    """
+    Query the release history of a repository.
+
+    Args:
+        repo: Repo instance (releases_dir, base_dir and hgit are used)
+
+    Examples:
+        history = ReleaseHistory(repo)
+        history.where("42-login")
+        # → [{"release": "0.3.0-rc1", "kind": "rc", "merge_commit": "ce96282f", ...},
+        #    {"release": "0.3.0", "kind": "production", ...}]
+        history.log(from_version="0.2.0", to_version="0.3.0")
+        history.log(since_days=30)
+    """
+
+    def __init__(self, repo):
+        self._repo = repo
+        self._base_dir = repo.base_dir
+        self._releases_dir = Path(repo.releases_dir)
+        self._releases: Optional[List[Dict]] = None
+
+    # ========================================================================
+    # INDEX
+    # ========================================================================
+
+    def refresh(self) -> Dict:
+        """
+        Bring the index up to date with the release files and tags.
+
+        Returns:
+            {"files": {name: {"key", "patches"}}, "tags": {name: {"commit", "date"}},
+             "commits": {merge_commit: date}}
+        """
+        previous = cache.load(self._base_dir, RELEASE_HISTORY_INDEX)
+        index = {
+            "files": {},
+            "tags": {},
+            "commits": dict(previous.get("commits", {})),
+        }
+        changed = False
+
+        for path in sorted(self._releases_dir.glob("*")):
+            if not (TXT_RELEASE_FILE.match(path.name) or TOML_RELEASE_FILE.match(path.name)):
+                continue
+            key = cache.file_key(path)
+            entry = previous.get("files", {}).get(path.name)
+            if entry is None or entry.get("key") != key:
+                entry = {"key": key, "patches": self._read_release_file(path)}
+                changed = True
+            index["files"][path.name] = entry
+        changed = changed or set(previous.get("files", {})) != set(index["files"])
+
+        git_repo = self._git_repo()
+        if git_repo is not None:
+            previous_tags = previous.get("tags", {})
+            for name in self._repo.hgit.list_tags("v*"):
+                if not RELEASE_TAG.match(name):
+                    continue
+                if name in previous_tags:
+                    index["tags"][name] = previous_tags[name]
+                    continue
+                tag = self._resolve_tag(git_repo, name)
+                if tag is not None:
+                    index["tags"][name] = tag
+            changed = changed or set(previous_tags) != set(index["tags"])
+
+            for entry in index["files"].values():
+                for _, merge_commit, _ in entry["patches"]:
+                    if merge_commit and merge_commit not in index["commits"]:
+                        date = self._commit_date(git_repo, merge_commit)
+                        if date is not None:
+                            index["commits"][merge_commit] = date
+                            changed = True
+
+        if changed:
+            cache.save(self._base_dir, RELEASE_HISTORY_INDEX, index)
+        self._releases = self._build_releases(index)
+        return index
+
+    def _git_repo(self):
+        hgit = getattr(self._repo, 'hgit', None)
+        return hgit.git_repo if hgit is not None else None
+
+    def _read_release_file(self, path: Path) -> List[List]:
+        """[[patch_id, merge_commit or None, status], ...] in file order."""
+        match = TOML_RELEASE_FILE.match(path.name)
+        if match:
+            try:
+                patches = ReleaseFile(match.group('version'), self._releases_dir).get_all_patch_info()
+            except ReleaseFileError:
+                return []
+            return [[patch_id, info["merge_commit"], info["status"]]
+                    for patch_id, info in patches.items()]
+
+        patches = []
+        for line in path.read_text(encoding='utf-8').splitlines():
+            line = line.strip()
+            if line and not line.startswith('#'):
+                patch_id, _, merge_commit = line.partition(':')
+                patches.append([patch_id, merge_commit or None, "staged"])
+        return patches
+
+    @staticmethod
+    def _resolve_tag(git_repo, name: str) -> Optional[Dict]:
+        """Commit and date (tagger date, or commit date if lightweight) of a tag."""
+        try:
+            tag_ref = git_repo.tags[name]
+            commit = tag_ref.commit
+            date = tag_ref.tag.tagged_date if tag_ref.tag is not None else commit.committed_date
+        except Exception:
+            return None
+        return {"commit": commit.hexsha, "date": date}
+
+    @staticmethod
+    def _commit_date(git_repo, sha: str) -> Optional[int]:
+        try:
+            return git_repo.commit(sha).committed_date
+        except Exception:
+            # Not fetched (yet)
+            return None
+
+    @staticmethod
+    def _build_releases(index: Dict) -> List[Dict]:
+        releases = []
+        for name, entry in index["files"].items():
+            match = TOML_RELEASE_FILE.match(name)
+            if match:
+                version, release, kind = match.group('version'), match.group('version'), 'development'
+            else:
+                match = TXT_RELEASE_FILE.match(name)
+                version, label = match.group('version'), match.group('label') or ''
+                release = f"{version}{label}"
+                kind = 'rc' if label.startswith('-rc') else 'hotfix' if label else 'production'
+            tag = index["tags"].get(f"v{release}") if kind != 'development' else None
+            releases.append({
+                "release": release,
+                "version": version,
+                "kind": kind,
+                "file": name,
+                "tag": f"v{release}" if tag else None,
+                "date": tag["date"] if tag else None,
+                "patches": [
+                    {"patch_id": patch_id, "merge_commit": merge_commit, "status": status,
+                     "date": index["commits"].get(merge_commit) if merge_commit else None}
+                    for patch_id, merge_commit, status in entry["patches"]
+                ],
+            })
+        releases.sort(key=lambda r: (Version(r["release"]) if r["kind"] != 'development'
+                                     else Version(r["version"]), _KIND_RANK[r["kind"]]))
+        return releases
+
+    # ========================================================================
+    # QUERIES
+    # ========================================================================
+
+    def releases(self) -> List[Dict]:
+        """
+        All releases in version order.
+
+        Returns:
+            List of {"release", "version", "kind", "file", "tag", "date",
+            "patches": [{"patch_id", "merge_commit", "status", "date"}]}
+            (dates are Unix timestamps, None when unknown)
+        """
+        if self._releases is None:
+            self.refresh()
+        return self._releases
+
+    def where(self, patch_id: str) -> List[Dict]:
+        """
+        Releases containing a patch, in version order.
+
+        Returns:
+            List of {"release", "version", "kind", "tag", "date",
+            "merge_commit", "status", "merge_date"}
+        """
+        found = []
+        for release in self.releases():
+            for patch in release["patches"]:
+                if patch["patch_id"] == patch_id:
+                    found.append({
+                        "release": release["release"],
+                        "version": release["version"],
+                        "kind": release["kind"],
+                        "tag": release["tag"],
+                        "date": release["date"],
+                        "merge_commit": patch["merge_commit"],
+                        "status": patch["status"],
+                        "merge_date": patch["date"],
+                    })
+        return found
+
+    def log(self, from_version: Optional[str] = None, to_version: Optional[str] = None,
+            since_days: Optional[float] = None, now: Optional[float] = None) -> List[Dict]:
+        """
+        Releases between two versions, optionally only the recent merges.
+
+        Args:
+            from_version: Lowest X.Y.Z version (inclusive)
+            to_version: Highest X.Y.Z version (inclusive)
+            since_days: Keep only the patches merged in the last since_days
+                days (and the releases containing some)
+            now: Reference time for since_days (default: time.time())
+
+        Returns:
+            Same format as releases()
+
+        Raises:
+            ReleaseHistoryError: If a version is not X.Y.Z
+        """
+        low = self._parse_version(from_version)
+        high = self._parse_version(to_version)
+        if low is not None and high is not None and low > high:
+            raise ReleaseHistoryError(f"{from_version} is after {to_version}")
+        threshold = None
+        if since_days is not None:
+            threshold = (time.time() if now is None else now) - since_days * 86400
+
+        selected = []
+        for release in self.releases():
+            version = Version(release["version"])
+            if (low is not None and version < low) or (high is not None and version > high):
+                continue
+            if threshold is not None:
+                patches = [patch for patch in release["patches"]
+                           if patch["date"] is not None and patch["date"] >= threshold]
+                if not patches:
+                    continue
+                release = {**release, "patches": patches}
+            selected.append(release)
+        return selected
+
+    @staticmethod
+    def _parse_version(value: Optional[str]) -> Optional[Version]:
+        if value is None:
+            return None
+        if not re.match(r'^\d+\.\d+\.\d+$', value):
+            raise ReleaseHistoryError(f"Invalid version '{value}': expected X.Y.Z")
+        return Version(value)
@@ -10,7 +10,9 @@ import os
 import re
 import sys
 import subprocess
+import time
 
+from contextlib import nullcontext
 from pathlib import Path
 from typing import Optional, Tuple, List, Dict, Literal
 from datetime import datetime, timezone
@@ -22,6 +24,22 @@ from packaging.version import Version, InvalidVersion
 from half_orm_dev.decorators import with_dynamic_branch_lock
 from half_orm import utils
 from half_orm_dev.release_file import ReleaseFile
+from half_orm_dev.backup import (
+    BackupOptions, backup_path, pg_dump_args, restore_command, remove_backup, prune_backups,
+    choose_backup_strategy, free_space, format_size, list_backups, backup_size,
+    expired_snapshots, drop_snapshots_in_background, PROD_RETENTION
+)
+from half_orm_dev import upgrade_plan
+from half_orm_dev.lock_retry import LockRetryPolicy
+from half_orm_dev.file_executor import (
+    execute_sql, execute_sql_file_psql, execute_python_script, TimingReport, TIMINGS_DIR
+)
+from half_orm_dev import duration_estimate
+
+
+# Transaction scopes of upgrade_production: one transaction per release, one
+# for the whole upgrade path, or none (each file autocommitted)
+TRANSACTION_SCOPES = ('release', 'upgrade', 'none')
 
 
 class ReleaseManagerError(Exception):
@@ -615,6 +633,7 @@ class ReleaseManager:
         self._repo.restore_database_from_schema()
 
         current_branch = self._repo.hgit.branch
+        timings = TimingReport(f"release-{version}")
 
         # Collect patches already applied from RC files
         applied_patches = set()
@@ -627,7 +646,8 @@ class ReleaseManager:
                 for patch_id, merge_commit in rc_patches.items():
                     if merge_commit:
                         self._repo.hgit.checkout(merge_commit)
-                    self._repo.patch_manager.apply_patch_files(patch_id, self._repo.model)
+                    self._repo.patch_manager.apply_patch_files(
+                        patch_id, self._repo.model, timings=timings)
                     applied_patches.add(patch_id)
 
         # Apply staged patches from TOML file that are NOT already in RC files
@@ -649,7 +669,8 @@ class ReleaseManager:
                 if merge_commit:
                     # Checkout the merge commit to have correct Python code
                     self._repo.hgit.checkout(merge_commit)
-                self._repo.patch_manager.apply_patch_files(patch_id, self._repo.model)
+                self._repo.patch_manager.apply_patch_files(
+                    patch_id, self._repo.model, timings=timings)
         else:
             # Production: read from hotfix snapshot if it exists
             # This handles the case where we're applying a hotfix release
@@ -665,7 +686,10 @@ class ReleaseManager:
             # (merge_commit info not available in .txt files)
             for patch_id in stage_patches:
                 if patch_id not in applied_patches:
-                    self._repo.patch_manager.apply_patch_files(patch_id, self._repo.model)
+                    self._repo.patch_manager.apply_patch_files(
+                        patch_id, self._repo.model, timings=timings)
+
+        timings.save(self._repo.base_dir)
 
         # Return to original branch
         self._repo.hgit.checkout(current_branch)
@@ -1320,6 +1344,11 @@ class ReleaseManager:
         force_backup: bool = False,
         skip_backup: bool = False,
         update_info: Optional[dict] = None,
+        backup_options: Optional[BackupOptions] = None,
+        transaction_scope: str = 'release',
+        plan: Optional[dict] = None,
+        lock_retry: Optional[LockRetryPolicy] = None,
+        timing_sources: Optional[List[str]] = None,
     ) -> dict:
         """
         Upgrade production database to target version.
@@ -1339,12 +1368,42 @@ class ReleaseManager:
             5. Apply each release sequentially on existing database
             6. Update database version after each release
 
+        Each release is applied in one transaction including its
+        half_orm_meta.hop_release row: a failing patch rolls its release back
+        and the database stays at the previous release. With
+        transaction_scope='upgrade' the whole upgrade path is one transaction.
+        Non-transactional steps (.psql and Python files, SQL files annotated
+        "-- hop: no-transaction") commit the work done before them: the
+        'upgrade' scope is refused, before any backup, when the path has one.
+
         Args:
             to_version: Stop at specific version (e.g., "1.3.6")
                     If None, apply all available releases
             dry_run: Simulate without modifying database or creating backup
             force_backup: Overwrite existing backup file without confirmation
             skip_backup: Skip backup creation (DANGEROUS - for testing only)
+            backup_options: Strategy (snapshot and/or pg_dump), format,
+                parallel jobs, compression and retention of the backup
+                (default: the backup_* settings of .hop/local_config,
+                automatic strategy and plain SQL if unset). After a
+                successful upgrade the snapshots and backups of the oldest
+                versions are deleted, keeping the retention most recent
+                ones (PROD_RETENTION, 3, if unset)
+            transaction_scope: 'release' (default), 'upgrade' or 'none'
+                (each patch file autocommitted, as before transactions)
+            plan: Upgrade plan compiled by compile_upgrade_plan() (see
+                half_orm_dev.upgrade_plan). Its releases are applied without
+                fetching nor reading the patch directories, after checking
+                the plan still matches the database and the ho-prod-X.Y.Z
+                branches. to_version and update_info are then ignored.
+            lock_retry: Run the SQL files with a lock_timeout, retried with
+                backoff (reporting the sessions holding the locks) when a
+                lock cannot be acquired (see half_orm_dev.lock_retry).
+                Default: wait for the locks indefinitely.
+            timing_sources: With dry_run, timing reports (files or
+                directories) to estimate the duration from, preferred to
+                those of .hop/timings/ (e.g. the reports of a staging
+                upgrade, see half_orm_dev.duration_estimate)
 
         Returns:
             dict: Upgrade result with detailed information
@@ -1353,11 +1412,18 @@ class ReleaseManager:
                 'status': 'success' or 'dry_run'
                 'dry_run': bool
                 'backup_created': Path or None (if dry_run or skip_backup)
+                'snapshot_used': Snapshot database name or None
+                'backup_jobs': int (pg_restore jobs of the rollback hint)
+                'db_name': str (production database)
+                'backup_strategy': 'dump', 'snapshot', 'both' or None (skip_backup)
                 'current_version': str (version before upgrade)
                 'target_version': str or None (explicit target or None for "all")
                 'releases_applied': List[str] (versions applied)
                 'patches_applied': Dict[str, List[str]] (patches per release)
                 'final_version': str (version after upgrade)
+                'timing_report': Path or None (.hop/timings/ report of the files)
+                'slowest_statements': List[dict] (see TimingReport.slowest)
+                'retention': dict or None (skip_backup), see _expire_backups
 
         Raises:
             ReleaseManagerError: For validation failures or application errors
@@ -1369,7 +1435,7 @@ class ReleaseManager:
             # Applies: 1.3.6 → 1.3.7 → 1.4.0
             # Result: {
             #   'status': 'success',
-            #   'backup_created': Path('backups/1.3.5.sql'),
+            #   'backup_created': Path('backups/prod-1.3.5.sql'),
             #   'current_version': '1.3.5',
             #   'target_version': None,
             #   'releases_applied': ['1.3.6', '1.3.7', '1.4.0'],
@@ -1397,9 +1463,10 @@ class ReleaseManager:
             # Result: {
             #   'status': 'dry_run',
             #   'dry_run': True,
-            #   'backup_would_be_created': 'backups/1.3.5.sql',
+            #   'backup_would_be_created': 'backups/prod-1.3.5.sql',
             #   'releases_would_apply': ['1.3.6', '1.3.7'],
-            #   'patches_would_apply': {...}
+            #   'patches_would_apply': {...},
+            #   'duration_estimate': {'seconds': 2460.0, 'patches': [...], ...}
             # }
 
             # Already up to date
@@ -1412,15 +1479,19 @@ class ReleaseManager:
             # }
         """
         assert self._repo.production
+        if transaction_scope not in TRANSACTION_SCOPES:
+            raise ReleaseManagerError(
+                f"Invalid transaction scope '{transaction_scope}': "
+                f"expected one of {', '.join(TRANSACTION_SCOPES)}")
         # Get current version
         current_version = self._repo.database.last_release_s
 
         # === 1. Get available releases (before any destructive operation) ===
-        if update_info is None:
+        if plan is None and update_info is None:
             update_info = self.update_production()
 
         # Check if already up to date — exit before creating any snapshot/backup
-        if not update_info['has_updates']:
+        if plan is None and not update_info['has_updates']:
             return {
                 'status': 'success',
                 'dry_run': False,
@@ -1436,136 +1507,180 @@ class ReleaseManager:
 
         # === 2. Validate environment ===
         self._validate_production_upgrade()
+        if backup_options is None and not skip_backup:
+            try:
+                backup_options = BackupOptions.from_local_config(self._repo.local_config)
+            except ValueError as e:
+                raise ReleaseManagerError(f"Invalid backup settings in .hop/local_config: {e}")
 
         # === 3. Calculate upgrade path ===
-        if to_version:
-            # Upgrade to specific version
-            full_path = update_info['upgrade_path']
-
-            # Validate target version exists
-            if to_version not in full_path:
-                raise ReleaseManagerError(
-                    f"Target version {to_version} not in upgrade path. "
-                    f"Available versions: {', '.join(full_path)}"
-                )
-
-            # Truncate path to target
-            upgrade_path = []
-            for version in full_path:
-                upgrade_path.append(version)
-                if version == to_version:
-                    break
+        planned_releases = {}
+        if plan is not None:
+            self._verify_upgrade_plan(plan, current_version)
+            planned_releases = {release['version']: release for release in plan['releases']}
+            upgrade_path = list(planned_releases)
         else:
-            # Upgrade to latest (all releases)
-            upgrade_path = update_info['upgrade_path']
+            upgrade_path = self._resolve_upgrade_path(update_info, to_version)
+
+        # A non-transactional step commits the releases before it: refuse
+        # --transaction=upgrade rather than promise "all releases or none"
+        if transaction_scope == 'upgrade':
+            releases = (list(planned_releases.values()) if plan is not None
+                        else self._compile_releases(upgrade_path))
+            steps = upgrade_plan.non_transactional_steps(releases)
+            if steps:
+                raise ReleaseManagerError(
+                    "The upgrade cannot be applied in one transaction: "
+                    "these steps commit the work done before them:\n"
+                    + '\n'.join(f"  - {step}" for step in steps)
+                    + "\nUse --transaction=release (one transaction per release).")
 
         # === DRY RUN - Stop here and return simulation ===
         if dry_run:
+            backup_strategy = None if skip_backup else self._resolve_backup_strategy(backup_options)
+            backup_name = backup_path('', self._repo.database.name, current_version,
+                                      backup_options or BackupOptions()).name
             # Build patches_would_apply dict
             patches_would_apply = {}
             for version in upgrade_path:
-                patches = self.read_release_patches(f"{version}.txt")
+                if plan is not None:
+                    patches = planned_releases[version]['patches']
+                else:
+                    patches = self.read_release_patches(f"{version}.txt")
                 patches_would_apply[version] = patches
 
+            reports = duration_estimate.load_reports(
+                [Path(self._base_dir) / '.hop' / TIMINGS_DIR], preferred=timing_sources or [])
+            estimation = duration_estimate.estimate(
+                patches_would_apply, reports, self._repo.database.relation_sizes())
+
             return {
                 'status': 'dry_run',
                 'dry_run': True,
-                'backup_would_be_created': f'backups/{current_version}.sql',
+                'backup_would_be_created': (
+                    f'backups/{backup_name}' if backup_strategy in ('dump', 'both') else None),
+                'snapshot_would_be_created': (
+                    self._snapshot_name(current_version)
+                    if backup_strategy in ('snapshot', 'both') else None),
+                'backup_strategy': backup_strategy,
+                'backup_usage': None if skip_backup else self._backup_inventory(),
                 'current_version': current_version,
                 'target_version': to_version,
                 'releases_would_apply': upgrade_path,
                 'patches_would_apply': patches_would_apply,
-                'final_version': upgrade_path[-1] if upgrade_path else current_version
+                'final_version': upgrade_path[-1] if upgrade_path else current_version,
+                'duration_estimate': estimation
             }
 
-        # === 4. SNAPSHOT OR BACKUP (last step before any destructive operation) ===
-        # Preferred: instant snapshot via CREATE DATABASE ... TEMPLATE (requires CREATEDB).
-        # Fallback: full pg_dump.
+        # === 4. SNAPSHOT AND/OR BACKUP (last step before any destructive operation) ===
+        # Snapshot: instant copy via CREATE DATABASE ... TEMPLATE (requires CREATEDB).
+        # Dump: pg_dump, made from the snapshot with the 'both' strategy.
         # Connections are terminated before the snapshot — this is intentional:
         # we want no application traffic during the schema migration anyway.
         snapshot_name = None
-        backup_path = None
+        backup_file = None
+        backup_strategy = None
         if not skip_backup:
-            db = self._repo.database
-            version_slug = current_version.replace('.', '_').replace('-', '_')
-            snap_name = f"{db.name}_hop_snap_{version_slug}"
-
-            if db.has_createdb_privilege():
-                existing = db.list_snapshots()
-                if snap_name in existing and not force_backup:
-                    raise ReleaseManagerError(
-                        f"Snapshot '{snap_name}' already exists — a previous upgrade "
-                        f"attempt may have failed mid-way.\n\n"
-                        f"OPTIONS:\n"
-                        f"  • Retry and overwrite the snapshot:\n"
-                        f"      half_orm dev upgrade --force\n"
-                        f"  • Roll back to the snapshot first, then retry:\n"
-                        f"      dropdb {db.name} && createdb -T {snap_name} {db.name}\n"
-                        f"      half_orm dev upgrade --force\n"
-                        f"  • Drop the snapshot and retry (no rollback possible):\n"
-                        f"      dropdb {snap_name}\n"
-                        f"      half_orm dev upgrade"
-                    )
-                if force_backup:
-                    db.drop_snapshot(snap_name)
-                db.terminate_active_connections()
-                db.create_snapshot(snap_name)
-                snapshot_name = snap_name
-                # Our psycopg connection was terminated above — reconnect.
-                db._Database__model.reconnect(reload=True)
-            else:
-                backup_path = self._create_production_backup(
+            backup_strategy = self._resolve_backup_strategy(backup_options)
+            if backup_strategy in ('snapshot', 'both'):
+                snapshot_name = self._create_production_snapshot(current_version, force_backup)
+            if backup_strategy in ('dump', 'both'):
+                backup_file = self._create_production_backup(
                     current_version,
-                    force=force_backup
+                    force=force_backup,
+                    options=backup_options,
+                    database_name=snapshot_name
                 )
 
         # === 5. Apply releases ===
         git_repo = self._repo.hgit._HGit__git_repo
         patches_applied = {}
+        transaction = None
+        final_version = upgrade_path[-1] if upgrade_path else current_version
+        timings = TimingReport(f"upgrade-{current_version}-to-{final_version}")
+        timings.relations = self._repo.database.relation_sizes()
+        # None until the first release: the upgrade may fail before it
+        # (transaction.begin() of --transaction=upgrade)
+        version = None
         try:
+            if transaction_scope == 'upgrade':
+                transaction = self._repo.database.transaction()
+                transaction.begin()
             for version in upgrade_path:
                 # Checkout immutable ho-prod-X.Y.Z branch (created at promote time).
-                # Fetch explicitly: production servers cloned with --single-branch only
-                # track ho-prod, so fetch_from_origin() won't fetch ho-prod-X.Y.Z.
-                prod_branch = f"ho-prod-{version}"
-                try:
-                    git_repo.git.fetch(
-                        'origin',
-                        f'{prod_branch}:refs/remotes/origin/{prod_branch}'
-                    )
-                except Exception:
-                    pass  # already present locally or will fail at checkout below
-                local_heads = {h.name: h for h in git_repo.heads}
-                if prod_branch in local_heads:
-                    local_heads[prod_branch].checkout()
+                # A plan was compiled from the fetched branches: no fetch needed.
+                self._checkout_prod_branch(git_repo, version, fetch=plan is None)
+
+                if transaction_scope == 'release':
+                    transaction = self._repo.database.transaction()
+                    transaction.begin()
+                timings.release = version
+                if plan is not None:
+                    applied_patches = self._apply_release_from_plan(
+                        planned_releases[version], transaction, lock_retry, timings)
                 else:
-                    git_repo.git.checkout('-b', prod_branch, f'origin/{prod_branch}')
-
-                applied_patches = self._apply_release_to_production(version)
+                    applied_patches = self._apply_release_to_production(
+                        version, transaction, lock_retry, timings)
+                if transaction_scope == 'release':
+                    transaction.commit()
                 patches_applied[version] = applied_patches
+            if transaction_scope == 'upgrade':
+                transaction.commit()
         except Exception as e:
-            db_name = self._repo.database.name
-            if snapshot_name:
-                restore_hint = (
-                    f"Restore snapshot: dropdb {db_name} && "
-                    f"createdb -T {snapshot_name} {db_name}"
-                )
-            else:
-                restore_hint = f"Restore dump: psql -d {db_name} -f {backup_path}"
+            # Releases applied before the failure stay in the database, except
+            # with --transaction=upgrade where the whole upgrade is rolled back
+            committed_releases = list(patches_applied) if transaction_scope != 'upgrade' else []
+            database_state, rolled_back = self._rollback_upgrade(
+                transaction, version, current_version, committed_releases)
+            # Version of the database once the instructions are followed: the
+            # code checked out must match it
+            database_version = committed_releases[-1] if committed_releases else current_version
+            instructions = []
+            if not rolled_back:
+                db_name = self._repo.database.name
+                if snapshot_name:
+                    instructions.append(
+                        f"Restore snapshot: dropdb {db_name} && "
+                        f"createdb -T {snapshot_name} {db_name}")
+                    database_version = current_version
+                elif backup_file is not None:
+                    jobs = backup_options.jobs if backup_options else 1
+                    instructions.append(
+                        f"Restore dump: {restore_command(db_name, backup_file, jobs)}")
+                    database_version = current_version
+                else:
+                    instructions.append("No backup was made (--skip-backup)")
+            instructions += [
+                f"git checkout ho-prod-{database_version}",
+                "Verify: SELECT * FROM half_orm_meta.hop_release ORDER BY id DESC LIMIT 1;",
+                "Fix the failing patch and retry upgrade",
+            ]
+            timing_report = timings.save(self._repo.base_dir)
+            timing_state = f"Timing report: {timing_report}\n\n" if timing_report else ''
+            failure = (f"Failed to apply release {version}" if version is not None
+                       else "Upgrade failed before applying the first release")
             raise ReleaseManagerError(
-                f"Failed to apply release {version}: {e}\n\n"
+                f"{failure}: {e}\n\n"
+                f"{database_state}"
+                f"{timing_state}"
                 f"ROLLBACK INSTRUCTIONS:\n"
-                f"1. {restore_hint}\n"
-                f"2. git checkout ho-prod-{current_version}\n"
-                f"3. Verify: SELECT * FROM half_orm_meta.hop_release ORDER BY id DESC LIMIT 1;\n"
-                f"4. Fix the failing patch and retry upgrade"
+                + "\n".join(f"{number}. {step}" for number, step in enumerate(instructions, 1))
             ) from e
 
         # Prune local ho-prod-* branches whose remote counterpart was deleted at promote time
         self._repo.hgit.prune_local_branches(pattern="ho-prod-*", exclude_current=True)
 
+        # Expire the snapshots and backups beyond the retention, like the
+        # ho-prod-X.Y.Z branches (the snapshots are dropped in the background)
+        retention = None
+        if not skip_backup:
+            retention = self._expire_backups(
+                backup_options.retention or PROD_RETENTION, snapshot_name, backup_file)
+
         # Keep snapshot for rollback — suggest archival dump for long-term storage
-        if snapshot_name:
+        if snapshot_name and backup_file:
+            click.echo(f"\n💡 Snapshot {snapshot_name} kept for rollback, dump in {backup_file}.")
+        elif snapshot_name:
             click.echo(
                 f"\n💡 Snapshot {snapshot_name} kept for rollback.\n"
                 f"   For long-term archival: pg_dump {self._repo.database.name} "
@@ -1573,38 +1688,395 @@ class ReleaseManager:
             )
 
         # === 6. Build success result ===
-        final_version = upgrade_path[-1] if upgrade_path else current_version
-
         return {
             'status': 'success',
             'dry_run': False,
-            'backup_created': backup_path,
+            'backup_created': backup_file,
             'snapshot_used': snapshot_name,
+            'backup_strategy': backup_strategy,
+            'backup_jobs': backup_options.jobs if backup_options else 1,
+            'db_name': self._repo.database.name,
             'current_version': current_version,
             'target_version': to_version,
             'releases_applied': upgrade_path,
             'patches_applied': patches_applied,
-            'final_version': final_version
+            'final_version': final_version,
+            'timing_report': timings.save(self._repo.base_dir),
+            'slowest_statements': timings.slowest(),
+            'retention': retention,
+        }
+
+
+    @staticmethod
+    def _resolve_upgrade_path(update_info: dict, to_version: Optional[str]) -> List[str]:
+        """
+        Releases to apply: the whole upgrade path of update_info, or up to to_version.
+
+        Raises:
+            ReleaseManagerError: If to_version is not in the upgrade path
+        """
+        full_path = update_info['upgrade_path']
+        if not to_version:
+            # Upgrade to latest (all releases)
+            return full_path
+
+        # Validate target version exists
+        if to_version not in full_path:
+            raise ReleaseManagerError(
+                f"Target version {to_version} not in upgrade path. "
+                f"Available versions: {', '.join(full_path)}"
+            )
+
+        # Truncate path to target
+        return full_path[:full_path.index(to_version) + 1]
+
+    @staticmethod
+    def _fetch_prod_branch(git_repo, version: str) -> None:
+        """
+        Fetch the ho-prod-X.Y.Z branch of a release.
+
+        Fetch explicitly: production servers cloned with --single-branch only
+        track ho-prod, so fetch_from_origin() won't fetch ho-prod-X.Y.Z.
+        """
+        prod_branch = f"ho-prod-{version}"
+        try:
+            git_repo.git.fetch(
+                'origin',
+                f'{prod_branch}:refs/remotes/origin/{prod_branch}'
+            )
+        except Exception:
+            pass  # already present locally or will fail at checkout below
+
+    @staticmethod
+    def _prod_branch_ref(git_repo, version: str) -> str:
+        """Local ho-prod-X.Y.Z branch if any, its remote-tracking branch otherwise."""
+        prod_branch = f"ho-prod-{version}"
+        if prod_branch in {h.name for h in git_repo.heads}:
+            return prod_branch
+        return f"origin/{prod_branch}"
+
+    def _checkout_prod_branch(self, git_repo, version: str, fetch: bool = True) -> None:
+        """Checkout the ho-prod-X.Y.Z branch of a release (fetched first by default)."""
+        prod_branch = f"ho-prod-{version}"
+        if fetch:
+            self._fetch_prod_branch(git_repo, version)
+        local_heads = {h.name: h for h in git_repo.heads}
+        if prod_branch in local_heads:
+            local_heads[prod_branch].checkout()
+        else:
+            git_repo.git.checkout('-b', prod_branch, f'origin/{prod_branch}')
+
+    def compile_upgrade_plan(
+        self,
+        to_version: Optional[str] = None,
+        update_info: Optional[dict] = None,
+    ) -> dict:
+        """
+        Compile the upgrade of production into an execution plan.
+
+        Run ahead of the maintenance window: fetches the ho-prod-X.Y.Z
+        branches of the upgrade path, reads their release files and patch
+        directories from git (nothing is checked out, the database is not
+        modified) and records the steps with the SQL to execute. Save it
+        with upgrade_plan.save() and execute it with
+        upgrade_production(plan=upgrade_plan.load(path)).
+
+        Args:
+            to_version: Stop at specific version, None for all releases
+            update_info: Pre-fetched result of update_production()
+
+        Returns:
+            dict: The plan (see half_orm_dev.upgrade_plan), without checksum
+
+        Raises:
+            ReleaseManagerError: If production is up to date, or a release
+                file or patch directory is missing
+        """
+        current_version = self._repo.database.last_release_s
+        if update_info is None:
+            update_info = self.update_production()
+        if not update_info['has_updates']:
+            raise ReleaseManagerError(
+                f"Production is already at latest version ({current_version}): nothing to plan")
+        upgrade_path = self._resolve_upgrade_path(update_info, to_version)
+
+        releases = self._compile_releases(upgrade_path)
+
+        return {
+            "format": upgrade_plan.PLAN_FORMAT,
+            "database": self._repo.database.name,
+            "from_version": current_version,
+            "to_version": upgrade_path[-1],
+            "created": time.time(),
+            "releases": releases,
         }
 
+    def _compile_releases(self, upgrade_path: List[str]) -> List[dict]:
+        """
+        Steps of the releases of the upgrade path, read from their fetched
+        ho-prod-X.Y.Z branches (see upgrade_plan.compile_release).
+
+        Raises:
+            ReleaseManagerError: If a branch, release file or patch
+                directory is missing
+        """
+        git_repo = self._repo.hgit._HGit__git_repo
+        releases = []
+        for version in upgrade_path:
+            self._fetch_prod_branch(git_repo, version)
+            ref = self._prod_branch_ref(git_repo, version)
+            try:
+                commit = git_repo.git.rev_parse(ref)
+            except Exception as e:
+                raise ReleaseManagerError(f"Branch ho-prod-{version} not found: {e}")
+            try:
+                releases.append(upgrade_plan.compile_release(self._repo.hgit, version, ref, commit))
+            except upgrade_plan.UpgradePlanError as e:
+                raise ReleaseManagerError(str(e))
+        return releases
+
+    def _verify_upgrade_plan(self, plan: dict, current_version: str) -> None:
+        """
+        Check a plan applies to the database and to the ho-prod-X.Y.Z branches.
+
+        Raises:
+            ReleaseManagerError: If the plan was compiled for another
+                database or version, or a branch moved since
+        """
+        if plan['database'] != self._repo.database.name:
+            raise ReleaseManagerError(
+                f"The plan was compiled for database {plan['database']}, "
+                f"not {self._repo.database.name}")
+        if plan['from_version'] != current_version:
+            raise ReleaseManagerError(
+                f"The plan upgrades from {plan['from_version']} but the database is at "
+                f"{current_version}: compile it again (half_orm dev upgrade --plan)")
+        git_repo = self._repo.hgit._HGit__git_repo
+        for release in plan['releases']:
+            ref = self._prod_branch_ref(git_repo, release['version'])
+            try:
+                commit = git_repo.git.rev_parse(ref)
+            except Exception:
+                commit = None
+            if commit != release['commit']:
+                raise ReleaseManagerError(
+                    f"{release['branch']} does not point to the planned commit "
+                    f"{release['commit'][:8]} anymore: compile the plan again "
+                    f"(half_orm dev upgrade --plan)")
+
+    @staticmethod
+    def _rollback_upgrade(transaction, version: Optional[str], current_version: str,
+                          committed_releases: List[str]) -> Tuple[str, bool]:
+        """
+        Roll back the open transaction of a failed upgrade.
+
+        Args:
+            transaction: DatabaseTransaction of the failed release (or of the
+                whole upgrade), None without transaction
+            version: Release that failed, None if the upgrade failed
+                before its first release
+            current_version: Version of the database before the upgrade
+            committed_releases: Releases committed before the failure
+
+        Returns:
+            tuple: Description of the database state for the error message,
+            and whether the failed release was fully rolled back (no
+            restore needed)
+        """
+        if transaction is None:
+            return "", False
+        failed = f"Release {version}" if version is not None else "The upgrade"
+        if transaction.active:
+            try:
+                transaction.rollback()
+            except Exception as e:
+                return f"DATABASE STATE:\n{failed}: rollback failed: {e}\n\n", False
+        if transaction.suspended_steps:
+            return (
+                f"DATABASE STATE:\n"
+                f"{failed} is partially applied: the work done up to the "
+                f"non-transactional step {transaction.suspended_steps[-1]} was committed.\n\n"
+            ), False
+        database_version = committed_releases[-1] if committed_releases else current_version
+        return (
+            f"DATABASE STATE:\n"
+            f"{failed} was rolled back: the database is at version {database_version}.\n"
+            f"Fix the failing patch and run the upgrade again (no restore needed).\n\n"
+        ), True
+
+    def _resolve_backup_strategy(self, options: Optional[BackupOptions]) -> str:
+        """
+        Backup strategy of the upgrade: 'dump', 'snapshot' or 'both'.
+
+        The 'auto' strategy is resolved from the CREATEDB privilege, the size
+        of the database and the free space of the server data directory,
+        only known for a local server (see Database.data_directory and
+        backup.choose_backup_strategy). A warning is printed when a snapshot
+        is taken on a server whose free space is unknown, and when the
+        backups directory has less free space than the size of the database.
+
+        Raises:
+            ReleaseManagerError: If a snapshot is required without CREATEDB
+        """
+        strategy = options.strategy if options else 'auto'
+        db = self._repo.database
+        can_snapshot = strategy != 'dump' and db.has_createdb_privilege()
+        size = db.database_size()
+        server_free = free_space(db.data_directory()) if strategy == 'auto' and can_snapshot else None
+        try:
+            strategy = choose_backup_strategy(strategy, can_snapshot, size, server_free)
+        except ValueError as e:
+            raise ReleaseManagerError(f"{e} (use --backup-strategy dump or auto)")
+        if strategy == 'snapshot' and server_free is None:
+            click.echo(utils.Color.bold(
+                f"⚠️  Free space of the server unknown: the snapshot needs about "
+                f"{format_size(size)} on the server (--backup-strategy dump to avoid it)"))
+        if strategy != 'snapshot':
+            backups_dir = Path(self._repo.backups_dir)
+            local_free = free_space(backups_dir if backups_dir.exists() else backups_dir.parent)
+            if local_free is not None and local_free < size:
+                click.echo(utils.Color.bold(
+                    f"⚠️  {backups_dir} has {format_size(local_free)} free for the dump "
+                    f"of a {format_size(size)} database"))
+        return strategy
+
+    def _backup_inventory(self) -> dict:
+        """
+        Snapshots and backups of the production database with their disk usage.
+
+        Returns:
+            dict: Oldest version first, sizes in bytes (pg_database_size of
+            the snapshots, files of the backups):
+                'snapshots': [{'name': 'prod_hop_snap_1_3_5', 'version': '1.3.5', 'size': int}]
+                'backups': [{'path': Path, 'size': int}]
+                'size': Total size
+        """
+        db = self._repo.database
+        snapshots = [
+            {'name': name, 'version': str(version), 'size': db.database_size(name)}
+            for version, name in sorted(self._snapshot_versions())
+        ]
+        backups = [
+            {'path': path, 'size': backup_size(path)}
+            for path in list_backups(self._repo.backups_dir, db.name)
+        ]
+        return {
+            'snapshots': snapshots,
+            'backups': backups,
+            'size': sum(item['size'] for item in snapshots + backups),
+        }
+
+    def _expire_backups(self, retention: int, snapshot_name: Optional[str] = None,
+                        backup_file: Optional[Path] = None) -> dict:
+        """
+        Remove the snapshots and backups beyond the `retention` most recent.
+
+        Backup files are removed at once, the snapshot databases are dropped
+        in a background thread (see backup.drop_snapshots_in_background).
+        The snapshot and backup of this upgrade are always kept.
+
+        Returns:
+            dict:
+                'retention': int
+                'usage': Disk usage of the snapshots and backups kept
+                    (see _backup_inventory)
+                'expired_snapshots': List[str] (being dropped)
+                'removed_backups': List[Path]
+                'thread': Thread dropping the snapshots, or None
+        """
+        db = self._repo.database
+        removed = prune_backups(self._repo.backups_dir, db.name, retention,
+                                keep=[backup_file] if backup_file else [])
+        for path in removed:
+            click.echo(f"  ✓ Removed old backup {path.name}")
+        expired = expired_snapshots(self._snapshot_versions(), retention,
+                                    keep=[snapshot_name] if snapshot_name else [])
+        usage = self._backup_inventory()
+        freed = sum(item['size'] for item in usage['snapshots'] if item['name'] in expired)
+        usage['snapshots'] = [item for item in usage['snapshots'] if item['name'] not in expired]
+        usage['size'] -= freed
+        thread = None
+        if expired:
+            click.echo(f"  ⏳ Dropping {len(expired)} expired snapshot(s) "
+                       f"({format_size(freed)}) in the background")
+            thread = drop_snapshots_in_background(db.drop_snapshot, expired, report=click.echo)
+        return {
+            'retention': retention,
+            'usage': usage,
+            'expired_snapshots': expired,
+            'removed_backups': removed,
+            'thread': thread,
+        }
+
+    def _snapshot_name(self, current_version: str) -> str:
+        """Snapshot database of the production at current_version: {db}_hop_snap_1_3_5"""
+        version_slug = current_version.replace('.', '_').replace('-', '_')
+        return f"{self._repo.database.name}_hop_snap_{version_slug}"
+
+    def _create_production_snapshot(self, current_version: str, force: bool = False) -> str:
+        """
+        Create the {db}_hop_snap_<version> snapshot of the production database.
+
+        Terminates the connections to the database (CREATE DATABASE ...
+        TEMPLATE requires none) and reconnects the model.
+
+        Returns:
+            str: Name of the snapshot database
+
+        Raises:
+            ReleaseManagerError: If the snapshot already exists and force is False
+        """
+        db = self._repo.database
+        snap_name = self._snapshot_name(current_version)
+        if snap_name in db.list_snapshots() and not force:
+            raise ReleaseManagerError(
+                f"Snapshot '{snap_name}' already exists — a previous upgrade "
+                f"attempt may have failed mid-way.\n\n"
+                f"OPTIONS:\n"
+                f"  • Retry and overwrite the snapshot:\n"
+                f"      half_orm dev upgrade --force\n"
+                f"  • Roll back to the snapshot first, then retry:\n"
+                f"      dropdb {db.name} && createdb -T {snap_name} {db.name}\n"
+                f"      half_orm dev upgrade --force\n"
+                f"  • Drop the snapshot and retry (no rollback possible):\n"
+                f"      dropdb {snap_name}\n"
+                f"      half_orm dev upgrade"
+            )
+        if force:
+            db.drop_snapshot(snap_name)
+        db.terminate_active_connections()
+        db.create_snapshot(snap_name)
+        # Our psycopg connection was terminated above — reconnect.
+        db._Database__model.reconnect(reload=True)
+        return snap_name
 
     def _create_production_backup(
         self,
         current_version: str,
-        force: bool = False
+        force: bool = False,
+        options: Optional[BackupOptions] = None,
+        database_name: Optional[str] = None
     ) -> Path:
         """
         Create production database backup before upgrade.
 
-        Creates backups/{version}.sql using pg_dump with full database dump
+        Creates backups/{db}-{version}.sql using pg_dump with full database dump
         (schema + data + metadata). This is the rollback point if upgrade fails.
+        With the custom or directory format (see half_orm_dev.backup) the
+        backup is backups/{db}-{version}.dump or the directory
+        backups/{db}-{version}.dir, written by pg_dump -j N for the directory
+        format. {db} is the name of the production database.
 
         Args:
             current_version: Current database version (e.g., "1.3.5")
             force: Overwrite existing backup without confirmation
+            options: Format, jobs and compression (default: plain SQL)
+            database_name: Database dumped (default: the production
+                database; the snapshot with the 'both' strategy, which
+                holds the same data and takes no lock on production)
 
         Returns:
-            Path: Backup file path (e.g., Path("backups/1.3.5.sql"))
+            Path: Backup file path (e.g., Path("backups/prod-1.3.5.sql"))
 
         Raises:
             ReleaseManagerError: If backup creation fails or user declines overwrite
@@ -1612,14 +2084,14 @@ class ReleaseManager:
         Examples:
             # Create new backup
             path = mgr._create_production_backup("1.3.5")
-            # → Creates backups/1.3.5.sql
-            # → Returns Path('backups/1.3.5.sql')
+            # → Creates backups/prod-1.3.5.sql
+            # → Returns Path('backups/prod-1.3.5.sql')
 
             # Backup exists, user confirms overwrite
             path = mgr._create_production_backup("1.3.5", force=False)
             # → Prompt: "Backup exists. Overwrite? [y/N]"
             # → User enters 'y'
-            # → Overwrites backups/1.3.5.sql
+            # → Overwrites backups/prod-1.3.5.sql
 
             # Backup exists, force=True
             path = mgr._create_production_backup("1.3.5", force=True)
@@ -1630,12 +2102,18 @@ class ReleaseManager:
             # → User enters 'n'
             # → Raises: "Backup exists and user declined overwrite"
         """
+        if options is None:
+            options = BackupOptions()
+        # Named after the production database, even when dumped from the snapshot
+        production_name = self._repo.database.name
+        database_name = database_name or production_name
+
         # Create backups directory if doesn't exist
-        backups_dir = Path(self._repo.base_dir) / ".hop" / "backups"
-        backups_dir.mkdir(exist_ok=True)
+        backups_dir = Path(self._repo.backups_dir)
+        backups_dir.mkdir(parents=True, exist_ok=True)
 
         # Build backup filename
-        backup_file = backups_dir / f"{current_version}.sql"
+        backup_file = backup_path(backups_dir, production_name, current_version, options)
 
         # Check if backup already exists
         if backup_file.exists() and not force:
@@ -1651,6 +2129,10 @@ class ReleaseManager:
                     f"Use --force to overwrite or remove the file manually."
                 )
 
+        # pg_dump -Fd refuses to write into an existing directory
+        if options.format == 'directory':
+            remove_backup(backup_file)
+
         # Create backup using pg_dump with explicit connection parameters
         try:
             params = self._repo.database._get_connection_params()
@@ -1661,7 +2143,10 @@ class ReleaseManager:
                     cmd_args += ['-p', str(params['port'])]
             if params.get('user'):
                 cmd_args += ['-U', params['user']]
-            cmd_args += [self._repo.database.name, '-f', str(backup_file)]
+            if options.format == 'plain' and options.jobs == 1 and options.compress is None:
+                cmd_args += [database_name, '-f', str(backup_file)]
+            else:
+                cmd_args += pg_dump_args(database_name, backup_file, options)
             self._repo.database.execute_pg_command(*cmd_args)
         except Exception as e:
             raise ReleaseManagerError(
@@ -1722,7 +2207,8 @@ class ReleaseManager:
             )
 
 
-    def _apply_release_to_production(self, version: str) -> List[str]:
+    def _apply_release_to_production(self, version: str, transaction=None,
+                                     lock_retry=None, timings=None) -> List[str]:
         """
         Apply single release to existing production database.
 
@@ -1734,6 +2220,11 @@ class ReleaseManager:
 
         Args:
             version: Release version (e.g., "1.3.6")
+            transaction: Optional DatabaseTransaction the release is applied
+                in (committed or rolled back by the caller)
+            lock_retry: Optional LockRetryPolicy of the SQL files
+            timings: Optional TimingReport of the patch files, also stored
+                in half_orm_meta.hop_upgrade_timing
 
         Returns:
             List[str]: Patch IDs applied (e.g., ["456-auth", "789-security"])
@@ -1772,7 +2263,10 @@ class ReleaseManager:
             try:
                 self._repo.patch_manager.apply_patch_files(
                     patch_id,
-                    self._repo.model
+                    self._repo.model,
+                    transaction=transaction,
+                    lock_retry=lock_retry,
+                    timings=timings
                 )
             except Exception as e:
                 raise ReleaseManagerError(
@@ -1780,6 +2274,69 @@ class ReleaseManager:
                 ) from e
 
         # Update database version
+        self._register_production_release(version, timings)
+
+        return patches
+
+    def _apply_release_from_plan(self, release: dict, transaction=None,
+                                 lock_retry=None, timings=None) -> List[str]:
+        """
+        Apply a release of an upgrade plan to the production database.
+
+        The SQL steps are executed from the plan on the connection of the
+        model; the .psql and Python steps run from the checked out
+        ho-prod-X.Y.Z branch, outside the transaction.
+
+        Args:
+            release: Release entry of the plan (see half_orm_dev.upgrade_plan)
+            transaction: Optional DatabaseTransaction the release is applied in
+            lock_retry: Optional LockRetryPolicy of the SQL steps
+            timings: Optional TimingReport of the steps
+
+        Returns:
+            List[str]: Patch IDs applied
+
+        Raises:
+            ReleaseManagerError: If a step fails
+        """
+        version = release['version']
+        model = self._repo.model
+        base_dir = Path(self._repo.base_dir)
+        for step in release['steps']:
+            name = f"{step['patch_id']}/{step['file']}"
+            transactional = step['kind'] == 'sql' and step['transactional']
+            click.echo(f"  • {name}{'' if transactional or step['kind'] != 'sql' else ' (no transaction)'}")
+            suspended = nullcontext()
+            if transaction is not None and not transactional:
+                suspended = transaction.suspended(name)
+            timed = nullcontext()
+            if timings is not None:
+                timed = timings.step(step['patch_id'], step['file'], step['kind'])
+            try:
+                with suspended, timed as statements:
+                    if step['kind'] == 'sql':
+                        if step['sql'].strip():
+                            execute_sql(step['sql'], model, lock_retry, statements, label=name)
+                    elif step['kind'] == 'psql':
+                        execute_sql_file_psql(
+                            base_dir / step['path'], self._repo.database, self._repo.database.name)
+                    else:
+                        output = execute_python_script(base_dir / step['path'], model)
+                        if output:
+                            click.echo(f"Python output from {step['file']}: {output}")
+            except Exception as e:
+                raise ReleaseManagerError(
+                    f"Failed to apply {name} from release {version}: {e}"
+                ) from e
+
+        self._register_production_release(version, timings)
+        return release['patches']
+
+    def _register_production_release(self, version: str, timings=None) -> None:
+        """
+        Record release X.Y.Z in half_orm_meta.hop_release, and the timing
+        summary of its files in half_orm_meta.hop_upgrade_timing.
+        """
         version_parts = version.split('.')
         if len(version_parts) != 3:
             raise ReleaseManagerError(
@@ -1788,8 +2345,8 @@ class ReleaseManager:
 
         major, minor, patch = map(int, version_parts)
         self._repo.database.register_release(major, minor, patch)
-
-        return patches
+        if timings is not None:
+            self._repo.database.record_upgrade_timings(version, timings.release_steps(version))
 
     # ========================================================================
     # NEW INTEGRATION WORKFLOW WITH RELEASE BRANCHES
@@ -2278,8 +2835,13 @@ class ReleaseManager:
     ) -> dict:
         """Push/sync, tag, cleanup branches, migrate candidates, build result."""
         current_branch = self._repo.hgit.branch
-        self._repo.hgit.push_branch(current_branch)
-        self._repo.sync_hop_to_active_branches(reason=f"promote {version} to {target}")
+        modified_branches = [current_branch]
+        self._repo.sync_hop_to_active_branches(
+            reason=f"promote {version} to {target}",
+            defer_push=True,
+            modified_branches=modified_branches
+        )
+        self._repo.push_synced_branches(modified_branches)
 
         self._repo.hgit.create_tag(tag, tag_message)
         self._repo.hgit.push_tag(tag)
@@ -2325,12 +2887,13 @@ class ReleaseManager:
             result['branch'] = release_branch
         return result
 
-    def _cleanup_old_prod_branches(self, current_version: str, retention: int = 3) -> list:
+    def _cleanup_old_prod_branches(self, current_version: str, retention: int = PROD_RETENTION) -> list:
         """Remove ho-prod-* branches from remote beyond the retention window.
 
         Keeps the last `retention` versions (including current_version).
         Called at promote-prod time so production servers get a clean slate
-        on the next fetch --prune.
+        on the next fetch --prune. The snapshots and backups of the
+        production servers follow the same retention (see _expire_backups).
         """
         remote_branches = self._repo.hgit.get_remote_branches()
         prod_branches = []
@@ -2375,21 +2938,25 @@ class ReleaseManager:
         base = '.'.join(parts[:3])
         return base + '-' + '_'.join(parts[3:]) if len(parts) > 3 else base
 
-    def _list_rollback_versions(self) -> list:
-        """Return available rollback versions (sorted descending) based on snapshots."""
+    def _snapshot_versions(self) -> list:
+        """Return (Version, snapshot name) pairs of the {db}_hop_snap_* snapshots."""
         db = self._repo.database
         prefix = f"{db.name}_hop_snap_"
-        snap_names = db.list_snapshots()
-        versions = []
-        for snap in snap_names:
+        snapshots = []
+        for snap in db.list_snapshots():
             if snap.startswith(prefix):
                 version = self._slug_to_version(snap[len(prefix):])
                 if version:
                     try:
-                        Version(version)
-                        versions.append(version)
+                        snapshots.append((Version(version), snap))
                     except InvalidVersion:
                         pass
+        return snapshots
+
+    def _list_rollback_versions(self) -> list:
+        """Return available rollback versions (sorted descending) based on snapshots."""
+        prefix = f"{self._repo.database.name}_hop_snap_"
+        versions = [self._slug_to_version(snap[len(prefix):]) for _, snap in self._snapshot_versions()]
         versions.sort(key=lambda v: Version(v), reverse=True)
         return versions
 
@@ -2547,8 +3114,9 @@ class ReleaseManager:
         """Create RC snapshot file from staged patches."""
         rc_file = self._releases_dir / f"{version}-rc{rc_number}.txt"
         lines = []
+        patches = release_file.get_all_patch_info()
         for patch_id in staged_patches:
-            merge_commit = release_file.get_merge_commit(patch_id)
+            merge_commit = patches.get(patch_id, {}).get("merge_commit")
             lines.append(f"{patch_id}:{merge_commit}" if merge_commit else patch_id)
         rc_file.write_text("\n".join(lines) + "\n" if lines else "", encoding='utf-8')
 
@@ -3205,6 +3773,7 @@ class ReleaseManager:
             - patches_applied: List of patch IDs applied
             - candidates_merged: List of candidate patch branches merged
             - files_applied: List of SQL/Python files applied
+            - timing_report: Timing report of the patch files (.hop/timings/)
             - tests_passed: Boolean (None if tests not run)
             - test_output: Test output (None if tests not run)
             - status: 'success' or 'failed'
@@ -3294,12 +3863,14 @@ class ReleaseManager:
             # 6. Get and apply ALL patches (RC + staged + candidates)
             all_patches = self.get_all_release_patches_for_testing()
             all_applied_files = []
+            timings = TimingReport(f"validate-{next_version}")
 
             for patch_id in all_patches:
                 files = self._repo.patch_manager.apply_patch_files(
-                    patch_id, self._repo.model
+                    patch_id, self._repo.model, timings=timings
                 )
                 all_applied_files.extend(files)
+            timing_report = timings.save(self._repo.base_dir)
 
             # 7. Generate Python code
             from half_orm_dev import modules
@@ -3340,6 +3911,7 @@ class ReleaseManager:
                 'patches_applied': all_patches,
                 'candidates_merged': candidates_merged,
                 'files_applied': all_applied_files,
+                'timing_report': timing_report,
                 'tests_passed': tests_passed,
                 'test_output': test_output,
                 'status': 'success' if tests_passed is not False else 'failed',
@@ -33,9 +33,10 @@ from half_orm_dev.release_manager import ReleaseManager, ReleaseManagerError
 from half_orm_dev.migration_manager import MigrationManager, MigrationManagerError
 from half_orm_dev.release_file import ReleaseFile, ReleaseFileError
 from half_orm_dev.file_executor import execute_bootstrap_files
+from half_orm_dev import dump_restore
 from half_orm_dev.decorators import with_dynamic_branch_lock
 
-from .utils import TEMPLATE_DIRS, hop_version
+from .utils import TEMPLATE_DIRS, hop_version, find_base_dir
 
 def _git_origin_to_https(git_origin: str) -> str:
     """Convert a git remote URL to its HTTPS equivalent for use as Homepage.
@@ -95,6 +96,30 @@ def _parse_with_half_orm_meta(raw: str) -> 'bool | str':
     return raw.strip()
 
 
+ROW_TYPES = ('slots', 'tuple')
+
+# Seconds a last fetch may be ahead of the clock and still be fresh
+FETCH_CLOCK_TOLERANCE = 1.0
+
+
+def _parse_row_types(raw: str) -> str:
+    """Parse the raw ".hop/config" `row_types` value.
+
+    'slots' generates frozen slotted dataclasses, 'tuple' generates
+    NamedTuples. Anything else disables row type generation.
+    """
+    value = raw.strip().lower()
+    if value in ROW_TYPES:
+        return value
+    if value:
+        warnings.warn(
+            f"Ignoring row_types = {raw!r} in .hop/config "
+            f"(expected one of: {', '.join(ROW_TYPES)})",
+            UserWarning
+        )
+    return ''
+
+
 class Config:
     """
     Configuration manager for half_orm_dev projects.
@@ -104,6 +129,10 @@ class Config:
     - hop_version: half_orm_dev version
     - git_origin: Git remote URL
     - devel: Development mode flag
+    - split_baseclasses: Generate ho_baseclasses as a lazily imported
+      package with one module per schema (opt-in)
+    - row_types: Generate compact Row_* types for ho_select_rows,
+      'slots' or 'tuple' (opt-in)
 
     Note: database_name may differ from package_name when cloning with --database-name.
     The package_name is always used for Python module generation.
@@ -113,6 +142,8 @@ class Config:
     __devel: bool = False
     __hop_version: Optional[str] = None
     __with_half_orm_meta: 'bool | str' = False
+    __split_baseclasses: bool = False
+    __row_types: str = ''
 
     def __init__(self, base_dir, **kwargs):
         Config.__file = os.path.join(base_dir, '.hop', 'config')
@@ -138,6 +169,8 @@ class Config:
         self.__with_half_orm_meta = _parse_with_half_orm_meta(
             config['halfORM'].get('with_half_orm_meta', 'False')
         )
+        self.__split_baseclasses = config['halfORM'].getboolean('split_baseclasses', False)
+        self.__row_types = _parse_row_types(config['halfORM'].get('row_types', ''))
         # Read package_name from config (takes priority over directory name)
         stored_package_name = config['halfORM'].get('package_name', '')
         if stored_package_name:
@@ -154,6 +187,10 @@ class Config:
             'package_name': self.__package_name or '',
             'with_half_orm_meta': self.__with_half_orm_meta
         }
+        if self.__split_baseclasses:
+            data['split_baseclasses'] = True
+        if self.__row_types:
+            data['row_types'] = self.__row_types
         config['halfORM'] = data
         with open(Config.__file, 'w', encoding='utf-8') as configfile:
             config.write(configfile)
@@ -208,14 +245,39 @@ class Config:
     def with_half_orm_meta(self, value):
         self.__with_half_orm_meta = value
 
+    @property
+    def split_baseclasses(self):
+        return self.__split_baseclasses
+
+    @split_baseclasses.setter
+    def split_baseclasses(self, value):
+        self.__split_baseclasses = value
+
+    @property
+    def row_types(self):
+        return self.__row_types
+
+    @row_types.setter
+    def row_types(self, value):
+        self.__row_types = value
+
 class LocalConfig:
     """
     Manages local configuration stored in .hop/local_config (not versioned).
 
     This file contains machine-specific settings that should not be shared
-    via Git, such as custom backup directories.
+    via Git, such as custom backup directories, the pre-upgrade backup
+    settings or the time of the last fetch from origin.
     """
+    DEFAULT_FETCH_FRESHNESS = 300  # seconds
     __backups_dir: Optional[str] = None
+    __last_fetch: Optional[float] = None
+    __fetch_freshness: Optional[int] = None
+    __backup_strategy: Optional[str] = None
+    __backup_format: Optional[str] = None
+    __backup_jobs: Optional[int] = None
+    __backup_compress: Optional[str] = None
+    __backup_retention: Optional[int] = None
 
     def __init__(self, base_dir):
         self.__file = os.path.join(base_dir, '.hop', 'local_config')
@@ -228,6 +290,25 @@ class LocalConfig:
         config.read(self.__file)
         if 'local' in config:
             self.__backups_dir = config['local'].get('backups_dir')
+            try:
+                self.__last_fetch = config['local'].getfloat('last_fetch')
+            except ValueError:
+                self.__last_fetch = None
+            try:
+                self.__fetch_freshness = config['local'].getint('fetch_freshness')
+            except ValueError:
+                self.__fetch_freshness = None
+            self.__backup_strategy = config['local'].get('backup_strategy')
+            self.__backup_format = config['local'].get('backup_format')
+            self.__backup_compress = config['local'].get('backup_compress')
+            try:
+                self.__backup_jobs = config['local'].getint('backup_jobs')
+            except ValueError:
+                self.__backup_jobs = None
+            try:
+                self.__backup_retention = config['local'].getint('backup_retention')
+            except ValueError:
+                self.__backup_retention = None
 
     def write(self):
         """Write local configuration to .hop/local_config"""
@@ -235,6 +316,21 @@ class LocalConfig:
         data = {}
         if self.__backups_dir:
             data['backups_dir'] = self.__backups_dir
+        if self.__last_fetch is not None:
+            # repr: a rounded timestamp could be in the future
+            data['last_fetch'] = repr(float(self.__last_fetch))
+        if self.__fetch_freshness is not None:
+            data['fetch_freshness'] = str(self.__fetch_freshness)
+        if self.__backup_strategy:
+            data['backup_strategy'] = self.__backup_strategy
+        if self.__backup_format:
+            data['backup_format'] = self.__backup_format
+        if self.__backup_jobs is not None:
+            data['backup_jobs'] = str(self.__backup_jobs)
+        if self.__backup_compress:
+            data['backup_compress'] = self.__backup_compress
+        if self.__backup_retention is not None:
+            data['backup_retention'] = str(self.__backup_retention)
         if data:
             config['local'] = data
             os.makedirs(os.path.dirname(self.__file), exist_ok=True)
@@ -252,6 +348,95 @@ class LocalConfig:
         self.__backups_dir = path
         self.write()
 
+    @property
+    def last_fetch(self):
+        """Returns the time (epoch seconds) of the last fetch from origin, or None"""
+        return self.__last_fetch
+
+    @last_fetch.setter
+    def last_fetch(self, timestamp):
+        """Record the time of the last fetch from origin and save to local_config"""
+        self.__last_fetch = timestamp
+        self.write()
+
+    @property
+    def fetch_freshness(self):
+        """Returns the freshness window of a fetch in seconds (0: always fetch)"""
+        if self.__fetch_freshness is None:
+            return self.DEFAULT_FETCH_FRESHNESS
+        return self.__fetch_freshness
+
+    @fetch_freshness.setter
+    def fetch_freshness(self, seconds):
+        """Set the freshness window of a fetch and save to local_config"""
+        self.__fetch_freshness = seconds
+        self.write()
+
+    @property
+    def backup_strategy(self):
+        """Returns the pre-upgrade backup strategy (auto, dump, snapshot, both), or None"""
+        return self.__backup_strategy
+
+    @backup_strategy.setter
+    def backup_strategy(self, strategy):
+        """Set the pre-upgrade backup strategy and save to local_config"""
+        self.__backup_strategy = strategy
+        self.write()
+
+    @property
+    def backup_format(self):
+        """Returns the pg_dump format of the pre-upgrade backups (plain, custom, directory), or None"""
+        return self.__backup_format
+
+    @backup_format.setter
+    def backup_format(self, backup_format):
+        """Set the format of the pre-upgrade backups and save to local_config"""
+        self.__backup_format = backup_format
+        self.write()
+
+    @property
+    def backup_jobs(self):
+        """Returns the number of parallel pg_dump/pg_restore jobs, or None"""
+        return self.__backup_jobs
+
+    @backup_jobs.setter
+    def backup_jobs(self, jobs):
+        """Set the number of parallel backup jobs and save to local_config"""
+        self.__backup_jobs = jobs
+        self.write()
+
+    @property
+    def backup_compress(self):
+        """Returns the pg_dump --compress value of the backups (e.g. 6, zstd:3), or None"""
+        return self.__backup_compress
+
+    @backup_compress.setter
+    def backup_compress(self, compress):
+        """Set the compression of the backups and save to local_config"""
+        self.__backup_compress = compress
+        self.write()
+
+    @property
+    def backup_retention(self):
+        """Returns the number of pre-upgrade backups to keep, or None (keep all)"""
+        return self.__backup_retention
+
+    @backup_retention.setter
+    def backup_retention(self, count):
+        """Set the number of backups to keep and save to local_config"""
+        self.__backup_retention = count
+        self.write()
+
+    def is_fetch_fresh(self, now=None):
+        """True if the last fetch from origin is within the freshness window"""
+        if self.__last_fetch is None or self.fetch_freshness <= 0:
+            return False
+        if now is None:
+            now = time.time()
+        # A fetch slightly in the future (clock jitter) is fresh, not a
+        # clock that went backwards
+        return -FETCH_CLOCK_TOLERANCE <= now - self.__last_fetch < self.fetch_freshness
+
 class Repo:
     """Reads and writes the hop repo conf file.
 
@@ -297,16 +482,7 @@ class Repo:
     @classmethod
     def _find_base_dir(cls):
         """Find the base directory for the current context (same logic as __check)"""
-        base_dir = os.path.abspath(os.path.curdir)
-        while base_dir:
-            conf_file = os.path.join(base_dir, '.hop', 'config')
-            if os.path.exists(conf_file):
-                return base_dir
-            par_dir = os.path.split(base_dir)[0]
-            if par_dir == base_dir:
-                break
-            base_dir = par_dir
-        return os.path.abspath(os.path.curdir)  # fallback to current dir
+        return find_base_dir() or os.path.abspath(os.path.curdir)  # fallback to current dir
 
     @classmethod
     def clear_instances(cls):
@@ -594,8 +770,10 @@ class Repo:
         - Source: current branch
         - Targets: all active branches + ho-prod - current branch
 
-        Uses git checkout to copy the entire .hop/ directory from current branch,
-        ensuring perfect consistency across all branches.
+        The sync commits are built with git plumbing (temporary index,
+        commit-tree, update-ref) from the tree of the current branch: no
+        checkout, no hook and no fetch per target branch, and the working
+        tree is never touched. A branch behind origin is fast-forwarded first.
 
         Args:
             reason: Description of why sync is happening (for commit message)
@@ -629,8 +807,7 @@ class Repo:
                 modified_branches=branches
             )
             # ... more operations ...
-            for branch in branches:
-                repo.hgit.push_branch(branch)
+            repo.push_synced_branches(branches)
         """
         result = {
             'synced_branches': [],
@@ -701,51 +878,67 @@ class Repo:
             return result
 
         # Phase 1 — local commits only (no push yet).
-        # All commits are made locally first so that a failure on any branch
-        # can be fully rolled back via git reset --hard, leaving a clean state.
-        original_shas = {}   # branch → SHA recorded after checkout/fast-forward
+        # Sync commits are built with git plumbing (temporary index,
+        # commit-tree, update-ref): the working tree never moves and no hook
+        # runs. A failure on any branch is rolled back by moving the branch
+        # refs back to their recorded SHAs.
+        original_shas = {}   # branch → SHA the sync commit was built on
         committed_branches = []  # branches that received a new local commit
         commit_msg = f"[HOP] Sync .hop/ from {source_branch} ({reason})"
+        git_cmd = self.hgit._HGit__git_repo.git
 
         def _rollback_phase1():
             """Undo all local commits made during Phase 1."""
-            for rb, sha in original_shas.items():
+            for rb in committed_branches:
                 try:
-                    self.hgit.checkout(rb)
-                    self.hgit._HGit__git_repo.git.reset('--hard', sha)
+                    if rb in branch_refs['local']:
+                        git_cmd.update_ref(
+                            '-m', 'hop sync: rollback', f'refs/heads/{rb}',
+                            original_shas[rb], result['branch_commits'][rb]
+                        )
+                    else:
+                        git_cmd.update_ref('-d', f'refs/heads/{rb}', result['branch_commits'][rb])
                 except Exception:
                     pass
-            try:
-                self.hgit.checkout(source_branch)
-                self.__config = Config(self.base_dir)
-            except Exception:
-                pass
 
-        for branch in target_branches:
-            try:
-                self.hgit.checkout(branch)
+        def _release_version(file_path, prefix, pattern):
+            """Version string of a file named <prefix><version>..., or None."""
+            match = re.match(pattern, file_path[len(prefix):]) if file_path.startswith(prefix) else None
+            return match.group(1) if match else None
 
-                # Fast-forward if behind remote (safe — no local commits lost)
-                remote_ref = f"origin/{branch}"
-                try:
-                    synced, status = self.hgit.is_branch_synced(branch)
-                    if not synced and status == "behind":
-                        self.hgit._HGit__git_repo.git.reset('--hard', remote_ref)
-                except GitCommandError:
-                    pass
+        try:
+            branch_refs = self.hgit.read_branch_refs('origin')
+            source_files = self.hgit.list_tree(source_branch, '.hop/')
+            source_additional = {}
+            for file_path in additional_files or []:
+                source_additional.update(self.hgit.list_tree(source_branch, file_path))
+        except Exception as e:
+            result['errors'].append(f"Failed to read {source_branch}: {e}")
+            return result
 
-                # Record SHA after fast-forward: this is the rollback target
-                original_shas[branch] = self.hgit._HGit__git_repo.head.commit.hexsha
+        source_versions = set()
+        for file_path in source_files:
+            release = _release_version(file_path, '.hop/releases/', r'^(\d+\.\d+\.\d+)[-.]')
+            if release:
+                source_versions.add(release)
 
-                # Persist before-SHA as a recovery ref (survives process crashes)
-                try:
-                    self.hgit._HGit__git_repo.git.update_ref(
-                        f'refs/hop/sync/before/{branch}', original_shas[branch]
-                    )
-                except Exception:
-                    pass
+        for branch in target_branches:
+            try:
+                local_sha = branch_refs['local'].get(branch, {}).get('sha')
+                base_sha = local_sha
+                if local_sha is None:
+                    # Remote-only branch: build on origin, create the local branch
+                    base_sha = branch_refs['remote'][branch]
+                elif branch in branch_refs['remote']:
+                    # Fast-forward if behind remote (safe — no local commits lost)
+                    try:
+                        ahead, behind = self.hgit._branch_sync_counts(branch, branch_refs)
+                        if behind and not ahead:
+                            base_sha = branch_refs['remote'][branch]
+                    except GitCommandError:
+                        pass
 
-                self.__config = Config(self.base_dir)
+                target_files = self.hgit.list_tree(base_sha, '.hop/')
 
                 # Preserve release-*.sql files for versions > source_version
                 # These files are generated during propagation and should not be
@@ -754,104 +947,65 @@ class Repo:
                 # When syncing from ho-prod (source_version=None), preserve ALL
                 # release-*.sql files on the target branch, as ho-prod doesn't
                 # have development release schemas that should overwrite them.
-                preserved_release_schemas = {}
-                model_dir = Path(self.model_dir)
-                if model_dir.exists():
-                    for release_file in model_dir.glob('release-*.sql'):
-                        match = re.match(r'^release-(\d+\.\d+\.\d+)\.sql$', release_file.name)
-                        if match:
-                            try:
-                                file_version = version.parse(match.group(1))
-                                # Preserve if:
-                                # - source_version is None (syncing from ho-prod) OR
-                                # - file_version > source_version (higher version release schema)
-                                if source_version is None or file_version > source_version:
-                                    # Save content before it gets overwritten
-                                    preserved_release_schemas[release_file.name] = release_file.read_text(encoding='utf-8')
-                            except (ValueError, UnicodeDecodeError):
-                                pass
-
-                # Copy .hop/ from source branch
-                self.hgit._HGit__git_repo.git.checkout(source_branch, '--', '.hop/')
-
-                # Restore preserved release-*.sql files
-                if preserved_release_schemas:
-                    model_dir = Path(self.model_dir)
-                    for filename, content in preserved_release_schemas.items():
-                        file_path = model_dir / filename
-                        file_path.write_text(content, encoding='utf-8')
-
-                if additional_files:
-                    for file_path in additional_files:
+                preserved = set()
+                for file_path in target_files:
+                    schema_version = _release_version(
+                        file_path, '.hop/model/', r'^release-(\d+\.\d+\.\d+)\.sql$')
+                    if schema_version:
                         try:
-                            self.hgit._HGit__git_repo.git.checkout(source_branch, '--', file_path)
-                        except GitCommandError:
+                            if source_version is None or version.parse(schema_version) > source_version:
+                                preserved.add(file_path)
+                        except ValueError:
                             pass
 
-                # Remove files that exist in target but no longer in source
-                try:
-                    target_files_output = self.hgit._HGit__git_repo.git.ls_files('.hop/')
-                    target_files = set(f for f in target_files_output.split('\n') if f.strip())
-                    source_files_output = self.hgit._HGit__git_repo.git.ls_tree('-r', '--name-only', source_branch, '.hop/')
-                    source_files = set(f for f in source_files_output.split('\n') if f.strip())
-                    source_versions = set()
-                    for file_path in source_files:
-                        if file_path.startswith('.hop/releases/'):
-                            filename = file_path.replace('.hop/releases/', '')
-                            match = re.match(r'^(\d+\.\d+\.\d+)[-.]', filename)
-                            if match:
-                                source_versions.add(match.group(1))
-                    safe_to_delete = []
-                    for file_path in target_files - source_files:
-                        if not file_path:
-                            continue
-                        if file_path.startswith('.hop/releases/'):
-                            filename = file_path.replace('.hop/releases/', '')
-                            match = re.match(r'^(\d+\.\d+\.\d+)[-.]', filename)
-                            if match:
-                                if match.group(1) in source_versions:
-                                    safe_to_delete.append(file_path)
-                            else:
-                                safe_to_delete.append(file_path)
-                        else:
-                            safe_to_delete.append(file_path)
-                    for file_path in safe_to_delete:
-                        self.hgit._HGit__git_repo.git.rm(file_path)
-                except Exception:
-                    pass
+                # Copy .hop/ (and additional files) from source branch
+                changes = {}
+                for file_path, entry in {**source_files, **source_additional}.items():
+                    if file_path not in preserved and target_files.get(file_path) != entry:
+                        changes[file_path] = entry
+
+                # Remove files that exist in target but no longer in source.
+                # Release files of versions unknown to the source are kept.
+                for file_path in set(target_files) - set(source_files) - preserved:
+                    release = _release_version(file_path, '.hop/releases/', r'^(\d+\.\d+\.\d+)[-.]')
+                    if release is None or release in source_versions:
+                        changes[file_path] = None
+
+                if not changes:
+                    if local_sha is not None and base_sha != local_sha:
+                        git_cmd.update_ref(
+                            '-m', f'hop sync: fast-forward to origin/{branch}',
+                            f'refs/heads/{branch}', base_sha, local_sha)
+                    result['skipped_branches'].append(branch)
+                    continue
 
-                self.hgit.add('.hop/')
-                if additional_files:
-                    for file_path in additional_files:
-                        try:
-                            self.hgit.add(file_path)
-                        except GitCommandError:
-                            pass
+                if branch == 'ho-prod' and not self.hgit.holds_branch_lock('ho-prod'):
+                    # Same protection as the pre-commit hook: ho-prod only
+                    # receives commits from a Half-ORM workflow holding its lock.
+                    raise RepoError("Direct commits on ho-prod are not allowed")
 
-                status = self.hgit._HGit__git_repo.git.status('--porcelain')
-                if not status.strip():
+                new_sha = self.hgit.commit_tree_update(
+                    branch, base_sha, changes, commit_msg,
+                    old_sha=local_sha or '0' * 40)
+                if new_sha is None:
                     result['skipped_branches'].append(branch)
-                    del original_shas[branch]  # nothing to roll back for this branch
                     continue
 
-                self.hgit.commit('-m', commit_msg)
-
-                result['branch_commits'][branch] = (
-                    self.hgit._HGit__git_repo.head.commit.hexsha
-                )
+                # Record SHA the commit was built on: this is the rollback target
+                original_shas[branch] = base_sha
+                result['branch_commits'][branch] = new_sha
                 committed_branches.append(branch)
 
+                # Persist before-SHA as a recovery ref (survives process crashes)
+                try:
+                    git_cmd.update_ref(f'refs/hop/sync/before/{branch}', base_sha)
+                except Exception:
+                    pass
+
             except Exception as e:
                 if branch == 'ho-prod':
-                    # ho-prod may have a protective hook that blocks direct
-                    # commits. Clean up staged state so the next checkout
-                    # succeeds, then skip gracefully.
-                    try:
-                        self.hgit._HGit__git_repo.git.reset('HEAD')
-                        self.hgit._HGit__git_repo.git.checkout('--', '.hop/')
-                    except Exception:
-                        pass
-                    original_shas.pop('ho-prod', None)
+                    # ho-prod is protected against direct commits: skip it
+                    # gracefully instead of aborting the whole sync.
                     result['errors'].append(f"ho-prod: sync skipped (commit blocked): {e}")
                 else:
                     # Any other branch failure aborts and rolls back all local commits.
@@ -862,13 +1016,6 @@ class Repo:
                         f"Run 'hop check' to diagnose."
                     ) from e
 
-        # Return to source branch before pushing
-        try:
-            self.hgit.checkout(source_branch)
-            self.__config = Config(self.base_dir)
-        except Exception as e:
-            result['errors'].append(f"Failed to return to {source_branch}: {e}")
-
         # Phase 2 — push all committed branches (or defer)
         # The distributed lock ensures no conflicting pushes; errors here are
         # unexpected but collected rather than raised.
@@ -878,23 +1025,41 @@ class Repo:
                 modified_branches.extend(committed_branches)
             result['synced_branches'].extend(committed_branches)
         else:
-            # Normal mode: push immediately
-            for branch in committed_branches:
-                try:
-                    self.hgit.push_branch(branch)
-                    result['synced_branches'].append(branch)
-                    # Branch safely on origin — recovery ref no longer needed
-                    try:
-                        self.hgit._HGit__git_repo.git.update_ref(
-                            '-d', f'refs/hop/sync/before/{branch}'
-                        )
-                    except Exception:
-                        pass
-                except Exception as e:
+            # Normal mode: push all branches at once (git push --atomic)
+            try:
+                self.push_synced_branches(committed_branches)
+                result['synced_branches'].extend(committed_branches)
+            except Exception as e:
+                for branch in committed_branches:
                     result['errors'].append(f"{branch}: push failed: {e}")
 
         return result
 
+    def push_synced_branches(self, branches: list) -> None:
+        """
+        Push branches committed locally by a sync in one atomic `git push`.
+
+        Once the push succeeded, the refs/hop/sync/before/* recovery refs of
+        these branches are deleted. On failure nothing was pushed and the
+        recovery refs are kept for 'hop recover'.
+
+        Args:
+            branches: Branch names (e.g., modified_branches collected with
+                defer_push=True)
+
+        Raises:
+            GitCommandError: If the push fails
+        """
+        self.hgit.push_branches(branches, atomic=True)
+        for branch in branches:
+            # Branch safely on origin — recovery ref no longer needed
+            try:
+                self.hgit._HGit__git_repo.git.update_ref(
+                    '-d', f'refs/hop/sync/before/{branch}'
+                )
+            except Exception:
+                pass
+
     def recover(self) -> dict:
         """Complete or clean up a sync interrupted by a crash or network failure.
 
@@ -925,18 +1090,15 @@ class Repo:
             return result
         result['lock_tag'] = lock_tag
 
-        # Verify ownership: the lock tag must still exist on origin
+        # Verify ownership: the lock must still be held on origin
         lock_on_origin = False
         try:
-            remote_output = self.hgit._HGit__git_repo.git.ls_remote(
-                '--tags', 'origin', lock_tag
-            )
-            lock_on_origin = bool(remote_output.strip())
+            lock_on_origin = self.hgit.is_lock_held(lock_tag)
         except GitCommandError as e:
             result['errors'].append(f"Could not verify lock on origin: {e}")
 
         if not lock_on_origin:
-            self._recover_cleanup_refs(result)
+            self._recover_cleanup_refs(result, lock_tag)
             try:
                 os.unlink(sync_lock_path)
             except FileNotFoundError:
@@ -1015,8 +1177,15 @@ class Repo:
 
         return result
 
-    def _recover_cleanup_refs(self, result: dict) -> None:
-        """Delete stale refs/hop/sync/before/* refs (lock already gone)."""
+    def _recover_cleanup_refs(self, result: dict, lock_tag: str = '') -> None:
+        """Delete stale refs/hop/sync/before/* refs and the local copy of the lock (lock already gone)."""
+        if ':' in lock_tag:
+            lock_ref, lock_sha = lock_tag.rsplit(':', 1)
+            try:
+                # Only if it is still this lock (not one acquired meanwhile)
+                self.hgit._HGit__git_repo.git.update_ref('-d', lock_ref, lock_sha)
+            except GitCommandError:
+                pass
         try:
             refs_output = self.hgit._HGit__git_repo.git.for_each_ref(
                 '--format=%(refname)', 'refs/hop/sync/before/'
@@ -1181,8 +1350,7 @@ class Repo:
                 modified_branches=branches
             )
             # ... more operations ...
-            for branch in branches:
-                repo.hgit.push_branch(branch)
+            repo.push_synced_branches(branches)
         """
         result = {
             'commit_hash': None,
@@ -1297,6 +1465,11 @@ class Repo:
     def config(self):
         return self.__config
 
+    @property
+    def local_config(self):
+        "Returns the machine-specific configuration (.hop/local_config)"
+        return self.__local_config
+
     @property
     def devel(self):
         return self.__config.devel
@@ -1305,6 +1478,16 @@ class Repo:
     def with_half_orm_meta(self):
         return self.__config.with_half_orm_meta
 
+    @property
+    def split_baseclasses(self):
+        """Returns whether ho_baseclasses is generated as a per-schema package."""
+        return self.__config.split_baseclasses
+
+    @property
+    def row_types(self):
+        """Returns the kind of Row_* types to generate ('slots', 'tuple' or '')."""
+        return self.__config.row_types
+
     @property
     def releases_dir(self):
         """Returns the path to the releases directory (.hop/releases)."""
@@ -1794,10 +1977,11 @@ class Repo:
             dict with keys:
                 'hooks': dict from install_git_hooks()
                 'stale_branches': dict with 'candidates', 'deleted', 'errors'
-                'cache_hit': bool - True if cache was used
+                'fetched': bool - False if the last fetch was fresh enough
+                    (see LocalConfig.fetch_freshness) or origin unreachable
 
         Examples:
-            # Automatic check (silent, uses cache)
+            # Automatic check (silent, fetches only if the last fetch is stale)
             result = repo.check_and_update(silent=True)
 
             # Manual check with stale branch detection
@@ -1808,67 +1992,55 @@ class Repo:
 
         result = {}
 
-        # 0. Update ho-prod from remote and fetch all branches
-        # This ensures we have the latest hop_version and branch status
-        # Must run in BOTH silent and non-silent modes for hop_version validation
+        # 0. Fetch all branches from origin, unless the last fetch is fresh.
+        # This ensures we have the latest hop_version and branch status.
+        # The automatic (silent) check uses the local remote-tracking refs
+        # while the last fetch is within the freshness window set in
+        # .hop/local_config; an explicit check always fetches.
+        fetch = not silent or not (self.__local_config and self.__local_config.is_fetch_fresh())
+        result['fetched'] = False
         if self.hgit:
-            current_branch = None
-            git_repo = None
-            try:
-                git_repo = self.hgit.git_repo
-                current_branch = git_repo.active_branch.name
-
-                # Check if working directory is clean (only in non-silent mode)
-                if not silent and git_repo.is_dirty(untracked_files=False):
-                    raise RepoError(
-                        f"Working directory has uncommitted changes.\n"
-                        f"Please commit or stash your changes before running check:\n"
-                        f"  git stash\n"
-                        f"  OR\n"
-                        f"  git add . && git commit -m \"your message\""
-                    )
-
-                # Switch to ho-prod temporarily
-                git_repo.heads['ho-prod'].checkout()
-
-                # Pull ho-prod from origin
-                git_repo.remotes.origin.pull('ho-prod')
-
-                # Fetch all other branches with prune
-                git_repo.remotes.origin.fetch(prune=True)
+            git_repo = self.hgit.git_repo
 
-                # Switch back to original branch
-                git_repo.heads[current_branch].checkout()
+            # Check if working directory is clean (only in non-silent mode)
+            try:
+                dirty = not silent and git_repo.is_dirty(untracked_files=False)
+            except Exception:
+                dirty = False
+            if dirty:
+                raise RepoError(
+                    f"Working directory has uncommitted changes.\n"
+                    f"Please commit or stash your changes before running check:\n"
+                    f"  git stash\n"
+                    f"  OR\n"
+                    f"  git add . && git commit -m \"your message\""
+                )
 
-            except RepoError:
-                # Re-raise RepoError (dirty working directory)
-                raise
-            except Exception as e:
-                # If we're in detached HEAD or any error, try to return to original state
-                # and continue (offline mode, no remote, etc.)
+            if fetch:
                 try:
-                    if current_branch and git_repo:
-                        git_repo.heads[current_branch].checkout()
-                except (GitCommandError, IndexError, TypeError):
-                    pass
+                    self.hgit.fetch_from_origin()
+                    result['fetched'] = True
+                except Exception:
+                    pass  # Offline mode, no remote, etc.
 
-        # 0b. Sync all active branches that are behind remote
-        # Origin is the source of truth - always sync to match remote
+        # 0b. Sync all active branches that are behind remote (ho-prod included)
+        # Origin is the source of truth - always sync to match remote.
+        # Branches are fast-forwarded from the refs fetched above.
         sync_result = {'synced': [], 'skipped': [], 'errors': []}
         if self.hgit and not dry_run:
             try:
-                sync_result = self.hgit.sync_active_branches(pattern="ho-*")
+                sync_result = self.hgit.sync_active_branches(pattern="ho-*", fetch=False)
             except GitCommandError:
                 pass  # Best effort - continue even if sync fails
 
         result['branch_sync'] = sync_result
 
         if self.hgit and not dry_run:
-            self.hgit.update_snapshot()
+            self.hgit.update_snapshot(fetch=False)
 
-        # 0c. Reload config and validate version after pull/sync.
+        # 0c. Reload config and validate version after fetch/sync.
         # Another developer may have run the migration and pushed a new hop_version.
-        # The pull + sync above may have updated .hop/config on the current branch;
+        # The fetch + sync above may have updated .hop/config on the current branch;
         # we must detect that before any further operation.
         if self.hgit:
             try:
@@ -1925,11 +2097,14 @@ class Repo:
                             # Use ReleaseFile to parse directly from filesystem
                             release_file = ReleaseFile(version, releases_dir)
                             metadata = release_file.get_metadata()
+                            patches = release_file.get_all_patch_info()
 
                             releases_info[version] = {
                                 'patches_file': str(toml_file.relative_to(self.__base_dir)),
-                                'candidates': release_file.get_patches(status='candidate'),
-                                'staged': release_file.get_patches(status='staged'),
+                                'candidates': [patch_id for patch_id, info in patches.items()
+                                               if info['status'] == 'candidate'],
+                                'staged': [patch_id for patch_id, info in patches.items()
+                                           if info['status'] == 'staged'],
                                 'metadata': metadata
                             }
                         except (ReleaseFileError, OSError):
@@ -1940,7 +2115,8 @@ class Repo:
                     pass  # Silent failure - will result in empty releases_info
 
             result['active_branches'] = self.hgit.get_active_branches_status(
-                stage_files=[]  # No longer used with TOML format
+                stage_files=[],  # No longer used with TOML format
+                fetch=False  # Fetched in step 0 when needed
             )
             result['releases_info'] = releases_info
 
@@ -2662,7 +2838,8 @@ INSERT INTO public.roles (name) VALUES ('admin'), ('user');
         Process:
         1. Verify model/schema.sql exists (file or symlink)
         2. Drop all user schemas with CASCADE (no superuser privileges needed)
-        3. Load schema structure from model/schema.sql using psql -f
+        3. Load schema structure from model/schema.sql using psql -f, then
+           create the half_orm_meta tables it lacks (Database.apply_meta_patch)
         4. Load half_orm_meta data from model/metadata-X.Y.Z.sql using psql -f (if exists)
         5. Load reference data from model/data-*.sql files up to current version
         6. Reload halfORM Model metadata cache
@@ -2743,6 +2920,12 @@ INSERT INTO public.roles (name) VALUES ('admin'), ('user');
             except Exception as e:
                 raise RepoError(f"Failed to load schema from {schema_path.name}: {e}") from e
 
+            # 3b. Create the half_orm_meta tables missing from an older schema
+            try:
+                self.database.apply_meta_patch()
+            except Exception as e:
+                raise RepoError(f"Failed to apply the half_orm_meta patch: {e}") from e
+
             # 4. Load metadata from model/metadata-X.Y.Z.sql (if exists)
             metadata_path, version = self._deduce_metadata_path(schema_path)
 
@@ -2770,9 +2953,10 @@ INSERT INTO public.roles (name) VALUES ('admin'), ('user');
             # Catch any unexpected errors
             raise RepoError(f"Database restoration failed: {e}") from e
 
-    def restore_database_from_dump(self, dump_file: Path) -> None:
+    def restore_database_from_dump(self, dump_file: Path, jobs: Optional[int] = None,
+                                   use_cache: bool = True) -> dict:
         """
-        Restore database from a pg_dump SQL file.
+        Restore database from a pg_dump file or directory.
 
         Alternative to restore_database_from_schema() for working with
         production data snapshots. Useful for testing patches against
@@ -2780,22 +2964,31 @@ INSERT INTO public.roles (name) VALUES ('admin'), ('user');
 
         Process:
         1. Verify dump file exists
-        2. Drop all user schemas with CASCADE
-        3. Load dump using psql -f
+        2. With the CREATEDB privilege: recreate the database from the
+           template caching this dump, restoring the dump into it first
+           if it is not cached yet (see half_orm_dev.dump_restore)
+        3. Otherwise: drop all user schemas with CASCADE and load the dump
+           (psql -f for a SQL dump, pg_restore -j N for the custom and
+           directory formats)
         4. Reload halfORM Model metadata cache
 
         Note: Bootstrap scripts are NOT executed since the dump
         already contains the data.
 
         Args:
-            dump_file: Path to SQL dump file (plain text format from pg_dump)
+            dump_file: Path to the dump (any pg_dump format)
+            jobs: Parallel jobs of pg_restore (default: dump_restore.DEFAULT_JOBS)
+            use_cache: Use and fill the template cache of the dump
+
+        Returns:
+            dict: {'format': str, 'cache': template name or None, 'cache_hit': bool}
 
         Raises:
             RepoError: If dump file not found or restoration fails
 
         Examples:
             # Use production dump for patch development
-            repo.restore_database_from_dump(Path("/path/to/prod_dump.sql"))
+            repo.restore_database_from_dump(Path("/path/to/prod.dump"), jobs=8)
             patch_mgr.apply_patch_files("456-feature", repo.model)
         """
         dump_path = Path(dump_file)
@@ -2803,25 +2996,25 @@ INSERT INTO public.roles (name) VALUES ('admin'), ('user');
         if not dump_path.exists():
             raise RepoError(
                 f"Dump file not found: {dump_path}. "
-                "Please provide a valid pg_dump SQL file."
+                "Please provide a valid pg_dump file or directory."
             )
 
         try:
-            # 1. Drop all schemas (no superuser privileges needed)
-            self._reset_database_schemas()
-
-            # 2. Load dump using psql
+            # 1. Load dump, through its template cache if possible
             try:
-                self.database.execute_pg_command(
-                    'psql', '-d', self.database_name, '-f', str(dump_path)
-                )
+                restored = dump_restore.restore_dump(
+                    self.database, dump_path, reset=self._reset_database_schemas,
+                    jobs=jobs, use_cache=use_cache)
+            except RepoError:
+                raise
             except Exception as e:
                 raise RepoError(f"Failed to load dump from {dump_path.name}: {e}") from e
 
-            # 3. Reload half_orm metadata cache
+            # 2. Reload half_orm metadata cache
             self.model.reconnect(reload=True)
 
             # Note: Bootstrap scripts are NOT executed - dump contains data
+            return restored
 
         except RepoError:
             raise
@@ -2934,6 +3127,7 @@ INSERT INTO public.roles (name) VALUES ('admin'), ('user');
             self.database.execute_pg_command(
                 'psql', '-d', self.database_name, '-f', str(release_schema_path)
             )
+            self.database.apply_meta_patch()
 
             # Reload half_orm metadata cache
             self.model.reconnect(reload=True)
@@ -0,0 +1,195 @@
+"""
+Precompiled production upgrade plans.
+
+`half_orm dev upgrade --plan` reads, ahead of the maintenance window, the
+release files and patch directories of the ho-prod-X.Y.Z branches of the
+upgrade path from git (without checking them out) and writes the ordered
+list of the steps to .hop/plans/<from>-to-<to>.json:
+
+    {"format": 1, "database": "prod", "from_version": "1.3.5", "to_version": "1.3.7",
+     "created": 1760000000.0,
+     "releases": [{"version": "1.3.6", "branch": "ho-prod-1.3.6", "commit": "<sha>",
+                   "patches": ["456-auth"],
+                   "steps": [{"patch_id": "456-auth", "file": "01_users.sql",
+                              "path": "Patches/456-auth/01_users.sql", "kind": "sql",
+                              "blob": "<git blob sha>", "transactional": true,
+                              "sql": "CREATE TABLE ..."}, ...]}, ...],
+     "checksum": "<sha256 of the plan>"}
+
+`half_orm dev upgrade --execute-plan FILE` checks the checksum and that
+the branches still point to the planned commits, then runs the SQL of the
+plan on the connection of the model. The .psql and Python steps cannot be
+precompiled: they run from the checked out files, as in a regular upgrade.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from half_orm_dev.file_executor import sql_is_transactional
+from half_orm_dev.utils import make_ignored_dir
+
+PLAN_FORMAT = 1
+PLANS_DIR = 'plans'
+
+# Locations of a patch directory, in resolution order (see
+# PatchManager.get_patch_directory_path)
+PATCH_DIRS = ('Patches/{}/', 'Patches/staged/{}/', 'Patches/orphaned/{}/')
+
+_STEP_KINDS = {'.sql': 'sql', '.psql': 'psql', '.py': 'python', '.python': 'python'}
+
+
+class UpgradePlanError(Exception):
+    """Raised when an upgrade plan cannot be compiled, read or trusted."""
+    pass
+
+
+def step_kind(file_name: str) -> Optional[str]:
+    """'sql', 'psql' or 'python', None for the files that are not executed."""
+    if file_name == 'README.md':
+        return None
+    return _STEP_KINDS.get(os.path.splitext(file_name)[1].lower())
+
+
+def compile_release(hgit, version: str, ref: str, commit: str) -> Dict:
+    """
+    Steps of the release `version` as found at the git ref.
+
+    Args:
+        hgit: HGit instance (read_file_at_ref and list_tree are used)
+        version: Release version (X.Y.Z)
+        ref: ho-prod-X.Y.Z branch (or its remote-tracking ref)
+        commit: Commit the ref points to, recorded in the plan
+
+    Raises:
+        UpgradePlanError: If the release file or a patch directory is missing
+    """
+    release_file = f".hop/releases/{version}.txt"
+    content = hgit.read_file_at_ref(ref, release_file)
+    if not content:
+        raise UpgradePlanError(f"{release_file} not found on {ref}")
+    patches = [line.strip().split(':')[0] for line in content.splitlines()
+               if line.strip() and not line.strip().startswith('#')]
+
+    tree = hgit.list_tree(ref, 'Patches/') if patches else {}
+    steps = []
+    for patch_id in patches:
+        for pattern in PATCH_DIRS:
+            directory = pattern.format(patch_id)
+            files = {path[len(directory):]: blob for path, (_, blob) in tree.items()
+                     if path.startswith(directory) and '/' not in path[len(directory):]}
+            if files:
+                break
+        else:
+            raise UpgradePlanError(f"Patch directory of {patch_id} not found on {ref}")
+
+        for name in sorted(files, key=str.lower):
+            kind = step_kind(name)
+            if kind is None:
+                continue
+            step = {
+                "patch_id": patch_id,
+                "file": name,
+                "path": f"{directory}{name}",
+                "kind": kind,
+                "blob": files[name],
+                "transactional": kind == 'sql',
+            }
+            if kind == 'sql':
+                sql = hgit.read_file_at_ref(ref, step["path"])
+                step["transactional"] = sql_is_transactional(sql.splitlines())
+                step["sql"] = sql
+            steps.append(step)
+
+    return {
+        "version": version,
+        "branch": f"ho-prod-{version}",
+        "commit": commit,
+        "patches": patches,
+        "steps": steps,
+    }
+
+
+def non_transactional_steps(releases: List[Dict]) -> List[str]:
+    """
+    The steps that commit the work done before them ("1.3.6 456-auth/02_data.psql"):
+    .psql and Python files, SQL files annotated "-- hop: no-transaction".
+    """
+    return [f"{release['version']} {step['patch_id']}/{step['file']}"
+            for release in releases for step in release['steps']
+            if not step['transactional']]
+
+
+def checksum(plan: Dict) -> str:
+    """sha256 of the plan (without its checksum)."""
+    content = {key: value for key, value in plan.items() if key != 'checksum'}
+    encoded = json.dumps(content, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def plan_path(base_dir: Union[str, Path], plan: Dict) -> Path:
+    """
+    Default location of the plan: .hop/plans/<from>-to-<to>.json
+
+    .hop/plans/ is created ignored by git: a plan must not make the
+    repository dirty, which would refuse the upgrade that executes it.
+    """
+    plans_dir = make_ignored_dir(Path(base_dir) / '.hop' / PLANS_DIR)
+    return plans_dir / f"{plan['from_version']}-to-{plan['to_version']}.json"
+
+
+def save(plan: Dict, path: Union[str, Path]) -> Path:
+    """
+    Write the plan with its checksum (atomically).
+
+    Returns:
+        Path: The plan file
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    plan["checksum"] = checksum(plan)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            json.dump(plan, file, indent=1)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path
+
+
+def load(path: Union[str, Path]) -> Dict:
+    """
+    Read a plan and check its checksum.
+
+    Raises:
+        UpgradePlanError: If the file is unreadable, of another format or
+            modified since it was compiled
+    """
+    try:
+        with open(path, encoding='utf-8') as file:
+            plan = json.load(file)
+    except (OSError, ValueError) as e:
+        raise UpgradePlanError(f"Cannot read upgrade plan {path}: {e}")
+    if not isinstance(plan, dict) or plan.get('format') != PLAN_FORMAT:
+        raise UpgradePlanError(f"{path} is not an upgrade plan (format {PLAN_FORMAT})")
+    if plan.get('checksum') != checksum(plan):
+        raise UpgradePlanError(f"Checksum mismatch: {path} was modified after it was compiled")
+    return plan
+
+
+def summary(plan: Dict) -> List[str]:
+    """One line per release: version, patches and steps by kind."""
+    lines = []
+    for release in plan['releases']:
+        kinds = {}
+        for step in release['steps']:
+            kinds[step['kind']] = kinds.get(step['kind'], 0) + 1
+        detail = ', '.join(f"{count} {kind}" for kind, count in sorted(kinds.items()))
+        lines.append(f"{release['version']}  {len(release['patches'])} patches  "
+                     f"{len(release['steps'])} steps ({detail or 'none'})")
+    return lines
@@ -13,6 +13,22 @@ def hop_version():
         hop_v = version.read().strip()
     return hop_v
 
+def make_ignored_dir(path):
+    """
+    Create the directory path (and its parents) and make git ignore its
+    content with a `*` .gitignore inside it.
+
+    Used for the machine-local directories of .hop/ (cache, plans,
+    timings): they stay out of `git status` and `git add .hop/` even in the
+    repositories whose .gitignore predates them.
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    gitignore = path / '.gitignore'
+    if not gitignore.exists():
+        gitignore.write_text('*\n', encoding='utf-8')
+    return path
+
 def resolve_database_config_name(base_dir):
     """
     Resolve database configuration name with backward compatibility.
@@ -47,3 +63,39 @@ def resolve_database_config_name(base_dir):
 
     # Priority 3: directory name
     return base_path.name
+
+def find_base_dir(path=None):
+    """
+    Returns the closest directory containing .hop/config, starting from
+    path (default: current directory) and walking up, or None.
+    """
+    base_dir = os.path.abspath(path or os.path.curdir)
+    while base_dir:
+        if os.path.exists(os.path.join(base_dir, '.hop', 'config')):
+            return base_dir
+        par_dir = os.path.split(base_dir)[0]
+        if par_dir == base_dir:
+            break
+        base_dir = par_dir
+    return None
+
+def is_production(base_dir):
+    """
+    Returns whether the repository runs against a production database,
+    without connecting to it.
+
+    True if the clone carries the .hop/production marker or if the halfORM
+    connection file of the database (in HALFORM_CONF_DIR) is tagged
+    `production`, read the same way half_orm.model.Model does.
+    """
+    if os.path.exists(os.path.join(base_dir, '.hop', 'production')):
+        return True
+    conf_dir = os.path.abspath(os.environ.get('HALFORM_CONF_DIR', '/etc/half_orm'))
+    config = configparser.ConfigParser()
+    try:
+        config.read(os.path.join(conf_dir, resolve_database_config_name(base_dir)))
+    except configparser.Error:
+        return False
+    if 'database' not in config:
+        return False
+    return config['database'].get('production', 'False') not in ('', 'False')
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Measure the startup cost of `half_orm dev` with `python -X importtime`.
+
+Registers the dev group the way the half_orm CLI does (cli_extension.
+add_commands) and runs `half_orm dev --help` in a fresh interpreter, from
+the current directory (run it inside a hop repository to measure the
+repository case). Prints the wall time, the cumulative import time of
+half_orm_dev.cli_extension and the slowest imports.
+
+With --output FILE, the measure is also written as JSON so that runs can
+be compared. With --max-ms, exits with code 1 if the median wall time is
+above the limit. Heavy modules (GitPython, psycopg, half_orm_dev.repo)
+imported by `--help` are reported as errors.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+SNIPPET = (
+    "import click\n"
+    "from half_orm_dev.cli_extension import add_commands\n"
+    "group = click.Group('half_orm')\n"
+    "add_commands(group)\n"
+    "group(['dev', '--help'], prog_name='half_orm', standalone_mode=False)\n"
+)
+
+# Must not be imported to display the help
+HEAVY_MODULES = ('git', 'psycopg', 'half_orm.model', 'half_orm_dev.repo')
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$')
+
+
+def _run_once() -> tuple:
+    """Return (wall time in ms, {module: (self us, cumulative us)})."""
+    pythonpath = os.pathsep.join(filter(None, [str(ROOT), os.environ.get('PYTHONPATH')]))
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', SNIPPET],
+        capture_output=True, text=True, check=True,
+        env={**os.environ, 'PYTHONPATH': pythonpath},
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    modules = {}
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            modules[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return wall_ms, modules
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='Number of runs (default: 5)')
+    parser.add_argument('--top', type=int, default=15, help='Slowest imports to list (default: 15)')
+    parser.add_argument('--output', metavar='FILE', help='Write the measure as JSON')
+    parser.add_argument('--max-ms', type=float, help='Fail if the median wall time exceeds it')
+    args = parser.parse_args()
+
+    walls = []
+    modules = {}
+    for _ in range(args.runs):
+        wall_ms, modules = _run_once()
+        walls.append(wall_ms)
+
+    median_ms = statistics.median(walls)
+    extension_us = modules.get('half_orm_dev.cli_extension', (0, 0))[1]
+    slowest = sorted(modules.items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+    heavy = [name for name in HEAVY_MODULES if name in modules]
+
+    print(f'half_orm dev --help: {median_ms:.1f} ms (median of {args.runs} runs)')
+    print(f'  half_orm_dev.cli_extension import: {extension_us / 1000:.1f} ms cumulative')
+    print(f'  modules imported: {len(modules)}')
+    print('\nSlowest imports (self time, cumulative):')
+    for name, (self_us, cumulative_us) in slowest:
+        print(f'  {self_us / 1000:7.1f} ms  {cumulative_us / 1000:7.1f} ms  {name}')
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({
+            'python': sys.version.split()[0],
+            'median_ms': round(median_ms, 1),
+            'runs_ms': [round(wall, 1) for wall in walls],
+            'cli_extension_import_ms': round(extension_us / 1000, 1),
+            'modules': {name: {'self_us': s, 'cumulative_us': c}
+                        for name, (s, c) in modules.items()},
+        }, indent=2) + '\n', encoding='utf-8')
+        print(f'\n✓ Written to {args.output}')
+
+    failed = False
+    if heavy:
+        print(f'\nERROR: --help imports {", ".join(heavy)}', file=sys.stderr)
+        failed = True
+    if args.max_ms is not None and median_ms > args.max_ms:
+        print(f'\nERROR: {median_ms:.1f} ms exceeds --max-ms {args.max_ms}', file=sys.stderr)
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
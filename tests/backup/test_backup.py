@@ -0,0 +1,285 @@
+"""
+Tests for the pre-upgrade backup settings (half_orm_dev.backup).
+
+Backup file names, pg_dump arguments, restore commands and retention of
+the backups of .hop/backups/.
+"""
+
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from click.testing import CliRunner
+from unittest.mock import MagicMock, patch
+
+from half_orm_dev.backup import (
+    BackupOptions, backup_path, pg_dump_args, restore_command, list_backups, prune_backups,
+    choose_backup_strategy, format_size, backup_size, expired_snapshots,
+    drop_snapshots_in_background
+)
+from packaging.version import Version
+from half_orm_dev.repo import LocalConfig
+
+
+def _local_config(**settings):
+    values = dict(backup_strategy=None, backup_format=None, backup_jobs=None, backup_compress=None,
+                  backup_retention=None)
+    values.update(settings)
+    return SimpleNamespace(**values)
+
+
+class TestBackupOptions:
+
+    def test_defaults(self):
+        options = BackupOptions()
+
+        assert (options.format, options.jobs, options.compress, options.retention) == (
+            'plain', 1, None, None)
+
+    @pytest.mark.parametrize('settings, message', [
+        (dict(strategy='copy'), 'Invalid backup strategy'),
+        (dict(format='tar'), 'Invalid backup format'),
+        (dict(jobs=0), 'Invalid number of backup jobs'),
+        (dict(format='custom', jobs=2), 'requires the directory format'),
+        (dict(retention=0), 'Invalid backup retention'),
+        (dict(compress='bzip2:9'), 'Invalid backup compression'),
+    ])
+    def test_invalid(self, settings, message):
+        with pytest.raises(ValueError, match=message):
+            BackupOptions(**settings)
+
+    def test_from_local_config_with_overrides(self):
+        local_config = _local_config(backup_format='directory', backup_jobs=4,
+                                     backup_compress='6', backup_retention=3)
+
+        options = BackupOptions.from_local_config(local_config, jobs=8, compress=None)
+
+        assert options == BackupOptions(format='directory', jobs=8, compress='6', retention=3)
+
+    def test_from_missing_local_config(self):
+        assert BackupOptions.from_local_config(None) == BackupOptions()
+
+
+class TestStrategy:
+
+    @pytest.mark.parametrize('strategy, can_snapshot, server_free, expected', [
+        ('auto', True, None, 'snapshot'),
+        ('auto', True, 13 * 2**30, 'snapshot'),
+        ('auto', True, 11 * 2**30, 'dump'),
+        ('auto', False, None, 'dump'),
+        ('dump', True, None, 'dump'),
+        ('both', True, 2**30, 'both'),
+    ])
+    def test_choose(self, strategy, can_snapshot, server_free, expected):
+        assert choose_backup_strategy(strategy, can_snapshot, 10 * 2**30, server_free) == expected
+
+    @pytest.mark.parametrize('strategy', ['snapshot', 'both'])
+    def test_snapshot_requires_createdb(self, strategy):
+        with pytest.raises(ValueError, match='requires the CREATEDB privilege'):
+            choose_backup_strategy(strategy, False, 1000, None)
+
+    @pytest.mark.parametrize('size, text', [
+        (512, '512 B'), (1536, '1.5 kB'), (10 * 2**30, '10.0 GB')])
+    def test_format_size(self, size, text):
+        assert format_size(size) == text
+
+
+class TestCommands:
+
+    @pytest.mark.parametrize('options, name', [
+        (BackupOptions(), 'prod-1.3.5.sql'),
+        (BackupOptions(compress='6'), 'prod-1.3.5.sql.gz'),
+        (BackupOptions(compress='gzip:0'), 'prod-1.3.5.sql'),
+        (BackupOptions(compress='zstd:3'), 'prod-1.3.5.sql.zst'),
+        (BackupOptions(compress='lz4'), 'prod-1.3.5.sql.lz4'),
+        (BackupOptions(format='custom', compress='zstd:3'), 'prod-1.3.5.dump'),
+        (BackupOptions(format='custom'), 'prod-1.3.5.dump'),
+        (BackupOptions(format='directory', jobs=4), 'prod-1.3.5.dir'),
+    ])
+    def test_backup_path(self, tmp_path, options, name):
+        assert backup_path(tmp_path, 'prod', '1.3.5', options) == tmp_path / name
+
+    def test_pg_dump_args(self):
+        options = BackupOptions(format='directory', jobs=4, compress='6')
+
+        assert pg_dump_args('prod', Path('/b/1.3.5.dir'), options) == [
+            '-F', 'd', '-j', '4', '-Z', '6', 'prod', '-f', '/b/1.3.5.dir']
+
+    @pytest.mark.parametrize('path, jobs, command', [
+        ('/b/1.3.5.sql', 4, 'psql -d prod -f /b/1.3.5.sql'),
+        ('/b/1.3.5.sql.gz', 1, 'gunzip -c /b/1.3.5.sql.gz | psql -d prod'),
+        ('/b/1.3.5.sql.zst', 1, 'zstd -dc /b/1.3.5.sql.zst | psql -d prod'),
+        ('/b/1.3.5.sql.lz4', 1, 'lz4 -dc /b/1.3.5.sql.lz4 | psql -d prod'),
+        ('/b/1.3.5.dump', 1, 'pg_restore --clean --if-exists -d prod /b/1.3.5.dump'),
+        ('/b/1.3.5.dir', 4, 'pg_restore --clean --if-exists -j 4 -d prod /b/1.3.5.dir'),
+    ])
+    def test_restore_command(self, path, jobs, command):
+        assert restore_command('prod', path, jobs) == command
+
+    @pytest.mark.parametrize('path, command', [
+        ('/my backups/1.3.5.sql', "psql -d 'my prod' -f '/my backups/1.3.5.sql'"),
+        ('/my backups/1.3.5.sql.gz', "gunzip -c '/my backups/1.3.5.sql.gz' | psql -d 'my prod'"),
+        ('/my backups/1.3.5.dir',
+         "pg_restore --clean --if-exists -j 4 -d 'my prod' '/my backups/1.3.5.dir'"),
+    ])
+    def test_restore_command_quoted(self, path, command):
+        assert restore_command('my prod', path, 4) == command
+
+
+class TestRetention:
+
+    @pytest.fixture
+    def backups_dir(self, tmp_path):
+        for name in ('prod-1.10.0.sql', 'prod-1.2.0.dump', 'prod-1.9.0.sql.gz', 'notes.txt'):
+            (tmp_path / name).write_text('')
+        (tmp_path / 'prod-1.11.0.dir').mkdir()
+        (tmp_path / 'prod-1.11.0.dir' / 'toc.dat').write_text('')
+        return tmp_path
+
+    def test_list_backups_in_version_order(self, backups_dir):
+        assert [path.name for path in list_backups(backups_dir, 'prod')] == [
+            'prod-1.2.0.dump', 'prod-1.9.0.sql.gz', 'prod-1.10.0.sql', 'prod-1.11.0.dir']
+
+    def test_prune_keeps_most_recent(self, backups_dir):
+        removed = prune_backups(backups_dir, 'prod', 2)
+
+        assert [path.name for path in removed] == ['prod-1.2.0.dump', 'prod-1.9.0.sql.gz']
+        assert sorted(path.name for path in backups_dir.iterdir()) == [
+            'notes.txt', 'prod-1.10.0.sql', 'prod-1.11.0.dir']
+
+    def test_prune_never_removes_kept(self, backups_dir):
+        removed = prune_backups(backups_dir, 'prod', 1, keep=[backups_dir / 'prod-1.2.0.dump'])
+
+        assert [path.name for path in removed] == ['prod-1.9.0.sql.gz', 'prod-1.10.0.sql']
+        assert (backups_dir / 'prod-1.11.0.dir').exists()
+        assert (backups_dir / 'prod-1.2.0.dump').exists()
+
+    def test_prune_leaves_other_databases(self, backups_dir):
+        # Backups directory shared with other projects (HALF_ORM_BACKUPS_DIR)
+        for name in ('shop-1.0.0.sql', 'prod-test-1.0.0.dump', 'prod_old-1.0.0.sql', '1.0.0.sql'):
+            (backups_dir / name).write_text('')
+
+        removed = prune_backups(backups_dir, 'prod', 1)
+
+        assert [path.name for path in removed] == [
+            'prod-1.2.0.dump', 'prod-1.9.0.sql.gz', 'prod-1.10.0.sql']
+        assert sorted(path.name for path in backups_dir.iterdir()) == [
+            '1.0.0.sql', 'notes.txt', 'prod-1.11.0.dir', 'prod-test-1.0.0.dump',
+            'prod_old-1.0.0.sql', 'shop-1.0.0.sql']
+        assert [path.name for path in list_backups(backups_dir, 'shop')] == ['shop-1.0.0.sql']
+
+    def test_zstd_and_lz4_backups_listed(self, tmp_path):
+        for name in ('prod-1.3.5.sql.zst', 'prod-1.3.4.sql.lz4'):
+            (tmp_path / name).write_text('')
+
+        assert [path.name for path in list_backups(tmp_path, 'prod')] == [
+            'prod-1.3.4.sql.lz4', 'prod-1.3.5.sql.zst']
+
+    def test_missing_directory(self, tmp_path):
+        assert prune_backups(tmp_path / 'missing', 'prod', 1) == []
+
+    def test_backup_size(self, backups_dir):
+        (backups_dir / 'prod-1.2.0.dump').write_text('12345')
+        (backups_dir / 'prod-1.11.0.dir' / 'toc.dat').write_text('123')
+        (backups_dir / 'prod-1.11.0.dir' / '3001.dat.gz').write_text('1234')
+
+        assert backup_size(backups_dir / 'prod-1.2.0.dump') == 5
+        assert backup_size(backups_dir / 'prod-1.11.0.dir') == 7
+        assert backup_size(backups_dir / 'prod-1.0.0.sql') == 0
+
+
+class TestSnapshotRetention:
+
+    SNAPSHOTS = [(Version('1.10.0'), 'db_hop_snap_1_10_0'), (Version('1.2.0'), 'db_hop_snap_1_2_0'),
+                 (Version('1.9.0'), 'db_hop_snap_1_9_0'), (Version('1.0.0'), 'db_hop_snap_1_0_0')]
+
+    def test_expired_in_version_order(self):
+        assert expired_snapshots(self.SNAPSHOTS, 2) == ['db_hop_snap_1_0_0', 'db_hop_snap_1_2_0']
+
+    def test_kept_snapshot_never_expired(self):
+        assert expired_snapshots(self.SNAPSHOTS, 3, keep=['db_hop_snap_1_0_0']) == []
+
+    def test_drop_in_background(self):
+        dropped, messages = [], []
+
+        def drop(name):
+            if name == 'db_hop_snap_1_2_0':
+                raise RuntimeError('database is being accessed by other users')
+            dropped.append(name)
+
+        thread = drop_snapshots_in_background(
+            drop, ['db_hop_snap_1_0_0', 'db_hop_snap_1_2_0'], report=messages.append)
+        thread.join(5)
+
+        assert not thread.daemon
+        assert dropped == ['db_hop_snap_1_0_0']
+        assert messages == [
+            '  ✓ Dropped expired snapshot db_hop_snap_1_0_0',
+            '  ⚠ Failed to drop snapshot db_hop_snap_1_2_0: database is being accessed by other users']
+
+
+class TestLocalConfig:
+
+    def test_round_trip(self, tmp_path):
+        (tmp_path / '.hop').mkdir()
+        local_config = LocalConfig(str(tmp_path))
+        local_config.backup_strategy = 'both'
+        local_config.backup_format = 'directory'
+        local_config.backup_jobs = 4
+        local_config.backup_compress = 'zstd:3'
+        local_config.backup_retention = 5
+
+        reloaded = LocalConfig(str(tmp_path))
+
+        assert (reloaded.backup_strategy, reloaded.backup_format, reloaded.backup_jobs,
+                reloaded.backup_compress, reloaded.backup_retention) == (
+            'both', 'directory', 4, 'zstd:3', 5)
+
+
+class TestUpgradeCommand:
+
+    def _invoke(self, args):
+        from half_orm_dev.cli.commands.upgrade import upgrade
+
+        mock_repo = MagicMock()
+        mock_repo.local_config = _local_config(backup_retention=3)
+        mock_repo.release_manager.update_production.return_value = {
+            'current_version': '1.3.5', 'has_updates': True,
+            'available_releases': [{'version': '1.3.6', 'patches': []}],
+            'upgrade_path': ['1.3.6'],
+        }
+        mock_repo.release_manager.upgrade_production.return_value = {
+            'dry_run': False, 'current_version': '1.3.5', 'final_version': '1.3.6',
+            'releases_applied': [], 'patches_applied': {},
+        }
+        with patch('half_orm_dev.cli.commands.upgrade.Repo', return_value=mock_repo):
+            result = CliRunner().invoke(upgrade, ['--yes'] + args)
+        return result, mock_repo.release_manager.upgrade_production
+
+    def test_backup_options(self):
+        result, upgrade_production = self._invoke(
+            ['--backup-format', 'directory', '-j', '4', '--compress', '6'])
+
+        assert result.exit_code == 0
+        assert upgrade_production.call_args.kwargs['backup_options'] == BackupOptions(
+            format='directory', jobs=4, compress='6', retention=3)
+
+    def test_backup_strategy(self):
+        result, upgrade_production = self._invoke(['--backup-strategy', 'snapshot'])
+
+        assert result.exit_code == 0
+        assert upgrade_production.call_args.kwargs['backup_options'] == BackupOptions(
+            strategy='snapshot', retention=3)
+
+    def test_defaults_to_local_config(self):
+        result, upgrade_production = self._invoke([])
+
+        assert result.exit_code == 0
+        assert upgrade_production.call_args.kwargs['backup_options'] is None
+
+    def test_parallel_plain_backup_refused(self):
+        result, upgrade_production = self._invoke(['-j', '4'])
+
+        assert result.exit_code == 2
+        assert 'requires the directory format' in result.output
+        upgrade_production.assert_not_called()
@@ -0,0 +1,184 @@
+"""
+Tests for BatchedMigration - batched data migrations of large tables.
+"""
+
+from contextlib import contextmanager
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+from psycopg import sql as pg_sql
+from psycopg.pq import TransactionStatus
+
+from half_orm_dev.batch_migration import (
+    BatchedMigration, BatchMigrationError, CHECKPOINT_TABLE_QUERY, CHECKPOINT_QUERY,
+    SAVE_CHECKPOINT_QUERY, PRIMARY_KEY_QUERY, KEY_TYPE_QUERY, REPLICATION_LAG_QUERY
+)
+
+SQL = "UPDATE public.users SET active = true WHERE id BETWEEN %(first)s AND %(last)s"
+
+
+class FakeCursor:
+    """Runs the queries of a migration on the keys of a fake table."""
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._rows = []
+        self.rowcount = -1
+        self.description = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def _result(self, rows):
+        self._rows = rows
+        self.description = [SimpleNamespace(name=name) for name in (rows[0] if rows else {})]
+
+    def execute(self, query, params=None):
+        connection = self._connection
+        if isinstance(query, pg_sql.Composable):
+            keys = [key for key in connection.keys
+                    if params['after'] is None or key > int(params['after'])][:params['size']]
+            self._result([{'first': str(keys[0]) if keys else None,
+                           'last': str(keys[-1]) if keys else None}])
+        elif query == CHECKPOINT_TABLE_QUERY:
+            self._result([{'exists': connection.checkpoint_table}])
+        elif query == PRIMARY_KEY_QUERY:
+            self._result(connection.primary_key)
+        elif query == KEY_TYPE_QUERY:
+            self._result([{'key': params['key'], 'type': 'integer'}])
+        elif query == CHECKPOINT_QUERY:
+            checkpoint = connection.checkpoints.get(params['name'])
+            self._result([dict(checkpoint)] if checkpoint else [])
+        elif query == SAVE_CHECKPOINT_QUERY:
+            connection.pending[params['name']] = {
+                key: params[key] for key in ('last_key', 'rows', 'batches', 'done')}
+        elif query == REPLICATION_LAG_QUERY:
+            self._result([{'lag': connection.lags.pop(0) if connection.lags else 0.0}])
+        else:
+            first, last = int(params['first']), int(params['last'])
+            connection.log.append(('batch', first, last))
+            self.rowcount = len([key for key in connection.keys if first <= key <= last])
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return self._rows
+
+
+@pytest.fixture
+def model():
+    connection = Mock()
+    connection.autocommit = True
+    connection.info.transaction_status = TransactionStatus.IDLE
+    connection.keys = [1, 2, 3, 5, 8, 13, 21]
+    connection.primary_key = [{'key': 'id', 'type': 'integer'}]
+    connection.checkpoint_table = True
+    connection.checkpoints = {}
+    connection.pending = {}
+    connection.lags = []
+    connection.log = []
+    connection.cursor.side_effect = lambda: FakeCursor(connection)
+
+    @contextmanager
+    def transaction():
+        connection.pending = {}
+        yield
+        connection.checkpoints.update(connection.pending)
+        connection.log.append('COMMIT')
+
+    connection.transaction.side_effect = transaction
+    model = Mock()
+    model._connection = connection
+    return model
+
+
+class TestBatchedMigration:
+
+    def test_batches_by_key_range(self, model):
+        rows = BatchedMigration('1-active', 'public.users', SQL, batch_size=3).run(model)
+
+        assert rows == 7
+        assert model._connection.log == [
+            ('batch', 1, 3), 'COMMIT', ('batch', 5, 13), 'COMMIT',
+            ('batch', 21, 21), 'COMMIT', 'COMMIT']
+        assert model._connection.checkpoints['1-active'] == {
+            'last_key': '21', 'rows': 7, 'batches': 3, 'done': True}
+
+    def test_resumes_from_checkpoint(self, model):
+        model._connection.checkpoints['1-active'] = {
+            'last_key': '5', 'rows': 4, 'batches': 2, 'done': False}
+
+        rows = BatchedMigration('1-active', 'public.users', SQL, batch_size=2).run(model)
+
+        assert rows == 7
+        assert [entry for entry in model._connection.log if entry[0] == 'batch'] == [
+            ('batch', 8, 13), ('batch', 21, 21)]
+
+    def test_interrupted_migration_keeps_committed_batches(self, model):
+        def backfill(model, first, last):
+            if first == '8':
+                raise RuntimeError("connection lost")
+            return 2
+
+        with pytest.raises(RuntimeError):
+            BatchedMigration('1-active', 'public.users', backfill, batch_size=2).run(model)
+
+        assert model._connection.checkpoints['1-active'] == {
+            'last_key': '5', 'rows': 4, 'batches': 2, 'done': False}
+
+    def test_runs_without_checkpoint_table(self, model, capsys):
+        model._connection.checkpoint_table = False
+
+        rows = BatchedMigration('1-active', 'public.users', SQL, batch_size=3).run(model)
+
+        assert rows == 7
+        assert model._connection.checkpoints == {}
+        assert "an interrupted migration will start over" in capsys.readouterr().out
+
+    def test_done_migration_skipped(self, model, capsys):
+        model._connection.checkpoints['1-active'] = {
+            'last_key': '21', 'rows': 7, 'batches': 1, 'done': True}
+
+        assert BatchedMigration('1-active', 'public.users', SQL).run(model) == 7
+
+        assert 'COMMIT' not in model._connection.log
+        assert "1-active: already done (7 rows)" in capsys.readouterr().out
+
+    def test_throttles_on_replication_lag(self, model, capsys):
+        model._connection.lags = [42.0, 12.5, 3.0]
+        delays = []
+
+        BatchedMigration('1-active', 'public.users', SQL, max_replication_lag=10,
+                         lag_poll=2).run(model, sleep=delays.append)
+
+        assert delays == [2, 2]
+        assert "replication lag 42.0s > 10s, waiting 2s" in capsys.readouterr().out
+
+    def test_explicit_key(self, model):
+        model._connection.primary_key = []
+
+        BatchedMigration('1-active', 'public.users', SQL, key='id').run(model)
+
+        assert ('batch', 1, 21) in model._connection.log
+
+    def test_requires_single_column_key(self, model):
+        model._connection.primary_key = [{'key': 'a', 'type': 'int'}, {'key': 'b', 'type': 'int'}]
+
+        with pytest.raises(BatchMigrationError, match="no single-column primary key"):
+            BatchedMigration('1-active', 'public.users', SQL).run(model)
+
+    def test_refuses_to_run_in_transaction(self, model):
+        model._connection.autocommit = False
+
+        with pytest.raises(BatchMigrationError, match="outside a transaction"):
+            BatchedMigration('1-active', 'public.users', SQL).run(model)
+
+    @pytest.mark.parametrize("options", [{'batch_size': 0}, {'max_replication_lag': 0}])
+    def test_invalid_options(self, options):
+        with pytest.raises(ValueError):
+            BatchedMigration('1-active', 'public.users', SQL, **options)
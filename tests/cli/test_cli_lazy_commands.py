@@ -0,0 +1,90 @@
+"""
+Test lazy loading of the command modules by the CLI group.
+
+Command modules (and through them repo, hgit/GitPython, psycopg...) are
+imported only when their command is invoked: `--help` and shell completion
+use the short help of the ALL_COMMANDS registry.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from half_orm_dev.cli.commands import ALL_COMMANDS, load_command
+from half_orm_dev.cli.main import create_cli_group
+from half_orm_dev.utils import hop_version
+
+ROOT = Path(__file__).parent.parent.parent
+
+HEAVY_MODULES = ('git', 'psycopg', 'half_orm_dev.repo', 'half_orm_dev.cli.commands.patch')
+
+
+@pytest.fixture
+def devel_repo(tmp_path, monkeypatch):
+    (tmp_path / '.hop').mkdir()
+    (tmp_path / '.hop' / 'config').write_text(
+        f"[halfORM]\nhop_version = {hop_version()}\ndevel = True\n")
+    monkeypatch.setenv('HALFORM_CONF_DIR', str(tmp_path / 'conf'))
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def _modules_imported_by(code, cwd):
+    """Run code in a fresh interpreter, return the heavy modules it imported."""
+    check = f"import sys; print('imported:' + ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    env = {**os.environ, 'PYTHONPATH': str(ROOT)}
+    proc = subprocess.run([sys.executable, '-c', f'{code}\n{check}'],
+                          cwd=cwd, env=env, capture_output=True, text=True, check=True)
+    return proc.stdout.splitlines()[-1][len('imported:'):]
+
+
+class TestCommandRegistry:
+
+    @pytest.mark.parametrize('name', sorted(ALL_COMMANDS))
+    def test_short_help_matches_command(self, name):
+        """The registry short help is the one of the command itself."""
+        command = load_command(name)
+
+        assert command.get_short_help_str(1000) == ALL_COMMANDS[name][2]
+
+
+class TestLazyGroup:
+
+    def test_help_lists_commands_without_importing(self, devel_repo):
+        code = ("from click.testing import CliRunner\n"
+                "from half_orm_dev.cli import create_cli_group\n"
+                "result = CliRunner().invoke(create_cli_group(), ['--help'])\n"
+                "assert 'Patch development and management commands.' in result.output\n")
+
+        assert _modules_imported_by(code, devel_repo) == ''
+
+    def test_completion_without_importing(self, devel_repo):
+        code = ("from half_orm_dev.cli import create_cli_group\n"
+                "from click.shell_completion import ShellComplete\n"
+                "group = create_cli_group()\n"
+                "items = ShellComplete(group, {}, 'half_orm', '_X').get_completions([], 'pa')\n"
+                "assert [item.value for item in items] == ['patch']\n")
+
+        assert _modules_imported_by(code, devel_repo) == ''
+
+    def test_invoked_command_is_loaded(self, devel_repo):
+        cli = create_cli_group()
+
+        result = CliRunner().invoke(cli, ['set-git-origin', '--help'])
+
+        assert result.exit_code == 0
+        assert 'Update the git remote origin URL.' in result.output
+        assert list(cli.commands) == ['set-git-origin']
+
+    def test_unavailable_command_not_listed(self, devel_repo):
+        cli = create_cli_group()
+
+        result = CliRunner().invoke(cli, ['--help'])
+
+        assert 'patch' in result.output
+        assert 'clone' not in result.output
+        assert cli.get_command(None, 'clone') is None
@@ -129,6 +129,52 @@ class TestUpgradeDryRun:
         result = _invoke(['--dry-run'], upgrade_result=_UPGRADE_RESULT_DRY_RUN)
         assert 'Target version' not in result.output
 
+    def test_shows_backup(self):
+        result = _invoke(['--dry-run'], upgrade_result=_UPGRADE_RESULT_DRY_RUN)
+        assert 'Would create backup: backups/0.3.2.sql' in result.output
+
+    def test_skip_backup_shows_no_backup(self):
+        result = _invoke(['--dry-run', '--skip-backup'], upgrade_result={
+            **_UPGRADE_RESULT_DRY_RUN, 'backup_strategy': None, 'backup_would_be_created': None})
+        assert 'Would create backup' not in result.output
+
+    def test_shows_duration_estimate(self):
+        estimation = {
+            'seconds': 2460.0, 'releases': {'0.3.3': 2400.0, '0.4.0': 60.0},
+            'patches': [
+                {'release': '0.3.3', 'patch_id': '1-fix', 'seconds': 2400.0,
+                 'recorded_seconds': 0.5, 'run': 'validate-0.3.3', 'dominant': True,
+                 'slowest': {'file': '01_users.sql', 'line': 3, 'relation': 'public.users',
+                             'sql': 'UPDATE users SET active = true', 'seconds': 2400.0},
+                 'unscaled': []},
+                {'release': '0.4.0', 'patch_id': '3-big-feature', 'seconds': 60.0,
+                 'recorded_seconds': 60.0, 'run': 'upgrade-0.3.2-to-0.4.0',
+                 'dominant': False, 'slowest': None, 'unscaled': []}],
+            'unknown': ['2-feat']}
+        result = _invoke(['--dry-run'],
+                         upgrade_result={**_UPGRADE_RESULT_DRY_RUN, 'duration_estimate': estimation})
+        assert 'Estimated duration: ~41m00s' in result.output
+        assert '0.3.3/1-fix: ~40m00s (98%, 0.5s in validate-0.3.3)' in result.output
+        assert '01_users.sql:3  UPDATE users SET active = true' in result.output
+        assert '3-big-feature:' not in result.output
+        assert 'no timing recorded for: 2-feat' in result.output
+
+    def test_timings_from_passed_to_upgrade_production(self, tmp_path):
+        runner = CliRunner()
+        mock_repo = MagicMock()
+        mock_repo.release_manager.update_production.return_value = _UPDATE_INFO_TWO_RELEASES
+        mock_repo.release_manager.upgrade_production.return_value = _UPGRADE_RESULT_DRY_RUN
+        with patch('half_orm_dev.cli.commands.upgrade.Repo', return_value=mock_repo):
+            runner.invoke(upgrade, ['--dry-run', '--timings-from', str(tmp_path)],
+                          catch_exceptions=False)
+        kwargs = mock_repo.release_manager.upgrade_production.call_args.kwargs
+        assert kwargs['timing_sources'] == [str(tmp_path)]
+
+    def test_timings_from_requires_dry_run(self, tmp_path):
+        result = CliRunner().invoke(upgrade, ['--timings-from', str(tmp_path)])
+        assert result.exit_code != 0
+        assert '--timings-from requires --dry-run' in result.output
+
 
 class TestUpgradeInteractivePrompt:
     def test_shows_target_version_prompt(self):
@@ -214,3 +260,42 @@ class TestUpgradeFlags:
         assert call_kwargs.kwargs.get('update_info') is _UPDATE_INFO_TWO_RELEASES
         # update_production() called only once (not twice)
         assert mock_repo.release_manager.update_production.call_count == 1
+
+    def test_transaction_scope_passed_to_upgrade_production(self):
+        """--transaction selects the transaction scope (one per release by default)."""
+        runner = CliRunner()
+        mock_repo = MagicMock()
+        mock_repo.release_manager.update_production.return_value = _UPDATE_INFO_TWO_RELEASES
+        mock_repo.release_manager.upgrade_production.return_value = _UPGRADE_RESULT_FULL
+        with patch('half_orm_dev.cli.commands.upgrade.Repo', return_value=mock_repo):
+            runner.invoke(upgrade, ['--yes'], catch_exceptions=False)
+            runner.invoke(upgrade, ['--yes', '--transaction=upgrade'], catch_exceptions=False)
+        scopes = [call.kwargs.get('transaction_scope')
+                  for call in mock_repo.release_manager.upgrade_production.call_args_list]
+        assert scopes == ['release', 'upgrade']
+
+    def test_lock_timeout_passed_to_upgrade_production(self):
+        """--lock-timeout/--lock-retries build the lock retry policy."""
+        runner = CliRunner()
+        mock_repo = MagicMock()
+        mock_repo.release_manager.update_production.return_value = _UPDATE_INFO_TWO_RELEASES
+        mock_repo.release_manager.upgrade_production.return_value = _UPGRADE_RESULT_FULL
+        with patch('half_orm_dev.cli.commands.upgrade.Repo', return_value=mock_repo):
+            runner.invoke(upgrade, ['--yes'], catch_exceptions=False)
+            runner.invoke(upgrade, ['--yes', '--lock-timeout=2.5', '--lock-retries=8'],
+                          catch_exceptions=False)
+        policies = [call.kwargs.get('lock_retry')
+                    for call in mock_repo.release_manager.upgrade_production.call_args_list]
+        assert policies[0] is None
+        assert (policies[1].lock_timeout, policies[1].retries) == (2.5, 8)
+
+    def test_lock_retries_requires_lock_timeout(self):
+        result = CliRunner().invoke(upgrade, ['--yes', '--lock-retries=3'])
+        assert result.exit_code == 2
+        assert "--lock-retries requires --lock-timeout" in result.output
+
+    def test_rollback_hint_uses_database_and_jobs(self):
+        upgrade_result = dict(_UPGRADE_RESULT_FULL, snapshot_used=None,
+                              backup_created='backups/0.3.2.dir', backup_jobs=4, db_name='mydb')
+        result = _invoke(['--yes'], upgrade_result=upgrade_result)
+        assert 'pg_restore --clean --if-exists -j 4 -d mydb backups/0.3.2.dir' in result.output
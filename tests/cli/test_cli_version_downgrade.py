@@ -42,8 +42,8 @@ def _make_cli_and_invoke(temp_hop_dir, installed_version, args=None):
     runner = CliRunner()
     args = args or []
 
-    with patch('half_orm_dev.repo.Repo._find_base_dir', return_value=str(temp_hop_dir)):
-        with patch('half_orm_dev.repo.hop_version', return_value=installed_version):
+    with patch('half_orm_dev.cli.main.find_base_dir', return_value=str(temp_hop_dir)):
+        with patch('half_orm_dev.cli.main.hop_version', return_value=installed_version):
             Repo.clear_instances()
             cli = create_cli_group()
             with patch('half_orm_dev.cli.main.subprocess.run') as mock_pip:
@@ -89,8 +89,8 @@ def test_pip_failure_exits_with_error(temp_hop_dir):
     """If pip install fails, shows manual install instructions and exits 1."""
     runner = CliRunner()
 
-    with patch('half_orm_dev.repo.Repo._find_base_dir', return_value=str(temp_hop_dir)):
-        with patch('half_orm_dev.repo.hop_version', return_value='0.17.2'):
+    with patch('half_orm_dev.cli.main.find_base_dir', return_value=str(temp_hop_dir)):
+        with patch('half_orm_dev.cli.main.hop_version', return_value='0.17.2'):
             Repo.clear_instances()
             cli = create_cli_group()
             with patch('half_orm_dev.cli.main.subprocess.run',
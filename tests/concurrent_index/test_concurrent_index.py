@@ -0,0 +1,271 @@
+"""
+Tests for the concurrent index builds of the non-transactional patch files.
+"""
+
+import threading
+from types import SimpleNamespace
+from unittest.mock import Mock, MagicMock
+
+import pytest
+from psycopg import errors
+from psycopg.pq import TransactionStatus
+
+from half_orm_dev import concurrent_index
+from half_orm_dev.concurrent_index import (
+    is_concurrent_index, index_name, reindex_target, format_progress, execute_concurrently,
+    IndexProgress,
+    INVALID_INDEX_QUERY, INVALID_REINDEX_QUERY, PROGRESS_QUERY
+)
+from half_orm_dev.file_executor import execute_sql
+from half_orm_dev.lock_retry import LockRetryPolicy
+
+CIC = 'CREATE INDEX CONCURRENTLY ix_users_email ON blog.users (email)'
+REINDEX = 'REINDEX INDEX CONCURRENTLY blog.ix_users_email'
+
+
+class FakeCursor:
+    """
+    Builds the index of CIC (or rebuilds it with REINDEX), failing while
+    connection.failures is not empty. A failed REINDEX leaves a _ccnewN index
+    in connection.reindex_leftovers.
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        connection = self._connection
+        connection.statements.append(sql)
+        if sql == INVALID_INDEX_QUERY:
+            self._rows = [(connection.invalid,)] if params['index'] == 'blog.ix_users_email' else []
+        elif sql == INVALID_REINDEX_QUERY:
+            connection.reindex_params.append(params)
+            self._rows = [(index,) for index in connection.reindex_leftovers]
+        elif sql.startswith('DROP INDEX'):
+            connection.invalid = False
+            index = sql.rsplit(' ', 1)[1]
+            if index in connection.reindex_leftovers:
+                connection.reindex_leftovers.remove(index)
+        elif sql == CIC:
+            if connection.failures:
+                connection.invalid = True
+                raise connection.failures.pop(0)
+        elif sql == REINDEX:
+            if connection.failures:
+                leftovers = connection.reindex_leftovers
+                leftovers.append(f'blog.ix_users_email_ccnew{len(leftovers) or ""}')
+                raise connection.failures.pop(0)
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return self._rows
+
+
+@pytest.fixture
+def model():
+    connection = Mock()
+    connection.statements = []
+    connection.failures = []
+    connection.invalid = False
+    connection.reindex_leftovers = []
+    connection.reindex_params = []
+    connection.autocommit = True
+    connection.info.transaction_status = TransactionStatus.IDLE
+    connection.cursor.side_effect = lambda: FakeCursor(connection)
+    model = Mock()
+    model._connection = connection
+    return model
+
+
+class TestParsing:
+
+    @pytest.mark.parametrize("sql, expected", [
+        (CIC, True),
+        ('create unique index concurrently if not exists ix on users (id)', True),
+        ('REINDEX (VERBOSE) TABLE CONCURRENTLY users', True),
+        ('CREATE INDEX ix ON users (id)', False),
+        ('REFRESH MATERIALIZED VIEW CONCURRENTLY stats', False),
+    ])
+    def test_is_concurrent_index(self, sql, expected):
+        assert is_concurrent_index(sql) is expected
+
+    @pytest.mark.parametrize("sql, name", [
+        (CIC, 'blog.ix_users_email'),
+        ('CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS "Ix" ON ONLY users (id)', '"Ix"'),
+        ('CREATE INDEX CONCURRENTLY ON users (id)', None),
+        ('REINDEX INDEX CONCURRENTLY ix', None),
+    ])
+    def test_index_name(self, sql, name):
+        assert index_name(sql) == name
+
+    @pytest.mark.parametrize("sql, target", [
+        (REINDEX, ('index', 'blog.ix_users_email')),
+        ('reindex (verbose) table concurrently "Users"', ('table', '"Users"')),
+        ('REINDEX SCHEMA CONCURRENTLY blog', None),
+        (CIC, None),
+    ])
+    def test_reindex_target(self, sql, target):
+        assert reindex_target(sql) == target
+
+    @pytest.mark.parametrize("progress, line", [
+        ({'phase': 'building index: scanning table', 'blocks_done': 250, 'blocks_total': 1000,
+          'tuples_done': 0, 'tuples_total': 0, 'lockers_done': 0, 'lockers_total': 0},
+         "building index: scanning table 25% (250/1000 blocks)"),
+        ({'phase': 'waiting for old snapshots', 'blocks_done': 0, 'blocks_total': 0,
+          'tuples_done': 0, 'tuples_total': 0, 'lockers_done': 1, 'lockers_total': 4},
+         "waiting for old snapshots 25% (1/4 transactions)"),
+        ({'phase': 'initializing', 'blocks_done': 0, 'blocks_total': 0,
+          'tuples_done': 0, 'tuples_total': 0, 'lockers_done': 0, 'lockers_total': 0},
+         "initializing"),
+    ])
+    def test_format_progress(self, progress, line):
+        assert format_progress('02_index.sql:1', progress) == f"    ⏳ 02_index.sql:1: {line}"
+
+
+class TestExecuteConcurrently:
+
+    def test_builds_index(self, model):
+        assert execute_concurrently(model, CIC, progress_interval=None) == 1
+        assert CIC in model._connection.statements
+
+    def test_drops_invalid_index_of_previous_build(self, model, capsys):
+        model._connection.invalid = True
+
+        execute_concurrently(model, CIC, label='02_index.sql:1', progress_interval=None)
+
+        statements = model._connection.statements
+        assert statements.index('DROP INDEX CONCURRENTLY IF EXISTS blog.ix_users_email') < statements.index(CIC)
+        assert "dropped the invalid index blog.ix_users_email of a previous build" in capsys.readouterr().out
+
+    def test_retries_transient_error_after_dropping_invalid_index(self, model):
+        model._connection.failures = [errors.DeadlockDetected("deadlock detected")]
+        delays = []
+
+        attempts = execute_concurrently(model, CIC, progress_interval=None, sleep=delays.append)
+
+        assert attempts == 2
+        assert delays == [concurrent_index.RETRY_DELAY]
+        assert model._connection.statements.count(CIC) == 2
+        assert 'DROP INDEX CONCURRENTLY IF EXISTS blog.ix_users_email' in model._connection.statements
+
+    def test_lock_retry_policy(self, model):
+        model._connection.failures = [errors.LockNotAvailable("lock timeout")] * 2
+        delays = []
+
+        attempts = execute_concurrently(model, CIC, lock_retry=LockRetryPolicy(lock_timeout=2, backoff=3),
+                                        progress_interval=None, sleep=delays.append)
+
+        assert (attempts, delays) == (3, [3, 6])
+        assert model._connection.statements.count('SET lock_timeout = 2000') == 3
+
+    def test_unique_violation_not_retried(self, model):
+        model._connection.failures = [errors.UniqueViolation("could not create unique index")]
+
+        with pytest.raises(errors.UniqueViolation):
+            execute_concurrently(model, CIC, progress_interval=None)
+
+        assert model._connection.statements.count(CIC) == 1
+        assert model._connection.invalid is False
+
+    def test_reindex_leftovers_dropped(self, model):
+        model._connection.failures = [errors.DeadlockDetected("deadlock detected")]
+
+        execute_concurrently(model, REINDEX, progress_interval=None, sleep=lambda delay: None)
+
+        statements = model._connection.statements
+        drop = 'DROP INDEX CONCURRENTLY IF EXISTS blog.ix_users_email_ccnew'
+        assert statements.index(REINDEX) < statements.index(drop) < len(statements) - 1
+        assert statements.count(REINDEX) == 2
+        assert model._connection.reindex_leftovers == []
+        assert model._connection.reindex_params[0] == {'index': 'blog.ix_users_email', 'table': None}
+
+    def test_reindex_keeps_other_sessions_indexes(self, model):
+        """The _ccnew index of a REINDEX running in another session is never dropped."""
+        model._connection.reindex_leftovers = ['blog.ix_users_email_ccnew']
+        model._connection.failures = [errors.UniqueViolation("could not create unique index")]
+
+        with pytest.raises(errors.UniqueViolation):
+            execute_concurrently(model, REINDEX, progress_interval=None)
+
+        statements = model._connection.statements
+        assert 'DROP INDEX CONCURRENTLY IF EXISTS blog.ix_users_email_ccnew' not in statements
+        assert 'DROP INDEX CONCURRENTLY IF EXISTS blog.ix_users_email_ccnew1' in statements
+        assert model._connection.reindex_leftovers == ['blog.ix_users_email_ccnew']
+
+
+class TestIndexProgress:
+
+    def test_polls_backend_of_connection(self, model, monkeypatch, capsys):
+        polled = threading.Event()
+        progress = MagicMock()
+        progress.description = [SimpleNamespace(name=name) for name in (
+            'phase', 'blocks_done', 'blocks_total', 'tuples_done', 'tuples_total',
+            'lockers_done', 'lockers_total')]
+        progress.fetchone.side_effect = lambda: (polled.set(), ('building index: scanning table',
+                                                               50, 200, 0, 0, 0, 0))[1]
+        monitor = MagicMock()
+        monitor.__enter__.return_value.execute.return_value = progress
+        connect = Mock(return_value=monitor)
+        monkeypatch.setattr(concurrent_index.psycopg, 'connect', connect)
+        model._connection.info.dsn = 'host=db dbname=prod'
+        model._connection.info.password = 'secret'
+        model._connection.info.backend_pid = 4242
+
+        with IndexProgress(model._connection, '02_index.sql:1', interval=0.001):
+            assert polled.wait(5)
+
+        connect.assert_called_once_with('host=db dbname=prod', autocommit=True, password='secret')
+        monitor.__enter__.return_value.execute.assert_called_with(PROGRESS_QUERY, {'pid': 4242})
+        assert "02_index.sql:1: building index: scanning table 25% (50/200 blocks)" in capsys.readouterr().out
+
+    def test_no_polling_without_interval(self, model, monkeypatch):
+        connect = Mock()
+        monkeypatch.setattr(concurrent_index.psycopg, 'connect', connect)
+
+        with IndexProgress(model._connection, '02_index.sql:1', interval=None):
+            pass
+
+        connect.assert_not_called()
+
+
+class TestExecuteSql:
+
+    def test_concurrent_statement_timed_with_attempts(self, model, monkeypatch):
+        build = Mock(return_value=2)
+        monkeypatch.setattr(concurrent_index, 'execute_concurrently', build)
+        model.execute_query.return_value = SimpleNamespace(rowcount=-1)
+        records = []
+
+        execute_sql(f"-- hop: no-transaction\nSET maintenance_work_mem = '1GB';\n{CIC};\n",
+                    model, timings=records, label='02_index.sql')
+
+        build.assert_called_once_with(model, f"{CIC};", label='02_index.sql:3', lock_retry=None)
+        assert [(record['line'], record.get('attempts')) for record in records] == [(2, None), (3, 2)]
+
+    def test_untimed_concurrent_sql_split(self, model, monkeypatch):
+        build = Mock(return_value=1)
+        monkeypatch.setattr(concurrent_index, 'execute_concurrently', build)
+
+        execute_sql(f"{CIC};", model)
+
+        build.assert_called_once()
+        model.execute_query.assert_not_called()
+
+    def test_in_transaction_executed_as_is(self, model, monkeypatch):
+        build = Mock()
+        monkeypatch.setattr(concurrent_index, 'execute_concurrently', build)
+        model._connection.autocommit = False
+
+        execute_sql(f"{CIC};", model, timings=[])
+
+        build.assert_not_called()
+        model.execute_query.assert_called_once_with(f"{CIC};")
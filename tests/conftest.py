@@ -2,7 +2,9 @@
 Shared pytest fixtures for half_orm_dev tests.
 """
 
+import atexit
 import os
+import subprocess
 import pytest
 import tempfile
 import shutil
@@ -10,10 +12,13 @@ from pathlib import Path
 from unittest.mock import Mock, patch
 
 # Set HALFORM_CONF_DIR before importing half_orm modules, as CONF_DIR is
-# resolved at import time. Using setdefault preserves any explicit user setting.
-_half_orm_conf_dir = Path(os.getcwd()) / ".half_orm"
-_half_orm_conf_dir.mkdir(exist_ok=True)
-os.environ.setdefault("HALFORM_CONF_DIR", str(_half_orm_conf_dir))
+# resolved at import time. An explicit user setting is preserved.
+# The connection files written by the tests (with their passwords) go to a
+# temporary directory, never to the working tree.
+if "HALFORM_CONF_DIR" not in os.environ:
+    _half_orm_conf_dir = tempfile.mkdtemp(prefix="half_orm_conf_")
+    atexit.register(shutil.rmtree, _half_orm_conf_dir, ignore_errors=True)
+    os.environ["HALFORM_CONF_DIR"] = _half_orm_conf_dir
 
 from half_orm_dev.database import Database
 from half_orm_dev.repo import Repo
@@ -450,4 +455,69 @@ def create_toml_patches_file():
 
         return release_file
 
-    return _create_toml
\ No newline at end of file
+    return _create_toml
+
+
+# Real git repositories (bare origin + clones)
+
+def _run_git(cwd, *args):
+    """Run a git command in cwd and return its stripped stdout."""
+    return subprocess.run(
+        ['git', *args], cwd=cwd, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+def _commit_file(cwd, name, content='content'):
+    """Write a file and commit it. Returns the new HEAD SHA."""
+    (cwd / name).write_text(content)
+    _run_git(cwd, 'add', name)
+    _run_git(cwd, 'commit', '-q', '-m', f'update {name}')
+    return _run_git(cwd, 'rev-parse', 'HEAD')
+
+
+def _init_clone(path, origin):
+    _run_git(path.parent, 'clone', '-q', str(origin), path.name)
+    _run_git(path, 'config', 'user.name', 'Test User')
+    _run_git(path, 'config', 'user.email', 'test@example.com')
+    _run_git(path, 'config', 'commit.gpgsign', 'false')
+    (path / '.hop').mkdir(exist_ok=True)
+
+
+@pytest.fixture
+def run_git():
+    """Helper: run_git(cwd, *args) -> stdout."""
+    return _run_git
+
+
+@pytest.fixture
+def commit_file():
+    """Helper: commit_file(cwd, name, content) -> new HEAD SHA."""
+    return _commit_file
+
+
+@pytest.fixture
+def git_clones(tmp_path):
+    """
+    Bare origin with a ho-prod branch and two clones of it.
+
+    Returns (origin, local, other): `local` is the clone under test (on
+    ho-prod), `other` plays a colleague pushing to origin.
+    """
+    origin = tmp_path / 'origin.git'
+    _run_git(tmp_path, 'init', '-q', '--bare', '-b', 'ho-prod', str(origin))
+
+    seed = tmp_path / 'seed'
+    seed.mkdir()
+    _run_git(seed, 'init', '-q', '-b', 'ho-prod')
+    _run_git(seed, 'config', 'user.name', 'Test User')
+    _run_git(seed, 'config', 'user.email', 'test@example.com')
+    _run_git(seed, 'config', 'commit.gpgsign', 'false')
+    _commit_file(seed, 'README', 'initial')
+    _run_git(seed, 'remote', 'add', 'origin', str(origin))
+    _run_git(seed, 'push', '-q', 'origin', 'ho-prod')
+
+    local = tmp_path / 'local'
+    other = tmp_path / 'other'
+    _init_clone(local, origin)
+    _init_clone(other, origin)
+    return origin, local, other
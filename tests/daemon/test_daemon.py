@@ -0,0 +1,327 @@
+"""
+Tests for the local daemon (half_orm dev serve).
+
+The daemon runs the commands forwarded by the CLI in its own process and
+clears the Repo singletons when HEAD or the files of .hop/ change.
+"""
+
+import io
+import os
+import subprocess
+import sys
+import threading
+from unittest.mock import patch
+
+import click
+import pytest
+from click.testing import CliRunner
+
+from half_orm_dev import daemon
+from half_orm_dev.cli.main import Hop, create_cli_group
+from half_orm_dev.utils import hop_version
+
+
+def _request(cwd, argv, **extra):
+    """A request to run argv from cwd, as forward sends it."""
+    return {'hop_version': hop_version(), 'argv': argv, 'cwd': str(cwd),
+            'env': daemon.client_environment(), **extra}
+
+
+@pytest.fixture
+def devel_repo(tmp_path, monkeypatch):
+    (tmp_path / '.git' / 'refs' / 'heads').mkdir(parents=True)
+    (tmp_path / '.git' / 'HEAD').write_text('ref: refs/heads/ho-prod\n')
+    (tmp_path / '.git' / 'refs' / 'heads' / 'ho-prod').write_text('a' * 40 + '\n')
+    (tmp_path / '.hop').mkdir()
+    (tmp_path / '.hop' / 'config').write_text(
+        f"[halfORM]\nhop_version = {hop_version()}\ndevel = True\n")
+    monkeypatch.setenv('HALFORM_CONF_DIR', str(tmp_path / 'conf'))
+    monkeypatch.delenv(daemon.NO_DAEMON_ENV, raising=False)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def server(devel_repo, monkeypatch):
+    """A daemon serving devel_repo from a thread."""
+    monkeypatch.setattr(daemon.HopDaemon, 'warm_up', lambda self: None)
+    hop_daemon = daemon.HopDaemon(str(devel_repo), idle_timeout=10)
+    thread = threading.Thread(target=hop_daemon.serve_forever, daemon=True)
+    thread.start()
+    for _ in range(100):
+        if daemon.ping(str(devel_repo)):
+            break
+        thread.join(0.05)
+    yield hop_daemon
+    daemon.stop(str(devel_repo))
+    thread.join(5)
+
+
+class TestStateFingerprint:
+
+    def test_stable(self, devel_repo):
+        assert daemon.state_fingerprint(str(devel_repo)) == daemon.state_fingerprint(str(devel_repo))
+
+    @pytest.mark.parametrize('path, content', [
+        ('.git/HEAD', 'ref: refs/heads/ho-patch/42-login\n'),
+        ('.git/refs/heads/ho-prod', 'b' * 40 + '\n'),
+        ('.hop/config', '[halfORM]\ndevel = False\n'),
+        ('.hop/releases/0.1.0-stage.toml', '[patches]\n'),
+        ('.hop/model/schema.sql', 'CREATE TABLE t();\n'),
+    ])
+    def test_changes_with_repository_state(self, devel_repo, path, content):
+        before = daemon.state_fingerprint(str(devel_repo))
+        (devel_repo / path).parent.mkdir(parents=True, exist_ok=True)
+        (devel_repo / path).write_text(content)
+
+        assert daemon.state_fingerprint(str(devel_repo)) != before
+
+    @pytest.mark.parametrize('path', [
+        '.hop/local_config', '.hop/hop.sock', '.hop/backups/x.sql', '.hop/cache/x.json',
+        '.hop/plans/1.3.5-to-1.3.7.json', '.hop/timings/patch-42-20261018T101500.json'])
+    def test_ignores_local_files(self, devel_repo, path):
+        before = daemon.state_fingerprint(str(devel_repo))
+        (devel_repo / path).parent.mkdir(parents=True, exist_ok=True)
+        (devel_repo / path).write_text('[local]\nlast_fetch = 1.0\n')
+
+        assert daemon.state_fingerprint(str(devel_repo)) == before
+
+
+class TestHopDaemon:
+
+    def test_refresh_clears_repo_on_change(self, devel_repo):
+        hop_daemon = daemon.HopDaemon(str(devel_repo))
+        with patch('half_orm_dev.repo.Repo.clear_instances') as clear_instances:
+            assert hop_daemon.refresh() is True
+            assert hop_daemon.refresh() is False
+            (devel_repo / '.git' / 'HEAD').write_text('ref: refs/heads/ho-release/0.1.0\n')
+            assert hop_daemon.refresh() is True
+
+        clear_instances.assert_called_once_with()
+
+    def test_runs_command(self, devel_repo):
+        hop_daemon = daemon.HopDaemon(str(devel_repo))
+
+        reply = hop_daemon.handle(_request(devel_repo, ['set-git-origin', '--help']))
+
+        assert reply['exit_code'] == 0
+        assert 'Update the git remote origin URL.' in reply['stdout']
+        assert daemon.NO_DAEMON_ENV not in os.environ
+
+    def test_usage_error(self, devel_repo):
+        hop_daemon = daemon.HopDaemon(str(devel_repo))
+
+        reply = hop_daemon.handle(_request(devel_repo, ['set-git-origin']))
+
+        assert reply['exit_code'] == 2
+        assert "Missing argument" in reply['stderr']
+
+    def test_stdin_sent_to_command(self, devel_repo):
+        @click.command()
+        def confirm():
+            click.echo(f"answer: {click.prompt('Continue?')}")
+
+        with patch('half_orm_dev.cli.main.create_cli_group', return_value=confirm):
+            reply = daemon.HopDaemon(str(devel_repo)).handle(
+                _request(devel_repo, [], stdin='yes\n'))
+
+        assert reply['exit_code'] == 0
+        assert 'answer: yes' in reply['stdout']
+
+    def test_subprocess_output_relayed(self, devel_repo):
+        @click.command()
+        def dump():
+            click.echo("from click")
+            subprocess.run(['sh', '-c', 'echo from psql; echo psql error >&2'], check=True)
+
+        output = []
+        with patch('half_orm_dev.cli.main.create_cli_group', return_value=dump):
+            reply = daemon.HopDaemon(str(devel_repo)).handle(
+                _request(devel_repo, []),
+                output=lambda stream, data: output.append((stream, data)))
+
+        assert reply['exit_code'] == 0
+        assert ''.join(data for stream, data in output if stream == 'stdout') == (
+            "from click\nfrom psql\n")
+        assert ('stderr', "psql error\n") in output
+
+    def test_refuses_other_version(self, devel_repo):
+        reply = daemon.HopDaemon(str(devel_repo)).handle(
+            {'hop_version': '0.0.1', 'argv': ['check'], 'cwd': str(devel_repo)})
+
+        assert 'error' in reply
+
+    def test_refuses_other_repository(self, devel_repo, tmp_path_factory):
+        other = tmp_path_factory.mktemp('other')
+
+        reply = daemon.HopDaemon(str(devel_repo)).handle(_request(other, ['check']))
+
+        assert 'error' in reply
+
+    @pytest.mark.parametrize('name', ['HALFORM_CONF_DIR', 'PGHOST', 'HALF_ORM_BACKUPS_DIR'])
+    def test_refuses_other_environment(self, devel_repo, name):
+        request = _request(devel_repo, ['check'])
+        request['env'][name] = '/elsewhere'
+
+        reply = daemon.HopDaemon(str(devel_repo)).handle(request)
+
+        assert reply == {'error': f"environment differs from the daemon's ({name})"}
+
+    def test_refuses_request_without_environment(self, devel_repo):
+        request = _request(devel_repo, ['check'])
+        del request['env']
+
+        assert 'error' in daemon.HopDaemon(str(devel_repo)).handle(request)
+
+
+class TestClientEnvironment:
+
+    def test_relevant_variables(self):
+        environ = {'HALFORM_CONF_DIR': '/etc/half_orm', 'PGHOST': 'db', 'PGPASSWORD': 'x',
+                   'HALF_ORM_BACKUPS_DIR': '/backups', 'PATH': '/bin', 'HOME': '/root'}
+
+        assert daemon.client_environment(environ) == {
+            'HALFORM_CONF_DIR': '/etc/half_orm', 'PGHOST': 'db', 'PGPASSWORD': 'x',
+            'HALF_ORM_BACKUPS_DIR': '/backups'}
+
+
+class TestClient:
+
+    def test_no_daemon(self, devel_repo):
+        assert daemon.ping(str(devel_repo)) is False
+        assert daemon.forward(str(devel_repo), ['check']) is None
+
+    def test_round_trip(self, server, devel_repo, capsys):
+        exit_code = daemon.forward(str(devel_repo), ['set-git-origin', '--help'])
+
+        assert exit_code == 0
+        assert 'Update the git remote origin URL.' in capsys.readouterr().out
+        assert oct(os.stat(server.socket_path).st_mode & 0o777) == '0o600'
+
+    def test_stop_removes_socket(self, server, devel_repo):
+        assert daemon.stop(str(devel_repo)) is True
+        for _ in range(100):
+            if not os.path.exists(server.socket_path):
+                break
+            threading.Event().wait(0.05)
+
+        assert not os.path.exists(server.socket_path)
+
+    def test_second_daemon_refused(self, server, devel_repo):
+        with pytest.raises(daemon.DaemonError, match='already serving'):
+            daemon.HopDaemon(str(devel_repo)).serve_forever()
+
+    def test_other_environment_runs_locally(self, server, devel_repo, monkeypatch, capsys):
+        # Set after the daemon started: the client's environment only
+        monkeypatch.setenv('PGHOST', 'staging.example.com')
+
+        assert daemon.forward(str(devel_repo), ['set-git-origin', '--help']) is None
+        assert capsys.readouterr().out == ''
+
+    def test_not_served_without_unix_sockets(self, devel_repo, monkeypatch):
+        monkeypatch.setattr(daemon, 'available', lambda: False)
+
+        with pytest.raises(daemon.DaemonError, match='POSIX'):
+            daemon.HopDaemon(str(devel_repo)).serve_forever()
+
+
+class TestCliForwarding:
+
+    def test_command_forwarded(self, devel_repo):
+        cli = create_cli_group()
+        with patch.object(Hop, 'run_in_daemon', return_value=3) as run_in_daemon:
+            result = CliRunner().invoke(cli, ['set-git-origin', 'git@host:x.git'])
+
+        assert result.exit_code == 3
+        run_in_daemon.assert_called_once_with(['set-git-origin', 'git@host:x.git'])
+        assert 'set-git-origin' not in cli.commands
+
+    def test_runs_locally_without_daemon(self, devel_repo):
+        result = CliRunner().invoke(create_cli_group(), ['set-git-origin', '--help'])
+
+        assert result.exit_code == 0
+        assert 'Update the git remote origin URL.' in result.output
+
+    def test_serve_not_forwarded(self, devel_repo):
+        with patch.object(Hop, 'run_in_daemon') as run_in_daemon:
+            CliRunner().invoke(create_cli_group(), ['serve', '--help'])
+
+        run_in_daemon.assert_not_called()
+
+    def test_disabled_by_environment(self, server, devel_repo, monkeypatch):
+        monkeypatch.setenv(daemon.NO_DAEMON_ENV, '1')
+
+        assert Hop().run_in_daemon(['check']) is None
+
+    def test_not_forwarded_outside_posix(self, server, devel_repo, answers, monkeypatch):
+        hop = Hop()
+        monkeypatch.setattr('half_orm_dev.cli.main.os.name', 'nt')
+        with patch.object(daemon, 'forward') as forward:
+            assert hop.run_in_daemon(['check']) is None
+
+        forward.assert_not_called()
+
+    @pytest.fixture
+    def answers(self, tmp_path, monkeypatch):
+        """stdin redirected from a file: half_orm dev ... < answers"""
+        path = tmp_path / 'answers'
+        path.write_text('y\n')
+        with open(path, encoding='utf-8') as stdin:
+            monkeypatch.setattr('sys.stdin', stdin)
+            yield stdin
+
+    def test_stdin_file_forwarded(self, server, devel_repo, answers):
+        with patch.object(daemon, 'forward', return_value=0) as forward:
+            assert Hop().run_in_daemon(['check']) == 0
+
+        forward.assert_called_once_with(str(devel_repo), ['check'], 'y\n')
+
+    def test_stdin_kept_when_run_locally(self, server, devel_repo, answers):
+        with patch.object(daemon, 'forward', return_value=None):
+            assert Hop().run_in_daemon(['check']) is None
+
+        assert sys.stdin.read() == 'y\n'
+
+    def test_open_pipe_not_forwarded(self, server, devel_repo, monkeypatch):
+        read_end, write_end = os.pipe()
+        with open(read_end, encoding='utf-8') as stdin:
+            monkeypatch.setattr('sys.stdin', stdin)
+            with patch.object(daemon, 'forward') as forward:
+                assert Hop().run_in_daemon(['check']) is None
+        os.close(write_end)
+
+        forward.assert_not_called()
+
+    def test_stale_socket_not_read(self, devel_repo, answers):
+        (devel_repo / '.hop' / daemon.SOCKET_NAME).write_text('')
+
+        assert Hop().run_in_daemon(['check']) is None
+        assert sys.stdin.read() == 'y\n'
+
+
+class TestStdinInput:
+
+    def test_regular_file(self, tmp_path):
+        (tmp_path / 'answers').write_text('y\n')
+        with open(tmp_path / 'answers', encoding='utf-8') as stdin:
+            assert daemon.stdin_input(stdin) == 'y\n'
+
+    def test_dev_null(self):
+        with open(os.devnull, encoding='utf-8') as stdin:
+            assert daemon.stdin_input(stdin) == ''
+
+    def test_closed_empty_pipe(self):
+        read_end, write_end = os.pipe()
+        os.close(write_end)
+        with open(read_end, encoding='utf-8') as stdin:
+            assert daemon.stdin_input(stdin) == ''
+
+    def test_open_pipe(self):
+        read_end, write_end = os.pipe()
+        os.write(write_end, b'y\n')
+        with open(read_end, encoding='utf-8') as stdin:
+            assert daemon.stdin_input(stdin) is None
+        os.close(write_end)
+
+    def test_not_a_file(self):
+        assert daemon.stdin_input(io.StringIO('y\n')) is None
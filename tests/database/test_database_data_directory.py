@@ -0,0 +1,39 @@
+"""
+Tests for Database.data_directory().
+
+The data directory is only meaningful (for its free space) when the server
+runs on this host: no host, localhost or a Unix socket directory.
+"""
+
+import pytest
+from unittest.mock import Mock
+
+from half_orm_dev.database import Database
+
+
+def _database(**params):
+    database = Database.__new__(Database)
+    database._get_connection_params = Mock(return_value={'docker_container': None, **params})
+    database.execute_pg_command = Mock(return_value=Mock(stdout=' /var/lib/postgresql/data\n'))
+    return database
+
+
+class TestDataDirectory:
+
+    @pytest.mark.parametrize('host', [None, '', 'localhost', '127.0.0.1', '::1', '/var/run/postgresql'])
+    def test_local_server(self, host):
+        database = _database(host=host)
+
+        assert database.data_directory() == '/var/lib/postgresql/data'
+
+    @pytest.mark.parametrize('host', ['db.example.com', '10.0.0.12'])
+    def test_remote_server_is_unknown(self, host):
+        database = _database(host=host)
+
+        assert database.data_directory() is None
+        database.execute_pg_command.assert_not_called()
+
+    def test_docker_is_unknown(self):
+        database = _database(host='localhost', docker_container='pg')
+
+        assert database.data_directory() is None
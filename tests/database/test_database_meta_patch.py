@@ -0,0 +1,73 @@
+"""
+Tests for the half_orm_meta tables of the meta patch (META_PATCH_DIR).
+
+The tables are declared in half_orm_meta.sql for the new databases and
+created by the meta patch for the existing ones: never on the fly.
+"""
+
+from pathlib import Path
+from unittest.mock import Mock, call
+
+import pytest
+
+from half_orm_dev.database import Database, META_PATCH_DIR
+from half_orm_dev.utils import HOP_PATH
+
+HALF_ORM_META_SQL = Path(HOP_PATH) / 'patches' / 'sql' / 'half_orm_meta.sql'
+
+STEP = {'patch_id': '456-user-auth', 'file': '01_users.sql', 'kind': 'sql', 'seconds': 1.5,
+        'statements': [{'line': 1, 'seconds': 1.5, 'rows': 10}]}
+
+
+def _database(existing_relations=()):
+    database = Database.__new__(Database)
+    database._Database__name = 'test_db'
+    database._Database__model = Mock()
+    database._Database__model.execute_query.side_effect = lambda query, values=None: Mock(
+        fetchone=Mock(return_value={'exists': values[0] in existing_relations}))
+    database.execute_pg_command = Mock()
+    return database
+
+
+def _queries(database):
+    return [args[0] for args, _ in database._Database__model.execute_query.call_args_list]
+
+
+class TestMetaTables:
+
+    @pytest.mark.parametrize('table', ['hop_upgrade_timing', 'hop_batch_checkpoint'])
+    def test_declared_in_half_orm_meta_and_meta_patch(self, table):
+        assert f"CREATE TABLE half_orm_meta.{table} (" in HALF_ORM_META_SQL.read_text()
+        meta_patch = ''.join(path.read_text() for path in Path(META_PATCH_DIR).glob('*.sql'))
+        assert f"create table if not exists half_orm_meta.{table} (" in meta_patch
+
+    def test_apply_meta_patch_in_order(self):
+        database = _database()
+
+        database.apply_meta_patch()
+
+        files = sorted(Path(META_PATCH_DIR).glob('*.sql'))
+        assert files
+        assert database.execute_pg_command.call_args_list == [
+            call('psql', '-d', 'test_db', '-f', str(path)) for path in files]
+
+
+class TestRecordUpgradeTimings:
+
+    def test_records_one_row_per_file(self):
+        database = _database(existing_relations=('half_orm_meta.hop_upgrade_timing',))
+
+        database.record_upgrade_timings('1.3.6', [STEP])
+
+        queries = _queries(database)
+        assert queries[-1].startswith("INSERT INTO half_orm_meta.hop_upgrade_timing")
+        assert not any('CREATE' in query.upper() for query in queries)
+
+    def test_missing_table_is_not_created(self, capsys):
+        database = _database()
+
+        database.record_upgrade_timings('1.3.6', [STEP])
+
+        assert not any('CREATE' in query.upper() or 'INSERT' in query.upper()
+                       for query in _queries(database))
+        assert "timings of 1.3.6 not recorded" in capsys.readouterr().err
@@ -0,0 +1,71 @@
+"""
+Tests for DatabaseTransaction.
+
+Explicit transaction on the connection of a halfORM model, with
+suspensions for the non-transactional steps.
+"""
+
+import pytest
+from unittest.mock import Mock
+
+from half_orm_dev.database import DatabaseTransaction
+
+
+@pytest.fixture
+def model():
+    model = Mock()
+    model._connection.autocommit = True
+    return model
+
+
+class TestDatabaseTransaction:
+
+    def test_commits_on_success(self, model):
+        with DatabaseTransaction(model) as transaction:
+            assert model._connection.autocommit is False
+            assert transaction.active
+
+        model._connection.commit.assert_called_once_with()
+        model._connection.rollback.assert_not_called()
+        assert model._connection.autocommit is True
+        assert not transaction.active
+
+    def test_rolls_back_on_exception(self, model):
+        with pytest.raises(RuntimeError):
+            with DatabaseTransaction(model):
+                raise RuntimeError("SQL error")
+
+        model._connection.rollback.assert_called_once_with()
+        model._connection.commit.assert_not_called()
+        assert model._connection.autocommit is True
+
+    def test_suspended_step_runs_in_autocommit(self, model):
+        with DatabaseTransaction(model) as transaction:
+            with transaction.suspended("456-auth/02_index.sql"):
+                assert model._connection.autocommit is True
+                assert not transaction.active
+            assert model._connection.autocommit is False
+
+        assert transaction.suspended_steps == ["456-auth/02_index.sql"]
+        assert model._connection.commit.call_count == 2
+
+    def test_failed_suspended_step_leaves_nothing_to_roll_back(self, model):
+        with pytest.raises(RuntimeError):
+            with DatabaseTransaction(model) as transaction:
+                with transaction.suspended("456-auth/03_script.py"):
+                    raise RuntimeError("script failed")
+
+        model._connection.commit.assert_called_once_with()
+        model._connection.rollback.assert_not_called()
+        assert model._connection.autocommit is True
+
+    def test_failed_suspended_step_does_not_begin(self, model):
+        transaction = DatabaseTransaction(model)
+        transaction.begin()
+        with pytest.raises(RuntimeError):
+            with transaction.suspended("456-auth/03_script.py"):
+                raise RuntimeError("script failed")
+
+        assert not transaction.active
+        assert model._connection.autocommit is True
+        assert transaction.suspended_steps == ["456-auth/03_script.py"]
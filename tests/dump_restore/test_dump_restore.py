@@ -0,0 +1,190 @@
+"""
+Tests for the restore of a pg_dump by patch apply --from-dump and its
+template database cache.
+"""
+
+import tarfile
+from unittest.mock import Mock
+
+import pytest
+from click.testing import CliRunner
+
+from half_orm_dev.dump_restore import (
+    dump_format, dump_cache_key, cache_prefix, cache_name, restore_args, restore_dump
+)
+
+
+@pytest.fixture
+def custom_dump(tmp_path):
+    path = tmp_path / "prod.dump"
+    path.write_bytes(b"PGDMP\x01\x0e\x00" + b"x" * 100)
+    return path
+
+
+@pytest.fixture
+def database():
+    database = Mock()
+    database.name = "blog"
+    database.has_createdb_privilege.return_value = True
+    database.list_dump_caches.return_value = []
+    return database
+
+
+class TestDumpFormat:
+
+    def test_plain(self, tmp_path):
+        path = tmp_path / "prod.sql"
+        path.write_text("CREATE TABLE t (id int);")
+
+        assert dump_format(path) == 'plain'
+
+    def test_custom(self, custom_dump):
+        assert dump_format(custom_dump) == 'custom'
+
+    def test_directory(self, tmp_path):
+        (tmp_path / "toc.dat").write_bytes(b"PGDMP")
+
+        assert dump_format(tmp_path) == 'directory'
+
+    def test_not_a_dump_directory(self, tmp_path):
+        with pytest.raises(ValueError, match="no toc.dat"):
+            dump_format(tmp_path)
+
+    def test_tar(self, tmp_path):
+        (tmp_path / "toc.dat").write_bytes(b"PGDMP")
+        path = tmp_path / "prod.tar"
+        with tarfile.open(path, 'w', format=tarfile.USTAR_FORMAT) as archive:
+            archive.add(tmp_path / "toc.dat", arcname="toc.dat")
+
+        assert dump_format(path) == 'tar'
+
+
+class TestCacheKey:
+
+    def test_content_and_size(self, tmp_path, custom_dump):
+        copy = tmp_path / "copy.dump"
+        copy.write_bytes(custom_dump.read_bytes())
+        truncated = tmp_path / "truncated.dump"
+        truncated.write_bytes(custom_dump.read_bytes()[:-1])
+
+        digest, size = dump_cache_key(custom_dump)
+
+        assert size == 108
+        assert dump_cache_key(copy) == (digest, size)
+        assert dump_cache_key(truncated)[0] != digest
+
+    def test_directory_files(self, tmp_path):
+        (tmp_path / "toc.dat").write_bytes(b"PGDMP")
+        (tmp_path / "3001.dat.gz").write_bytes(b"rows")
+        digest, size = dump_cache_key(tmp_path)
+
+        (tmp_path / "3001.dat.gz").write_bytes(b"ROWS")
+
+        assert size == 9
+        assert dump_cache_key(tmp_path) != (digest, size)
+
+    @pytest.mark.parametrize("database_name", ["d" * 63, "é" * 40, "blog"])
+    def test_cache_name_fits_identifier(self, database_name):
+        name = cache_name(database_name, "3f2a9c1b7d4e" + "0" * 52)
+
+        assert name.startswith(database_name[:16])
+        assert name.endswith("_hop_dump_3f2a9c1b7d4e")
+        assert len(name.encode()) <= 63
+
+    def test_long_names_with_common_prefix_do_not_share_cache(self):
+        common = "analytics_warehouse_production_eu_west"
+        first, second = f"{common}_1", f"{common}_2"
+
+        assert cache_prefix(first) != cache_prefix(second)
+        assert not cache_name(second, "0" * 64).startswith(cache_prefix(first))
+        assert cache_prefix(first) == cache_prefix(first)
+
+
+class TestRestoreArgs:
+
+    @pytest.mark.parametrize("fmt, jobs, args", [
+        ('plain', 4, ['psql', '-d', 'blog', '-f', '/d/prod.sql']),
+        ('custom', 4, ['pg_restore', '--no-owner', '--no-acl', '-j', '4', '-d', 'blog', '/d/prod.sql']),
+        ('directory', 1, ['pg_restore', '--no-owner', '--no-acl', '-d', 'blog', '/d/prod.sql']),
+        ('tar', 4, ['pg_restore', '--no-owner', '--no-acl', '-d', 'blog', '/d/prod.sql']),
+    ])
+    def test_command(self, fmt, jobs, args):
+        assert restore_args(fmt, 'blog', '/d/prod.sql', jobs) == args
+
+
+class TestRestoreDump:
+
+    def test_cache_miss_restores_into_template(self, database, custom_dump):
+        reset = Mock()
+        template = cache_name("blog", dump_cache_key(custom_dump)[0])
+        previous = cache_name("blog", "0123456789ab" + "0" * 52)
+        database.list_dump_caches.return_value = [previous]
+
+        restored = restore_dump(database, custom_dump, reset, jobs=4, report=Mock())
+
+        assert restored == {'format': 'custom', 'cache': template, 'cache_hit': False}
+        database.drop_snapshot.assert_called_once_with(previous)
+        database.execute_pg_command.assert_any_call('createdb', template, database_name='postgres')
+        database.execute_pg_command.assert_any_call(
+            'pg_restore', '--no-owner', '--no-acl', '-j', '4', '-d', template, str(custom_dump),
+            database_name=template)
+        database.terminate_active_connections.assert_called_once()
+        database.restore_from_snapshot.assert_called_once_with(template)
+        reset.assert_not_called()
+
+    def test_cache_hit_clones_template(self, database, custom_dump):
+        template = cache_name("blog", dump_cache_key(custom_dump)[0])
+        database.list_dump_caches.return_value = [template]
+
+        restored = restore_dump(database, custom_dump, Mock())
+
+        assert restored['cache_hit'] is True
+        database.execute_pg_command.assert_not_called()
+        database.restore_from_snapshot.assert_called_once_with(template)
+
+    def test_failed_restore_drops_template(self, database, custom_dump):
+        template = cache_name("blog", dump_cache_key(custom_dump)[0])
+        database.execute_pg_command.side_effect = [None, RuntimeError("pg_restore failed")]
+
+        with pytest.raises(RuntimeError):
+            restore_dump(database, custom_dump, Mock(), report=Mock())
+
+        database.drop_snapshot.assert_called_once_with(template)
+        database.restore_from_snapshot.assert_not_called()
+
+    @pytest.mark.parametrize("privilege, use_cache", [(False, True), (True, False)])
+    def test_direct_restore(self, database, custom_dump, privilege, use_cache):
+        database.has_createdb_privilege.return_value = privilege
+        reset = Mock()
+
+        restored = restore_dump(database, custom_dump, reset, jobs=2, use_cache=use_cache)
+
+        assert restored == {'format': 'custom', 'cache': None, 'cache_hit': False}
+        reset.assert_called_once()
+        database.execute_pg_command.assert_called_once_with(
+            'pg_restore', '--no-owner', '--no-acl', '-j', '2', '-d', 'blog', str(custom_dump))
+        database.restore_from_snapshot.assert_not_called()
+
+
+class TestListDumpCaches:
+
+    def test_only_own_prefix(self):
+        from half_orm_dev.database import Database
+
+        database = Database.__new__(Database)
+        database._Database__name = "blog"
+        own = cache_name("blog", "0" * 64)
+        # '_' of the prefix is a LIKE wildcard: matched by the query, not ours
+        lookalike = own.replace("_hop_", "xhop_")
+        database.execute_pg_command = Mock(return_value=Mock(stdout=f" {own}\n {lookalike}\n\n"))
+
+        assert database.list_dump_caches() == [own]
+
+
+def test_dump_options_require_from_dump():
+    from half_orm_dev.cli.commands.patch import patch_apply
+
+    result = CliRunner().invoke(patch_apply, ['-j', '4'])
+
+    assert result.exit_code == 2
+    assert "require --from-dump" in result.output
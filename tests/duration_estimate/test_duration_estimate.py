@@ -0,0 +1,190 @@
+"""
+Tests for the duration estimate of the upgrade dry run.
+"""
+
+import json
+
+import pytest
+
+from half_orm_dev.duration_estimate import (
+    statement_relation, load_reports, estimate_patch, estimate, format_duration, summary
+)
+
+
+def _report(run, started, steps, relations=None):
+    return {"run": run, "started": started, "relations": relations or {}, "steps": steps}
+
+
+def _step(patch_id, statements, status="ok", kind="sql", seconds=None):
+    return {"patch_id": patch_id, "file": "01.sql", "kind": kind, "status": status,
+            "seconds": seconds if seconds is not None else sum(s[1] for s in statements),
+            "statements": [{"line": line, "sql": sql, "seconds": secs, "rows": None}
+                           for line, (sql, secs) in enumerate(statements, 1)]}
+
+
+TARGET = {"public.users": {"reltuples": 1e7, "relpages": 100000},
+          "blog.post": {"reltuples": 1e5, "relpages": 1000}}
+
+
+class TestStatementRelation:
+
+    @pytest.mark.parametrize("sql, relation", [
+        ("UPDATE users SET active = true", "public.users"),
+        ('ALTER TABLE IF EXISTS ONLY "Blog"."Post" ADD COLUMN x int', "Blog.Post"),
+        ("INSERT INTO blog.post SELECT 1", "blog.post"),
+        ("DELETE FROM Users WHERE id < 0", "public.users"),
+        ("CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix ON ONLY blog.post (id)", "blog.post"),
+        ("VACUUM (VERBOSE) ANALYZE users", "public.users"),
+        ("REFRESH MATERIALIZED VIEW CONCURRENTLY stats", "public.stats"),
+        ("CREATE TABLE users (id int)", None),
+        ("SELECT 1", None),
+    ])
+    def test_relation(self, sql, relation):
+        assert statement_relation(sql) == relation
+
+
+class TestEstimatePatch:
+
+    def test_scaled_by_relation_size(self):
+        reports = [_report("validate-1.3.6", 2, [
+            _step("1-users", [("UPDATE users SET active = true", 0.02),
+                              ("CREATE INDEX ix ON blog.post (id)", 0.5),
+                              ("CREATE TABLE t (id int)", 0.01)])],
+            relations={"public.users": {"reltuples": 1e3, "relpages": 10},
+                       "blog.post": {"reltuples": 1e4, "relpages": 100}})]
+
+        patch = estimate_patch("1-users", reports, TARGET)
+
+        # 0.02 × 100000/10 + 0.5 × 1000/100 + 0.01
+        assert patch["seconds"] == pytest.approx(205.01)
+        assert patch["recorded_seconds"] == pytest.approx(0.53)
+        assert patch["run"] == "validate-1.3.6"
+        assert (patch["slowest"]["line"], patch["slowest"]["relation"]) == (1, "public.users")
+        assert patch["unscaled"] == []
+
+    def test_empty_table_not_scaled(self):
+        reports = [_report("validate-1.3.6", 1, [
+            _step("1-users", [("ALTER TABLE users ADD COLUMN note text", 0.004),
+                              ("UPDATE blog.post SET x = 1", 0.2)])],
+            relations={"public.users": {"reltuples": 0, "relpages": 0},
+                       "blog.post": {"reltuples": 1e5, "relpages": 1000}})]
+
+        patch = estimate_patch("1-users", reports, TARGET)
+
+        assert patch["seconds"] == pytest.approx(0.204)
+        assert [(s["line"], s["relation"]) for s in patch["unscaled"]] == [(1, "public.users")]
+
+    def test_closest_sizes_preferred_to_most_recent(self):
+        target = {"public.users": {"reltuples": 1e8, "relpages": 1000000}}
+        alter = [("ALTER TABLE users ADD COLUMN note text", 0.004)]
+        reports = [
+            _report("validate-1.3.6", 2, [_step("1-users", alter)],
+                    relations={"public.users": {"reltuples": 0, "relpages": 0}}),
+            _report("upgrade-1.3.5-to-1.3.6", 1, [_step("1-users", alter)],
+                    relations={"public.users": {"reltuples": 9e7, "relpages": 900000}}),
+        ]
+
+        patch = estimate_patch("1-users", reports, target)
+
+        assert patch["run"] == "upgrade-1.3.5-to-1.3.6"
+        assert patch["seconds"] == pytest.approx(0.004 * 1000000 / 900000)
+        assert patch["unscaled"] == []
+
+    def test_timings_from_preferred(self):
+        reports = [
+            _report("upgrade-local", 2, [_step("1-users", [("UPDATE users SET x = 1", 1.0)])],
+                    relations={"public.users": {"reltuples": 1e7, "relpages": 100000}}),
+            dict(_report("upgrade-staging", 1, [_step("1-users", [("UPDATE users SET x = 1", 2.0)])],
+                         relations={"public.users": {"reltuples": 1e6, "relpages": 10000}}),
+                 preferred=True),
+        ]
+
+        patch = estimate_patch("1-users", reports, TARGET)
+
+        assert (patch["run"], patch["seconds"]) == ("upgrade-staging", pytest.approx(20.0))
+
+    def test_most_recent_successful_run(self):
+        reports = [
+            _report("patch-1-users", 3, [_step("1-users", [("SELECT 1", 9.0)], status="failed")]),
+            _report("upgrade-1.3.5-to-1.3.6", 2, [_step("1-users", [("SELECT 1", 4.0)])]),
+            _report("validate-1.3.6", 1, [_step("1-users", [("SELECT 1", 1.0)])]),
+        ]
+
+        assert estimate_patch("1-users", reports, TARGET)["run"] == "upgrade-1.3.5-to-1.3.6"
+
+    def test_python_steps_not_scaled(self):
+        reports = [_report("r", 1, [_step("1-users", [], kind="python", seconds=12.0)])]
+
+        patch = estimate_patch("1-users", reports, TARGET)
+
+        assert (patch["seconds"], patch["slowest"]) == (12.0, None)
+
+    def test_no_timing(self):
+        assert estimate_patch("1-users", [], TARGET) is None
+
+
+class TestEstimate:
+
+    def test_dominant_and_unknown_patches(self):
+        reports = [_report("r", 1, [
+            _step("1-big", [("UPDATE users SET x = 1", 0.01)]),  # 1000s
+            _step("2-small", [("SELECT 1", 50.0)]),
+            _step("3-medium", [("UPDATE blog.post SET x = 1", 0.3)]),  # 300s
+        ], relations={"public.users": {"reltuples": 100, "relpages": 1},
+                      "blog.post": {"reltuples": 100, "relpages": 1}})]
+
+        estimation = estimate({"1.3.6": ["1-big", "2-small"], "1.3.7": ["3-medium", "4-new"]},
+                              reports, TARGET)
+
+        assert estimation["seconds"] == pytest.approx(1350)
+        assert estimation["releases"] == pytest.approx({"1.3.6": 1050, "1.3.7": 300})
+        assert [(p["release"], p["patch_id"], p["dominant"]) for p in estimation["patches"]] == [
+            ("1.3.6", "1-big", True), ("1.3.6", "2-small", False), ("1.3.7", "3-medium", True)]
+        assert estimation["unknown"] == ["4-new"]
+
+        lines = summary(estimation)
+        assert lines[0].startswith("1.3.6/1-big: ~16m40s (74%, 0.0s in r)")
+        assert lines[1].startswith("1.3.7/3-medium: ~5m00s (22%")
+        assert lines[2] == "no timing recorded for: 4-new"
+
+    def test_unscaled_statements_reported(self):
+        reports = [_report("validate-1.3.6", 1, [
+            _step("1-users", [("ALTER TABLE users ADD COLUMN note text", 0.004)])],
+            relations={"public.users": {"reltuples": 0, "relpages": 0}})]
+
+        lines = summary(estimate({"1.3.6": ["1-users"]}, reports, TARGET))
+
+        assert ("1.3.6/1-users: 1 unscaled statement(s), public.users empty in "
+                "validate-1.3.6: duration unknown") in lines
+
+
+class TestLoadReports:
+
+    def test_files_and_directories_most_recent_first(self, tmp_path):
+        (tmp_path / "old.json").write_text(json.dumps(_report("old", 1, [])))
+        (tmp_path / "broken.json").write_text("{")
+        (tmp_path / "notes.json").write_text("[]")
+        (tmp_path / "staging").mkdir()
+        other = tmp_path / "staging" / "upgrade.json"
+        other.write_text(json.dumps(_report("new", 2, [])))
+
+        reports = load_reports([tmp_path, other, tmp_path / "missing"])
+
+        assert [report["run"] for report in reports] == ["new", "old"]
+        assert reports[-1]["path"] == str(tmp_path / "old.json")
+
+    def test_preferred_reports_flagged_once(self, tmp_path):
+        (tmp_path / "local.json").write_text(json.dumps(_report("local", 2, [])))
+        staging = tmp_path / "staging.json"
+        staging.write_text(json.dumps(_report("staging", 1, [])))
+
+        reports = load_reports([tmp_path], preferred=[staging])
+
+        assert [(report["run"], report["preferred"]) for report in reports] == [
+            ("local", False), ("staging", True)]
+
+
+@pytest.mark.parametrize("seconds, text", [
+    (0.42, "0.4s"), (42, "42s"), (425, "7m05s"), (8040, "2h14m")])
+def test_format_duration(seconds, text):
+    assert format_duration(seconds) == text
@@ -15,6 +15,9 @@ from half_orm_dev.file_executor import (
     execute_sql_file_psql,
     execute_python_file,
     execute_python_bootstrap,
+    is_transactional,
+    split_sql_statements,
+    TimingReport,
     _has_run_entrypoint,
     FileExecutionError
 )
@@ -166,6 +169,129 @@ class TestExecutePythonFile:
         assert str(subdir) in output
 
 
+class TestIsTransactional:
+    """Test is_transactional function."""
+
+    def test_plain_sql(self, tmp_path):
+        f = tmp_path / 's.sql'
+        f.write_text('-- add users\nCREATE TABLE users (id int);\n')
+        assert is_transactional(f) is True
+
+    @pytest.mark.parametrize('header', [
+        '-- hop: no-transaction\n',
+        '-- create the index without locking\n\n--hop:NO-TRANSACTION\n',
+    ])
+    def test_annotated_sql(self, tmp_path, header):
+        f = tmp_path / 's.sql'
+        f.write_text(header + 'CREATE INDEX CONCURRENTLY ix ON users (name);\n')
+        assert is_transactional(f) is False
+
+    def test_annotation_after_first_statement_ignored(self, tmp_path):
+        f = tmp_path / 's.sql'
+        f.write_text('SELECT 1;\n-- hop: no-transaction\n')
+        assert is_transactional(f) is True
+
+    def test_nonexistent_file(self, tmp_path):
+        assert is_transactional(tmp_path / 'nope.sql') is True
+
+
+class TestSplitSqlStatements:
+    """Test split_sql_statements function."""
+
+    def test_quoted_semicolons(self):
+        sql = ("-- header; comment\n"
+               "SELECT 'a;b', \"x;y\", E'it\\'s;'; /* c; /* nested; */ */\n"
+               "CREATE FUNCTION f() RETURNS int AS $body$ BEGIN RETURN 1; END; $body$\n"
+               "LANGUAGE plpgsql;\n"
+               "DO $$ BEGIN PERFORM 1; END $$;\n"
+               "SELECT $1 FROM t\n")
+
+        statements = split_sql_statements(sql)
+
+        assert [(s.line, s.sql) for s in statements] == [
+            (2, "SELECT 'a;b', \"x;y\", E'it\\'s;';"),
+            (3, "CREATE FUNCTION f() RETURNS int AS $body$ BEGIN RETURN 1; END; $body$\n"
+                "LANGUAGE plpgsql;"),
+            (5, "DO $$ BEGIN PERFORM 1; END $$;"),
+            (6, "SELECT $1 FROM t"),
+        ]
+
+    def test_copy_from_stdin_data(self):
+        sql = "COPY t (a, b) FROM stdin;\n1\tx;y\n2\tz\n\\.\nANALYZE t;\n"
+
+        copy, analyze = split_sql_statements(sql)
+
+        assert copy.sql == "COPY t (a, b) FROM stdin;"
+        assert copy.copy_data == "1\tx;y\n2\tz\n"
+        assert (analyze.line, analyze.sql, analyze.copy_data) == (5, "ANALYZE t;", None)
+
+    def test_only_comments(self):
+        assert split_sql_statements("-- hop: no-transaction\n/* nothing */\n") == []
+
+
+class TestTimedExecution:
+    """Test execute_sql_file with timings: one statement at a time."""
+
+    def test_records_each_statement(self, tmp_path):
+        sql_file = tmp_path / '01_users.sql'
+        sql_file.write_text("CREATE TABLE users (id int);\nUPDATE users SET id = id;\n")
+        model = Mock()
+        model._connection.autocommit = True
+        model.execute_query.return_value = Mock(rowcount=42)
+        timings = TimingReport("patch-42")
+
+        with timings.step("42-users", sql_file.name) as statements:
+            execute_sql_file(sql_file, model, timings=statements)
+
+        assert [c.args[0] for c in model.execute_query.call_args_list] == [
+            "CREATE TABLE users (id int);", "UPDATE users SET id = id;"]
+        # Still one transaction for the file in autocommit mode
+        model._connection.commit.assert_called_once_with()
+        assert [(s["line"], s["rows"]) for s in timings.steps[0]["statements"]] == [(1, 42), (2, 42)]
+        assert timings.slowest(1)[0]["patch_id"] == "42-users"
+
+    def test_failing_statement_recorded(self, tmp_path):
+        sql_file = tmp_path / '01_users.sql'
+        sql_file.write_text("SELECT 1;\nSELEC 2;\n")
+        model = Mock()
+        model._connection.autocommit = True
+        model.execute_query.side_effect = [Mock(rowcount=-1), Exception("syntax error")]
+        timings = TimingReport("patch-42")
+
+        with pytest.raises(FileExecutionError):
+            with timings.step("42-users", sql_file.name) as statements:
+                execute_sql_file(sql_file, model, timings=statements)
+
+        step = timings.steps[0]
+        assert step["status"] == "failed"
+        assert step["statements"][0]["rows"] is None
+        assert step["statements"][1]["error"] == "syntax error"
+        model._connection.rollback.assert_called_once_with()
+
+    def test_save(self, tmp_path):
+        timings = TimingReport("upgrade-1.3.5-to-1.3.6")
+        with timings.step("42-users", "02_seed.py", "python"):
+            pass
+
+        path = timings.save(tmp_path)
+
+        assert path.parent == tmp_path / ".hop" / "timings"
+        assert path.name.startswith("upgrade-1.3.5-to-1.3.6-")
+        assert '"42-users"' in path.read_text()
+
+    def test_save_ignored_by_git(self, tmp_path):
+        path = TimingReport("patch-42").save(tmp_path)
+
+        assert (path.parent / ".gitignore").read_text() == "*\n"
+
+    def test_save_never_overwrites(self, tmp_path):
+        first, second = TimingReport("patch-42"), TimingReport("patch-42")
+        second.started = first.started
+
+        assert first.save(tmp_path) != second.save(tmp_path)
+        assert len(list((tmp_path / ".hop" / "timings").glob("*.json"))) == 2
+
+
 class TestHasRunEntrypoint:
     """Test _has_run_entrypoint function."""
 
@@ -245,7 +371,7 @@ class TestExecutePythonBootstrap:
         f = tmp_path / '1-seed-0.1.0.py'
         f.write_text('def run(model):\n    pass\n')
         execute_python_bootstrap(f, Mock())
-        assert not any('_hop_bootstrap_' in k for k in sys.modules)
+        assert not any('_hop_script_' in k for k in sys.modules)
 
 
 class TestFileExecutionError:
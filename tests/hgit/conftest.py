@@ -0,0 +1,20 @@
+"""
+HGit fixtures running against the real git clones of tests/conftest.py.
+"""
+
+import git
+import pytest
+
+from half_orm_dev.hgit import HGit
+
+
+@pytest.fixture
+def real_hgit(git_clones):
+    """HGit bound to the `local` clone of git_clones, without a Repo."""
+    _, local, _ = git_clones
+    hgit = HGit.__new__(HGit)
+    hgit._HGit__git_repo = git.Repo(local)
+    hgit._HGit__repo = None
+    hgit._HGit__base_dir = str(local)
+    hgit._HGit__snapshot = {}
+    return hgit
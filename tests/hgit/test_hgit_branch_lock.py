@@ -0,0 +1,191 @@
+"""
+Tests for the ref-based branch lock: refs/hop-locks/<branch> on origin,
+acquired and released with one compare-and-swap push each.
+"""
+
+import shutil
+import subprocess
+import time
+from pathlib import Path
+from unittest.mock import Mock
+
+import git
+import pytest
+from git.exc import GitCommandError
+
+from half_orm_dev.hgit import HGit
+from half_orm_dev.utils import TEMPLATE_DIRS
+
+
+@pytest.fixture
+def other_hgit(git_clones):
+    """HGit bound to the `other` clone: a colleague competing for locks."""
+    _, _, other = git_clones
+    hgit = HGit.__new__(HGit)
+    hgit._HGit__git_repo = git.Repo(other)
+    return hgit
+
+
+def _remote_lock(origin, run_git, branch='ho-prod'):
+    output = run_git(origin, 'for-each-ref', '--format=%(objectname)', f'refs/hop-locks/{branch}')
+    return output or None
+
+
+class TestLockPayload:
+
+    def test_created_ms(self):
+        payload = "hop lock on ho-prod\n\ncreated: 1704123456789\nowner: dev@host pid 1"
+        assert HGit._lock_created_ms(payload) == 1704123456789
+
+    def test_created_ms_missing(self):
+        assert HGit._lock_created_ms("garbage") is None
+
+
+class TestBranchLockRealGit:
+
+    def test_acquire_pushes_lock_ref(self, real_hgit, git_clones, run_git):
+        origin, local, _ = git_clones
+
+        lock = real_hgit.acquire_branch_lock('ho-patch/1-x')
+
+        lock_ref, lock_sha = lock.rsplit(':', 1)
+        assert lock_ref == 'refs/hop-locks/ho-patch/1-x'
+        assert _remote_lock(origin, run_git, 'ho-patch/1-x') == lock_sha
+        assert real_hgit.holds_branch_lock('ho-patch/1-x')
+        assert real_hgit.is_lock_held(lock)
+        assert 'created: ' in run_git(local, 'log', '-1', '--format=%B', lock_sha)
+        # No tag involved
+        assert run_git(origin, 'tag', '-l') == ''
+
+    def test_second_acquire_blocked(self, real_hgit, other_hgit, git_clones, run_git):
+        origin, _, _ = git_clones
+        lock = real_hgit.acquire_branch_lock('ho-prod')
+
+        with pytest.raises(GitCommandError, match='locked by another process'):
+            other_hgit.acquire_branch_lock('ho-prod')
+
+        assert _remote_lock(origin, run_git) == lock.rsplit(':', 1)[1]
+        assert other_hgit.is_branch_locked('ho-prod')
+        assert not other_hgit.holds_branch_lock('ho-prod')
+
+    def test_stale_lock_taken_over(self, real_hgit, other_hgit, git_clones, run_git, monkeypatch):
+        origin, _, _ = git_clones
+        stale = real_hgit.acquire_branch_lock('ho-prod')
+        # The lock payload says it was created an hour ago
+        monkeypatch.setattr(HGit, '_lock_created_ms',
+                            staticmethod(lambda payload: int(time.time() * 1000) - 3_600_000))
+
+        lock = other_hgit.acquire_branch_lock('ho-prod', timeout_minutes=30)
+
+        assert _remote_lock(origin, run_git) == lock.rsplit(':', 1)[1]
+        assert not real_hgit.is_lock_held(stale)
+
+    def test_release_deletes_lock(self, real_hgit, git_clones, run_git):
+        origin, _, _ = git_clones
+        lock = real_hgit.acquire_branch_lock('ho-prod')
+
+        real_hgit.release_branch_lock(lock)
+
+        assert _remote_lock(origin, run_git) is None
+        assert not real_hgit.holds_branch_lock('ho-prod')
+        assert not real_hgit.is_branch_locked('ho-prod')
+
+    def test_release_leaves_lock_taken_over(self, real_hgit, other_hgit, git_clones,
+                                            run_git, monkeypatch):
+        origin, _, _ = git_clones
+        stale = real_hgit.acquire_branch_lock('ho-prod')
+        monkeypatch.setattr(HGit, '_lock_created_ms',
+                            staticmethod(lambda payload: int(time.time() * 1000) - 3_600_000))
+        lock = other_hgit.acquire_branch_lock('ho-prod')
+
+        real_hgit.release_branch_lock(stale)
+
+        assert _remote_lock(origin, run_git) == lock.rsplit(':', 1)[1]
+
+
+class TestStaleLocalLock:
+    """A local refs/hop-locks/<branch> left behind by a crashed process."""
+
+    def test_orphan_local_lock_not_held(self, real_hgit, git_clones, run_git):
+        _, local, _ = git_clones
+        run_git(local, 'update-ref', 'refs/hop-locks/ho-prod', 'HEAD')
+
+        assert not real_hgit.holds_branch_lock('ho-prod')
+
+        assert run_git(local, 'for-each-ref', 'refs/hop-locks/') == ''
+
+    def test_lock_taken_over_not_held(self, real_hgit, other_hgit, git_clones,
+                                      run_git, monkeypatch):
+        _, local, _ = git_clones
+        real_hgit.acquire_branch_lock('ho-prod')
+        monkeypatch.setattr(HGit, '_lock_created_ms',
+                            staticmethod(lambda payload: int(time.time() * 1000) - 3_600_000))
+        other_hgit.acquire_branch_lock('ho-prod')
+
+        assert not real_hgit.holds_branch_lock('ho-prod')
+        assert other_hgit.holds_branch_lock('ho-prod')
+        assert run_git(local, 'for-each-ref', 'refs/hop-locks/') == ''
+
+    def test_blocked_acquire_deletes_orphan(self, real_hgit, other_hgit, git_clones, run_git):
+        _, local, _ = git_clones
+        other_hgit.acquire_branch_lock('ho-prod')
+        run_git(local, 'update-ref', 'refs/hop-locks/ho-prod', 'HEAD')
+
+        with pytest.raises(GitCommandError, match='locked by another process'):
+            real_hgit.acquire_branch_lock('ho-prod')
+
+        assert run_git(local, 'for-each-ref', 'refs/hop-locks/') == ''
+
+    def test_pre_commit_hook_ignores_orphan(self, git_clones, run_git):
+        _, local, _ = git_clones
+        hook = Path(local) / '.git' / 'hooks' / 'pre-commit'
+        shutil.copy(Path(TEMPLATE_DIRS) / 'git-hooks' / 'pre-commit', hook)
+        hook.chmod(0o755)
+        run_git(local, 'update-ref', 'refs/hop-locks/ho-prod', 'HEAD')
+
+        result = subprocess.run(['git', 'commit', '--allow-empty', '-m', 'direct'],
+                                cwd=local, capture_output=True, text=True)
+
+        assert result.returncode != 0
+        assert "Direct commits on 'ho-prod' are not allowed" in result.stderr
+        assert run_git(local, 'for-each-ref', 'refs/hop-locks/') == ''
+
+    def test_pre_commit_hook_allows_lock_holder(self, real_hgit, git_clones, run_git):
+        _, local, _ = git_clones
+        hook = Path(local) / '.git' / 'hooks' / 'pre-commit'
+        shutil.copy(Path(TEMPLATE_DIRS) / 'git-hooks' / 'pre-commit', hook)
+        hook.chmod(0o755)
+        real_hgit.acquire_branch_lock('ho-prod')
+
+        result = subprocess.run(['git', 'commit', '--allow-empty', '-m', 'hop workflow'],
+                                cwd=local, capture_output=True, text=True)
+
+        assert result.returncode == 0, result.stdout + result.stderr
+
+
+class TestBranchLockRoundTrips:
+
+    @pytest.fixture
+    def hgit(self):
+        hgit = HGit.__new__(HGit)
+        hgit._HGit__git_repo = git_repo = Mock()
+        git_repo.git.commit_tree.return_value = 'locksha'
+        return hgit
+
+    def test_acquire_free_branch_single_push(self, hgit):
+        lock = hgit.acquire_branch_lock('ho-prod')
+
+        git_cmd = hgit._HGit__git_repo.git
+        git_cmd.push.assert_called_once_with(
+            '--force-with-lease=refs/hop-locks/ho-prod:', 'origin', 'locksha:refs/hop-locks/ho-prod')
+        git_cmd.fetch.assert_not_called()
+        git_cmd.ls_remote.assert_not_called()
+        assert lock == 'refs/hop-locks/ho-prod:locksha'
+
+    def test_release_single_push(self, hgit):
+        hgit.release_branch_lock('refs/hop-locks/ho-prod:locksha')
+
+        git_cmd = hgit._HGit__git_repo.git
+        git_cmd.push.assert_called_once_with(
+            '--force-with-lease=refs/hop-locks/ho-prod:locksha', 'origin', ':refs/hop-locks/ho-prod')
+        git_cmd.update_ref.assert_called_once_with('-d', 'refs/hop-locks/ho-prod')
@@ -0,0 +1,145 @@
+"""
+Tests for HGit.read_branch_refs() and the batched branch status in
+HGit.get_active_branches_status().
+
+All branch SHAs and upstream ahead/behind counts come from a single
+`git for-each-ref` call; `git rev-list` only runs for branches that
+differ from origin without tracking it.
+"""
+
+from unittest.mock import Mock
+
+import pytest
+
+from half_orm_dev.hgit import HGit
+
+
+class TestParseUpstreamTrack:
+
+    @pytest.mark.parametrize('track, expected', [
+        ('', (0, 0)),
+        ('ahead 2', (2, 0)),
+        ('behind 3', (0, 3)),
+        ('ahead 1, behind 4', (1, 4)),
+        ('gone', None),
+    ])
+    def test_parse(self, track, expected):
+        assert HGit._parse_upstream_track(track) == expected
+
+
+class TestSyncStatusFromCounts:
+
+    @pytest.mark.parametrize('ahead, behind, status', [
+        (0, 0, 'synced'),
+        (2, 0, 'ahead'),
+        (0, 2, 'behind'),
+        (1, 1, 'diverged'),
+    ])
+    def test_status(self, ahead, behind, status):
+        assert HGit._sync_status_from_counts(ahead, behind) == status
+
+
+class TestReadBranchRefs:
+
+    def test_single_for_each_ref_call(self):
+        hgit = HGit.__new__(HGit)
+        hgit._HGit__git_repo = Mock()
+        hgit._HGit__git_repo.git.for_each_ref.return_value = '\n'.join([
+            'refs/heads/ho-prod\0aaa\0refs/remotes/origin/ho-prod\0behind 2',
+            'refs/heads/ho-patch/1-x\0bbb\0\0',
+            'refs/remotes/origin/HEAD\0aaa\0\0',
+            'refs/remotes/origin/ho-prod\0ccc\0\0',
+        ])
+
+        refs = hgit.read_branch_refs()
+
+        hgit._HGit__git_repo.git.for_each_ref.assert_called_once()
+        assert refs['local'] == {
+            'ho-prod': {'sha': 'aaa', 'upstream': 'refs/remotes/origin/ho-prod', 'track': (0, 2)},
+            'ho-patch/1-x': {'sha': 'bbb', 'upstream': '', 'track': None},
+        }
+        assert refs['remote'] == {'ho-prod': 'ccc'}
+
+
+class TestActiveBranchesStatusRealGit:
+
+    def _status_by_name(self, status):
+        infos = [status['prod_branch']] + status['patch_branches'] + status['staged_branches']
+        return {info['name']: info for info in infos}
+
+    def test_statuses(self, real_hgit, git_clones, run_git, commit_file):
+        _, local, other = git_clones
+        # ho-patch/1-behind: pushed by a colleague, then advanced on origin
+        run_git(other, 'checkout', '-q', '-b', 'ho-patch/1-behind')
+        commit_file(other, 'one')
+        run_git(other, 'push', '-q', '-u', 'origin', 'ho-patch/1-behind')
+        run_git(local, 'fetch', '-q')
+        run_git(local, 'branch', '-q', '--track', 'ho-patch/1-behind', 'origin/ho-patch/1-behind')
+        commit_file(other, 'two')
+        run_git(other, 'push', '-q')
+        # ho-patch/2-ahead: local commit not pushed, upstream not tracked
+        run_git(local, 'checkout', '-q', '-b', 'ho-patch/2-ahead')
+        run_git(local, 'push', '-q', 'origin', 'ho-patch/2-ahead')
+        commit_file(local, 'three')
+        # ho-patch/3-local: never pushed
+        run_git(local, 'checkout', '-q', '-b', 'ho-patch/3-local')
+        # ho-staged/4-remote: only on origin
+        run_git(other, 'checkout', '-q', '-b', 'ho-staged/4-remote', 'ho-prod')
+        run_git(other, 'push', '-q', 'origin', 'ho-staged/4-remote')
+
+        status = self._status_by_name(real_hgit.get_active_branches_status())
+
+        assert status['ho-prod']['sync_status'] == 'synced'
+        assert (status['ho-patch/1-behind']['sync_status'],
+                status['ho-patch/1-behind']['behind']) == ('behind', 1)
+        assert (status['ho-patch/2-ahead']['sync_status'],
+                status['ho-patch/2-ahead']['ahead']) == ('ahead', 1)
+        assert status['ho-patch/3-local']['sync_status'] == 'no_remote'
+        assert status['ho-patch/3-local']['is_current'] is True
+        assert status['ho-staged/4-remote']['sync_status'] == 'remote_only'
+
+
+class TestSyncActiveBranchesRealGit:
+
+    def _setup(self, git_clones, run_git, commit_file):
+        """ho-patch/1-x and ho-prod both advanced on origin by a colleague."""
+        _, local, other = git_clones
+        run_git(other, 'checkout', '-q', '-b', 'ho-patch/1-x')
+        commit_file(other, 'one')
+        run_git(other, 'push', '-q', '-u', 'origin', 'ho-patch/1-x')
+        run_git(local, 'fetch', '-q')
+        run_git(local, 'branch', '-q', '--track', 'ho-patch/1-x', 'origin/ho-patch/1-x')
+        patch_sha = commit_file(other, 'two')
+        run_git(other, 'push', '-q')
+        run_git(other, 'checkout', '-q', 'ho-prod')
+        prod_sha = commit_file(other, 'prod')
+        run_git(other, 'push', '-q')
+        return local, patch_sha, prod_sha
+
+    def test_fast_forwards_without_checkout(self, real_hgit, git_clones, run_git, commit_file):
+        local, patch_sha, prod_sha = self._setup(git_clones, run_git, commit_file)
+        reflog_before = run_git(local, 'reflog', 'HEAD')
+
+        result = real_hgit.sync_active_branches()
+
+        assert sorted(result['synced']) == ['ho-patch/1-x', 'ho-prod']
+        assert result['errors'] == []
+        assert run_git(local, 'rev-parse', 'ho-patch/1-x') == patch_sha
+        assert run_git(local, 'rev-parse', 'ho-prod') == prod_sha
+        # The current branch was fast-forwarded in place, no checkout happened
+        assert run_git(local, 'rev-parse', '--abbrev-ref', 'HEAD') == 'ho-prod'
+        assert (local / 'prod').exists()
+        assert not (local / 'two').exists()
+        assert 'checkout:' not in run_git(local, 'reflog', 'HEAD').replace(reflog_before, '')
+
+    def test_ahead_branch_not_moved(self, real_hgit, git_clones, run_git, commit_file):
+        _, local, _ = git_clones
+        run_git(local, 'checkout', '-q', '-b', 'ho-patch/2-y')
+        run_git(local, 'push', '-q', '-u', 'origin', 'ho-patch/2-y')
+        local_sha = commit_file(local, 'mine')
+        run_git(local, 'checkout', '-q', 'ho-prod')
+
+        result = real_hgit.sync_active_branches()
+
+        assert ('ho-patch/2-y', 'ahead') in result['skipped']
+        assert run_git(local, 'rev-parse', 'ho-patch/2-y') == local_sha
@@ -94,3 +94,29 @@ class TestHGitFetchFromOrigin:
         # Should call fetch() without arguments (fetches all refs)
         # vs fetch_tags() which calls fetch(tags=True)
         mock_origin.fetch.assert_called_once_with(prune=True)  # No tags=True argument
+
+    def test_fetch_from_origin_records_fetch_time(self, hgit_mock_only, tmp_path):
+        """Test that a successful fetch is recorded in .hop/local_config."""
+        from half_orm_dev.repo import LocalConfig
+        hgit, mock_git_repo = hgit_mock_only
+        local_config = LocalConfig(str(tmp_path))
+        hgit._HGit__repo = Mock(local_config=local_config)
+
+        hgit.fetch_from_origin()
+
+        assert LocalConfig(str(tmp_path)).is_fetch_fresh()
+
+    def test_fetch_from_origin_failure_not_recorded(self, hgit_mock_only, tmp_path):
+        """Test that a failed fetch leaves the last fetch time untouched."""
+        from half_orm_dev.repo import LocalConfig
+        hgit, mock_git_repo = hgit_mock_only
+        local_config = LocalConfig(str(tmp_path))
+        hgit._HGit__repo = Mock(local_config=local_config)
+        mock_git_repo.remote.return_value.fetch.side_effect = GitCommandError(
+            "git fetch", 1, stderr="Network unreachable"
+        )
+
+        with pytest.raises(GitCommandError):
+            hgit.fetch_from_origin()
+
+        assert local_config.last_fetch is None
@@ -0,0 +1,65 @@
+"""
+Tests for HGit.push_branches(): several branches in one `git push --atomic`.
+"""
+
+from unittest.mock import Mock
+
+import pytest
+from git.exc import GitCommandError
+
+from half_orm_dev.hgit import HGit
+
+
+class TestPushBranchesCommand:
+
+    @pytest.fixture
+    def hgit(self):
+        hgit = HGit.__new__(HGit)
+        hgit._HGit__git_repo = Mock()
+        return hgit
+
+    def test_single_atomic_push(self, hgit):
+        hgit.push_branches(['ho-prod', 'ho-patch/1-x', 'ho-prod'])
+
+        hgit._HGit__git_repo.git.push.assert_called_once_with(
+            '--atomic', '--set-upstream', 'origin', 'ho-prod', 'ho-patch/1-x')
+
+    def test_non_atomic_without_upstream(self, hgit):
+        hgit.push_branches(['ho-prod'], atomic=False, set_upstream=False)
+
+        hgit._HGit__git_repo.git.push.assert_called_once_with('origin', 'ho-prod')
+
+    def test_nothing_to_push(self, hgit):
+        hgit.push_branches([])
+
+        hgit._HGit__git_repo.git.push.assert_not_called()
+
+
+class TestPushBranchesRealGit:
+
+    def test_all_branches_pushed(self, real_hgit, git_clones, run_git, commit_file):
+        _, local, _ = git_clones
+        prod_sha = commit_file(local, 'prod')
+        run_git(local, 'checkout', '-q', '-b', 'ho-patch/1-x')
+        patch_sha = commit_file(local, 'patch')
+
+        real_hgit.push_branches(['ho-prod', 'ho-patch/1-x'])
+
+        assert run_git(local, 'rev-parse', 'origin/ho-prod') == prod_sha
+        assert run_git(local, 'rev-parse', 'origin/ho-patch/1-x') == patch_sha
+        assert run_git(local, 'rev-parse', '--abbrev-ref', 'ho-patch/1-x@{upstream}') == \
+            'origin/ho-patch/1-x'
+
+    def test_rejected_ref_pushes_nothing(self, real_hgit, git_clones, run_git, commit_file):
+        origin, local, other = git_clones
+        # A colleague advances ho-prod: our ho-prod push is not a fast-forward
+        commit_file(other, 'theirs')
+        run_git(other, 'push', '-q')
+        commit_file(local, 'ours')
+        run_git(local, 'checkout', '-q', '-b', 'ho-patch/1-x')
+        commit_file(local, 'patch')
+
+        with pytest.raises(GitCommandError):
+            real_hgit.push_branches(['ho-prod', 'ho-patch/1-x'])
+
+        assert 'ho-patch/1-x' not in run_git(origin, 'branch', '--list', 'ho-patch/*')
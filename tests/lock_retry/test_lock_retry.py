@@ -0,0 +1,114 @@
+"""
+Tests for LockRetryPolicy - lock_timeout and retries of the upgrade SQL.
+"""
+
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+from psycopg import errors
+from psycopg.pq import TransactionStatus
+
+from half_orm_dev.lock_retry import LockRetryPolicy, LockRetryError, LOCK_HOLDERS_QUERY
+
+HOLDER = (4242, 'alice', 'idle in transaction', 3600, 'RowExclusiveLock',
+          'public.users', 'UPDATE users SET name = $1')
+COLUMNS = ('pid', 'usename', 'state', 'xact_seconds', 'mode', 'relation', 'query')
+
+
+class FakeCursor:
+    """Records the statements, failing the patch SQL while locks are held."""
+
+    def __init__(self, connection):
+        self._connection = connection
+        self.description = [SimpleNamespace(name=name) for name in COLUMNS]
+        self.rowcount = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql):
+        self._connection.statements.append(sql)
+        if sql == 'ALTER TABLE users ADD COLUMN age int':
+            if self._connection.lock_failures:
+                self._connection.lock_failures -= 1
+                raise errors.LockNotAvailable("canceling statement due to lock timeout")
+            self.rowcount = 3
+
+    def fetchall(self):
+        return [HOLDER]
+
+
+@pytest.fixture
+def model():
+    connection = Mock()
+    connection.statements = []
+    connection.lock_failures = 0
+    connection.autocommit = False
+    connection.info.transaction_status = TransactionStatus.IDLE
+    connection.cursor.side_effect = lambda: FakeCursor(connection)
+    model = Mock()
+    model._connection = connection
+    return model
+
+
+SQL = 'ALTER TABLE users ADD COLUMN age int'
+
+
+class TestLockRetryPolicy:
+
+    def test_runs_in_savepoint_with_lock_timeout(self, model):
+        assert LockRetryPolicy(lock_timeout=2).execute(model, SQL) == 3
+
+        assert model._connection.statements == [
+            'SAVEPOINT hop_lock_retry', 'SET LOCAL lock_timeout = 2000',
+            SQL, 'RELEASE SAVEPOINT hop_lock_retry']
+
+    def test_retries_with_backoff_and_reports_holders(self, model, capsys):
+        model._connection.lock_failures = 2
+        delays = []
+
+        LockRetryPolicy(lock_timeout=1, backoff=2).execute(
+            model, SQL, label='01_age.sql', sleep=delays.append)
+
+        assert delays == [2, 4]
+        statements = model._connection.statements
+        assert statements.count('ROLLBACK TO SAVEPOINT hop_lock_retry') == 2
+        assert statements.count(LOCK_HOLDERS_QUERY) == 2
+        output = capsys.readouterr().out
+        assert "01_age.sql: lock not acquired within 1s (attempt 1/6), retrying in 2s" in output
+        assert ("pid 4242 (alice, idle in transaction, 3600s in transaction): "
+                "RowExclusiveLock on public.users: UPDATE users SET name = $1") in output
+
+    def test_gives_up_after_retries(self, model):
+        model._connection.lock_failures = 10
+        delays = []
+
+        with pytest.raises(LockRetryError, match=r"after 3 attempts\npid 4242"):
+            LockRetryPolicy(lock_timeout=1, retries=2).execute(model, SQL, sleep=delays.append)
+
+        assert delays == [1, 2]
+
+    def test_autocommit_sets_and_resets_lock_timeout(self, model):
+        model._connection.autocommit = True
+        model._connection.lock_failures = 1
+
+        LockRetryPolicy(lock_timeout=0.5).execute(model, SQL, sleep=lambda delay: None)
+
+        statements = model._connection.statements
+        assert 'SAVEPOINT hop_lock_retry' not in statements
+        assert statements.count('SET lock_timeout = 500') == 2
+        assert statements.count('RESET lock_timeout') == 2
+
+    def test_backoff_capped(self):
+        policy = LockRetryPolicy(backoff=1, max_backoff=5)
+
+        assert [policy.delay(attempt) for attempt in range(1, 6)] == [1, 2, 4, 5, 5]
+
+    @pytest.mark.parametrize("options", [{'lock_timeout': 0}, {'retries': -1}])
+    def test_invalid_policy(self, options):
+        with pytest.raises(ValueError):
+            LockRetryPolicy(**options)
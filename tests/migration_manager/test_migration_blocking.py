@@ -115,38 +115,28 @@ class TestNeedsMigration:
 class TestCommandBlocking:
     """Test that commands are properly blocked when migration is needed."""
 
-    def test_only_migrate_available_when_migration_needed(self):
+    @pytest.fixture
+    def hop_dir(self, tmp_path, monkeypatch):
+        """Hop repository requiring 0.17.2, with no production database."""
+        (tmp_path / '.hop').mkdir()
+        (tmp_path / '.hop' / 'config').write_text(
+            "[halfORM]\nhop_version = 0.17.2\ndevel = True\n")
+        monkeypatch.setenv('HALFORM_CONF_DIR', str(tmp_path / 'conf'))
+        monkeypatch.chdir(tmp_path)
+        return tmp_path
+
+    def test_only_migrate_available_when_migration_needed(self, hop_dir):
         """Test that only 'migrate' command is available when migration needed."""
-        # Mock the Repo class to return a mock instance
-        with patch('half_orm_dev.cli.main.Repo') as MockRepo:
-            mock_repo = Mock()
-            mock_repo.checked = True
-            mock_repo.needs_migration.return_value = True
-            mock_repo.database.production = False
-            MockRepo.return_value = mock_repo
-
+        with patch('half_orm_dev.cli.main.hop_version', return_value='0.18.0'):
             from half_orm_dev.cli.main import Hop
             hop = Hop()
 
             # Test the available commands
             assert hop.available_commands == ['migrate']
 
-    def test_all_commands_available_when_no_migration(self):
+    def test_all_commands_available_when_no_migration(self, hop_dir):
         """Test that all commands are available when no migration needed."""
-        # Mock the Repo class to return a mock instance
-        with patch('half_orm_dev.cli.main.Repo') as MockRepo:
-            mock_repo = Mock()
-            mock_repo.checked = True
-            mock_repo.needs_migration.return_value = False
-            mock_repo.devel = True
-
-            # Mock database
-            mock_database = Mock()
-            mock_database.production = False
-            mock_repo.database = mock_database
-
-            MockRepo.return_value = mock_repo
-
+        with patch('half_orm_dev.cli.main.hop_version', return_value='0.17.2'):
             from half_orm_dev.cli.main import Hop
             hop = Hop()
 
@@ -155,6 +145,36 @@ class TestCommandBlocking:
             assert 'patch' in hop.available_commands
             assert 'release' in hop.available_commands
 
+    def test_commands_computed_without_repo(self, hop_dir):
+        """Test that the Repo (database, git) is not created to list commands."""
+        with patch('half_orm_dev.cli.main.hop_version', return_value='0.17.2'), \
+             patch('half_orm_dev.repo.Repo.__init__') as repo_init:
+            from half_orm_dev.cli.main import Hop
+            hop = Hop()
+
+            assert 'patch' in hop.available_commands
+            repo_init.assert_not_called()
+
+    def test_production_marker(self, hop_dir):
+        """Test that a production clone only gets the production commands."""
+        (hop_dir / '.hop' / 'production').touch()
+        with patch('half_orm_dev.cli.main.hop_version', return_value='0.18.0'):
+            from half_orm_dev.cli.main import Hop
+            hop = Hop()
+
+            assert hop.available_commands == ['upgrade', 'rollback']
+
+    def test_production_connection_file(self, hop_dir):
+        """Test that the production flag of the halfORM connection file is honoured."""
+        (hop_dir / 'conf').mkdir()
+        (hop_dir / 'conf' / hop_dir.name).write_text(
+            "[database]\nname = db\nproduction = True\n")
+        with patch('half_orm_dev.cli.main.hop_version', return_value='0.17.2'):
+            from half_orm_dev.cli.main import Hop
+            hop = Hop()
+
+            assert hop.available_commands == ['upgrade', 'rollback']
+
 
 class TestMigrationErrorHandling:
     """Test error handling during migration."""
@@ -181,16 +181,15 @@ class TestRevertMigration:
         mock_repo.hgit.delete_remote_tag.assert_called_once_with('ho-migration/0.18.0')
 
     def test_branches_pushed_after_revert(self):
-        """All affected branches are pushed after reverting."""
+        """All affected branches are pushed in one atomic push after reverting."""
         ann = self._annotation('0.17.0', '0.18.0', {'ho-patch/3-foo': 'patchSHA'})
         tag = _make_mock_tag('ho-migration/0.18.0', ann)
         mgr, mock_repo, mock_git_repo = _make_mgr(extra_tags=[tag])
 
         mgr.revert_migration()
 
-        pushed = [c.args[0] for c in mock_repo.hgit.push_branch.call_args_list]
-        assert 'ho-patch/3-foo' in pushed
-        assert 'ho-prod' in pushed
+        mock_repo.hgit.push_branches.assert_called_once_with(
+            ['ho-patch/3-foo', 'ho-prod'], atomic=True)
 
     def test_no_tag_raises_error(self):
         """MigrationManagerError raised when no ho-migration/* tag exists."""
@@ -0,0 +1,106 @@
+"""
+Unit tests for Row_* generation in modules.py (row_types in .hop/config).
+
+Row_* types are compact, immutable row containers built by
+BC_*.ho_select_rows(): frozen slotted dataclasses ('slots') or
+NamedTuples ('tuple').
+"""
+import dataclasses
+import sys
+from typing import NamedTuple, Optional
+from unittest.mock import Mock
+
+import pytest
+
+import half_orm_dev.modules as _mod
+
+
+def _private(name):
+    return _mod.__dict__.get(f'_half_orm_dev{name}') or _mod.__dict__[name]
+
+
+_gen_row_type = _private('__gen_row_type')
+_gen_baseclass = _private('__gen_baseclass')
+_row_types = _private('__row_types')
+
+
+def _make_relation(fields):
+    rel = Mock()
+    rel._t_fqrn = ('db', 'public', 'author')
+    rel._ho_fields = {}
+    for name, fieldtype in fields.items():
+        field = Mock()
+        field._metadata = {'fieldtype': fieldtype}
+        rel._ho_fields[name] = field
+    rel._ho_dataclass_name = Mock(return_value='DC_PublicAuthor')
+    return Mock(return_value=rel)
+
+
+def _load(class_str, slots):
+    """Execute a generated Row_* class and return it."""
+    namespace = {
+        'dataclasses': dataclasses, 'Optional': Optional, 'NamedTuple': NamedTuple,
+        '_ROW_SLOTS': {'slots': True} if slots else {},
+    }
+    exec(class_str, namespace)
+    return namespace['Row_PublicAuthor']
+
+
+class TestRowTypesOption:
+
+    def test_known_values(self):
+        assert _row_types(Mock(row_types='slots')) == 'slots'
+        assert _row_types(Mock(row_types='tuple')) == 'tuple'
+
+    def test_disabled_by_default(self):
+        assert _row_types(Mock(row_types='')) == ''
+        assert _row_types(Mock()) == ''
+
+
+class TestGenRowTypeSlots:
+
+    @pytest.mark.parametrize('native_slots', [
+        pytest.param(True, marks=pytest.mark.skipif(
+            sys.version_info < (3, 10), reason='slots=True requires Python 3.10')),
+        False,
+    ])
+    def test_frozen_slotted_without_dict(self, native_slots):
+        result = _gen_row_type(_make_relation({'id': 'int4', 'name': 'text'}), 'slots')
+        row_type = _load(result, native_slots)
+        row = row_type(1, 'Alice')
+        assert (row.id, row.name) == (1, 'Alice')
+        assert not hasattr(row, '__dict__')
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            row.name = 'Bob'
+
+    def test_invalid_field_commented_out(self):
+        result = _gen_row_type(_make_relation({'id': 'int4', 'class': 'text'}), 'slots')
+        assert "# " in result and 'FIX ME!' in result
+        assert "__slots__ = ('id',)" in result
+
+
+class TestGenRowTypeTuple:
+
+    def test_named_tuple(self):
+        result = _gen_row_type(_make_relation({'id': 'int4', 'name': 'text'}), 'tuple')
+        assert 'class Row_PublicAuthor(NamedTuple):' in result
+        row = _load(result, False)(1, 'Alice')
+        assert row == (1, 'Alice')
+        assert row.name == 'Alice'
+
+    def test_leading_underscore_excluded(self):
+        result = _gen_row_type(_make_relation({'id': 'int4', '_hidden': 'text'}), 'tuple')
+        row_type = _load(result, False)
+        assert row_type._fields == ('id',)
+
+
+class TestHoSelectRows:
+
+    def test_absent_without_row_types(self):
+        result = _gen_baseclass(_make_relation({'id': 'int4'}), {})
+        assert 'ho_select_rows' not in result
+
+    def test_builds_rows_from_selected_dicts(self):
+        result = _gen_baseclass(_make_relation({'id': 'int4', 'name': 'text'}), {}, row_types='tuple')
+        assert 'def ho_select_rows(' in result
+        assert "Row_PublicAuthor(*[row.get(name) for name in ('id', 'name')])" in result
@@ -0,0 +1,138 @@
+"""
+Unit tests for the per-schema ho_baseclasses package (split_baseclasses).
+
+With `split_baseclasses = True` in .hop/config, ho_baseclasses is generated
+as a package: one module per schema plus an __init__ resolving DC_*/BC_*
+names lazily through a module-level __getattr__.
+"""
+import sys
+from unittest.mock import Mock
+
+import pytest
+
+import half_orm_dev.modules as _mod
+
+
+def _private(name):
+    return _mod.__dict__.get(f'_half_orm_dev{name}') or _mod.__dict__[name]
+
+
+_gen_dataclass = _private('__gen_dataclass')
+_gen_baseclass = _private('__gen_baseclass')
+_gen_baseclasses_package = _private('__gen_baseclasses_package')
+_split_baseclasses = _private('__split_baseclasses')
+
+
+class _Relation:
+    """Minimal relation: calling it returns itself, like a Relation instance."""
+
+    def __init__(self, schema, table, fkeys=None):
+        self._t_fqrn = ('db', schema, table)
+        field = Mock()
+        field._metadata = {'fieldtype': 'text'}
+        self._ho_fields = {'id': field}
+        self._ho_fkeys = {}
+        for constraint_name, (target_schema, target_table) in (fkeys or {}).items():
+            target = Mock()
+            target._t_fqrn = ('db', target_schema, target_table)
+            self._ho_fkeys[constraint_name] = Mock(return_value=target)
+
+    def __call__(self):
+        return self
+
+    def _ho_dataclass_name(self):
+        return f"DC_{_private('__get_full_class_name')(*self._t_fqrn[1:])}"
+
+
+@pytest.fixture
+def accumulators():
+    """Reset the module accumulators around each test."""
+    _mod.HO_SCHEMA_BASECLASSES.clear()
+    _mod.HO_DATACLASSES_IMPORTS.clear()
+    yield _mod.HO_SCHEMA_BASECLASSES
+    _mod.HO_SCHEMA_BASECLASSES.clear()
+
+
+def _add(relation):
+    schema = relation._t_fqrn[1]
+    full_name = relation._ho_dataclass_name()[3:]
+    _mod.HO_SCHEMA_BASECLASSES.setdefault(schema, []).append((
+        _gen_dataclass(relation, {}, split=True),
+        '',
+        _gen_baseclass(relation, {}),
+        f'{full_name}Dict'))
+
+
+class TestSplitDataclassReferences:
+
+    def test_same_schema_reference_is_local(self):
+        rel = _Relation('blog', 'comment', {'post_fk': ('blog', 'post')})
+        result = _gen_dataclass(rel, {}, split=True)
+        assert 'self.fk_post_fk = DC_BlogPost' in result
+
+    def test_other_schema_reference_goes_through_package(self):
+        rel = _Relation('blog', 'post', {'author_fk': ('actor', 'person')})
+        result = _gen_dataclass(rel, {}, split=True)
+        assert 'self.fk_author_fk = ho_baseclasses.DC_ActorPerson' in result
+
+    def test_monolithic_layout_unchanged(self):
+        rel = _Relation('blog', 'post', {'author_fk': ('actor', 'person')})
+        result = _gen_dataclass(rel, {})
+        assert 'self.fk_author_fk = DC_ActorPerson' in result
+
+
+class TestSplitBaseclassesOption:
+
+    def test_enabled_only_when_true(self):
+        assert _split_baseclasses(Mock(split_baseclasses=True)) is True
+        assert _split_baseclasses(Mock(split_baseclasses=False)) is False
+        # Mock attributes are truthy but not True
+        assert _split_baseclasses(Mock()) is False
+
+
+class TestGenBaseclassesPackage:
+
+    @pytest.fixture
+    def package(self, tmp_path, accumulators, monkeypatch):
+        package_name = 'splitpkg'
+        package_dir = tmp_path / package_name
+        package_dir.mkdir()
+        (package_dir / '__init__.py').write_text(
+            "class _Model:\n"
+            "    def get_relation_class(self, fqtn, fields_aliases=None):\n"
+            "        return type('Relation', (), {'fqtn': fqtn})\n"
+            "MODEL = _Model()\n",
+            encoding='utf-8')
+        _add(_Relation('blog', 'post', {'author_fk': ('actor', 'person')}))
+        _add(_Relation('actor', 'person'))
+        _gen_baseclasses_package(str(package_dir), package_name)
+        monkeypatch.syspath_prepend(str(tmp_path))
+        yield package_dir
+        for name in list(sys.modules):
+            if name == package_name or name.startswith(f'{package_name}.'):
+                del sys.modules[name]
+
+    def test_one_module_per_schema(self, package):
+        files = sorted(p.name for p in (package / 'ho_baseclasses').iterdir())
+        assert files == ['__init__.py', '_dc_relation.py', 'actor.py', 'blog.py']
+
+    def test_schema_modules_loaded_on_demand(self, package):
+        from splitpkg import ho_baseclasses
+        assert 'splitpkg.ho_baseclasses.blog' not in sys.modules
+        assert ho_baseclasses.BC_BlogPost.__name__ == 'BC_BlogPost'
+        assert 'splitpkg.ho_baseclasses.blog' in sys.modules
+        assert 'splitpkg.ho_baseclasses.actor' not in sys.modules
+
+    def test_cross_schema_reference_resolved(self, package):
+        from splitpkg import ho_baseclasses
+        post = ho_baseclasses.DC_BlogPost()
+        assert post.fk_author_fk is ho_baseclasses.DC_ActorPerson
+
+    def test_unknown_name_raises_attribute_error(self, package):
+        from splitpkg import ho_baseclasses
+        with pytest.raises(AttributeError):
+            ho_baseclasses.BC_Unknown
+
+    def test_dir_lists_lazy_names(self, package):
+        from splitpkg import ho_baseclasses
+        assert {'BC_BlogPost', 'DC_ActorPerson', 'DC_Relation'} <= set(dir(ho_baseclasses))
@@ -235,7 +235,7 @@ class TestApplyPatchWithReleaseContext:
         # Track execution order
         execution_order = []
 
-        def track_apply(patch_id, model):
+        def track_apply(patch_id, model, **kwargs):
             execution_order.append(patch_id)
             return [f"{patch_id}_01.sql", f"{patch_id}_02.sql"]
 
@@ -270,7 +270,7 @@ class TestApplyPatchWithReleaseContext:
         # Track execution order
         execution_order = []
 
-        def track_apply(patch_id, model):
+        def track_apply(patch_id, model, **kwargs):
             execution_order.append(patch_id)
             return [f"{patch_id}.sql"]
 
@@ -300,7 +300,7 @@ class TestApplyPatchWithReleaseContext:
         # Track execution order
         execution_order = []
 
-        def track_apply(patch_id, model):
+        def track_apply(patch_id, model, **kwargs):
             execution_order.append(patch_id)
             return [f"{patch_id}.sql"]
 
@@ -328,7 +328,7 @@ class TestApplyPatchWithReleaseContext:
 
         execution_order = []
 
-        def track_apply(patch_id, model):
+        def track_apply(patch_id, model, **kwargs):
             execution_order.append(patch_id)
             return [f"{patch_id}.sql"]
 
@@ -358,7 +358,7 @@ class TestApplyPatchWithReleaseContext:
 
         execution_order = []
 
-        def track_apply(patch_id, model):
+        def track_apply(patch_id, model, **kwargs):
             execution_order.append(patch_id)
             return [f"{patch_id}.sql"]
 
@@ -387,7 +387,7 @@ class TestApplyPatchWithReleaseContext:
         for patch_id in ["123", "456", "789"]:
             create_patch_directory(patches_dir, patch_id)
 
-        def mock_apply(patch_id, model):
+        def mock_apply(patch_id, model, **kwargs):
             return [f"{patch_id}.sql"]
 
         with patch.object(patch_mgr, 'apply_patch_files', side_effect=mock_apply):
@@ -420,7 +420,7 @@ class TestApplyPatchErrorHandlingWithReleaseContext:
             create_patch_directory(patches_dir, patch_id)
 
         # Mock failure on patch 456
-        def mock_apply(patch_id, model):
+        def mock_apply(patch_id, model, **kwargs):
             if patch_id == "456":
                 raise PatchManagerError(f"Failed to apply patch {patch_id}")
             return [f"{patch_id}.sql"]
@@ -446,7 +446,7 @@ class TestApplyPatchErrorHandlingWithReleaseContext:
             create_patch_directory(patches_dir, patch_id)
 
         # Mock failure on current patch
-        def mock_apply(patch_id, model):
+        def mock_apply(patch_id, model, **kwargs):
             if patch_id == "789":
                 raise PatchManagerError(f"Failed to apply current patch {patch_id}")
             return [f"{patch_id}.sql"]
@@ -18,6 +18,7 @@ from half_orm_dev.file_executor import (
     execute_sql_file, execute_python_file,
     FileExecutionError
 )
+from half_orm_dev.database import DatabaseTransaction
 
 
 class TestApplyPatchFiles:
@@ -44,6 +45,29 @@ class TestApplyPatchFiles:
         # Should have called database execute_query for SQL files (3 times)
         assert mock_database.execute_query.call_count == 3
 
+    def test_apply_patch_files_in_transaction(self, patch_manager, mock_database):
+        """Test non-transactional steps are run between two transactions."""
+        patch_mgr, repo, temp_dir, patches_dir = patch_manager
+
+        patch_path = patches_dir / "456-tx"
+        patch_path.mkdir()
+        (patch_path / "01_create_table.sql").write_text("CREATE TABLE users (id INTEGER);")
+        (patch_path / "02_index.sql").write_text(
+            "-- hop: no-transaction\nCREATE INDEX CONCURRENTLY ix ON users (id);")
+        (patch_path / "03_script.py").write_text("print('Migration complete')")
+        (patch_path / "04_insert.sql").write_text("INSERT INTO users VALUES (1);")
+
+        with DatabaseTransaction(mock_database) as transaction:
+            applied_files = patch_mgr.apply_patch_files(
+                "456-tx", mock_database, transaction=transaction)
+            assert transaction.active
+
+        assert applied_files == ["01_create_table.sql", "02_index.sql", "03_script.py", "04_insert.sql"]
+        assert transaction.suspended_steps == ["456-tx/02_index.sql", "456-tx/03_script.py"]
+        # Before each suspended step, then at the end
+        assert mock_database._connection.commit.call_count == 3
+        mock_database._connection.rollback.assert_not_called()
+
     def test_apply_patch_files_sql_only(self, patch_manager, mock_database):
         """Test applying patch with only SQL files."""
         patch_mgr, repo, temp_dir, patches_dir = patch_manager
@@ -77,6 +101,20 @@ class TestApplyPatchFiles:
         # No SQL execution
         assert mock_database.execute_query.call_count == 0
 
+    def test_apply_patch_files_python_run_entrypoint(self, patch_manager, mock_database):
+        """Test a Python file defining run(model) is called with the model."""
+        patch_mgr, repo, temp_dir, patches_dir = patch_manager
+
+        patch_path = patches_dir / "456-backfill"
+        patch_path.mkdir()
+        (patch_path / "01_backfill.py").write_text(
+            "def run(model):\n    model.execute_query('UPDATE users SET active = true')\n")
+
+        applied_files = patch_mgr.apply_patch_files("456-backfill", mock_database)
+
+        assert applied_files == ["01_backfill.py"]
+        mock_database.execute_query.assert_called_once_with('UPDATE users SET active = true')
+
     def test_apply_patch_files_empty_patch(self, patch_manager, mock_database):
         """Test applying empty patch."""
         patch_mgr, repo, temp_dir, patches_dir = patch_manager
@@ -279,3 +279,102 @@ class TestBuildPatchStatusMap:
 
         # Should get info from TOML (has merge_commit)
         assert status_map["1-test"]["merge_commit"] == "abc123"
+
+
+class TestPersistentStatusIndex:
+    """Test the patch status index kept in .hop/cache/ across PatchManager instances."""
+
+    def test_index_written_and_ignored_by_git(self, patch_manager_with_releases):
+        patch_mgr, repo, tmp_path, patches_dir, releases_dir = patch_manager_with_releases
+        release_file = ReleaseFile("0.1.0", releases_dir)
+        release_file.create_empty()
+        release_file.add_patch("1-auth")
+
+        patch_mgr.get_patch_status_map()
+
+        cache_dir = tmp_path / ".hop" / "cache"
+        assert (cache_dir / "patch_status.json").exists()
+        assert (cache_dir / ".gitignore").read_text() == "*\n"
+
+    def test_unchanged_sources_not_read_again(self, patch_manager_with_releases, monkeypatch):
+        patch_mgr, repo, tmp_path, patches_dir, releases_dir = patch_manager_with_releases
+        for version, patch_id in (("0.1.0", "1-auth"), ("0.2.0", "2-api")):
+            release_file = ReleaseFile(version, releases_dir)
+            release_file.create_empty()
+            release_file.add_patch(patch_id)
+        (releases_dir / "0.0.1.txt").write_text("0-init\n")
+        (patches_dir / "orphaned" / "3-old").mkdir(parents=True)
+        expected = patch_mgr.get_patch_status_map()
+
+        read = []
+        monkeypatch.setattr(PatchManager, "_read_toml_patches",
+                            lambda self, path: read.append(path.name) or {})
+        monkeypatch.setattr(PatchManager, "_read_txt_patches",
+                            staticmethod(lambda path: read.append(path.name) or {}))
+
+        assert PatchManager(repo).get_patch_status_map() == expected
+        assert read == []
+
+    def test_only_changed_source_read_again(self, patch_manager_with_releases, monkeypatch):
+        patch_mgr, repo, tmp_path, patches_dir, releases_dir = patch_manager_with_releases
+        for version, patch_id in (("0.1.0", "1-auth"), ("0.2.0", "2-api")):
+            release_file = ReleaseFile(version, releases_dir)
+            release_file.create_empty()
+            release_file.add_patch(patch_id)
+        patch_mgr.get_patch_status_map()
+
+        ReleaseFile("0.2.0", releases_dir).move_to_staged("2-api", "def456")
+        read = []
+        original = PatchManager._read_toml_patches
+        monkeypatch.setattr(PatchManager, "_read_toml_patches",
+                            lambda self, path: read.append(path.name) or original(self, path))
+
+        status_map = PatchManager(repo).get_patch_status_map()
+
+        assert read == ["0.2.0-patches.toml"]
+        assert status_map["2-api"]["status"] == "staged"
+        assert status_map["2-api"]["merge_commit"] == "def456"
+        assert status_map["1-auth"]["status"] == "candidate"
+
+    def test_removed_source_dropped(self, patch_manager_with_releases):
+        patch_mgr, repo, tmp_path, patches_dir, releases_dir = patch_manager_with_releases
+        release_file = ReleaseFile("0.1.0", releases_dir)
+        release_file.create_empty()
+        release_file.add_patch("1-auth")
+        patch_mgr.get_patch_status_map()
+
+        release_file.file_path.unlink()
+
+        assert PatchManager(repo).get_patch_status_map() == {}
+
+    def test_new_patch_directory_detected(self, patch_manager_with_releases):
+        patch_mgr, repo, tmp_path, patches_dir, releases_dir = patch_manager_with_releases
+        (patches_dir / "staged").mkdir()
+        patch_mgr.get_patch_status_map()
+
+        (patches_dir / "staged" / "5-merged").mkdir()
+
+        assert PatchManager(repo).get_patch_status_map() == {"5-merged": {"status": "staged"}}
+
+    def test_corrupt_index_rebuilt(self, patch_manager_with_releases):
+        patch_mgr, repo, tmp_path, patches_dir, releases_dir = patch_manager_with_releases
+        release_file = ReleaseFile("0.1.0", releases_dir)
+        release_file.create_empty()
+        release_file.add_patch("1-auth")
+        (tmp_path / ".hop" / "cache").mkdir()
+        (tmp_path / ".hop" / "cache" / "patch_status.json").write_text("{not json")
+
+        assert patch_mgr.get_patch_status_map()["1-auth"]["status"] == "candidate"
+
+    def test_status_cache_updates_persist(self, patch_manager_with_releases):
+        """_add_patch_to_status_cache refreshes the index with the file just written."""
+        patch_mgr, repo, tmp_path, patches_dir, releases_dir = patch_manager_with_releases
+        release_file = ReleaseFile("0.1.0", releases_dir)
+        release_file.create_empty()
+        patch_mgr.get_patch_status_map()
+
+        release_file.add_patch("1-auth")
+        patch_mgr._add_patch_to_status_cache("1-auth", "candidate", "0.1.0")
+
+        index = patch_mgr._refresh_patch_status_index()
+        assert index["toml"]["0.1.0-patches.toml"]["patches"]["1-auth"]["status"] == "candidate"
@@ -643,3 +643,67 @@ class TestTomlFileFormat:
             "status": "staged",
             "merge_commit": "abc12345"
         }
+
+
+class TestParsedDocumentCache:
+    """Test the cache of parsed TOML documents."""
+
+    @pytest.fixture
+    def release_file(self, tmp_path):
+        ReleaseFile.clear_cache()
+        release_file = ReleaseFile("1.3.6", tmp_path)
+        release_file.create_empty()
+        release_file.add_patch("001-first")
+        release_file.add_patch("002-second")
+        release_file.move_to_staged("001-first", "commit001")
+        yield release_file
+        ReleaseFile.clear_cache()
+
+    def test_file_parsed_once_for_reads(self, release_file, monkeypatch):
+        """Reads of an unchanged file reuse the parsed document."""
+        ReleaseFile.clear_cache()
+        calls = []
+        load = tomli.load
+        monkeypatch.setattr("half_orm_dev.release_file.tomli.load",
+                            lambda f: calls.append(f) or load(f))
+
+        for patch_id in release_file.get_patches():
+            release_file.get_patch_status(patch_id)
+            release_file.get_merge_commit(patch_id)
+        ReleaseFile("1.3.6", release_file.releases_dir).get_metadata()
+
+        assert len(calls) == 1
+
+    def test_own_writes_update_cache(self, release_file):
+        release_file.add_patch("003-third")
+
+        assert release_file.get_patches() == ["001-first", "002-second", "003-third"]
+
+    def test_external_change_invalidates_cache(self, release_file):
+        assert release_file.get_patch_status("002-second") == "candidate"
+
+        release_file.file_path.write_text(
+            '[patches]\n"002-second" = { status = "staged", merge_commit = "commit002" }\n')
+
+        assert release_file.get_patches() == ["002-second"]
+        assert release_file.get_merge_commit("002-second") == "commit002"
+
+    def test_deleted_file_not_served_from_cache(self, release_file):
+        release_file.get_patches()
+        release_file.file_path.unlink()
+
+        with pytest.raises(ReleaseFileError, match="not found"):
+            release_file.get_patches()
+
+    def test_returned_metadata_does_not_alter_cache(self, release_file):
+        release_file.set_metadata({"source_version": "1.3.5"})
+
+        release_file.get_metadata()["source_version"] = "changed"
+
+        assert release_file.get_metadata() == {"source_version": "1.3.5"}
+
+    def test_get_all_patch_info(self, release_file):
+        assert release_file.get_all_patch_info() == {
+            "001-first": {"status": "staged", "merge_commit": "commit001"},
+            "002-second": {"status": "candidate", "merge_commit": None},
+        }
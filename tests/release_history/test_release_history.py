@@ -0,0 +1,190 @@
+"""
+Tests for ReleaseHistory - indexed queries on the release history.
+
+The index is built from the release files of .hop/releases/ and the release
+tags, kept in .hop/cache/release_history.json and refreshed incrementally.
+"""
+
+from unittest.mock import Mock
+
+import pytest
+from click.testing import CliRunner
+
+from half_orm_dev.release_file import ReleaseFile
+from half_orm_dev.release_history import ReleaseHistory, ReleaseHistoryError
+
+DAY = 86400
+NOW = 1_760_000_000
+
+
+def _tag(date):
+    tag_ref = Mock()
+    tag_ref.tag = None  # lightweight tag: commit date
+    tag_ref.commit.hexsha = f"{date:040x}"
+    tag_ref.commit.committed_date = date
+    return tag_ref
+
+
+@pytest.fixture
+def repo(tmp_path):
+    releases_dir = tmp_path / ".hop" / "releases"
+    releases_dir.mkdir(parents=True)
+    (releases_dir / "0.1.0-rc1.txt").write_text("1-init:aaaa1111\n")
+    (releases_dir / "0.1.0.txt").write_text("1-init\n")
+    (releases_dir / "0.2.0-rc1.txt").write_text("2-auth:bbbb2222\n3-api:cccc3333\n")
+    (releases_dir / "0.2.0-rc2.txt").write_text("2-auth:bbbb2222\n3-api:cccc3333\n4-fix:dddd4444\n")
+    (releases_dir / "0.2.0.txt").write_text("2-auth\n3-api\n4-fix\n")
+    (releases_dir / "0.2.0.post1.txt").write_text("5-hotfix:eeee5555\n")
+    release_file = ReleaseFile("0.3.0", releases_dir)
+    release_file.create_empty()
+    release_file.add_patch("6-search")
+    release_file.add_patch("7-export")
+    release_file.move_to_staged("6-search", "ffff6666")
+
+    commit_dates = {"aaaa1111": NOW - 100 * DAY, "bbbb2222": NOW - 40 * DAY,
+                    "cccc3333": NOW - 35 * DAY, "dddd4444": NOW - 20 * DAY,
+                    "eeee5555": NOW - 10 * DAY, "ffff6666": NOW - 2 * DAY}
+    tags = {"v0.1.0-rc1": _tag(NOW - 99 * DAY), "v0.1.0": _tag(NOW - 98 * DAY),
+            "v0.2.0-rc1": _tag(NOW - 30 * DAY), "v0.2.0-rc2": _tag(NOW - 19 * DAY),
+            "v0.2.0": _tag(NOW - 15 * DAY), "v0.2.0.post1": _tag(NOW - 9 * DAY)}
+
+    repo = Mock()
+    repo.base_dir = str(tmp_path)
+    repo.releases_dir = str(releases_dir)
+    repo.hgit.list_tags.side_effect = lambda pattern=None: list(tags) + ["lock-ho-prod-1"]
+    repo.hgit.git_repo.tags = tags
+    repo.hgit.git_repo.commit.side_effect = lambda sha: Mock(committed_date=commit_dates[sha])
+    repo.tags = tags
+    return repo
+
+
+class TestQueries:
+
+    def test_releases_in_version_order(self, repo):
+        releases = ReleaseHistory(repo).releases()
+
+        assert [(r["release"], r["kind"]) for r in releases] == [
+            ("0.1.0-rc1", "rc"), ("0.1.0", "production"),
+            ("0.2.0-rc1", "rc"), ("0.2.0-rc2", "rc"), ("0.2.0", "production"),
+            ("0.2.0.post1", "hotfix"), ("0.3.0", "development"),
+        ]
+        assert releases[1]["tag"] == "v0.1.0"
+        assert releases[1]["date"] == NOW - 98 * DAY
+        assert releases[-1]["tag"] is None
+
+    def test_where(self, repo):
+        found = ReleaseHistory(repo).where("4-fix")
+
+        assert [(f["release"], f["merge_commit"]) for f in found] == [
+            ("0.2.0-rc2", "dddd4444"), ("0.2.0", None)]
+        assert found[0]["merge_date"] == NOW - 20 * DAY
+
+    def test_where_development_release(self, repo):
+        found = ReleaseHistory(repo).where("7-export")
+
+        assert found == [{"release": "0.3.0", "version": "0.3.0", "kind": "development",
+                          "tag": None, "date": None, "merge_commit": None,
+                          "status": "candidate", "merge_date": None}]
+
+    def test_where_unknown_patch(self, repo):
+        assert ReleaseHistory(repo).where("999-missing") == []
+
+    def test_log_version_range(self, repo):
+        releases = ReleaseHistory(repo).log("0.2.0", "0.2.0")
+
+        assert [r["release"] for r in releases] == [
+            "0.2.0-rc1", "0.2.0-rc2", "0.2.0", "0.2.0.post1"]
+
+    def test_log_since(self, repo):
+        releases = ReleaseHistory(repo).log(since_days=30, now=NOW)
+
+        assert [(r["release"], [p["patch_id"] for p in r["patches"]]) for r in releases] == [
+            ("0.2.0-rc2", ["4-fix"]), ("0.2.0.post1", ["5-hotfix"]), ("0.3.0", ["6-search"])]
+
+    @pytest.mark.parametrize("from_version, to_version", [("0.2", None), ("0.3.0", "0.1.0")])
+    def test_log_invalid_range(self, repo, from_version, to_version):
+        with pytest.raises(ReleaseHistoryError):
+            ReleaseHistory(repo).log(from_version, to_version)
+
+
+class TestIncrementalIndex:
+
+    def test_unchanged_history_not_read_again(self, repo, tmp_path, monkeypatch):
+        ReleaseHistory(repo).refresh()
+        index_file = tmp_path / ".hop" / "cache" / "release_history.json"
+        mtime = index_file.stat().st_mtime_ns
+        repo.hgit.git_repo.commit.reset_mock()
+        monkeypatch.setattr(ReleaseHistory, "_read_release_file",
+                            lambda self, path: pytest.fail(f"{path.name} read again"))
+
+        assert len(ReleaseHistory(repo).releases()) == 7
+        repo.hgit.git_repo.commit.assert_not_called()
+        assert index_file.stat().st_mtime_ns == mtime
+
+    def test_new_release_file_and_tag(self, repo, tmp_path):
+        ReleaseHistory(repo).refresh()
+        (tmp_path / ".hop" / "releases" / "0.3.0-rc1.txt").write_text("6-search:ffff6666\n")
+        repo.tags["v0.3.0-rc1"] = _tag(NOW - DAY)
+        read = []
+        original = ReleaseHistory._read_release_file
+
+        def spy(self, path):
+            read.append(path.name)
+            return original(self, path)
+
+        history = ReleaseHistory(repo)
+        history._read_release_file = spy.__get__(history)
+
+        found = history.where("6-search")
+
+        assert read == ["0.3.0-rc1.txt"]
+        assert [(f["release"], f["tag"]) for f in found] == [("0.3.0-rc1", "v0.3.0-rc1"), ("0.3.0", None)]
+
+    def test_without_git(self, repo):
+        repo.hgit = None
+
+        found = ReleaseHistory(repo).where("2-auth")
+
+        assert [(f["release"], f["merge_date"]) for f in found] == [
+            ("0.2.0-rc1", None), ("0.2.0-rc2", None), ("0.2.0", None)]
+
+
+class TestCommands:
+
+    @pytest.fixture
+    def cli_repo(self, repo, monkeypatch):
+        monkeypatch.setattr("half_orm_dev.cli.commands.release.Repo", lambda: repo)
+        monkeypatch.setattr("half_orm_dev.cli.commands.patch.Repo", lambda: repo)
+        return repo
+
+    def test_release_log(self, cli_repo):
+        from half_orm_dev.cli.commands.release import release
+
+        result = CliRunner().invoke(release, ["log", "0.1.0", "0.1.0"])
+
+        assert result.exit_code == 0
+        assert "0.1.0-rc1" in result.output
+        assert "1-init  aaaa1111" in result.output
+        assert "0.2.0" not in result.output
+
+    def test_release_log_invalid_version(self, cli_repo):
+        from half_orm_dev.cli.commands.release import release
+
+        result = CliRunner().invoke(release, ["log", "latest"])
+
+        assert result.exit_code == 2
+
+    def test_patch_where(self, cli_repo):
+        from half_orm_dev.cli.commands.patch import patch
+
+        result = CliRunner().invoke(patch, ["where", "ho-patch/5-hotfix"])
+
+        assert result.exit_code == 0
+        assert "0.2.0.post1  hotfix  eeee5555  v0.2.0.post1" in result.output
+
+    def test_patch_where_unknown(self, cli_repo):
+        from half_orm_dev.cli.commands.patch import patch
+
+        result = CliRunner().invoke(patch, ["where", "999-missing"])
+
+        assert result.exit_code == 1
@@ -225,7 +225,7 @@ class TestApplyRelease:
         # Track apply order
         apply_order = []
 
-        def track_apply(patch_id, model):
+        def track_apply(patch_id, model, **kwargs):
             apply_order.append(patch_id)
             return [f"{patch_id}.sql"]
 
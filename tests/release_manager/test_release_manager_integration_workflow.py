@@ -13,7 +13,7 @@ can see each other's changes during development.
 
 import pytest
 from pathlib import Path
-from unittest.mock import Mock, MagicMock, patch, call
+from unittest.mock import Mock, MagicMock, patch, call, ANY
 from git.exc import GitCommandError
 
 from half_orm_dev.release_manager import ReleaseManager, ReleaseManagerError
@@ -251,15 +251,15 @@ class TestApplyReleasePatches:
         assert len(apply_calls) == 5
 
         # RC1 patches first
-        assert apply_calls[0] == call("001-first", repo.model)
-        assert apply_calls[1] == call("002-second", repo.model)
+        assert apply_calls[0] == call("001-first", repo.model, timings=ANY)
+        assert apply_calls[1] == call("002-second", repo.model, timings=ANY)
 
         # RC2 patches second
-        assert apply_calls[2] == call("003-third", repo.model)
+        assert apply_calls[2] == call("003-third", repo.model, timings=ANY)
 
         # TOML patches last
-        assert apply_calls[3] == call("004-fourth", repo.model)
-        assert apply_calls[4] == call("005-fifth", repo.model)
+        assert apply_calls[3] == call("004-fourth", repo.model, timings=ANY)
+        assert apply_calls[4] == call("005-fifth", repo.model, timings=ANY)
 
     def test_restore_called_before_any_patch(self, release_manager):
         """Test that database restore happens before any patch application."""
@@ -274,7 +274,7 @@ class TestApplyReleasePatches:
         def track_restore(**kwargs):
             call_order.append('restore')
 
-        def track_apply(*args):
+        def track_apply(*args, **kwargs):
             call_order.append(f'apply:{args[0]}')
 
         repo.restore_database_from_schema = track_restore
@@ -307,8 +307,8 @@ class TestApplyReleasePatches:
         # Verify only TOML patches applied
         apply_calls = mock_patch_manager.apply_patch_files.call_args_list
         assert len(apply_calls) == 2
-        assert apply_calls[0] == call("001-first", repo.model)
-        assert apply_calls[1] == call("002-second", repo.model)
+        assert apply_calls[0] == call("001-first", repo.model, timings=ANY)
+        assert apply_calls[1] == call("002-second", repo.model, timings=ANY)
 
     def test_empty_stage_file_applies_only_rc_patches(self, release_manager):
         """Test that empty TOML file still applies RC patches."""
@@ -331,7 +331,7 @@ class TestApplyReleasePatches:
         # Verify only RC patches applied
         apply_calls = mock_patch_manager.apply_patch_files.call_args_list
         assert len(apply_calls) == 1
-        assert apply_calls[0] == call("001-first", repo.model)
+        assert apply_calls[0] == call("001-first", repo.model, timings=ANY)
 
     def test_multiple_rc_files_applied_in_order(self, release_manager):
         """Test that RC files are applied in numerical order (rc1, rc2, rc3...)."""
@@ -360,9 +360,9 @@ class TestApplyReleasePatches:
         # Verify RC files applied in correct order
         apply_calls = mock_patch_manager.apply_patch_files.call_args_list
         assert len(apply_calls) == 3
-        assert apply_calls[0] == call("001-first", repo.model)
-        assert apply_calls[1] == call("002-second", repo.model)
-        assert apply_calls[2] == call("003-third", repo.model)
+        assert apply_calls[0] == call("001-first", repo.model, timings=ANY)
+        assert apply_calls[1] == call("002-second", repo.model, timings=ANY)
+        assert apply_calls[2] == call("003-third", repo.model, timings=ANY)
 
     def test_handles_comments_and_empty_lines(self, release_manager):
         """Test that TOML format properly handles patches (no comments in TOML patch IDs)."""
@@ -381,8 +381,8 @@ class TestApplyReleasePatches:
         # Verify patches applied
         apply_calls = mock_patch_manager.apply_patch_files.call_args_list
         assert len(apply_calls) == 2
-        assert apply_calls[0] == call("001-first", repo.model)
-        assert apply_calls[1] == call("002-second", repo.model)
+        assert apply_calls[0] == call("001-first", repo.model, timings=ANY)
+        assert apply_calls[1] == call("002-second", repo.model, timings=ANY)
 
     def test_no_patches_still_restores_database(self, release_manager):
         """Test that database is restored even when there are no patches."""
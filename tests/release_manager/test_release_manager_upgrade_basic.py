@@ -13,6 +13,8 @@ import pytest
 from pathlib import Path
 from unittest.mock import Mock, call, patch, ANY
 from half_orm_dev.release_manager import ReleaseManager, ReleaseManagerError
+from half_orm_dev.database import DatabaseTransaction
+from half_orm_dev.backup import BackupOptions
 
 
 # ============================================================================
@@ -45,6 +47,8 @@ def release_manager_for_upgrade(tmp_path):
     mock_repo = Mock()
     mock_repo.name = "test_db"
     mock_repo.base_dir = tmp_path
+    mock_repo.backups_dir = str(tmp_path / ".hop" / "backups")
+    mock_repo.local_config = None
     mock_repo.releases_dir = str(releases_dir)
     mock_repo.model_dir = str(tmp_path / ".hop" / "model")
 
@@ -59,6 +63,11 @@ def release_manager_for_upgrade(tmp_path):
     mock_database.model.execute_query = Mock(return_value=[])
     mock_database.model.get_relation_class.return_value.return_value = []
     mock_database.has_createdb_privilege = Mock(return_value=False)
+    mock_database.transaction = Mock(side_effect=lambda: DatabaseTransaction(mock_database.model))
+    mock_database.relation_sizes.return_value = {}
+    mock_database.database_size.return_value = 1000
+    mock_database.data_directory.return_value = None
+    mock_database.list_snapshots.return_value = []
     mock_repo.database = mock_database
 
     # Mock HGit
@@ -96,6 +105,8 @@ def release_manager_for_snapshot(release_manager_for_upgrade):
     """Variant of release_manager_for_upgrade with CREATEDB privilege available."""
     release_mgr, mock_repo, tmp_path, releases_dir, backups_dir = release_manager_for_upgrade
     mock_repo.database.has_createdb_privilege = Mock(return_value=True)
+    # Local server with room for the snapshot
+    mock_repo.database.data_directory.return_value = str(tmp_path)
     mock_repo.database.terminate_active_connections = Mock(return_value=1)
     mock_repo.database.list_snapshots = Mock(return_value=[])
     mock_repo.database.create_snapshot = Mock()
@@ -119,14 +130,14 @@ class TestUpgradeProductionBackup:
 
         # Backup path should be returned
         assert result['backup_created'] is not None
-        assert result['backup_created'].name == "1.3.5.sql"
+        assert result['backup_created'].name == "test_db-1.3.5.sql"
 
         # Note: actual file won't exist because pg_dump is mocked
         # But pg_dump should be called with correct path
         mock_repo.database.execute_pg_command.assert_any_call(
             'pg_dump',
             'test_db',
-            '-f', str(backups_dir / "1.3.5.sql")
+            '-f', str(backups_dir / "test_db-1.3.5.sql")
         )
 
     def test_backup_created_before_validation(self, release_manager_for_upgrade):
@@ -152,7 +163,7 @@ class TestUpgradeProductionBackup:
         release_mgr, mock_repo, tmp_path, _, backups_dir = release_manager_for_upgrade
 
         # Create existing backup
-        existing_backup = backups_dir / "1.3.5.sql"
+        existing_backup = backups_dir / "test_db-1.3.5.sql"
         existing_backup.write_text("OLD BACKUP")
 
         # Execute upgrade with force
@@ -166,7 +177,7 @@ class TestUpgradeProductionBackup:
         release_mgr, mock_repo, tmp_path, _, backups_dir = release_manager_for_upgrade
 
         # Create existing backup
-        existing_backup = backups_dir / "1.3.5.sql"
+        existing_backup = backups_dir / "test_db-1.3.5.sql"
         existing_backup.write_text("OLD BACKUP")
 
         # Mock user input decline
@@ -415,3 +426,119 @@ class TestUpgradeProductionSnapshot:
         mock_repo.database.execute_pg_command.assert_any_call(
             'pg_dump', 'test_db', '-f', ANY
         )
+
+    def test_auto_strategy_dumps_when_server_lacks_space(self, release_manager_for_snapshot):
+        """Test the auto strategy falls back to pg_dump when the snapshot would not fit."""
+        release_mgr, mock_repo, _, _, _ = release_manager_for_snapshot
+        mock_repo.database.database_size.return_value = 10 * 2**30
+        mock_repo.database.data_directory.return_value = '/var/lib/postgresql/data'
+
+        with patch('half_orm_dev.release_manager.free_space', return_value=2**30):
+            result = release_mgr.upgrade_production()
+
+        mock_repo.database.create_snapshot.assert_not_called()
+        assert result['backup_strategy'] == 'dump'
+        assert result['backup_created'] is not None
+
+    def test_auto_strategy_snapshots_when_server_space_unknown(self, release_manager_for_snapshot, capsys):
+        """Test the auto strategy keeps the snapshot of a remote server with CREATEDB, with a warning."""
+        release_mgr, mock_repo, _, _, _ = release_manager_for_snapshot
+        mock_repo.database._get_connection_params.return_value = {
+            'host': 'db.example.com', 'port': 5432, 'user': 'hop', 'password': ''}
+        mock_repo.database.data_directory.return_value = None
+
+        result = release_mgr.upgrade_production()
+
+        mock_repo.database.create_snapshot.assert_called_once()
+        assert result['backup_strategy'] == 'snapshot'
+        assert result['backup_created'] is None
+        assert "Free space of the server unknown" in capsys.readouterr().out
+
+    def test_both_strategy_dumps_the_snapshot(self, release_manager_for_snapshot):
+        """Test the 'both' strategy takes the snapshot, then dumps it."""
+        release_mgr, mock_repo, _, _, _ = release_manager_for_snapshot
+
+        result = release_mgr.upgrade_production(backup_options=BackupOptions(strategy='both'))
+
+        assert result['snapshot_used'] == "test_db_hop_snap_1_3_5"
+        assert result['backup_created'].name == "test_db-1.3.5.sql"
+        mock_repo.database.execute_pg_command.assert_any_call(
+            'pg_dump', 'test_db_hop_snap_1_3_5', '-f', ANY
+        )
+
+    def test_dump_strategy_skips_snapshot(self, release_manager_for_snapshot):
+        """Test the 'dump' strategy never takes a snapshot."""
+        release_mgr, mock_repo, _, _, _ = release_manager_for_snapshot
+
+        result = release_mgr.upgrade_production(backup_options=BackupOptions(strategy='dump'))
+
+        mock_repo.database.create_snapshot.assert_not_called()
+        mock_repo.database.terminate_active_connections.assert_not_called()
+        assert result['snapshot_used'] is None
+
+    def test_snapshot_strategy_requires_createdb(self, release_manager_for_upgrade):
+        """Test the 'snapshot' strategy fails before any change without CREATEDB."""
+        release_mgr, mock_repo, _, _, _ = release_manager_for_upgrade
+
+        with pytest.raises(ReleaseManagerError, match="requires the CREATEDB privilege"):
+            release_mgr.upgrade_production(backup_options=BackupOptions(strategy='snapshot'))
+
+        mock_repo.patch_manager.apply_patch_files.assert_not_called()
+
+
+class TestUpgradeProductionRetention:
+    """Test the snapshots and backups beyond the retention are expired after an upgrade."""
+
+    @pytest.fixture
+    def snapshots(self, release_manager_for_snapshot):
+        """Snapshots of 1.3.2 to 1.3.4 on the server, plus those created by the upgrade."""
+        _, mock_repo, _, _, _ = release_manager_for_snapshot
+        database = mock_repo.database
+        names = [f"test_db_hop_snap_1_3_{patch}" for patch in (2, 3, 4)]
+        database.list_snapshots.side_effect = lambda: names + [
+            create.args[0] for create in database.create_snapshot.call_args_list]
+        database.database_size.side_effect = lambda name=None: 2**30
+        return names
+
+    def test_expired_snapshots_dropped_in_background(self, release_manager_for_snapshot, snapshots):
+        release_mgr, mock_repo, _, _, _ = release_manager_for_snapshot
+
+        result = release_mgr.upgrade_production()
+        result['retention']['thread'].join(5)
+
+        assert result['retention']['expired_snapshots'] == ["test_db_hop_snap_1_3_2"]
+        mock_repo.database.drop_snapshot.assert_called_once_with("test_db_hop_snap_1_3_2")
+        usage = result['retention']['usage']
+        assert [snapshot['name'] for snapshot in usage['snapshots']] == [
+            "test_db_hop_snap_1_3_3", "test_db_hop_snap_1_3_4", "test_db_hop_snap_1_3_5"]
+        assert usage['size'] == 3 * 2**30
+
+    def test_retention_of_backup_options(self, release_manager_for_snapshot, snapshots):
+        release_mgr, mock_repo, _, _, _ = release_manager_for_snapshot
+
+        result = release_mgr.upgrade_production(backup_options=BackupOptions(retention=1))
+        result['retention']['thread'].join(5)
+
+        assert result['retention']['expired_snapshots'] == snapshots
+
+    def test_default_retention_removes_old_backups(self, release_manager_for_upgrade):
+        release_mgr, mock_repo, _, _, backups_dir = release_manager_for_upgrade
+        for version in ("1.3.1", "1.3.2", "1.3.3", "1.3.4"):
+            (backups_dir / f"test_db-{version}.sql").write_text("OLD BACKUP")
+        mock_repo.database.execute_pg_command.side_effect = (
+            lambda *args, **kwargs: Path(args[-1]).write_text("BACKUP"))
+
+        result = release_mgr.upgrade_production()
+
+        assert sorted(path.name for path in backups_dir.iterdir()) == [
+            "test_db-1.3.3.sql", "test_db-1.3.4.sql", "test_db-1.3.5.sql"]
+        assert result['retention']['thread'] is None
+
+    def test_nothing_expired_on_failure(self, release_manager_for_snapshot, snapshots):
+        release_mgr, mock_repo, _, _, _ = release_manager_for_snapshot
+        mock_repo.patch_manager.apply_patch_files.side_effect = Exception("SQL error")
+
+        with pytest.raises(ReleaseManagerError):
+            release_mgr.upgrade_production()
+
+        mock_repo.database.drop_snapshot.assert_not_called()
@@ -12,6 +12,7 @@ import pytest
 from pathlib import Path
 from unittest.mock import Mock, call
 from half_orm_dev.release_manager import ReleaseManager, ReleaseManagerError
+from half_orm_dev.database import DatabaseTransaction
 
 
 # ============================================================================
@@ -41,6 +42,8 @@ def release_manager_for_errors(tmp_path):
     mock_repo = Mock()
     mock_repo.name = "test_db"
     mock_repo.base_dir = tmp_path
+    mock_repo.backups_dir = str(tmp_path / ".hop" / "backups")
+    mock_repo.local_config = None
     mock_repo.releases_dir = str(releases_dir)
     mock_repo.model_dir = str(tmp_path / ".hop" / "model")
 
@@ -53,6 +56,11 @@ def release_manager_for_errors(tmp_path):
     mock_database._get_connection_params = Mock(return_value={'host': '', 'port': 5432, 'user': '', 'password': ''})
     mock_database.has_createdb_privilege = Mock(return_value=False)
     mock_database.model.get_relation_class.return_value.return_value = []
+    mock_database.transaction = Mock(side_effect=lambda: DatabaseTransaction(mock_database.model))
+    mock_database.relation_sizes.return_value = {}
+    mock_database.database_size.return_value = 1000
+    mock_database.data_directory.return_value = None
+    mock_database.list_snapshots.return_value = []
     mock_repo.database = mock_database
 
     # Mock HGit
@@ -89,6 +97,8 @@ def release_manager_for_snapshot_errors(release_manager_for_errors):
     """Variant with CREATEDB privilege available for snapshot error testing."""
     release_mgr, mock_repo, tmp_path, backups_dir = release_manager_for_errors
     mock_repo.database.has_createdb_privilege = Mock(return_value=True)
+    # Local server with room for the snapshot
+    mock_repo.database.data_directory.return_value = str(tmp_path)
     mock_repo.database.terminate_active_connections = Mock(return_value=0)
     mock_repo.database.list_snapshots = Mock(return_value=[])
     mock_repo.database.create_snapshot = Mock()
@@ -110,15 +120,40 @@ class TestUpgradeProductionPatchFailures:
         # Make patch application fail
         mock_repo.patch_manager.apply_patch_files.side_effect = Exception("SQL error")
 
-        # Execute upgrade
+        # Execute upgrade (without transaction: the database must be restored)
         with pytest.raises(ReleaseManagerError) as exc_info:
-            release_mgr.upgrade_production()
+            release_mgr.upgrade_production(transaction_scope='none')
 
         # Should include rollback instructions with pg_dump restore hint
         error_msg = str(exc_info.value)
         assert "ROLLBACK INSTRUCTIONS" in error_msg
         assert "psql" in error_msg
-        assert "1.3.5.sql" in error_msg
+        assert "test_db-1.3.5.sql" in error_msg
+
+    def test_skip_backup_rollback_info(self, release_manager_for_errors):
+        """Test the instructions say no backup was made with --skip-backup."""
+        release_mgr, mock_repo, _, _ = release_manager_for_errors
+        mock_repo.patch_manager.apply_patch_files.side_effect = Exception("SQL error")
+
+        with pytest.raises(ReleaseManagerError) as exc_info:
+            release_mgr.upgrade_production(skip_backup=True, transaction_scope='none')
+
+        error_msg = str(exc_info.value)
+        assert "1. No backup was made (--skip-backup)" in error_msg
+        assert "None" not in error_msg
+
+    def test_no_restore_step_when_rolled_back(self, release_manager_for_errors):
+        """Test no restore is suggested when the failed release was rolled back."""
+        release_mgr, mock_repo, _, _ = release_manager_for_errors
+        mock_repo.patch_manager.apply_patch_files.side_effect = Exception("SQL error")
+
+        with pytest.raises(ReleaseManagerError) as exc_info:
+            release_mgr.upgrade_production()
+
+        error_msg = str(exc_info.value)
+        assert "no restore needed" in error_msg
+        assert "Restore dump" not in error_msg
+        assert "1. git checkout ho-prod-1.3.5" in error_msg
 
     def test_partial_failure_after_first_release(self, release_manager_for_errors):
         """Test failure on second release after first succeeds."""
@@ -174,7 +209,7 @@ class TestUpgradeProductionPatchFailures:
             pass
 
         # Backup should exist for rollback
-        backup_file = backups_dir / "1.3.5.sql"
+        backup_file = backups_dir / "test_db-1.3.5.sql"
         # Note: actual file won't exist in test (mocked), but path is correct
 
 
@@ -353,6 +388,170 @@ class TestUpgradeProductionConcurrency:
         # (Would need actual database connection to test properly)
 
 
+# ============================================================================
+# TRANSACTION TESTS
+# ============================================================================
+
+class TestUpgradeProductionTransactions:
+    """Test the transaction of each release (or of the whole upgrade)."""
+
+    @staticmethod
+    def _fail_on_patch(mock_repo, failing_patch):
+        def apply_patch_files(patch_id, model, transaction=None, lock_retry=None, timings=None):
+            if patch_id == failing_patch:
+                raise Exception("SQL error")
+            return []
+        mock_repo.patch_manager.apply_patch_files.side_effect = apply_patch_files
+
+    @staticmethod
+    def _prod_branches(mock_repo, files):
+        """The ho-prod-X.Y.Z branches read by --transaction=upgrade: {path: content}."""
+        files = {".hop/releases/1.3.6.txt": "456-user-auth\n789-security\n",
+                 ".hop/releases/1.3.7.txt": "999-bugfix\n", **files}
+        mock_repo.hgit.read_file_at_ref = Mock(side_effect=lambda ref, path: files.get(path, ""))
+        mock_repo.hgit.list_tree = Mock(return_value={
+            path: ('blob', f"sha-{path}") for path in files if path.startswith('Patches/')})
+
+    def test_failed_release_rolled_back(self, release_manager_for_errors):
+        """Test a failing release is rolled back, previous ones stay committed."""
+        release_mgr, mock_repo, _, _ = release_manager_for_errors
+        connection = mock_repo.database.model._connection
+        self._fail_on_patch(mock_repo, "999-bugfix")
+
+        with pytest.raises(ReleaseManagerError) as exc_info:
+            release_mgr.upgrade_production(skip_backup=True)
+
+        # 1.3.6 committed, 1.3.7 rolled back
+        assert connection.commit.call_count == 1
+        connection.rollback.assert_called_once_with()
+        assert connection.autocommit is True
+        error_msg = str(exc_info.value)
+        assert "Release 1.3.7 was rolled back: the database is at version 1.3.6" in error_msg
+        assert "ROLLBACK INSTRUCTIONS" in error_msg
+
+    def test_checkout_hint_names_last_committed_release(self, release_manager_for_errors):
+        """Test the code to check out matches the database after a partial upgrade."""
+        release_mgr, mock_repo, tmp_path, _ = release_manager_for_errors
+        (tmp_path / ".hop" / "releases" / "1.3.8.txt").write_text("1000-cleanup\n")
+        mock_tag_138 = Mock()
+        mock_tag_138.name = "v1.3.8"
+        mock_repo.hgit._HGit__git_repo.tags.append(mock_tag_138)
+        self._fail_on_patch(mock_repo, "999-bugfix")
+
+        with pytest.raises(ReleaseManagerError) as exc_info:
+            release_mgr.upgrade_production()
+
+        # 1.3.6 committed, 1.3.7 rolled back, 1.3.8 never started
+        error_msg = str(exc_info.value)
+        assert "Failed to apply release 1.3.7" in error_msg
+        assert "the database is at version 1.3.6" in error_msg
+        assert "1. git checkout ho-prod-1.3.6" in error_msg
+        assert "ho-prod-1.3.5" not in error_msg
+
+    def test_register_release_in_transaction(self, release_manager_for_errors):
+        """Test the hop_release row is part of the release transaction."""
+        release_mgr, mock_repo, _, _ = release_manager_for_errors
+        connection = mock_repo.database.model._connection
+        mock_repo.database.register_release.side_effect = Exception("DB error")
+
+        with pytest.raises(ReleaseManagerError, match="Release 1.3.6 was rolled back"):
+            release_mgr.upgrade_production(skip_backup=True)
+
+        connection.commit.assert_not_called()
+        connection.rollback.assert_called_once_with()
+
+    def test_upgrade_scope_rolls_back_all_releases(self, release_manager_for_errors):
+        """Test transaction_scope='upgrade' applies all releases or none."""
+        release_mgr, mock_repo, _, _ = release_manager_for_errors
+        connection = mock_repo.database.model._connection
+        self._prod_branches(mock_repo, {"Patches/456-user-auth/01.sql": "CREATE TABLE users ();",
+                                         "Patches/789-security/01.sql": "ALTER TABLE users ADD x int;",
+                                         "Patches/999-bugfix/01.sql": "UPDATE users SET x = 1;"})
+        self._fail_on_patch(mock_repo, "999-bugfix")
+
+        with pytest.raises(ReleaseManagerError, match="the database is at version 1.3.5"):
+            release_mgr.upgrade_production(skip_backup=True, transaction_scope='upgrade')
+
+        connection.commit.assert_not_called()
+        connection.rollback.assert_called_once_with()
+        mock_repo.database.transaction.assert_called_once_with()
+
+    def test_upgrade_scope_begin_failure(self, release_manager_for_errors):
+        """Test a failure before the first release is reported (no release applied)."""
+        release_mgr, mock_repo, _, _ = release_manager_for_errors
+        self._prod_branches(mock_repo, {"Patches/456-user-auth/01.sql": "CREATE TABLE users ();",
+                                         "Patches/789-security/01.sql": "ALTER TABLE users ADD x int;",
+                                         "Patches/999-bugfix/01.sql": "UPDATE users SET x = 1;"})
+        mock_repo.database.transaction = Mock(return_value=Mock(
+            begin=Mock(side_effect=Exception("connection lost")),
+            active=False, suspended_steps=[]))
+
+        with pytest.raises(ReleaseManagerError) as exc_info:
+            release_mgr.upgrade_production(skip_backup=True, transaction_scope='upgrade')
+
+        error_msg = str(exc_info.value)
+        assert "Upgrade failed before applying the first release: connection lost" in error_msg
+        assert "The upgrade was rolled back: the database is at version 1.3.5" in error_msg
+        mock_repo.patch_manager.apply_patch_files.assert_not_called()
+
+    def test_upgrade_scope_refused_with_non_transactional_steps(self, release_manager_for_errors):
+        """Test --transaction=upgrade is refused, before any backup, if a step would commit."""
+        release_mgr, mock_repo, _, _ = release_manager_for_errors
+        self._prod_branches(mock_repo, {
+            "Patches/456-user-auth/01.sql": "CREATE TABLE users ();",
+            "Patches/789-security/01_index.psql": "\\i index.sql",
+            "Patches/999-bugfix/01.sql": "-- hop: no-transaction\nVACUUM users;"})
+
+        with pytest.raises(ReleaseManagerError) as exc_info:
+            release_mgr.upgrade_production(transaction_scope='upgrade')
+
+        error_msg = str(exc_info.value)
+        assert "The upgrade cannot be applied in one transaction" in error_msg
+        assert "1.3.6 789-security/01_index.psql" in error_msg
+        assert "1.3.7 999-bugfix/01.sql" in error_msg
+        assert "456-user-auth" not in error_msg
+        mock_repo.database.execute_pg_command.assert_not_called()
+        mock_repo.database.transaction.assert_not_called()
+        mock_repo.patch_manager.apply_patch_files.assert_not_called()
+
+    def test_partially_committed_release_reported(self, release_manager_for_errors):
+        """Test a failure after a non-transactional step is reported as partial."""
+        release_mgr, mock_repo, _, _ = release_manager_for_errors
+
+        def apply_patch_files(patch_id, model, transaction=None, lock_retry=None, timings=None):
+            if patch_id == "789-security":
+                with transaction.suspended("789-security/01_index.psql"):
+                    pass
+                raise Exception("SQL error")
+            return []
+        mock_repo.patch_manager.apply_patch_files.side_effect = apply_patch_files
+
+        with pytest.raises(ReleaseManagerError) as exc_info:
+            release_mgr.upgrade_production(skip_backup=True)
+
+        assert ("Release 1.3.6 is partially applied: the work done up to the "
+                "non-transactional step 789-security/01_index.psql was committed"
+                in str(exc_info.value))
+
+    def test_no_transaction_scope(self, release_manager_for_errors):
+        """Test transaction_scope='none' autocommits each patch file."""
+        release_mgr, mock_repo, _, _ = release_manager_for_errors
+        self._fail_on_patch(mock_repo, "999-bugfix")
+
+        with pytest.raises(ReleaseManagerError) as exc_info:
+            release_mgr.upgrade_production(skip_backup=True, transaction_scope='none')
+
+        mock_repo.database.transaction.assert_not_called()
+        assert "DATABASE STATE" not in str(exc_info.value)
+
+    def test_invalid_scope(self, release_manager_for_errors):
+        """Test an unknown transaction scope is refused."""
+        release_mgr, _, _, _ = release_manager_for_errors
+
+        with pytest.raises(ReleaseManagerError, match="Invalid transaction scope"):
+            release_mgr.upgrade_production(transaction_scope='patch')
+
+
 # ============================================================================
 # ROLLBACK INFORMATION TESTS
 # ============================================================================
@@ -369,11 +568,11 @@ class TestUpgradeProductionRollbackInfo:
 
         # Execute upgrade
         with pytest.raises(ReleaseManagerError) as exc_info:
-            release_mgr.upgrade_production()
+            release_mgr.upgrade_production(transaction_scope='none')
 
         # Should include backup path
         error_msg = str(exc_info.value)
-        assert str(backups_dir / "1.3.5.sql") in error_msg or "1.3.5.sql" in error_msg
+        assert str(backups_dir / "test_db-1.3.5.sql") in error_msg or "test_db-1.3.5.sql" in error_msg
 
     def test_rollback_includes_psql_command(self, release_manager_for_errors):
         """Test rollback instructions include psql command."""
@@ -384,7 +583,7 @@ class TestUpgradeProductionRollbackInfo:
 
         # Execute upgrade
         with pytest.raises(ReleaseManagerError) as exc_info:
-            release_mgr.upgrade_production()
+            release_mgr.upgrade_production(transaction_scope='none')
 
         # Should include psql command
         error_msg = str(exc_info.value)
@@ -420,7 +619,7 @@ class TestUpgradeProductionSnapshotErrors:
         mock_repo.patch_manager.apply_patch_files.side_effect = Exception("SQL error")
 
         with pytest.raises(ReleaseManagerError) as exc_info:
-            release_mgr.upgrade_production()
+            release_mgr.upgrade_production(transaction_scope='none')
 
         error_msg = str(exc_info.value)
         assert "ROLLBACK INSTRUCTIONS" in error_msg
@@ -6,12 +6,20 @@ Focused on testing:
 - --to-release (partial upgrade)
 - --force (backup overwrite)
 - --skip-backup (no backup creation)
+- backup options (format, parallel jobs, retention)
+- lock_retry (lock_timeout of the SQL files)
+- duration estimate of the dry run
 """
 
+import json
 import pytest
 from pathlib import Path
 from unittest.mock import Mock, patch
 from half_orm_dev.release_manager import ReleaseManager, ReleaseManagerError
+from half_orm_dev.database import DatabaseTransaction
+from half_orm_dev.backup import BackupOptions
+from half_orm_dev.lock_retry import LockRetryPolicy
+from half_orm_dev.file_executor import TimingReport
 
 
 # ============================================================================
@@ -43,6 +51,8 @@ def release_manager_with_options(tmp_path):
     mock_repo = Mock()
     mock_repo.name = "test_db"
     mock_repo.base_dir = tmp_path
+    mock_repo.backups_dir = str(tmp_path / ".hop" / "backups")
+    mock_repo.local_config = None
     mock_repo.releases_dir = str(releases_dir)
     mock_repo.model_dir = str(tmp_path / ".hop" / "model")
 
@@ -55,6 +65,11 @@ def release_manager_with_options(tmp_path):
     mock_database._get_connection_params = Mock(return_value={'host': '', 'port': 5432, 'user': '', 'password': ''})
     mock_database.has_createdb_privilege = Mock(return_value=False)
     mock_database.model.get_relation_class.return_value.return_value = []
+    mock_database.transaction = Mock(side_effect=lambda: DatabaseTransaction(mock_database.model))
+    mock_database.relation_sizes.return_value = {}
+    mock_database.database_size.return_value = 1000
+    mock_database.data_directory.return_value = None
+    mock_database.list_snapshots.return_value = []
     mock_repo.database = mock_database
 
     # Mock HGit
@@ -114,7 +129,7 @@ class TestUpgradeProductionDryRun:
         result = release_mgr.upgrade_production(dry_run=True)
 
         # No backup should exist
-        assert not (backups_dir / "1.3.5.sql").exists()
+        assert not (backups_dir / "test_db-1.3.5.sql").exists()
 
         # pg_dump should not be called
         pg_dump_calls = [
@@ -152,7 +167,7 @@ class TestUpgradeProductionDryRun:
 
         # Should show simulation data
         assert 'backup_would_be_created' in result
-        assert result['backup_would_be_created'] == 'backups/1.3.5.sql'
+        assert result['backup_would_be_created'] == 'backups/test_db-1.3.5.sql'
 
         assert 'releases_would_apply' in result
         assert result['releases_would_apply'] == ['1.3.6', '1.3.7', '1.4.0']
@@ -164,6 +179,34 @@ class TestUpgradeProductionDryRun:
             '1.4.0': ['111-feature']
         }
 
+    def test_dry_run_estimates_duration(self, release_manager_with_options):
+        """Test dry run estimates the duration from .hop/timings/, scaled by table size."""
+        release_mgr, mock_repo, tmp_path, _ = release_manager_with_options
+        mock_repo.database.relation_sizes.return_value = {
+            'public.users': {'reltuples': 1e6, 'relpages': 1000}}
+        report = TimingReport("validate-1.3.6")
+        report.relations = {'public.users': {'reltuples': 1e3, 'relpages': 1}}
+        for patch_id, sql, seconds in [('456-user-auth', 'UPDATE users SET active = true', 0.5),
+                                       ('789-security', 'GRANT SELECT ON users TO app', 0.1)]:
+            report.steps.append({"release": None, "patch_id": patch_id, "file": "01.sql",
+                                 "kind": "sql", "status": "ok", "seconds": seconds,
+                                 "statements": [{"line": 1, "sql": sql, "seconds": seconds, "rows": None}]})
+        report.save(tmp_path)
+        staging = tmp_path / "staging"
+        staging.mkdir()
+        (staging / "upgrade.json").write_text(json.dumps({
+            "run": "upgrade-1.3.6-to-1.3.7", "started": 1.0, "relations": {},
+            "steps": [{"patch_id": "999-bugfix", "file": "01.py", "kind": "python",
+                       "status": "ok", "seconds": 30.0, "statements": []}]}))
+
+        result = release_mgr.upgrade_production(dry_run=True, timing_sources=[str(staging)])
+
+        estimation = result['duration_estimate']
+        assert estimation['releases'] == {'1.3.6': 500.1, '1.3.7': 30.0, '1.4.0': 0.0}
+        assert [(patch['patch_id'], patch['dominant']) for patch in estimation['patches']] == [
+            ('456-user-auth', True), ('789-security', False), ('999-bugfix', False)]
+        assert estimation['unknown'] == ['111-feature']
+
 
 # ============================================================================
 # TO-RELEASE TESTS
@@ -248,7 +291,7 @@ class TestUpgradeProductionForceBackup:
         release_mgr, mock_repo, _, backups_dir = release_manager_with_options
 
         # Create existing backup
-        existing_backup = backups_dir / "1.3.5.sql"
+        existing_backup = backups_dir / "test_db-1.3.5.sql"
         existing_backup.write_text("OLD BACKUP CONTENT")
 
         # Execute with force
@@ -263,7 +306,7 @@ class TestUpgradeProductionForceBackup:
         release_mgr, mock_repo, _, backups_dir = release_manager_with_options
 
         # Create existing backup
-        existing_backup = backups_dir / "1.3.5.sql"
+        existing_backup = backups_dir / "test_db-1.3.5.sql"
         existing_backup.write_text("OLD BACKUP")
 
         # Mock user declining
@@ -276,7 +319,7 @@ class TestUpgradeProductionForceBackup:
         release_mgr, mock_repo, _, backups_dir = release_manager_with_options
 
         # Create existing backup
-        existing_backup = backups_dir / "1.3.5.sql"
+        existing_backup = backups_dir / "test_db-1.3.5.sql"
         existing_backup.write_text("OLD BACKUP")
 
         # Mock user accepting
@@ -303,7 +346,7 @@ class TestUpgradeProductionSkipBackup:
 
         # No backup should be created
         assert result['backup_created'] is None
-        assert not (backups_dir / "1.3.5.sql").exists()
+        assert not (backups_dir / "test_db-1.3.5.sql").exists()
 
     def test_skip_backup_still_applies_patches(self, release_manager_with_options):
         """Test skip_backup doesn't affect patch application."""
@@ -329,7 +372,7 @@ class TestUpgradeProductionCombinedOptions:
         release_mgr, mock_repo, _, backups_dir = release_manager_with_options
 
         # Create existing backup
-        (backups_dir / "1.3.5.sql").write_text("OLD")
+        (backups_dir / "test_db-1.3.5.sql").write_text("OLD")
 
         # Execute with both options
         result = release_mgr.upgrade_production(
@@ -356,3 +399,105 @@ class TestUpgradeProductionCombinedOptions:
         # Should be dry run (ignores backup options)
         assert result['status'] == 'dry_run'
         assert 'backup_would_be_created' in result
+
+    def test_dry_run_skip_backup_creates_no_backup(self, release_manager_with_options):
+        """Test dry run with --skip-backup announces neither dump nor snapshot."""
+        release_mgr, _, _, _ = release_manager_with_options
+
+        result = release_mgr.upgrade_production(dry_run=True, skip_backup=True)
+
+        assert result['backup_strategy'] is None
+        assert result['backup_would_be_created'] is None
+        assert result['snapshot_would_be_created'] is None
+
+    def test_dry_run_snapshot_creates_no_dump(self, release_manager_with_options):
+        """Test dry run with the snapshot strategy announces no dump file."""
+        release_mgr, mock_repo, _, _ = release_manager_with_options
+        mock_repo.database.has_createdb_privilege.return_value = True
+
+        result = release_mgr.upgrade_production(
+            dry_run=True, backup_options=BackupOptions(strategy='snapshot'))
+
+        assert result['backup_would_be_created'] is None
+        assert result['snapshot_would_be_created'] is not None
+
+
+# ============================================================================
+# BACKUP OPTIONS TESTS
+# ============================================================================
+
+class TestUpgradeProductionBackupOptions:
+    """Test format, parallel jobs and retention of the pg_dump backup."""
+
+    def test_directory_format_dumps_in_parallel(self, release_manager_with_options):
+        """Test the directory format passes -F d -j N to pg_dump."""
+        release_mgr, mock_repo, _, backups_dir = release_manager_with_options
+        options = BackupOptions(format='directory', jobs=4, compress='zstd:3')
+
+        result = release_mgr.upgrade_production(backup_options=options)
+
+        assert result['backup_created'] == backups_dir / "test_db-1.3.5.dir"
+        mock_repo.database.execute_pg_command.assert_any_call(
+            'pg_dump', '-F', 'd', '-j', '4', '-Z', 'zstd:3',
+            'test_db', '-f', str(backups_dir / "test_db-1.3.5.dir")
+        )
+
+    def test_settings_of_local_config(self, release_manager_with_options):
+        """Test the backup settings of .hop/local_config are used by default."""
+        release_mgr, mock_repo, _, backups_dir = release_manager_with_options
+        mock_repo.local_config = Mock(backup_strategy=None, backup_format='custom', backup_jobs=None,
+                                      backup_compress=None, backup_retention=None)
+
+        result = release_mgr.upgrade_production()
+
+        assert result['backup_created'] == backups_dir / "test_db-1.3.5.dump"
+
+    def test_invalid_local_config_raises(self, release_manager_with_options):
+        """Test invalid backup settings are reported before any change."""
+        release_mgr, mock_repo, _, _ = release_manager_with_options
+        mock_repo.local_config = Mock(backup_strategy=None, backup_format='plain', backup_jobs=4,
+                                      backup_compress=None, backup_retention=None)
+
+        with pytest.raises(ReleaseManagerError, match="directory format"):
+            release_mgr.upgrade_production()
+
+        mock_repo.database.execute_pg_command.assert_not_called()
+
+    def test_retention_prunes_old_backups(self, release_manager_with_options):
+        """Test the oldest backups are removed after a successful upgrade."""
+        release_mgr, mock_repo, _, backups_dir = release_manager_with_options
+        for name in ("test_db-1.3.2.sql", "test_db-1.3.3.dump", "test_db-1.3.4.sql"):
+            (backups_dir / name).write_text("OLD BACKUP")
+        mock_repo.database.execute_pg_command.side_effect = (
+            lambda *args: Path(args[-1]).write_text("BACKUP"))
+
+        release_mgr.upgrade_production(backup_options=BackupOptions(retention=2))
+
+        assert sorted(path.name for path in backups_dir.iterdir()) == ["test_db-1.3.4.sql", "test_db-1.3.5.sql"]
+
+    def test_failed_upgrade_keeps_backups(self, release_manager_with_options):
+        """Test nothing is pruned when the upgrade fails."""
+        release_mgr, mock_repo, _, backups_dir = release_manager_with_options
+        (backups_dir / "test_db-1.3.2.sql").write_text("OLD BACKUP")
+        mock_repo.patch_manager.apply_patch_files.side_effect = Exception("Patch failed")
+
+        with pytest.raises(ReleaseManagerError, match="pg_restore --clean --if-exists -j 2"):
+            release_mgr.upgrade_production(
+                backup_options=BackupOptions(format='directory', jobs=2, retention=1),
+                transaction_scope='none')
+
+        assert (backups_dir / "test_db-1.3.2.sql").exists()
+
+
+class TestUpgradeProductionLockRetry:
+    """Test the lock_timeout policy reaches the SQL files of each patch."""
+
+    def test_lock_retry_passed_to_patch_files(self, release_manager_with_options):
+        release_mgr, mock_repo, _, _ = release_manager_with_options
+        policy = LockRetryPolicy(lock_timeout=3, retries=10)
+
+        release_mgr.upgrade_production(skip_backup=True, lock_retry=policy)
+
+        calls = mock_repo.patch_manager.apply_patch_files.call_args_list
+        assert calls
+        assert all(call.kwargs['lock_retry'] is policy for call in calls)
@@ -12,6 +12,7 @@ import pytest
 from pathlib import Path
 from unittest.mock import Mock, call
 from half_orm_dev.release_manager import ReleaseManager
+from half_orm_dev.database import DatabaseTransaction
 
 
 # ============================================================================
@@ -55,6 +56,11 @@ def release_manager_multi_version(tmp_path):
     mock_database.register_release = Mock()
     mock_database._get_connection_params = Mock(return_value={'host': '', 'port': 5432, 'user': '', 'password': ''})
     mock_database.model.get_relation_class.return_value.return_value = []
+    mock_database.transaction = Mock(side_effect=lambda: DatabaseTransaction(mock_database.model))
+    mock_database.relation_sizes.return_value = {}
+    mock_database.database_size.return_value = 1000
+    mock_database.data_directory.return_value = None
+    mock_database.list_snapshots.return_value = []
     mock_repo.database = mock_database
 
     # Mock HGit
@@ -294,6 +300,11 @@ class TestUpgradeProductionComplexScenarios:
         mock_database.register_release = Mock()
         mock_database._get_connection_params = Mock(return_value={'host': '', 'port': 5432, 'user': '', 'password': ''})
         mock_database.model.get_relation_class.return_value.return_value = []
+        mock_database.transaction = Mock(side_effect=lambda: DatabaseTransaction(mock_database.model))
+        mock_database.relation_sizes.return_value = {}
+        mock_database.database_size.return_value = 1000
+        mock_database.data_directory.return_value = None
+        mock_database.list_snapshots.return_value = []
         mock_repo.database = mock_database
 
         # Mock HGit with all tags
@@ -0,0 +1,127 @@
+"""
+Tests for the fetch-freshness cache of check_and_update().
+
+The time of the last fetch from origin is recorded in .hop/local_config.
+The automatic (silent) check uses local refs while that fetch is within
+the freshness window; an explicit check always fetches.
+"""
+
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from half_orm_dev.repo import Repo, LocalConfig
+
+
+class TestLocalConfigFetchFreshness:
+
+    def test_defaults(self, tmp_path):
+        local_config = LocalConfig(str(tmp_path))
+
+        assert local_config.last_fetch is None
+        assert local_config.fetch_freshness == LocalConfig.DEFAULT_FETCH_FRESHNESS
+        assert not local_config.is_fetch_fresh()
+        assert not (tmp_path / '.hop' / 'local_config').exists()
+
+    def test_round_trip(self, tmp_path):
+        local_config = LocalConfig(str(tmp_path))
+        local_config.backups_dir = '/var/backups/hop'
+        local_config.fetch_freshness = 60
+        local_config.last_fetch = 1704123456.5
+
+        reloaded = LocalConfig(str(tmp_path))
+
+        assert reloaded.backups_dir == '/var/backups/hop'
+        assert reloaded.fetch_freshness == 60
+        assert reloaded.last_fetch == 1704123456.5
+
+    @pytest.mark.parametrize('age, freshness, fresh', [
+        (10, 300, True),
+        (400, 300, False),
+        (10, 0, False),      # 0: always fetch
+        (-10, 300, False),   # clock went backwards
+        (-0.0005, 300, True),  # clock jitter
+    ])
+    def test_is_fetch_fresh(self, tmp_path, age, freshness, fresh):
+        local_config = LocalConfig(str(tmp_path))
+        local_config.fetch_freshness = freshness
+        local_config.last_fetch = 1000.0
+
+        assert local_config.is_fetch_fresh(now=1000.0 + age) is fresh
+
+    def test_last_fetch_saved_unrounded(self, tmp_path):
+        local_config = LocalConfig(str(tmp_path))
+        local_config.fetch_freshness = 300
+        local_config.last_fetch = 1704123456.0006
+
+        reloaded = LocalConfig(str(tmp_path))
+
+        assert reloaded.last_fetch == 1704123456.0006
+        assert reloaded.is_fetch_fresh(now=1704123456.0006)
+
+    def test_invalid_values_ignored(self, tmp_path):
+        (tmp_path / '.hop').mkdir()
+        (tmp_path / '.hop' / 'local_config').write_text(
+            "[local]\nlast_fetch = yesterday\nfetch_freshness = soon\n")
+
+        local_config = LocalConfig(str(tmp_path))
+
+        assert local_config.last_fetch is None
+        assert local_config.fetch_freshness == LocalConfig.DEFAULT_FETCH_FRESHNESS
+
+
+class TestCheckAndUpdateFetch:
+
+    @pytest.fixture
+    def repo(self, tmp_path):
+        (tmp_path / '.hop').mkdir()
+        (tmp_path / '.hop' / 'config').write_text("[halfORM]\n")
+        repo = Mock(spec=Repo)
+        repo._Repo__base_dir = str(tmp_path)
+        repo._Repo__local_config = LocalConfig(str(tmp_path))
+        repo._patch_directory = None
+        repo.releases_dir = str(tmp_path / '.hop' / 'releases')
+        repo.hgit = Mock()
+        repo.hgit.git_repo.is_dirty.return_value = False
+        repo.hgit.sync_active_branches.return_value = {
+            'synced': [], 'skipped': [], 'errors': []}
+        repo.check_and_update = Repo.check_and_update.__get__(repo, Repo)
+        return repo
+
+    def test_silent_fresh_uses_local_refs(self, repo):
+        repo._Repo__local_config.last_fetch = time.time()
+
+        result = repo.check_and_update(silent=True)
+
+        assert result['fetched'] is False
+        repo.hgit.fetch_from_origin.assert_not_called()
+        repo.hgit.sync_active_branches.assert_called_once_with(pattern="ho-*", fetch=False)
+        repo.hgit.update_snapshot.assert_called_once_with(fetch=False)
+        assert repo.hgit.get_active_branches_status.call_args.kwargs['fetch'] is False
+
+    def test_silent_stale_fetches_once(self, repo):
+        repo._Repo__local_config.last_fetch = time.time() - 3600
+
+        result = repo.check_and_update(silent=True)
+
+        assert result['fetched'] is True
+        repo.hgit.fetch_from_origin.assert_called_once_with()
+        repo.hgit.git_repo.remotes.origin.pull.assert_not_called()
+
+    def test_explicit_check_always_fetches(self, repo):
+        repo._Repo__local_config.last_fetch = time.time()
+
+        result = repo.check_and_update(silent=False, dry_run=True)
+
+        assert result['fetched'] is True
+        repo.hgit.fetch_from_origin.assert_called_once_with()
+
+    def test_offline_fetch_is_not_fatal(self, repo):
+        repo.hgit.fetch_from_origin.side_effect = Exception("could not resolve host")
+
+        result = repo.check_and_update(silent=True)
+
+        assert result['fetched'] is False
+        repo.hgit.sync_active_branches.assert_called_once()
+
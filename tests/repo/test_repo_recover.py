@@ -11,7 +11,7 @@ from half_orm_dev.repo import Repo, RepoError
 
 BEFORE_SHA = 'aabbccdd' * 4
 CURRENT_SHA = 'deadbeef' * 4
-LOCK_TAG = 'lock-ho-release-1.0.0-1704123456789'
+LOCK_TAG = 'refs/hop-locks/ho-release/1.0.0:' + '0123abcd' * 5
 
 
 class TestRecoverLockGuard:
@@ -90,13 +90,16 @@ class TestRecover:
     def test_lock_expired_on_origin_cleans_up(self, mock_repo):
         repo, tmp_path = mock_repo
         self._write_lock(tmp_path)
-        repo.hgit._HGit__git_repo.git.ls_remote.return_value = ''  # not found
+        repo.hgit.is_lock_held.return_value = False
         repo.hgit._HGit__git_repo.git.for_each_ref.return_value = ''
 
         result = repo.recover()
 
         assert any('Lock tag not found' in e for e in result['errors'])
         assert not (tmp_path / '.git' / 'hop-sync-lock').exists()
+        # The local copy of the lock is deleted too (only if it is still this lock)
+        lock_ref, lock_sha = LOCK_TAG.rsplit(':', 1)
+        repo.hgit._HGit__git_repo.git.update_ref.assert_any_call('-d', lock_ref, lock_sha)
 
     # --- Phase 2 completion: branch has sync commit, push it ---
 
@@ -105,7 +108,7 @@ class TestRecover:
         self._write_lock(tmp_path)
 
         branch = 'ho-release/1.0.0'
-        repo.hgit._HGit__git_repo.git.ls_remote.return_value = f'abc\trefs/tags/{LOCK_TAG}'
+        repo.hgit.is_lock_held.return_value = True
         repo.hgit._HGit__git_repo.git.for_each_ref.return_value = (
             f'refs/hop/sync/before/{branch} {BEFORE_SHA}'
         )
@@ -126,7 +129,7 @@ class TestRecover:
         self._write_lock(tmp_path)
 
         branch = 'ho-release/1.0.0'
-        repo.hgit._HGit__git_repo.git.ls_remote.return_value = f'abc\trefs/tags/{LOCK_TAG}'
+        repo.hgit.is_lock_held.return_value = True
         repo.hgit._HGit__git_repo.git.for_each_ref.return_value = (
             f'refs/hop/sync/before/{branch} {BEFORE_SHA}'
         )
@@ -151,7 +154,7 @@ class TestRecover:
 
         branch_push = 'ho-release/1.0.0'
         branch_clean = 'ho-patch/42-foo'
-        repo.hgit._HGit__git_repo.git.ls_remote.return_value = f'abc\trefs/tags/{LOCK_TAG}'
+        repo.hgit.is_lock_held.return_value = True
         repo.hgit._HGit__git_repo.git.for_each_ref.return_value = (
             f'refs/hop/sync/before/{branch_push} {BEFORE_SHA}\n'
             f'refs/hop/sync/before/{branch_clean} {BEFORE_SHA}'
@@ -175,7 +178,7 @@ class TestRecover:
         repo, tmp_path = mock_repo
         self._write_lock(tmp_path)
 
-        repo.hgit._HGit__git_repo.git.ls_remote.return_value = f'abc\trefs/tags/{LOCK_TAG}'
+        repo.hgit.is_lock_held.return_value = True
         repo.hgit._HGit__git_repo.git.for_each_ref.return_value = ''
 
         result = repo.recover()
@@ -190,7 +193,7 @@ class TestRecover:
         self._write_lock(tmp_path)
 
         branch = 'ho-release/1.0.0'
-        repo.hgit._HGit__git_repo.git.ls_remote.return_value = f'abc\trefs/tags/{LOCK_TAG}'
+        repo.hgit.is_lock_held.return_value = True
         repo.hgit._HGit__git_repo.git.for_each_ref.return_value = (
             f'refs/hop/sync/before/{branch} {BEFORE_SHA}'
         )
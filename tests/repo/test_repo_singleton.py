@@ -339,28 +339,28 @@ devel = True
         instances = []
 
         def create_repo():
-            with patch('os.path.abspath') as mock_abspath:
-                mock_abspath.return_value = temp_hop_repo
-
-                # CORRECTION: Retirer le patch de Changelog qui n'existe plus
-                with patch('half_orm_dev.repo.Database') as mock_db, \
-                     patch('half_orm_dev.repo.HGit') as mock_hgit:
+            # Add small delay to increase chance of race condition
+            time.sleep(0.01)
+            repo = Repo()
+            instances.append(repo)
 
-                    # Add small delay to increase chance of race condition
-                    time.sleep(0.01)
-                    repo = Repo()
-                    instances.append(repo)
+        # Patch once for all threads: patching os.path.abspath from several
+        # threads at once can leave the mock in place after the test.
+        with patch('os.path.abspath') as mock_abspath, \
+             patch('half_orm_dev.repo.Database') as mock_db, \
+             patch('half_orm_dev.repo.HGit') as mock_hgit:
+            mock_abspath.return_value = temp_hop_repo
 
-        # Create multiple threads
-        threads = [threading.Thread(target=create_repo) for _ in range(5)]
+            # Create multiple threads
+            threads = [threading.Thread(target=create_repo) for _ in range(5)]
 
-        # Start all threads
-        for thread in threads:
-            thread.start()
+            # Start all threads
+            for thread in threads:
+                thread.start()
 
-        # Wait for all threads
-        for thread in threads:
-            thread.join()
+            # Wait for all threads
+            for thread in threads:
+                thread.join()
 
         # Current implementation is NOT thread-safe - multiple instances may be created
         # This documents the current behavior rather than enforcing thread safety
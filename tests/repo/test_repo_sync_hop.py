@@ -2,12 +2,27 @@
 Tests for Repo.sync_hop_to_active_branches() method.
 
 Tests the automatic synchronization of .hop/ directory from ho-prod to active branches.
+Sync commits are built with git plumbing: no checkout of the target branches.
 """
 
+import git
 import pytest
-from pathlib import Path
-from unittest.mock import Mock, MagicMock, patch, call
-from half_orm_dev.repo import Repo
+from unittest.mock import Mock, patch
+from half_orm_dev.hgit import HGit
+from half_orm_dev.repo import Repo, RepoError
+
+
+SOURCE_FILES = {'.hop/config': ('100644', 'c0ffee01')}
+TARGET_FILES = {'.hop/config': ('100644', 'c0ffee00')}
+
+
+def _branch_refs(*branches):
+    """read_branch_refs() result where every branch is in sync with origin."""
+    return {
+        'local': {b: {'sha': f'sha-{b}', 'upstream': f'refs/remotes/origin/{b}', 'track': (0, 0)}
+                  for b in branches},
+        'remote': {b: f'sha-{b}' for b in branches},
+    }
 
 
 class TestRepoSyncHop:
@@ -16,57 +31,42 @@ class TestRepoSyncHop:
     @pytest.fixture
     def mock_repo(self, tmp_path):
         """Create a mock Repo with necessary structure."""
-        # Create .hop directory
-        hop_dir = tmp_path / '.hop'
-        hop_dir.mkdir()
-        (hop_dir / 'config').write_text('[halfORM]\nhop_version = "0.17.0"\n')
-
-        # Create model directory
-        model_dir = hop_dir / 'model'
-        model_dir.mkdir()
-
-        # Mock Repo instance
         repo = Mock(spec=Repo)
         repo.base_dir = str(tmp_path)
-        repo.model_dir = str(model_dir)
-        repo.config = Mock()
-        repo.config.hop_version = "0.17.0"
-
-        # Mock HGit
         repo.hgit = Mock()
         repo.hgit.branch = 'ho-prod'
         repo.hgit._HGit__git_repo = Mock()
-        repo.hgit.is_branch_synced = Mock(return_value=(True, "synced"))
+        repo.hgit._branch_sync_counts = Mock(return_value=(0, 0))
+        repo.hgit.holds_branch_lock = Mock(return_value=True)
+        repo.hgit.commit_tree_update = Mock(side_effect=lambda branch, *a, **kw: f'new-{branch}')
+        repo.hgit.push_branches = Mock()
 
-        # Bind the real method to the mock
-        repo.sync_hop_to_active_branches = Repo.sync_hop_to_active_branches.__get__(repo, Repo)
+        def list_tree(ref, *paths):
+            return dict(SOURCE_FILES if ref == repo.hgit.branch else TARGET_FILES)
 
-        return repo, tmp_path
+        repo.hgit.list_tree = Mock(side_effect=list_tree)
 
-    def test_sync_from_patch_branch(self, mock_repo):
-        """Test sync works from any branch (e.g., patch branch)."""
-        repo, tmp_path = mock_repo
-        repo.hgit.branch = 'ho-patch/123-test'
+        # Bind the real methods to the mock
+        repo.sync_hop_to_active_branches = Repo.sync_hop_to_active_branches.__get__(repo, Repo)
+        repo.push_synced_branches = Repo.push_synced_branches.__get__(repo, Repo)
 
-        # Mock get_active_branches_status
+        return repo
+
+    def _set_branches(self, repo, patch_branches=(), release_branches=()):
         repo.hgit.get_active_branches_status.return_value = {
-            'patch_branches': [{'name': 'ho-patch/123-test'}, {'name': 'ho-patch/456-other'}],
-            'release_branches': [{'name': 'ho-release/0.17.0'}]
+            'patch_branches': [{'name': b} for b in patch_branches],
+            'release_branches': [{'name': b} for b in release_branches],
         }
+        repo.hgit.read_branch_refs.return_value = _branch_refs(
+            'ho-prod', *patch_branches, *release_branches)
 
-        # Mock git operations
-        repo.hgit.checkout = Mock()
-        repo.hgit.add = Mock()
-        repo.hgit.commit = Mock()
-        repo.hgit.push_branch = Mock()
-        repo.hgit._HGit__git_repo.git.checkout = Mock()
-        repo.hgit._HGit__git_repo.git.status = Mock(return_value='M .hop/config\n')
-
-        # Mock Config reload
-        with patch('half_orm_dev.repo.Config') as MockConfig:
-            MockConfig.return_value = repo.config
+    def test_sync_from_patch_branch(self, mock_repo):
+        """Test sync works from any branch (e.g., patch branch)."""
+        repo = mock_repo
+        repo.hgit.branch = 'ho-patch/123-test'
+        self._set_branches(repo, ['ho-patch/123-test', 'ho-patch/456-other'], ['ho-release/0.17.0'])
 
-            result = repo.sync_hop_to_active_branches("test")
+        result = repo.sync_hop_to_active_branches("test")
 
         # Should sync to ho-prod, ho-release and other patch branch (not self)
         assert len(result['synced_branches']) == 3
@@ -77,13 +77,8 @@ class TestRepoSyncHop:
 
     def test_sync_no_active_branches(self, mock_repo):
         """Test sync with no active branches."""
-        repo, tmp_path = mock_repo
-
-        # Mock get_active_branches_status to return empty lists
-        repo.hgit.get_active_branches_status.return_value = {
-            'patch_branches': [],
-            'release_branches': []
-        }
+        repo = mock_repo
+        self._set_branches(repo)
 
         result = repo.sync_hop_to_active_branches("test")
 
@@ -92,266 +87,133 @@ class TestRepoSyncHop:
 
     def test_sync_single_branch_with_changes(self, mock_repo):
         """Test sync to single branch with changes."""
-        repo, tmp_path = mock_repo
-
-        # Mock get_active_branches_status
-        repo.hgit.get_active_branches_status.return_value = {
-            'patch_branches': [{'name': 'ho-patch/123-test'}],
-            'release_branches': []
-        }
+        repo = mock_repo
+        self._set_branches(repo, ['ho-patch/123-test'])
 
-        # Mock git operations
-        repo.hgit.checkout = Mock()
-        repo.hgit.add = Mock()
-        repo.hgit.commit = Mock()
-        repo.hgit.push_branch = Mock()
-        repo.hgit._HGit__git_repo.git.checkout = Mock()
-        repo.hgit._HGit__git_repo.git.status = Mock(return_value='M .hop/config\n')
+        result = repo.sync_hop_to_active_branches("test sync")
 
-        # Mock Config reload
-        with patch('half_orm_dev.repo.Config') as MockConfig:
-            MockConfig.return_value = repo.config
+        assert result['synced_branches'] == ['ho-patch/123-test']
+        assert result['errors'] == []
+        assert result['branch_commits'] == {'ho-patch/123-test': 'new-ho-patch/123-test'}
+        repo.hgit.commit_tree_update.assert_called_once_with(
+            'ho-patch/123-test', 'sha-ho-patch/123-test', SOURCE_FILES,
+            '[HOP] Sync .hop/ from ho-prod (test sync)', old_sha='sha-ho-patch/123-test')
+        repo.hgit.push_branches.assert_called_once_with(['ho-patch/123-test'], atomic=True)
 
-            result = repo.sync_hop_to_active_branches("test sync")
+    def test_sync_never_checks_out(self, mock_repo):
+        """Target branches are updated through refs, the working tree never moves."""
+        repo = mock_repo
+        self._set_branches(repo, ['ho-patch/123-test', 'ho-patch/456-feature'])
 
-        # Verify sync was successful
-        assert len(result['synced_branches']) == 1
-        assert 'ho-patch/123-test' in result['synced_branches']
-        assert len(result['errors']) == 0
+        repo.sync_hop_to_active_branches("test sync")
 
-        # Verify git operations
-        repo.hgit.checkout.assert_any_call('ho-patch/123-test')
-        repo.hgit._HGit__git_repo.git.checkout.assert_called_with('ho-prod', '--', '.hop/')
-        repo.hgit.add.assert_called_with('.hop/')
-        repo.hgit.commit.assert_called_once()
-        repo.hgit.push_branch.assert_called_with('ho-patch/123-test')
+        repo.hgit.checkout.assert_not_called()
+        repo.hgit.commit.assert_not_called()
+        repo.hgit._HGit__git_repo.git.checkout.assert_not_called()
 
     def test_sync_branch_no_changes(self, mock_repo):
         """Test sync to branch with no changes."""
-        repo, tmp_path = mock_repo
-
-        # Mock get_active_branches_status
-        repo.hgit.get_active_branches_status.return_value = {
-            'patch_branches': [{'name': 'ho-patch/123-test'}],
-            'release_branches': []
-        }
-
-        # Mock git operations - no changes
-        repo.hgit.checkout = Mock()
-        repo.hgit.add = Mock()
-        repo.hgit._HGit__git_repo.git.checkout = Mock()
-        repo.hgit._HGit__git_repo.git.status = Mock(return_value='')  # Empty = no changes
+        repo = mock_repo
+        self._set_branches(repo, ['ho-patch/123-test'])
+        repo.hgit.list_tree = Mock(return_value=dict(SOURCE_FILES))
 
-        # Mock Config reload
-        with patch('half_orm_dev.repo.Config') as MockConfig:
-            MockConfig.return_value = repo.config
-
-            result = repo.sync_hop_to_active_branches("test sync")
+        result = repo.sync_hop_to_active_branches("test sync")
 
         # Verify branch was skipped
-        assert len(result['skipped_branches']) == 1
-        assert 'ho-patch/123-test' in result['skipped_branches']
+        assert result['skipped_branches'] == ['ho-patch/123-test']
         assert len(result['synced_branches']) == 0
+        repo.hgit.commit_tree_update.assert_not_called()
 
     def test_sync_multiple_branches(self, mock_repo):
         """Test sync to multiple branches."""
-        repo, tmp_path = mock_repo
-
-        # Mock get_active_branches_status
-        repo.hgit.get_active_branches_status.return_value = {
-            'patch_branches': [
-                {'name': 'ho-patch/123-test'},
-                {'name': 'ho-patch/456-feature'}
-            ],
-            'release_branches': [
-                {'name': 'ho-release/0.17.0'}
-            ]
-        }
+        repo = mock_repo
+        self._set_branches(repo, ['ho-patch/123-test', 'ho-patch/456-feature'], ['ho-release/0.17.0'])
 
-        # Mock git operations
-        repo.hgit.checkout = Mock()
-        repo.hgit.add = Mock()
-        repo.hgit.commit = Mock()
-        repo.hgit.push_branch = Mock()
-        repo.hgit._HGit__git_repo.git.checkout = Mock()
-        repo.hgit._HGit__git_repo.git.status = Mock(return_value='M .hop/config\n')
+        result = repo.sync_hop_to_active_branches("test sync")
 
-        # Mock Config reload
-        with patch('half_orm_dev.repo.Config') as MockConfig:
-            MockConfig.return_value = repo.config
-
-            result = repo.sync_hop_to_active_branches("test sync")
-
-        # Verify all branches synced
+        # Verify all branches synced, with a single push
         assert len(result['synced_branches']) == 3
         assert 'ho-patch/123-test' in result['synced_branches']
         assert 'ho-patch/456-feature' in result['synced_branches']
         assert 'ho-release/0.17.0' in result['synced_branches']
-
-    def test_sync_branch_checkout_error_raises(self, mock_repo):
-        """Phase 1 checkout failure on a non-ho-prod branch raises RepoError and rolls back."""
-        from half_orm_dev.repo import RepoError
-        repo, tmp_path = mock_repo
-        # Use ho-prod as source so it is excluded from targets; only patch
-        # branches remain, keeping ordering predictable.
-        repo.hgit.branch = 'ho-prod'
-
-        repo.hgit.get_active_branches_status.return_value = {
-            'patch_branches': [
-                {'name': 'ho-patch/123-test'},
-                {'name': 'ho-patch/456-feature'}
-            ],
-            'release_branches': []
-        }
-
-        def checkout_side_effect(branch):
-            if branch == 'ho-patch/123-test':
-                raise Exception("Checkout failed")
-
-        repo.hgit.checkout = Mock(side_effect=checkout_side_effect)
-        repo.hgit.add = Mock()
-        repo.hgit.commit = Mock()
-        repo.hgit.push_branch = Mock()
-        repo.hgit._HGit__git_repo.git.checkout = Mock()
-        repo.hgit._HGit__git_repo.git.reset = Mock()
-        repo.hgit._HGit__git_repo.git.status = Mock(return_value='M .hop/config\n')
-
-        with patch('half_orm_dev.repo.Config') as MockConfig:
-            MockConfig.return_value = repo.config
-            with pytest.raises(RepoError, match="Sync commit failed on 'ho-patch/123-test'"):
-                repo.sync_hop_to_active_branches("test sync")
-
-        # ho-patch/456-feature was never checked out
-        checked_out = [str(c) for c in repo.hgit.checkout.call_args_list]
-        assert not any('456-feature' in c for c in checked_out)
+        repo.hgit.push_branches.assert_called_once()
+
+    def test_sync_push_failure_reported_for_all_branches(self, mock_repo):
+        """An atomic push failure leaves every branch unpushed, with its recovery ref."""
+        repo = mock_repo
+        self._set_branches(repo, ['ho-patch/123-test', 'ho-patch/456-feature'])
+        repo.hgit.push_branches = Mock(side_effect=Exception("rejected"))
+
+        result = repo.sync_hop_to_active_branches("test sync")
+
+        assert result['synced_branches'] == []
+        assert len(result['errors']) == 2
+        assert all('push failed: rejected' in e for e in result['errors'])
+        deleted = [c for c in repo.hgit._HGit__git_repo.git.update_ref.call_args_list
+                   if c[0][0] == '-d']
+        assert deleted == []
+
+    def test_sync_commit_error_raises(self, mock_repo):
+        """Phase 1 failure on a non-ho-prod branch raises RepoError and rolls back."""
+        repo = mock_repo
+        self._set_branches(repo, ['ho-patch/123-test', 'ho-patch/456-feature'])
+
+        def commit_tree_update(branch, *args, **kwargs):
+            if branch == 'ho-patch/456-feature':
+                raise Exception("update-ref failed")
+            return f'new-{branch}'
+
+        repo.hgit.commit_tree_update = Mock(side_effect=commit_tree_update)
+
+        with pytest.raises(RepoError, match="Sync commit failed on 'ho-patch/456-feature'"):
+            repo.sync_hop_to_active_branches("test sync")
+
+        # The first branch is moved back to the SHA the sync commit was built on
+        repo.hgit._HGit__git_repo.git.update_ref.assert_any_call(
+            '-m', 'hop sync: rollback', 'refs/heads/ho-patch/123-test',
+            'sha-ho-patch/123-test', 'new-ho-patch/123-test')
         # No push happened (Phase 2 never reached)
-        repo.hgit.push_branch.assert_not_called()
-
-    def test_sync_returns_to_original_branch(self, mock_repo):
-        """Test sync returns to original branch after completion."""
-        repo, tmp_path = mock_repo
-        repo.hgit.branch = 'ho-prod'
+        repo.hgit.push_branches.assert_not_called()
 
-        # Mock get_active_branches_status
-        repo.hgit.get_active_branches_status.return_value = {
-            'patch_branches': [{'name': 'ho-patch/123-test'}],
-            'release_branches': []
-        }
-
-        # Mock git operations
-        repo.hgit.checkout = Mock()
-        repo.hgit.add = Mock()
-        repo.hgit.commit = Mock()
-        repo.hgit.push_branch = Mock()
-        repo.hgit._HGit__git_repo.git.checkout = Mock()
-        repo.hgit._HGit__git_repo.git.status = Mock(return_value='M .hop/config\n')
-
-        # Mock Config reload
-        with patch('half_orm_dev.repo.Config') as MockConfig:
-            MockConfig.return_value = repo.config
-
-            result = repo.sync_hop_to_active_branches("test sync")
-
-        # Verify returned to ho-prod
-        repo.hgit.checkout.assert_called_with('ho-prod')
-        # Should be called twice: once for branch, once to return
-        assert repo.hgit.checkout.call_count == 2
-
-    def test_sync_does_not_reset_ahead_branch(self, mock_repo):
-        """Regression: a branch 'ahead' of origin must NOT be reset --hard.
+    def test_sync_does_not_fast_forward_ahead_branch(self, mock_repo):
+        """Regression: a branch 'ahead' of origin must NOT be reset to origin.
 
         When a patch branch has local commits not yet pushed (e.g. the
         'Create patch directory' commit created by `hop patch create`),
         sync_hop_to_active_branches must add the .hop/ sync commit ON TOP of
-        those commits — not destroy them via `git reset --hard origin/<branch>`.
-
-        Previously the code did `if not synced: reset --hard`, which fired for
-        'ahead' status and orphaned any unpushed commit on the patch branch.
+        those commits — not build it on origin/<branch>.
         """
-        repo, tmp_path = mock_repo
-        repo.hgit.branch = 'ho-prod'
-
-        repo.hgit.get_active_branches_status.return_value = {
-            'patch_branches': [{'name': 'ho-patch/8-fkeys'}],
-            'release_branches': [],
-            'staged_branches': [],
-        }
-
-        # The patch branch has a local commit not yet on remote → "ahead"
-        repo.hgit.is_branch_synced = Mock(return_value=(False, "ahead"))
-
-        repo.hgit.checkout = Mock()
-        repo.hgit.add = Mock()
-        repo.hgit.commit = Mock()
-        repo.hgit.push_branch = Mock()
-        repo.hgit._HGit__git_repo.git.checkout = Mock()
-        repo.hgit._HGit__git_repo.git.reset = Mock()
-        repo.hgit._HGit__git_repo.git.status = Mock(return_value='M .hop/config\n')
-
-        with patch('half_orm_dev.repo.Config') as MockConfig:
-            MockConfig.return_value = repo.config
-            repo.sync_hop_to_active_branches("migration 0.18.0-a2 → 1.0.0-a1")
-
-        # reset --hard must NOT have been called — that would orphan unpushed commits
-        repo.hgit._HGit__git_repo.git.reset.assert_not_called()
-
-    def test_sync_does_reset_behind_branch(self, mock_repo):
-        """A branch 'behind' origin IS reset --hard (pull fast-forward equivalent)."""
-        repo, tmp_path = mock_repo
-        repo.hgit.branch = 'ho-prod'
+        repo = mock_repo
+        self._set_branches(repo, ['ho-patch/8-fkeys'])
+        repo.hgit.read_branch_refs.return_value['remote']['ho-patch/8-fkeys'] = 'sha-origin'
+        repo.hgit._branch_sync_counts = Mock(return_value=(1, 0))
 
-        repo.hgit.get_active_branches_status.return_value = {
-            'patch_branches': [{'name': 'ho-patch/9-other'}],
-            'release_branches': [],
-            'staged_branches': [],
-        }
+        repo.sync_hop_to_active_branches("migration 0.18.0-a2 → 1.0.0-a1")
 
-        repo.hgit.is_branch_synced = Mock(return_value=(False, "behind"))
+        args = repo.hgit.commit_tree_update.call_args
+        assert args[0][1] == 'sha-ho-patch/8-fkeys'
 
-        repo.hgit.checkout = Mock()
-        repo.hgit.add = Mock()
-        repo.hgit.commit = Mock()
-        repo.hgit.push_branch = Mock()
-        repo.hgit._HGit__git_repo.git.checkout = Mock()
-        repo.hgit._HGit__git_repo.git.reset = Mock()
-        repo.hgit._HGit__git_repo.git.status = Mock(return_value='M .hop/config\n')
+    def test_sync_fast_forwards_behind_branch(self, mock_repo):
+        """A branch 'behind' origin gets its sync commit on top of origin."""
+        repo = mock_repo
+        self._set_branches(repo, ['ho-patch/9-other'])
+        repo.hgit.read_branch_refs.return_value['remote']['ho-patch/9-other'] = 'sha-origin'
+        repo.hgit._branch_sync_counts = Mock(return_value=(0, 2))
 
-        with patch('half_orm_dev.repo.Config') as MockConfig:
-            MockConfig.return_value = repo.config
-            repo.sync_hop_to_active_branches("migration")
+        repo.sync_hop_to_active_branches("migration")
 
-        repo.hgit._HGit__git_repo.git.reset.assert_called_once_with(
-            '--hard', 'origin/ho-patch/9-other'
-        )
+        repo.hgit.commit_tree_update.assert_called_once_with(
+            'ho-patch/9-other', 'sha-origin', SOURCE_FILES,
+            '[HOP] Sync .hop/ from ho-prod (migration)', old_sha='sha-ho-patch/9-other')
 
     def test_sync_commit_message_format(self, mock_repo):
         """Test sync commit message includes reason."""
-        repo, tmp_path = mock_repo
-
-        # Mock get_active_branches_status
-        repo.hgit.get_active_branches_status.return_value = {
-            'patch_branches': [{'name': 'ho-patch/123-test'}],
-            'release_branches': []
-        }
-
-        # Mock git operations
-        repo.hgit.checkout = Mock()
-        repo.hgit.add = Mock()
-        repo.hgit.commit = Mock()
-        repo.hgit.push_branch = Mock()
-        repo.hgit._HGit__git_repo.git.checkout = Mock()
-        repo.hgit._HGit__git_repo.git.status = Mock(return_value='M .hop/config\n')
-
-        # Mock Config reload
-        with patch('half_orm_dev.repo.Config') as MockConfig:
-            MockConfig.return_value = repo.config
+        repo = mock_repo
+        self._set_branches(repo, ['ho-patch/123-test'])
 
-            result = repo.sync_hop_to_active_branches("migration 0.17.0 → 0.17.1")
+        repo.sync_hop_to_active_branches("migration 0.17.0 → 0.17.1")
 
-        # Verify commit message
-        commit_call = repo.hgit.commit.call_args
-        assert commit_call is not None
-        commit_msg = commit_call[0][1]  # Second argument to commit()
+        commit_msg = repo.hgit.commit_tree_update.call_args[0][3]
         assert "[HOP] Sync .hop/ from ho-prod" in commit_msg
         assert "migration 0.17.0 → 0.17.1" in commit_msg
 
@@ -361,30 +223,25 @@ class TestSyncHopStaleAndErrors:
 
     @pytest.fixture
     def mock_repo(self, tmp_path):
-        hop_dir = tmp_path / '.hop'
-        hop_dir.mkdir()
-        (hop_dir / 'config').write_text('[halfORM]\nhop_version = "0.17.0"\n')
-
-        # Create model directory
-        model_dir = hop_dir / 'model'
-        model_dir.mkdir()
-
         repo = Mock(spec=Repo)
         repo.base_dir = str(tmp_path)
-        repo.model_dir = str(model_dir)
-        repo.config = Mock()
-        repo.config.hop_version = "0.17.0"
         repo.hgit = Mock()
         repo.hgit.branch = 'ho-release/0.17.0'
         repo.hgit._HGit__git_repo = Mock()
-        repo.hgit.is_branch_synced = Mock(return_value=(True, "synced"))
+        repo.hgit._branch_sync_counts = Mock(return_value=(0, 0))
+        repo.hgit.holds_branch_lock = Mock(return_value=False)
+        repo.hgit.commit_tree_update = Mock(side_effect=lambda branch, *a, **kw: f'new-{branch}')
+        repo.hgit.list_tree = Mock(
+            side_effect=lambda ref, *paths: dict(SOURCE_FILES if ref == repo.hgit.branch else TARGET_FILES))
+        repo.push_synced_branches = Repo.push_synced_branches.__get__(repo, Repo)
+        repo.hgit.read_branch_refs.return_value = _branch_refs(
+            'ho-prod', 'ho-patch/144-stale', 'ho-patch/151-active')
         repo.sync_hop_to_active_branches = Repo.sync_hop_to_active_branches.__get__(repo, Repo)
-        return repo, tmp_path
+        return repo
 
     def test_stale_branch_skipped(self, mock_repo):
         """Branch with exists_on_remote=False is excluded from sync targets."""
-        repo, tmp_path = mock_repo
-
+        repo = mock_repo
         repo.hgit.get_active_branches_status.return_value = {
             'patch_branches': [
                 {'name': 'ho-patch/144-stale', 'exists_on_remote': False},
@@ -392,98 +249,136 @@ class TestSyncHopStaleAndErrors:
             ],
             'release_branches': [],
         }
-        repo.hgit.checkout = Mock()
-        repo.hgit.add = Mock()
-        repo.hgit.commit = Mock()
-        repo.hgit.push_branch = Mock()
-        repo.hgit._HGit__git_repo.git.checkout = Mock()
-        repo.hgit._HGit__git_repo.git.status = Mock(return_value='M .hop/config\n')
 
-        with patch('half_orm_dev.repo.Config') as MockConfig:
-            MockConfig.return_value = repo.config
-            result = repo.sync_hop_to_active_branches("test")
+        result = repo.sync_hop_to_active_branches("test")
 
         synced = result['synced_branches']
         assert 'ho-patch/151-active' in synced
         assert 'ho-patch/144-stale' not in synced
-        # Checkout was never attempted for the stale branch
-        checked_out = [str(c) for c in repo.hgit.checkout.call_args_list]
-        assert not any('144-stale' in c for c in checked_out)
-
-    def test_failed_commit_raises_and_rolls_back(self, mock_repo):
-        """Phase 1 commit failure raises RepoError and rolls back via git reset --hard."""
-        from half_orm_dev.repo import RepoError
-        repo, tmp_path = mock_repo
-        repo.hgit.branch = 'ho-prod'
-
-        repo.hgit.get_active_branches_status.return_value = {
-            'patch_branches': [
-                {'name': 'ho-patch/100-fails', 'exists_on_remote': True},
-                {'name': 'ho-patch/101-ok',    'exists_on_remote': True},
-            ],
-            'release_branches': [],
-        }
-        repo.hgit.checkout = Mock()
-        repo.hgit.add = Mock()
-        repo.hgit.push_branch = Mock()
-        repo.hgit._HGit__git_repo.git.checkout = Mock()
-        repo.hgit._HGit__git_repo.git.status = Mock(return_value='M .hop/config\n')
-        repo.hgit._HGit__git_repo.git.reset = Mock()
-
-        rollback_sha = 'deadbeef1234'
-        repo.hgit._HGit__git_repo.head.commit.hexsha = rollback_sha
-
-        # commit always raises (first call — ho-patch/100-fails)
-        repo.hgit.commit = Mock(side_effect=Exception("pre-commit hook rejected"))
-
-        with patch('half_orm_dev.repo.Config') as MockConfig:
-            MockConfig.return_value = repo.config
-            with pytest.raises(RepoError, match="Sync commit failed on 'ho-patch/100-fails'"):
-                repo.sync_hop_to_active_branches("test")
-
-        # Rollback: git reset --hard was called with the recorded SHA
-        repo.hgit._HGit__git_repo.git.reset.assert_called_with('--hard', rollback_sha)
-
-        # Second branch was never attempted, no push ever happened
-        repo.hgit.push_branch.assert_not_called()
-
-    def test_ho_prod_commit_failure_is_soft_skip(self, mock_repo):
-        """ho-prod commit failure is non-fatal: staged state cleaned, loop continues."""
-        repo, tmp_path = mock_repo
+        updated = [c[0][0] for c in repo.hgit.commit_tree_update.call_args_list]
+        assert 'ho-patch/144-stale' not in updated
 
+    def test_ho_prod_without_lock_is_soft_skip(self, mock_repo):
+        """ho-prod is not committed to without a lock: warning, loop continues."""
+        repo = mock_repo
         repo.hgit.get_active_branches_status.return_value = {
             'patch_branches': [{'name': 'ho-patch/151-active', 'exists_on_remote': True}],
             'release_branches': [],
         }
-        repo.hgit.add = Mock()
-        repo.hgit.push_branch = Mock()
-        repo.hgit._HGit__git_repo.git.checkout = Mock()
-        repo.hgit._HGit__git_repo.git.status = Mock(return_value='M .hop/config\n')
-        repo.hgit._HGit__git_repo.git.reset = Mock()
-        repo.hgit._HGit__git_repo.head.commit.hexsha = 'abc123'
 
-        # Track which branch was last checked out to simulate per-branch commit behaviour
-        last_branch = ['']
+        result = repo.sync_hop_to_active_branches("test")
 
-        def checkout_side_effect(branch):
-            last_branch[0] = branch
+        # Patch branch synced despite ho-prod being protected
+        assert 'ho-patch/151-active' in result['synced_branches']
+        assert any(e.startswith('ho-prod: sync skipped') for e in result['errors'])
+        updated = [c[0][0] for c in repo.hgit.commit_tree_update.call_args_list]
+        assert 'ho-prod' not in updated
+
+
+@pytest.fixture
+def sync_repo(git_clones, run_git, commit_file):
+    """
+    Repo bound to the `local` clone, on ho-patch/1-a with a modified .hop/.
+
+    ho-patch/2-b and ho-release/0.17.0 exist on origin with the initial .hop/.
+    """
+    _, local, _ = git_clones
+    (local / '.hop' / 'releases').mkdir(parents=True)
+    (local / '.hop' / 'model').mkdir()
+    commit_file(local, '.hop/config', '[halfORM]\nhop_version = 0.17.0\n')
+    commit_file(local, '.hop/releases/0.17.0-stage.txt', '')
+    for branch in ('ho-patch/2-b', 'ho-release/0.17.0'):
+        run_git(local, 'branch', branch)
+    run_git(local, 'push', '-q', 'origin', 'ho-prod', 'ho-patch/2-b', 'ho-release/0.17.0')
+    run_git(local, 'checkout', '-q', '-b', 'ho-patch/1-a')
+    run_git(local, 'push', '-q', '-u', 'origin', 'ho-patch/1-a')
+    commit_file(local, '.hop/config', '[halfORM]\nhop_version = 0.17.1\n')
+    commit_file(local, '.hop/releases/0.17.0-patches.toml', '')
+
+    hgit = HGit.__new__(HGit)
+    hgit._HGit__git_repo = git.Repo(local)
+    hgit._HGit__repo = None
+    repo = Mock(spec=Repo)
+    repo.base_dir = str(local)
+    repo.hgit = hgit
+    repo.sync_hop_to_active_branches = Repo.sync_hop_to_active_branches.__get__(repo, Repo)
+    repo.push_synced_branches = Repo.push_synced_branches.__get__(repo, Repo)
+    return repo, local
+
+
+class TestSyncHopRealGit:
+    """Plumbing-based sync against real git repositories."""
+
+    def test_sync_without_checkout(self, sync_repo, run_git):
+        repo, local = sync_repo
+        repo.hgit.acquire_branch_lock('ho-prod')
+        reflog_before = run_git(local, 'reflog', 'HEAD')
 
-        repo.hgit.checkout = Mock(side_effect=checkout_side_effect)
+        result = repo.sync_hop_to_active_branches("test")
 
-        def commit_side_effect(*args, **kwargs):
-            if last_branch[0] == 'ho-prod':
-                raise Exception("Direct commits on ho-prod are not allowed")
-            return 'sha-151'
+        assert sorted(result['synced_branches']) == ['ho-patch/2-b', 'ho-prod', 'ho-release/0.17.0']
+        assert result['errors'] == []
+        for branch in result['synced_branches']:
+            assert run_git(local, 'show', f'origin/{branch}:.hop/config') == \
+                '[halfORM]\nhop_version = 0.17.1'
+            assert run_git(local, 'log', '-1', '--format=%s', branch) == \
+                '[HOP] Sync .hop/ from ho-patch/1-a (test)'
+            assert run_git(local, 'for-each-ref', f'refs/hop/sync/before/{branch}') == ''
+        assert run_git(local, 'rev-parse', '--abbrev-ref', 'HEAD') == 'ho-patch/1-a'
+        assert run_git(local, 'status', '--porcelain') == ''
+        assert 'checkout:' not in run_git(local, 'reflog', 'HEAD').replace(reflog_before, '')
+
+    def test_ho_prod_without_lock_not_committed(self, sync_repo, run_git):
+        repo, local = sync_repo
+        prod_sha = run_git(local, 'rev-parse', 'ho-prod')
 
-        repo.hgit.commit = Mock(side_effect=commit_side_effect)
+        result = repo.sync_hop_to_active_branches("test")
 
-        with patch('half_orm_dev.repo.Config') as MockConfig:
-            MockConfig.return_value = repo.config
-            result = repo.sync_hop_to_active_branches("test")
+        assert 'ho-prod' not in result['synced_branches']
+        assert run_git(local, 'rev-parse', 'ho-prod') == prod_sha
+        assert 'ho-patch/2-b' in result['synced_branches']
+
+    def test_deferred_push_keeps_recovery_refs(self, sync_repo, run_git):
+        repo, local = sync_repo
+        modified = []
+
+        result = repo.sync_hop_to_active_branches("test", defer_push=True, modified_branches=modified)
+
+        assert sorted(modified) == ['ho-patch/2-b', 'ho-release/0.17.0']
+        before = run_git(local, 'rev-parse', 'origin/ho-patch/2-b')
+        assert run_git(local, 'rev-parse', 'refs/hop/sync/before/ho-patch/2-b') == before
+        assert run_git(local, 'rev-parse', 'ho-patch/2-b^') == before
+        assert result['branch_commits']['ho-patch/2-b'] == run_git(local, 'rev-parse', 'ho-patch/2-b')
+
+    def test_release_schemas_and_unknown_releases_preserved(self, sync_repo, run_git, commit_file):
+        repo, local = sync_repo
+        run_git(local, 'checkout', '-q', 'ho-patch/2-b')
+        commit_file(local, '.hop/model/release-0.18.0.sql', 'schema')
+        commit_file(local, '.hop/releases/0.18.0-stage.txt', '')
+        commit_file(local, '.hop/stale', '')
+        run_git(local, 'checkout', '-q', 'ho-patch/1-a')
+
+        repo.sync_hop_to_active_branches("test", defer_push=True, modified_branches=[])
+
+        files = run_git(local, 'ls-tree', '-r', '--name-only', 'ho-patch/2-b', '.hop/').split('\n')
+        assert '.hop/model/release-0.18.0.sql' in files
+        assert '.hop/releases/0.18.0-stage.txt' in files
+        assert '.hop/releases/0.17.0-patches.toml' in files
+        assert '.hop/stale' not in files
+
+    def test_failure_rolls_back_refs(self, sync_repo, run_git):
+        repo, local = sync_repo
+        shas = {b: run_git(local, 'rev-parse', b) for b in ('ho-patch/2-b', 'ho-release/0.17.0')}
+        commit_tree_update = repo.hgit.commit_tree_update
+
+        def failing(branch, *args, **kwargs):
+            if branch == 'ho-patch/2-b':
+                raise Exception("boom")
+            return commit_tree_update(branch, *args, **kwargs)
+
+        with patch.object(repo.hgit, 'commit_tree_update', side_effect=failing):
+            with pytest.raises(RepoError, match="Sync commit failed on 'ho-patch/2-b'"):
+                repo.sync_hop_to_active_branches("test")
 
-        # Patch branch synced despite ho-prod failure
-        assert 'ho-patch/151-active' in result['synced_branches']
-        # ho-prod error collected as warning, not raised
-        assert any('ho-prod' in e for e in result['errors'])
-        # staged state was cleaned (reset HEAD called)
-        repo.hgit._HGit__git_repo.git.reset.assert_any_call('HEAD')
+        for branch, sha in shas.items():
+            assert run_git(local, 'rev-parse', branch) == sha
@@ -0,0 +1,295 @@
+"""
+Tests for the precompiled upgrade plans (half_orm_dev.upgrade_plan).
+
+A plan is compiled from the ho-prod-X.Y.Z branches read from git, saved
+with a checksum and executed by ReleaseManager.upgrade_production(plan=...).
+"""
+
+import json
+from unittest.mock import Mock
+
+import pytest
+
+from half_orm_dev import upgrade_plan
+from half_orm_dev.database import DatabaseTransaction
+from half_orm_dev.release_manager import ReleaseManager, ReleaseManagerError
+
+COMMITS = {"ho-prod-1.3.6": "a" * 40, "origin/ho-prod-1.3.7": "b" * 40}
+
+FILES = {
+    "ho-prod-1.3.6": {
+        ".hop/releases/1.3.6.txt": "456-user-auth\n# comment\n789-security\n",
+        "Patches/456-user-auth/README.md": "# Auth",
+        "Patches/456-user-auth/01_users.sql": "CREATE TABLE users (id int);",
+        "Patches/456-user-auth/02_index.sql": "-- hop: no-transaction\nCREATE INDEX CONCURRENTLY ix ON users (id);",
+        "Patches/456-user-auth/03_seed.py": "print('seed')",
+        "Patches/staged/789-security/01_grants.psql": "\\set ON_ERROR_STOP on",
+        "Patches/staged/789-security/data/ignored.sql": "SELECT 1;",
+    },
+    "origin/ho-prod-1.3.7": {
+        ".hop/releases/1.3.7.txt": "999-bugfix\n",
+        "Patches/999-bugfix/01_fix.sql": "UPDATE users SET id = id;",
+    },
+}
+
+
+class FakeHGit:
+    """read_file_at_ref/list_tree on FILES."""
+
+    def read_file_at_ref(self, ref, path):
+        return FILES[ref].get(path, '')
+
+    def list_tree(self, ref, *paths):
+        return {path: ('100644', f"blob-{path}") for path in FILES[ref]
+                if any(path.startswith(prefix) for prefix in paths)}
+
+
+class TestCompileRelease:
+
+    def test_steps_in_order(self):
+        release = upgrade_plan.compile_release(FakeHGit(), "1.3.6", "ho-prod-1.3.6", "a" * 40)
+
+        assert release["patches"] == ["456-user-auth", "789-security"]
+        assert [(s["path"], s["kind"], s["transactional"]) for s in release["steps"]] == [
+            ("Patches/456-user-auth/01_users.sql", "sql", True),
+            ("Patches/456-user-auth/02_index.sql", "sql", False),
+            ("Patches/456-user-auth/03_seed.py", "python", False),
+            ("Patches/staged/789-security/01_grants.psql", "psql", False),
+        ]
+        assert release["steps"][0]["sql"] == "CREATE TABLE users (id int);"
+        assert release["steps"][0]["blob"] == "blob-Patches/456-user-auth/01_users.sql"
+        assert "sql" not in release["steps"][2]
+
+    def test_missing_release_file(self):
+        with pytest.raises(upgrade_plan.UpgradePlanError, match="1.4.0.txt not found"):
+            upgrade_plan.compile_release(FakeHGit(), "1.4.0", "ho-prod-1.3.6", "a" * 40)
+
+    def test_missing_patch_directory(self, monkeypatch):
+        monkeypatch.setitem(FILES["origin/ho-prod-1.3.7"], ".hop/releases/1.3.7.txt", "999-bugfix\n1000-gone\n")
+
+        with pytest.raises(upgrade_plan.UpgradePlanError, match="1000-gone not found"):
+            upgrade_plan.compile_release(FakeHGit(), "1.3.7", "origin/ho-prod-1.3.7", "b" * 40)
+
+
+class TestPlanFile:
+
+    @pytest.fixture
+    def plan(self):
+        return {"format": upgrade_plan.PLAN_FORMAT, "database": "prod",
+                "from_version": "1.3.5", "to_version": "1.3.6", "created": 0.0,
+                "releases": [upgrade_plan.compile_release(
+                    FakeHGit(), "1.3.6", "ho-prod-1.3.6", "a" * 40)]}
+
+    def test_round_trip(self, tmp_path, plan):
+        path = upgrade_plan.save(plan, upgrade_plan.plan_path(tmp_path, plan))
+
+        assert path == tmp_path / ".hop" / "plans" / "1.3.5-to-1.3.6.json"
+        assert upgrade_plan.load(path) == plan
+        assert upgrade_plan.summary(plan) == ["1.3.6  2 patches  4 steps (1 psql, 1 python, 2 sql)"]
+
+    def test_modified_plan_refused(self, tmp_path, plan):
+        path = upgrade_plan.save(plan, tmp_path / "plan.json")
+        content = json.loads(path.read_text())
+        content["releases"][0]["steps"][0]["sql"] = "DROP TABLE users;"
+        path.write_text(json.dumps(content))
+
+        with pytest.raises(upgrade_plan.UpgradePlanError, match="Checksum mismatch"):
+            upgrade_plan.load(path)
+
+    def test_not_a_plan(self, tmp_path):
+        path = tmp_path / "plan.json"
+        path.write_text('{"format": 99}')
+
+        with pytest.raises(upgrade_plan.UpgradePlanError, match="not an upgrade plan"):
+            upgrade_plan.load(path)
+
+
+@pytest.fixture
+def release_mgr(tmp_path):
+    mock_repo = Mock()
+    mock_repo.base_dir = str(tmp_path)
+    mock_repo.releases_dir = str(tmp_path / ".hop" / "releases")
+    mock_repo.backups_dir = str(tmp_path / ".hop" / "backups")
+    mock_repo.local_config = None
+    mock_repo.database.name = "prod"
+    mock_repo.database.last_release_s = "1.3.5"
+    mock_repo.database.transaction = Mock(
+        side_effect=lambda: DatabaseTransaction(mock_repo.database.model))
+    mock_repo.model = mock_repo.database.model
+    mock_repo.database.relation_sizes.return_value = {}
+    mock_repo.database.database_size.return_value = 1000
+    mock_repo.database.data_directory.return_value = None
+    mock_repo.database.list_snapshots.return_value = []
+    fake_hgit = FakeHGit()
+    mock_repo.hgit.read_file_at_ref.side_effect = fake_hgit.read_file_at_ref
+    mock_repo.hgit.list_tree.side_effect = fake_hgit.list_tree
+    mock_repo.hgit.branch = "ho-prod"
+    git_repo = mock_repo.hgit._HGit__git_repo
+    head = Mock()
+    head.name = "ho-prod-1.3.6"
+    git_repo.heads = [head]
+    git_repo.git.rev_parse.side_effect = lambda ref: COMMITS[ref]
+
+    release_mgr = ReleaseManager(mock_repo)
+    release_mgr.update_production = Mock(return_value={
+        'current_version': '1.3.5', 'has_updates': True,
+        'available_releases': [], 'upgrade_path': ['1.3.6', '1.3.7']})
+    return release_mgr, mock_repo
+
+
+class TestCompileUpgradePlan:
+
+    def test_compiles_from_branches(self, release_mgr):
+        release_mgr, mock_repo = release_mgr
+
+        plan = release_mgr.compile_upgrade_plan()
+
+        assert (plan["database"], plan["from_version"], plan["to_version"]) == ("prod", "1.3.5", "1.3.7")
+        assert [(r["version"], r["commit"]) for r in plan["releases"]] == [
+            ("1.3.6", "a" * 40), ("1.3.7", "b" * 40)]
+        mock_repo.database.register_release.assert_not_called()
+        mock_repo.model.execute_query.assert_not_called()
+
+    def test_to_version(self, release_mgr):
+        release_mgr, _ = release_mgr
+
+        plan = release_mgr.compile_upgrade_plan(to_version="1.3.6")
+
+        assert [r["version"] for r in plan["releases"]] == ["1.3.6"]
+
+
+class TestExecuteUpgradePlan:
+
+    @pytest.fixture
+    def plan(self, release_mgr, tmp_path):
+        release_mgr, _ = release_mgr
+        path = upgrade_plan.save(release_mgr.compile_upgrade_plan(), tmp_path / "plan.json")
+        return upgrade_plan.load(path)
+
+    def test_executes_planned_sql(self, release_mgr, plan, monkeypatch, tmp_path):
+        release_mgr, mock_repo = release_mgr
+        psql = Mock()
+        python = Mock(return_value='')
+        monkeypatch.setattr("half_orm_dev.release_manager.execute_sql_file_psql", psql)
+        monkeypatch.setattr("half_orm_dev.release_manager.execute_python_script", python)
+        release_mgr.update_production.reset_mock()
+        mock_repo.hgit._HGit__git_repo.git.fetch.reset_mock()
+
+        result = release_mgr.upgrade_production(plan=plan, skip_backup=True)
+
+        release_mgr.update_production.assert_not_called()
+        mock_repo.hgit._HGit__git_repo.git.fetch.assert_not_called()
+        mock_repo.patch_manager.apply_patch_files.assert_not_called()
+        assert [c.args[0] for c in mock_repo.model.execute_query.call_args_list] == [
+            "CREATE TABLE users (id int);",
+            "CREATE INDEX CONCURRENTLY ix ON users (id);",
+            "UPDATE users SET id = id;"]
+        python.assert_called_once_with(tmp_path / "Patches/456-user-auth/03_seed.py", mock_repo.model)
+        psql.assert_called_once_with(
+            tmp_path / "Patches/staged/789-security/01_grants.psql", mock_repo.database, "prod")
+        assert result['releases_applied'] == ['1.3.6', '1.3.7']
+        assert result['patches_applied'] == {'1.3.6': ['456-user-auth', '789-security'],
+                                             '1.3.7': ['999-bugfix']}
+        assert [(step['patch_id'], step['file'], len(step['statements']))
+                for step in mock_repo.database.record_upgrade_timings.call_args_list[0].args[1]] == [
+            ('456-user-auth', '01_users.sql', 1), ('456-user-auth', '02_index.sql', 1),
+            ('456-user-auth', '03_seed.py', 0), ('789-security', '01_grants.psql', 0)]
+        assert result['timing_report'].parent == tmp_path / ".hop" / "timings"
+
+    def test_upgrade_scope_refused(self, release_mgr, plan):
+        release_mgr, mock_repo = release_mgr
+        mock_repo.hgit._HGit__git_repo.git.fetch.reset_mock()
+
+        with pytest.raises(ReleaseManagerError) as exc_info:
+            release_mgr.upgrade_production(plan=plan, skip_backup=True, transaction_scope='upgrade')
+
+        assert str(exc_info.value).splitlines()[1:4] == [
+            "  - 1.3.6 456-user-auth/02_index.sql",
+            "  - 1.3.6 456-user-auth/03_seed.py",
+            "  - 1.3.6 789-security/01_grants.psql"]
+        mock_repo.hgit._HGit__git_repo.git.fetch.assert_not_called()
+        mock_repo.model.execute_query.assert_not_called()
+
+    def test_database_moved_since_plan(self, release_mgr, plan):
+        release_mgr, mock_repo = release_mgr
+        mock_repo.database.last_release_s = "1.3.6"
+
+        with pytest.raises(ReleaseManagerError, match="upgrades from 1.3.5 but the database is at 1.3.6"):
+            release_mgr.upgrade_production(plan=plan, skip_backup=True)
+
+        mock_repo.model.execute_query.assert_not_called()
+
+    def test_branch_moved_since_plan(self, release_mgr, plan, monkeypatch):
+        release_mgr, mock_repo = release_mgr
+        monkeypatch.setitem(COMMITS, "origin/ho-prod-1.3.7", "c" * 40)
+
+        with pytest.raises(ReleaseManagerError, match="ho-prod-1.3.7 does not point to the planned commit"):
+            release_mgr.upgrade_production(plan=plan, skip_backup=True)
+
+        mock_repo.model.execute_query.assert_not_called()
+
+
+class TestUpgradeCommand:
+
+    def _invoke(self, args, release_mgr):
+        from click.testing import CliRunner
+        from unittest.mock import patch
+        from half_orm_dev.cli.commands.upgrade import upgrade
+
+        release_mgr, mock_repo = release_mgr
+        mock_repo.release_manager = release_mgr
+        with patch('half_orm_dev.cli.commands.upgrade.Repo', return_value=mock_repo):
+            return CliRunner().invoke(upgrade, args)
+
+    def test_plan_then_execute(self, release_mgr, tmp_path, monkeypatch):
+        (tmp_path / ".hop").mkdir()
+        result = self._invoke(['--plan', '--yes'], release_mgr)
+
+        assert result.exit_code == 0, result.output
+        path = tmp_path / ".hop" / "plans" / "1.3.5-to-1.3.7.json"
+        assert path.exists()
+        assert "1.3.6  2 patches  4 steps" in result.output
+
+        release_mgr[0].upgrade_production = Mock(return_value={
+            'dry_run': True, 'current_version': '1.3.5', 'releases_would_apply': []})
+        result = self._invoke(['--execute-plan', str(path), '--dry-run'], release_mgr)
+
+        assert result.exit_code == 0, result.output
+        assert release_mgr[0].upgrade_production.call_args.kwargs['plan'] == json.loads(path.read_text())
+
+    def test_plan_keeps_repository_clean(self, release_mgr, tmp_path, monkeypatch, run_git):
+        """--execute-plan runs after --plan in a repo whose .gitignore predates .hop/plans/."""
+        import git
+
+        run_git(tmp_path, 'init', '-q', '-b', 'ho-prod')
+        run_git(tmp_path, 'config', 'user.email', 'test@example.com')
+        run_git(tmp_path, 'config', 'user.name', 'Test User')
+        (tmp_path / ".gitignore").write_text("__pycache__/\n")
+        (tmp_path / ".hop").mkdir()
+        (tmp_path / ".hop" / "config").write_text("[halfORM]\n")
+        run_git(tmp_path, 'add', '.')
+        run_git(tmp_path, 'commit', '-q', '-m', 'initial')
+        _, mock_repo = release_mgr
+        mock_repo.hgit.repos_is_clean.side_effect = (
+            lambda: not git.Repo(tmp_path).is_dirty(untracked_files=True))
+        monkeypatch.setattr("half_orm_dev.release_manager.execute_sql_file_psql", Mock())
+        monkeypatch.setattr("half_orm_dev.release_manager.execute_python_script",
+                            Mock(return_value=''))
+
+        result = self._invoke(['--plan', '--yes'], release_mgr)
+        assert result.exit_code == 0, result.output
+        assert mock_repo.hgit.repos_is_clean()
+
+        path = tmp_path / ".hop" / "plans" / "1.3.5-to-1.3.7.json"
+        result = self._invoke(['--execute-plan', str(path), '--skip-backup', '--yes'], release_mgr)
+
+        assert result.exit_code == 0, result.output
+        assert "Repository has uncommitted changes" not in result.output
+
+    def test_plan_options_exclusive(self, release_mgr, tmp_path):
+        plan_file = tmp_path / "plan.json"
+        plan_file.write_text("{}")
+
+        result = self._invoke(['--plan', '--execute-plan', str(plan_file)], release_mgr)
+
+        assert result.exit_code == 2
@@ -0,0 +1,61 @@
+"""
+Unit tests for find_base_dir() and is_production(): the facts the CLI
+reads on disk to list the available commands without creating a Repo.
+"""
+
+import pytest
+
+from half_orm_dev.utils import find_base_dir, is_production
+
+
+@pytest.fixture
+def hop_repo(tmp_path, monkeypatch):
+    (tmp_path / 'my_project' / '.hop').mkdir(parents=True)
+    (tmp_path / 'my_project' / '.hop' / 'config').write_text("[halfORM]\n")
+    monkeypatch.setenv('HALFORM_CONF_DIR', str(tmp_path / 'conf'))
+    (tmp_path / 'conf').mkdir()
+    return tmp_path / 'my_project'
+
+
+class TestFindBaseDir:
+
+    def test_from_subdirectory(self, hop_repo):
+        (hop_repo / 'my_project' / 'public').mkdir(parents=True)
+
+        assert find_base_dir(str(hop_repo / 'my_project' / 'public')) == str(hop_repo)
+
+    def test_current_directory(self, hop_repo, monkeypatch):
+        monkeypatch.chdir(hop_repo)
+
+        assert find_base_dir() == str(hop_repo)
+
+    def test_outside_repository(self, tmp_path):
+        assert find_base_dir(str(tmp_path)) is None
+
+
+class TestIsProduction:
+
+    def test_development_by_default(self, hop_repo):
+        assert is_production(str(hop_repo)) is False
+
+    def test_production_marker(self, hop_repo):
+        (hop_repo / '.hop' / 'production').touch()
+
+        assert is_production(str(hop_repo)) is True
+
+    @pytest.mark.parametrize('value, expected', [
+        ('True', True),
+        ('False', False),
+    ])
+    def test_connection_file(self, hop_repo, value, expected):
+        (hop_repo.parent / 'conf' / 'my_project').write_text(
+            f"[database]\nname = my_project\nproduction = {value}\n")
+
+        assert is_production(str(hop_repo)) is expected
+
+    def test_connection_file_uses_alt_config(self, hop_repo):
+        (hop_repo / '.hop' / 'alt_config').write_text("my_project_prod")
+        (hop_repo.parent / 'conf' / 'my_project_prod').write_text(
+            "[database]\nname = my_project_prod\nproduction = True\n")
+
+        assert is_production(str(hop_repo)) is True